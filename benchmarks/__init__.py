@@ -0,0 +1 @@
+"""ライブラリ機能のベンチマーク（`uv run python -m benchmarks.<名前>` で実行）"""
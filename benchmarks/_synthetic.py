@@ -0,0 +1,86 @@
+"""
+ベンチマーク用の合成ライブラリ
+
+library/ と同じフォルダ構成（ocr_raw.txt・modern.txt・meta.json）の文書を
+乱数で大量に作る。文字は「よく出る漢字 + かな」を主体に、ときどき旧字体・
+非JIS の誤読字を混ぜて、実際の OCR 出力に近い分布にする。
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# よく出る漢字（常用漢字の一部）
+COMMON_KANJI = (
+    "日本国人年大中出事会社者地方内生時上同自行部業新主関市東京政法意動理"
+    "経合物用発対民定化委下前公所開問題警察報告震災記録議員長学校通信軍"
+)
+KANA = "のにはをたがでてとしれさあいうえおかきくけこアイウエオカキクケコトシテ"
+OLD_KANJI = "國會體舊學變聲"
+# 非JIS の誤読字（簡体字など）。前半は OCR_MISREAD_CORRECTIONS に登録済み、後半は未登録
+MISREADS = "郧郘郯衠鑜翤郓郦"
+# meta.json のタグと付く割合（絞り込みの効き方が分かるよう、ありふれたものから稀なものまで）
+TAGS = {"新聞": 0.3, "公文書": 0.1, "書簡": 0.02, "写真帳": 0.002}
+OCR_MODELS = ["glm-ocr"] * 9 + ["qwen2.5vl:7b"]
+# 合成文書の created_at の起点
+START = datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=9)))
+
+
+def make_text(rng: random.Random, n_chars: int) -> str:
+    chars = []
+    for _ in range(n_chars):
+        r = rng.random()
+        if r < 0.55:
+            chars.append(rng.choice(KANA))
+        elif r < 0.97:
+            chars.append(rng.choice(COMMON_KANJI))
+        elif r < 0.999:
+            chars.append(rng.choice(OLD_KANJI))
+        else:
+            chars.append(rng.choice(MISREADS))
+        if rng.random() < 0.02:
+            chars.append("\n")
+    return "".join(chars)
+
+
+def make_library(
+    root: Path, n_docs: int, chars_per_doc: int = 2000, seed: int = 0
+) -> Path:
+    """root に n_docs 件の文書フォルダを作る（既にあれば作り直さない）"""
+    marker = root / ".synthetic.json"
+    spec = {"n_docs": n_docs, "chars_per_doc": chars_per_doc, "seed": seed, "meta": 2}
+    if marker.exists() and json.loads(marker.read_text()) == spec:
+        return root
+
+    rng = random.Random(seed)
+    meta_rng = random.Random(seed + 1)  # 本文は meta の項目を変えても同じになるよう別の乱数で
+    root.mkdir(parents=True, exist_ok=True)
+    for i in range(n_docs):
+        doc_dir = root / f"2026-01-01_doc{i:06d}"
+        doc_dir.mkdir(exist_ok=True)
+        raw = make_text(rng, chars_per_doc)
+        meta = {
+            "schema_version": 1,
+            "id": doc_dir.name,
+            # 実際のライブラリと同じく、後から作った記録ほど新しい（2年に均等に散らす）
+            "created_at": (START + timedelta(days=730 * i / n_docs)).isoformat(timespec="seconds"),
+            "title": raw.split("\n", 1)[0][:40],
+            "sources": [f"source_{n + 1:02d}.png" for n in range(meta_rng.choice([1, 1, 1, 2, 3]))],
+            "ocr": {"model": meta_rng.choice(OCR_MODELS), "prompt": "", "elapsed_seconds": 0.0},
+            "normalization": {
+                "old_kanji": True,
+                "historical_kana": True,
+                "ocr_misread_correction": True,
+            },
+            "modernize": {"enabled": meta_rng.random() < 0.3, "model": "qwen3.5:9b"},
+            "tags": [tag for tag, ratio in TAGS.items() if meta_rng.random() < ratio],
+            "note": "",
+        }
+        (doc_dir / "ocr_raw.txt").write_text(raw, encoding="utf-8")
+        (doc_dir / "modern.txt").write_text(raw, encoding="utf-8")
+        (doc_dir / "meta.json").write_text(
+            json.dumps(meta, ensure_ascii=False), encoding="utf-8"
+        )
+    marker.write_text(json.dumps(spec))
+    return root
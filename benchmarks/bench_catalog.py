@@ -0,0 +1,83 @@
+"""
+カタログ（library/.index/catalog.db）のベンチマーク
+
+合成ライブラリで、
+  - カタログの作り直し（meta.json の読み込み・解析を 1 スレッドと index.workers スレッドで）
+  - 集計（stat）・一覧（list --limit 50）・全件の書き出し（list --format ndjson）
+  - 比較: 全文書の meta.json を開いて同じ集計をする素朴なやり方
+を測る。
+
+    uv run python -m benchmarks.bench_catalog --docs 100000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_catalog import LibraryCatalog
+from utils.library_search import INDEX_WORKERS
+
+REPEAT = 5
+
+
+def naive_summary(root: Path) -> tuple[int, int, float]:
+    """全文書の meta.json を開いて (文書数, ページ数, OCR 秒数) を数える"""
+    documents = pages = 0
+    seconds = 0.0
+    for entry in os.scandir(root):
+        if entry.name.startswith(".") or not entry.is_dir():
+            continue
+        meta = json.loads(Path(entry.path, "meta.json").read_text(encoding="utf-8"))
+        documents += 1
+        pages += len(meta["sources"])
+        seconds += meta["ocr"]["elapsed_seconds"]
+    return documents, pages, seconds
+
+
+def _median_ms(fn) -> float:
+    samples = []
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+    print(f"{args.docs:,}文書")
+
+    for workers in (1, INDEX_WORKERS):
+        with LibraryCatalog(root, workers=workers) as catalog:
+            t = time.perf_counter()
+            catalog.rebuild()
+            print(f"  作り直し（{workers}スレッド）: {time.perf_counter() - t:.2f}秒")
+
+    with LibraryCatalog(root) as catalog:
+        s = catalog.summary()
+        assert (s.documents, s.pages, s.ocr_seconds) == naive_summary(root)
+        print(f"  集計（stat）: {_median_ms(catalog.summary):.1f} ms")
+        print(f"  一覧（50件）: {_median_ms(lambda: catalog.entries(limit=50)):.2f} ms")
+        print(f"  差分更新（変更なし）: {_median_ms(catalog.update):.2f} ms")
+        t = time.perf_counter()
+        n = sum(1 for _ in catalog.export())
+        print(f"  全件の書き出し: {time.perf_counter() - t:.2f}秒（{n:,}件）")
+    t = time.perf_counter()
+    naive_summary(root)
+    print(f"  比較: meta.json を全部開いて集計: {time.perf_counter() - t:.2f}秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+文字統計（prewar analyze chars）のベンチマーク
+
+合成ライブラリで、初回（全件集計）・2回目（キャッシュ利用）・1%更新後の
+差分集計と、誤読候補の抽出にかかる時間を測る。
+
+    uv run python -m benchmarks.bench_char_stats --docs 100000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.char_stats import collect_stats, find_misread_candidates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=20000)
+    parser.add_argument("--chars", type=int, default=2000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    t0 = time.perf_counter()
+    make_library(root, args.docs, args.chars)
+    print(f"合成ライブラリ: {root}（{args.docs:,}文書 × {args.chars:,}字, 準備 {time.perf_counter() - t0:.1f}秒）")
+    (root / ".index" / "char_stats.npz").unlink(missing_ok=True)
+
+    def timed(label: str, **kwargs):
+        t = time.perf_counter()
+        stats = collect_stats(root, **kwargs)
+        print(f"  {label:<22} {time.perf_counter() - t:6.2f}秒  （再計算 {stats.computed:,}）")
+        return stats
+
+    timed("初回（全件）")
+    timed("2回目（キャッシュ）")
+    for i, doc_dir in enumerate(sorted(root.iterdir())):
+        if i % 100 == 0 and not doc_dir.name.startswith("."):
+            os.utime(doc_dir / "ocr_raw.txt")
+    stats = timed("1%更新後（差分）")
+
+    t = time.perf_counter()
+    candidates = find_misread_candidates(stats)
+    print(f"  {'誤読候補の抽出':<22} {time.perf_counter() - t:6.2f}秒  （{len(candidates)}件）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+近似重複の検出（MinHash・LSH）のベンチマーク
+
+合成ライブラリで次を測る。
+  - 署名の計算（1文書あたり。照合用テキストへの変換・署名・LSH のバケット）
+  - 保存時の照合（near_duplicates。中央値）: 索引済みの文書の2%の字を
+    置き換えた「撮り直し」で引き、元の文書が見つかった割合（再現率）も出す。
+    文書数によらずほぼ一定の時間になる。
+  - ライブラリ全体のまとめ（prewar dedup の duplicate_links・cluster_duplicates）
+
+    uv run python -m benchmarks.bench_dedup --docs 100000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import COMMON_KANJI, KANA, make_library
+from utils.library_dedup import cluster_duplicates
+from utils.library_search import LibraryIndex
+from utils.minhash import band_keys, document_signatures
+
+MUTATE_RATIO = 0.02
+LOOKUPS = 200
+
+
+def _mutate(rng: random.Random, text: str) -> str:
+    chars = list(text)
+    for i in rng.sample(range(len(chars)), int(len(chars) * MUTATE_RATIO)):
+        chars[i] = rng.choice(KANA + COMMON_KANJI)
+    return "".join(chars)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+    rng = random.Random(0)
+    print(f"{args.docs:,}文書 × {args.chars:,}字")
+
+    with LibraryIndex(root, result_cache_size=0) as idx:
+        t = time.perf_counter()
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        print(f"  索引の更新: {time.perf_counter() - t:.1f}秒")
+
+        ids = rng.sample(sorted(p.name for p in root.iterdir() if p.name[0] != "."), LOOKUPS)
+        texts = dict(idx.document_texts(ids, source="raw"))
+
+        t = time.perf_counter()
+        for text in texts.values():
+            for _, sig in document_signatures(text):
+                band_keys(sig)
+        sign_ms = (time.perf_counter() - t) / len(texts) * 1000
+        print(f"  署名の計算: {sign_ms:.2f} ms/文書")
+
+        samples = []
+        found = 0
+        for doc_id, text in texts.items():
+            query = _mutate(rng, text)
+            t = time.perf_counter()
+            matches = idx.near_duplicates(query)
+            samples.append(time.perf_counter() - t)
+            found += any(m.id == doc_id for m in matches)
+        print(
+            f"  保存時の照合（中央値）: {statistics.median(samples) * 1000:.2f} ms"
+            f"（{MUTATE_RATIO:.0%}置換の撮り直しの再現率 {found / len(texts):.1%}）"
+        )
+
+        t = time.perf_counter()
+        clusters = cluster_duplicates(idx)
+        print(f"  全体のまとめ: {time.perf_counter() - t:.1f}秒（{len(clusters)}組）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+あいまい検索（find --fuzzy）のベンチマーク
+
+合成ライブラリで、同じ語の通常の検索とあいまい検索（誤読しうる綴りへの展開と
+置換コストでの並べ直し）の時間（中央値）と件数を比べる。混同表は
+OCR_MISREAD_CORRECTIONS に、誤読らしい字の組（部 ↔ 郘・郶）を足したもの。
+
+    uv run python -m benchmarks.bench_fuzzy --docs 100000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_fuzzy import LEARNED_COST, fuzzy_search, load_confusions
+from utils.library_search import LibraryIndex
+
+QUERIES = ["部長", "本部", "警察部", "部長 東京"]
+LEARNED = [("郘", "部"), ("郶", "部")]
+LIMIT = 20
+REPEAT = 10
+
+
+def _median_ms(fn) -> tuple[float, int]:
+    samples = []
+    for _ in range(REPEAT):
+        t = time.perf_counter()
+        n = len(fn())
+        samples.append(time.perf_counter() - t)
+    return statistics.median(samples) * 1000, n
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    with LibraryIndex(root, result_cache_size=0) as idx:
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        table = load_confusions(root)
+        for wrong, correct in LEARNED:
+            table.add(wrong, correct, LEARNED_COST)
+        print(f"{args.docs:,}文書 × {args.chars:,}字（上位{LIMIT}件・中央値）")
+        for query in QUERIES:
+            exact_ms, exact_n = _median_ms(lambda: idx.search(query, limit=LIMIT))
+            fuzzy_ms, fuzzy_n = _median_ms(
+                lambda: fuzzy_search(idx, query, limit=LIMIT, table=table)
+            )
+            variants = sum(len(table.spellings(term)) for term in query.split())
+            print(
+                f"  {query:<8} 通常 {exact_ms:7.1f} ms（{exact_n}件） / "
+                f"あいまい {fuzzy_ms:7.1f} ms（{fuzzy_n}件・綴り +{variants}）"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+正規表現検索のベンチマーク（全件走査 vs 必須リテラルで絞り込んでから照合）
+
+合成ライブラリに対して、同じ正規表現を次の2通りで照合し、所要時間と
+一致数を比べる（一致数が違えば絞り込みの取りこぼし）。
+
+- 全件: 全文書の modern.txt を1プロセスで読んで照合する（素朴な grep）
+- 絞り込み: grep()。必須リテラルを検索インデックスで引き、候補だけを照合する
+  （候補が [grep] parallel_min_docs 件以上ならプロセスプールで）
+
+    uv run python -m benchmarks.bench_grep --docs 100000
+"""
+
+import argparse
+import re
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_grep import GrepStats, grep
+from utils.library_search import LibraryIndex
+
+PATTERNS = [
+    r"警察.{0,3}報告",  # 2文字のリテラル2つ（grams）
+    r"震災[のに]記録",  # 3文字以上にならないリテラルと文字クラス
+    r"國會",  # 旧字体（稀な文字）
+    r"議員[^\n]{0,5}委員",
+    r"[郧郘郯]",  # 非JIS の誤読字だけ（文字クラスを OR で引く）
+    r"\d+",  # 必須リテラルなし（全件を照合）
+]
+
+
+def naive(root: Path, pattern: str) -> int:
+    regex = re.compile(pattern)
+    count = 0
+    for doc_dir in sorted(root.iterdir()):
+        if doc_dir.name.startswith("."):
+            continue
+        text = (doc_dir / "modern.txt").read_text(encoding="utf-8")
+        count += sum(1 for m in regex.finditer(text) if m.group())
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    with LibraryIndex(root) as idx:
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        print(f"{args.docs:,}文書 × {args.chars:,}字")
+        for pattern in PATTERNS:
+            t = time.perf_counter()
+            expected = naive(root, pattern)
+            naive_s = time.perf_counter() - t
+
+            stats = GrepStats()
+            t = time.perf_counter()
+            first = None
+            for _ in grep(idx, pattern, stats=stats):
+                if first is None:
+                    first = time.perf_counter() - t
+            grep_s = time.perf_counter() - t
+            mark = "" if stats.matches == expected else f"  ✗ 全件では {expected}件"
+            first_s = f"{first:.2f}秒" if first is not None else "-"
+            print(
+                f"  {pattern:<16} 全件 {naive_s:6.2f}秒 / 絞り込み {grep_s:6.2f}秒"
+                f"（最初の一致 {first_s}・候補 {stats.candidates:,}文書・{stats.matches:,}件）{mark}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+元画像の知覚ハッシュ索引（OCR前の重複画像チェック）のベンチマーク
+
+文字の行を描いた合成ページ画像を元画像に持つライブラリを作り、
+  - 索引の初回の構築（全画像のハッシュ）と、変更の無いときの差分更新（走査だけ）
+  - 取り込む画像1枚の照合（ハッシュ + 全行との比較。中央値）
+  - 撮り直し（縮小・範囲のずれ・JPEG）を同じページと見分けた割合
+を測る。
+
+    uv run python -m benchmarks.bench_image_hash --images 20000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.image_hash import hash_gray
+from utils.library_images import ImageHashIndex
+
+LOOKUPS = 100
+SIZE = (700, 1000)  # 合成ページの幅・高さ（画素）
+
+
+def _page(seed: int) -> np.ndarray:
+    rng = random.Random(seed)
+    img = np.full((SIZE[1], SIZE[0]), 235, np.uint8)
+    for i in range(20):
+        line = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz   ") for _ in range(28))
+        cv2.putText(img, line, (40, 60 + i * 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 30, 2)
+    return img
+
+
+def _rescan(img: np.ndarray, rng: random.Random) -> np.ndarray:
+    """縮尺・ドラッグした範囲・画質の違う撮り直し"""
+    scale = rng.uniform(0.8, 1.2)
+    img = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    h, w = img.shape
+    top, left = rng.randrange(0, 20), rng.randrange(0, 20)
+    img = img[top : h - rng.randrange(0, 20), left : w - rng.randrange(0, 20)]
+    _, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, rng.randrange(50, 90)])
+    return cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)
+
+
+def _make_library(root: Path, n_images: int) -> None:
+    marker = root / ".synthetic_images"
+    if marker.exists() and marker.read_text() == str(n_images):
+        return
+    for i in range(n_images):
+        doc_dir = root / f"2026-01-01_img{i:06d}"
+        doc_dir.mkdir(parents=True, exist_ok=True)
+        _, buf = cv2.imencode(".png", _page(i))
+        buf.tofile(str(doc_dir / "source.png"))
+    marker.write_text(str(n_images))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--images", type=int, default=20000, help="ライブラリの元画像の枚数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_images_{args.images}")
+    _make_library(root, args.images)
+    (root / ".index" / "images.db").unlink(missing_ok=True)
+    print(f"元画像 {args.images:,}枚（{SIZE[0]}×{SIZE[1]}）")
+
+    rng = random.Random(0)
+    with ImageHashIndex(root) as index:
+        t = time.perf_counter()
+        index.update()
+        print(f"  初回の構築: {time.perf_counter() - t:.1f}秒")
+        t = time.perf_counter()
+        index.update()
+        print(f"  差分更新（変更なし）: {time.perf_counter() - t:.2f}秒")
+        index.find(hash_gray(_page(0)))  # 行列を読み込んでおく
+
+        samples = []
+        found = 0
+        for seed in rng.sample(range(args.images), LOOKUPS):
+            img = _rescan(_page(seed), rng)
+            t = time.perf_counter()
+            matches = index.find(hash_gray(img))
+            samples.append(time.perf_counter() - t)
+            found += any(m.doc_id == f"2026-01-01_img{seed:06d}" for m in matches[:1])
+        print(
+            f"  照合（中央値）: {statistics.median(samples) * 1000:.2f} ms"
+            f"（撮り直しを同じページと見分けた割合 {found / LOOKUPS:.0%}）"
+        )
+
+
+if __name__ == "__main__":
+    main()
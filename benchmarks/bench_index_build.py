@@ -0,0 +1,73 @@
+"""
+インデックス構築のスループット計測（rebuild / 変化なしの update / 一部変更の update）
+
+合成ライブラリに対して次を測り、所要時間と docs/sec を表示する。
+
+- rebuild: 全件の一括索引（一時ファイルに組み立てて差し替え・最後に optimize）
+- update（変化なし）: 変更ジャーナルの未読分を見るだけ
+- reconcile（変化なし）: ライブラリ全体の走査と mtime 比較
+- update（1% 変更）: meta.json の mtime を進めてジャーナルに載せた文書だけ再索引
+
+    uv run python -m benchmarks.bench_index_build --docs 10000
+    uv run python -m benchmarks.bench_index_build --docs 100000 --chars 1000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_journal import ChangeJournal
+from utils.library_search import LibraryIndex
+
+
+def timed(label: str, fn, n_docs: int) -> None:
+    t = time.perf_counter()
+    stats = fn()
+    elapsed = time.perf_counter() - t
+    changed = stats.added + stats.updated
+    print(
+        f"  {label:<16} {elapsed:8.2f} 秒   {n_docs / elapsed:10,.0f} docs/sec"
+        f"   (追加 {stats.added:,} / 更新 {stats.updated:,})"
+        + (f"   再索引 {changed / elapsed:,.0f} docs/sec" if changed else "")
+    )
+
+
+def touch_some(root: Path, ratio: float, seed: int = 2) -> int:
+    """ratio の割合の文書の meta.json の mtime を進め、変更ジャーナルに載せる"""
+    rng = random.Random(seed)
+    doc_dirs = [d for d in root.iterdir() if not d.name.startswith(".")]
+    picked = rng.sample(doc_dirs, max(1, int(len(doc_dirs) * ratio)))
+    now = time.time()
+    for d in picked:
+        os.utime(d / "meta.json", (now, now))
+    ChangeJournal(root).record(d.name for d in picked)
+    return len(picked)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=10000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+    print(f"{args.docs:,}文書 / 1文書 {args.chars:,}文字")
+
+    with LibraryIndex(root) as idx:
+        timed("rebuild", idx.rebuild, args.docs)
+        timed("update（変化なし）", idx.update, args.docs)
+        timed("reconcile（変化なし）", lambda: idx.update(reconcile=True), args.docs)
+        touch_some(root, 0.01)
+        timed("update（1% 変更）", idx.update, args.docs)
+        size = idx.stat()["db_size_bytes"]
+    print(f"  インデックスサイズ: {size / 1024 / 1024:,.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
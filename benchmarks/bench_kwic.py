@@ -0,0 +1,86 @@
+"""
+コンコーダンス（KWIC）のベンチマーク
+
+合成ライブラリで、出現数の違う語の全用例を concordance() で集め、
+最初の1行までの時間・全件の時間・right / left で並べたときの時間を測る。
+一致数は modern.txt を素朴に数えた数と比べる（違えば取りこぼし）。
+
+語は出現数が数百〜数十万件になるよう、ありふれたかな・2文字の語と、
+索引の中で一番多く現れる trigram（search_row から選ぶ）を使う。
+
+    uv run python -m benchmarks.bench_kwic --docs 100000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_kwic import concordance
+from utils.library_search import LibraryIndex
+
+TERMS = ["の", "に", "警察", "國會"]  # 1文字・2文字は grams、3文字以上は trigram の出現位置から
+
+
+def naive(root: Path, term: str) -> int:
+    count = 0
+    for doc_dir in sorted(root.iterdir()):
+        if doc_dir.name.startswith("."):
+            continue
+        text = (doc_dir / "modern.txt").read_text(encoding="utf-8")
+        start = text.find(term)
+        while start >= 0:
+            count += 1
+            start = text.find(term, start + 1)
+    return count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    parser.add_argument("--limit", type=int, default=100, help="並べ替えて表示する件数")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    with LibraryIndex(root) as idx:
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        with idx._read() as conn:
+            (top,) = conn.execute(
+                "SELECT term FROM search_row WHERE term NOT GLOB '*[ \n]*' ORDER BY cnt DESC LIMIT 1"
+            ).fetchone()
+        print(f"{args.docs:,}文書 × {args.chars:,}字")
+        for term in [*TERMS, top]:
+            expected = naive(root, term.replace("國會", "国会"))
+
+            t = time.perf_counter()
+            first = None
+            count = 0
+            for _ in concordance(idx, term):
+                if first is None:
+                    first = time.perf_counter() - t
+                count += 1
+            total_s = time.perf_counter() - t
+
+            sorts = []
+            for sort, limit in (("right", None), ("left", None), ("right", args.limit)):
+                t = time.perf_counter()
+                for _ in concordance(idx, term, sort=sort, limit=limit):
+                    pass
+                label = sort if limit is None else f"{sort} 上位{limit}"
+                sorts.append(f"{label} {time.perf_counter() - t:.2f}秒")
+
+            mark = "" if count == expected else f"  ✗ 素朴に数えると {expected:,}件"
+            first_s = f"{first:.2f}秒" if first is not None else "-"
+            print(
+                f"  {term:<4} {count:>9,}件  最初の1行 {first_s} / 全件 {total_s:.2f}秒"
+                f" / {' / '.join(sorts)}{mark}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+画像の内容アドレス型ストア（library/.objects/）のベンチマーク
+
+大きめの元画像（既定 20MB）を、
+  - 文書フォルダに毎回コピーする（今までの保存）
+  - 同じ中身の blob へのハードリンクにする（2回目以降の保存）
+で N 回置いたときの1回あたりの時間と、既存ライブラリの移行（migrate）の時間・
+空いた容量を測る。
+
+    uv run python -m benchmarks.bench_objects --mb 20 --copies 50
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from utils.library_objects import migrate, object_stats, place_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=20, help="元画像1枚の大きさ（MB）")
+    parser.add_argument("--copies", type=int, default=50, help="同じ画像を保存する回数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="prewar_bench_objects_") as tmp:
+        tmp = Path(tmp)
+        src = tmp / "scan.tiff"
+        src.write_bytes(os.urandom(args.mb << 20))
+        print(f"元画像 {args.mb}MB × {args.copies}回")
+
+        copy_root = tmp / "copy"
+        link_root = tmp / "link"
+        samples = {"コピー": [], "リンク": []}
+        for i in range(args.copies):
+            for label, root in (("コピー", copy_root), ("リンク", link_root)):
+                doc_dir = root / f"2026-01-01_doc{i:04d}"
+                doc_dir.mkdir(parents=True)
+                t = time.perf_counter()
+                if label == "コピー":
+                    shutil.copy2(src, doc_dir / "source.tiff")
+                else:
+                    place_file(root, src, doc_dir / "source.tiff")
+                samples[label].append(time.perf_counter() - t)
+        for label, values in samples.items():
+            print(f"  保存1回（{label}・中央値）: {statistics.median(values) * 1000:.1f} ms")
+
+        before = object_stats(copy_root).physical_bytes
+        t = time.perf_counter()
+        report = migrate(copy_root)
+        elapsed = time.perf_counter() - t
+        after = object_stats(copy_root).physical_bytes
+        print(
+            f"  移行: {elapsed:.2f}秒（{report.linked}枚をリンクに、"
+            f"{before >> 20}MB → {after >> 20}MB）"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+パッセージ単位の索引のベンチマーク（文書ごと vs パッセージごと）
+
+長い文書（既定 3万字 ≒ 数十ページの記録）の合成ライブラリを、
+[index] passage_chars = 0（文書全体で1行）と既定値（段落を passage_chars 字まで）
+でそれぞれ作り直し、同じクエリ列で次を比べる。
+
+- 構築: rebuild() の時間と、全文索引（search）・インデックス全体の大きさ
+- 検索: 3〜5文字の語と、2語の AND の search() の p50 / p99（結果キャッシュなし）
+
+    uv run python -m benchmarks.bench_passages --docs 2000 --chars 30000
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from benchmarks.bench_search_latency import make_queries, measure, report
+from utils import library_search
+from utils.library_search import LibraryIndex, _table_sizes
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chars", type=int, default=30000, help="1文書あたりの文字数")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument(
+        "--passage-chars", type=int, default=library_search.PASSAGE_CHARS, help="比べるパッセージの長さ"
+    )
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(
+        args.root or Path(tempfile.gettempdir()) / f"prewar_bench_long_{args.docs}_{args.chars}"
+    )
+    make_library(root, args.docs, args.chars)
+    queries = make_queries(root, args.queries)
+    pairs = [f"{a} {b}" for a, b in zip(queries, make_queries(root, args.queries, seed=2))]
+    print(f"{args.docs:,}文書 × {args.chars:,}字 / クエリ {len(queries)}本 / limit {args.limit}")
+
+    for label, size in (("文書ごと", 0), (f"{args.passage_chars}字", args.passage_chars)):
+        library_search.PASSAGE_CHARS = size
+        with LibraryIndex(root, result_cache_size=0) as idx:
+            t = time.perf_counter()
+            idx.rebuild()
+            build_s = time.perf_counter() - t
+            with idx._read() as conn:
+                search_bytes = _table_sizes(conn).get("search", 0)
+                (rows,) = conn.execute("SELECT COUNT(*) FROM search_docsize").fetchone()
+            print(
+                f"{label}: 構築 {build_s:.1f}秒 / search {search_bytes / 1024 / 1024:.1f} MB"
+                f"（{rows:,}行）/ 全体 {idx.db_path.stat().st_size / 1024 / 1024:.1f} MB"
+            )
+            measure(idx, queries[:30], args.limit)
+            report("1語", measure(idx, queries, args.limit))
+            report("2語 AND", measure(idx, pairs, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+検索レイテンシのベンチマーク（接続の使い回し vs 呼び出しごとの接続）
+
+合成ライブラリのインデックスに対して同じクエリ列を流し、1回ごとの
+search() の所要時間の p50 / p99 を比べる。
+
+- 従来: 呼び出しごとに sqlite3.connect + スキーマ確認（executescript）
+- 現行: LibraryIndex を使い回す（WAL・読み取りプール・プリペアドステートメント）
+
+あわせて 1〜2文字の語（grams）だけのクエリと、3文字以上の語との AND の
+レイテンシも測る。ここまでは結果キャッシュを切って測り、最後に
+キャッシュに載った2周目と、カーソルで続き（2ページ目）を引く時間を測る。
+絞り込みは、ありふれたタグ（新聞・約3割）と1か月ぶんの作成日（約4%）で測る。
+
+    uv run python -m benchmarks.bench_search_latency --docs 100000
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_search import LibraryIndex, SearchFacets
+
+
+class PerCallIndex(LibraryIndex):
+    """従来の動作の再現: 検索のたびに接続を開いてスキーマを確認する"""
+
+    @contextmanager
+    def _read(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            self._ensure_schema(conn)
+            yield conn
+        finally:
+            conn.close()
+
+
+def make_queries(
+    root: Path, n: int, seed: int = 1, min_chars: int = 3, max_chars: int = 5
+) -> list[str]:
+    """ランダムな文書の本文から min_chars〜max_chars 文字を切り出してクエリにする"""
+    rng = random.Random(seed)
+    doc_dirs = [d for d in root.iterdir() if not d.name.startswith(".")]
+    queries = []
+    while len(queries) < n:
+        text = (rng.choice(doc_dirs) / "modern.txt").read_text(encoding="utf-8")
+        start = rng.randrange(max(1, len(text) - max_chars))
+        q = text[start : start + rng.randint(min_chars, max_chars)]
+        # 短い語は grams に載る文字（文字・数字）だけにする
+        if len(q) >= min_chars and (q.isalnum() if len(q) < 3 else "\n" not in q):
+            queries.append(q)
+    return queries
+
+
+def measure(
+    idx: LibraryIndex, queries: list[str], limit: int, facets: SearchFacets | None = None
+) -> list[float]:
+    latencies = []
+    for q in queries:
+        t = time.perf_counter()
+        idx.search(q, limit=limit, facets=facets)
+        latencies.append((time.perf_counter() - t) * 1000)
+    return latencies
+
+
+def report(label: str, latencies: list[float]) -> None:
+    qs = statistics.quantiles(latencies, n=100)
+    print(f"  {label:<10} p50 {qs[49]:7.2f} ms   p99 {qs[98]:7.2f} ms   平均 {statistics.mean(latencies):7.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    with LibraryIndex(root) as idx:
+        t = time.perf_counter()
+        stats = idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        if stats.added or stats.updated:
+            print(f"インデックス構築: {time.perf_counter() - t:.1f}秒（{stats.added + stats.updated:,}件）")
+
+    queries = make_queries(root, args.queries)
+    print(f"{args.docs:,}文書 / クエリ {len(queries)}本 / limit {args.limit}")
+
+    # 同じクエリ列を両方式で。ページキャッシュの温まり方を揃えるため1周捨ててから測る
+    per_call = PerCallIndex(root, result_cache_size=0)
+    measure(per_call, queries[:50], args.limit)
+    report("従来", measure(per_call, queries, args.limit))
+
+    with LibraryIndex(root, result_cache_size=0) as idx:
+        measure(idx, queries[:50], args.limit)
+        report("使い回し", measure(idx, queries, args.limit))
+
+        short = make_queries(root, args.queries, seed=2, min_chars=1, max_chars=2)
+        mixed = [f"{long} {s}" for long, s in zip(queries, short)]
+        report("短い語", measure(idx, short, args.limit))
+        report("長い語+短い語", measure(idx, mixed, args.limit))
+
+        tag = SearchFacets(tags=("新聞",))
+        month = SearchFacets(since="2026-03", until="2026-03")
+        report("タグ", measure(idx, queries, args.limit, tag))
+        report("1か月", measure(idx, queries, args.limit, month))
+        report("短い語+1か月", measure(idx, short, args.limit, month))
+
+        cursors = [idx.search_page(q, args.limit).next_cursor for q in queries]
+        paged = [(q, c) for q, c in zip(queries, cursors) if c]
+        if len(paged) >= 2:
+            latencies = []
+            for q, cursor in paged:
+                t = time.perf_counter()
+                idx.search_page(q, args.limit, after=cursor)
+                latencies.append((time.perf_counter() - t) * 1000)
+            report("2ページ目", latencies)
+
+    with LibraryIndex(root, result_cache_size=len(queries)) as idx:
+        measure(idx, queries, args.limit)
+        report("キャッシュ", measure(idx, queries, args.limit))
+
+
+if __name__ == "__main__":
+    main()
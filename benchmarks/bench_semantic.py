@@ -0,0 +1,131 @@
+"""
+意味検索のベンチマーク（全件比較 vs IVF の近似検索）
+
+合成ライブラリのパッセージを決定的な埋め込み（HashingEmbedder。Ollama を
+使わない）で索引し、同じクエリ列で次を比べる。
+
+- 全件: memmap の float16 行列全体と内積をとる（search(exact=True)）
+- IVF: 検索語に近い nprobe 個のリストの行だけと内積をとる
+- 再現率: 全件比較の上位 limit 文書のうち、IVF でも上位に入った割合
+- 元の文書: クエリを切り出した文書が上位 limit 文書に入った割合
+- ハイブリッド: 全文検索と意味検索（IVF）を同時に引いてまとめた全体の時間と、
+  意味検索が [hybrid] budget_ms に収まらなかった割合
+
+合成文書はランダムな文字列で、実際の埋め込みのようなまとまり（話題ごとの
+塊）が無いため、IVF の再現率は実際より低めに出る。
+
+埋め込みの所要時間は Ollama のモデル次第なので、ここでは索引の書き込み・
+k-means・検索だけを測る。
+
+    uv run python -m benchmarks.bench_semantic --docs 100000
+"""
+
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils import library_vectors
+from utils.library_hybrid import BUDGET_MS, hybrid_search
+from utils.library_search import LibraryIndex
+from utils.library_vectors import HashingEmbedder, VectorIndex
+
+
+def make_queries(
+    root: Path, n: int, seed: int = 1, n_chars: int = 30
+) -> list[tuple[str, str]]:
+    """ランダムな文書の本文から n_chars 文字を切り出し、(文書の id, クエリ) にする"""
+    rng = random.Random(seed)
+    doc_dirs = [d for d in root.iterdir() if not d.name.startswith(".")]
+    queries = []
+    for _ in range(n):
+        doc_dir = rng.choice(doc_dirs)
+        text = (doc_dir / "modern.txt").read_text(encoding="utf-8")
+        start = rng.randrange(max(1, len(text) - n_chars))
+        queries.append((doc_dir.name, text[start : start + n_chars]))
+    return queries
+
+
+def measure(vectors: VectorIndex, queries: list[tuple[str, str]], limit: int, exact: bool):
+    latencies, results = [], []
+    for _, q in queries:
+        t = time.perf_counter()
+        hits = vectors.search(q, limit=limit, exact=exact)
+        latencies.append((time.perf_counter() - t) * 1000)
+        results.append({h.id for h in hits})
+    return latencies, results
+
+
+def report(label: str, latencies: list[float], queries, results) -> None:
+    qs = statistics.quantiles(latencies, n=100)
+    found = sum(doc_id in ids for (doc_id, _), ids in zip(queries, results)) / len(queries)
+    print(
+        f"  {label:<10} p50 {qs[49]:7.2f} ms   p99 {qs[98]:7.2f} ms"
+        f"   平均 {statistics.mean(latencies):7.2f} ms   元の文書 {found:.0%}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=384, help="埋め込みの次元")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    library_vectors.ANN_MIN_ROWS = 0  # 件数によらず IVF を作る（全件比較は exact=True で測る）
+    with LibraryIndex(root) as idx, VectorIndex(idx, HashingEmbedder(args.dim)) as vectors:
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        t = time.perf_counter()
+        stats = vectors.update()
+        if stats.embedded:
+            print(
+                f"意味検索の索引: {time.perf_counter() - t:.1f}秒"
+                f"（{stats.embedded:,}パッセージ・IVF {stats.ann_lists}リスト）"
+            )
+        s = vectors.stat()
+        print(
+            f"{s['document_count']:,}文書 / {s['passage_count']:,}パッセージ × {s['dim']}次元"
+            f"（{s['matrix_bytes'] / 1024 / 1024:.1f} MB）/ limit {args.limit}"
+        )
+
+        queries = make_queries(root, args.queries)
+        measure(vectors, queries[:20], args.limit, exact=True)
+        latencies, exact = measure(vectors, queries, args.limit, exact=True)
+        report("全件", latencies, queries, exact)
+        for nprobe in args.nprobe:
+            library_vectors.NPROBE = nprobe
+            latencies, approx = measure(vectors, queries, args.limit, exact=False)
+            recall = statistics.mean(len(a & e) / len(e) for a, e in zip(approx, exact) if e)
+            report(f"IVF {nprobe}", latencies, queries, approx)
+            print(f"  {'':<10} 再現率 {recall:.0%}")
+
+        # 全文検索と同じ長さの語で。クエリを短めに切り出し直す
+        library_vectors.NPROBE = args.nprobe[len(args.nprobe) // 2]
+        short = [(doc_id, q[:5]) for doc_id, q in queries]
+        totals, keyword, semantic, results = [], [], [], []
+        for _, q in short:
+            result = hybrid_search(idx, vectors, q, limit=args.limit)
+            totals.append(result.total_ms)
+            keyword.append(result.keyword_ms)
+            semantic.append(result.semantic_ms or BUDGET_MS)
+            results.append({h.id for h in result.hits})
+        report("ハイブリッド", totals, short, results)
+        over = sum(t >= BUDGET_MS for t in semantic) / len(semantic)
+        print(
+            f"  {'':<10} 全文 p50 {statistics.median(keyword):.2f} ms・意味 p50 {statistics.median(semantic):.2f} ms"
+            f"（{BUDGET_MS} ms 超過 {over:.0%}）"
+        )
+
+
+if __name__ == "__main__":
+    main()
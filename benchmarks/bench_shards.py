@@ -0,0 +1,62 @@
+"""
+シャード分割・連合検索（FederatedIndex）のベンチマーク
+
+同じ文書数の合成ライブラリを 1・2・4・8 個のライブラリ（シャード）に分けて、
+全シャードの作り直し（並行）・1シャードだけの作り直し・連合検索のレイテンシ
+（中央値。結果のキャッシュなし）を比べる。シャード数が増えると1シャードの
+作り直しは文書数に比例して短くなり、検索はシャード数ぶんの問い合わせを
+スレッドで同時に投げてまとめる時間がかかる。
+
+    uv run python -m benchmarks.bench_shards --docs 100000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from utils.library_shards import FederatedIndex
+
+QUERIES = ["震災", "警察 報告", "国会議", "東京 新聞社"]
+REPEAT = 10
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000, help="全シャード合わせた文書数")
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--shards", type=str, default="1,2,4,8", help="試すシャード数（カンマ区切り）")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    base = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_shards_{args.docs}")
+    print(f"{args.docs:,}文書 × {args.chars:,}字")
+    for n in (int(v) for v in args.shards.split(",")):
+        roots = [
+            make_library(base / f"{n}shards" / f"part{i}", args.docs // n, args.chars, seed=i)
+            for i in range(n)
+        ]
+        with FederatedIndex(roots, result_cache_size=0) as fed:
+            t = time.perf_counter()
+            fed.rebuild()
+            rebuild_s = time.perf_counter() - t
+            t = time.perf_counter()
+            fed.rebuild([fed.label(fed.shards()[0])])
+            one_s = time.perf_counter() - t
+
+            samples = []
+            for _ in range(REPEAT):
+                for query in QUERIES:
+                    t = time.perf_counter()
+                    fed.search(query)
+                    samples.append(time.perf_counter() - t)
+        print(
+            f"  {n}シャード: 全体の作り直し {rebuild_s:6.1f}秒 / 1シャードだけ {one_s:6.1f}秒 / "
+            f"検索（中央値） {statistics.median(samples) * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
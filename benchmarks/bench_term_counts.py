@@ -0,0 +1,63 @@
+"""
+語の出現数の集計（stat --term）のベンチマーク
+
+合成ライブラリで、語を集計の対象にするとき（全文書を数えて term_counts に
+入れる）の時間と、その後の月・年・タグごとの集計の時間を測る。出現数の
+合計は modern.txt を素朴に数えた数と比べる（違えば数え漏れ）。
+
+    uv run python -m benchmarks.bench_term_counts --docs 100000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks._synthetic import make_library
+from benchmarks.bench_kwic import naive
+from utils.library_search import TERM_GROUPS, LibraryIndex
+
+TERMS = ["の", "警察", "国会", "震災の"]  # 1〜2文字は本文から、3文字は search_instance から数える
+REPEAT = 20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--chars", type=int, default=1000, help="1文書あたりの文字数")
+    parser.add_argument("--root", type=str, default=None, help="合成ライブラリの置き場所")
+    args = parser.parse_args()
+
+    root = Path(args.root or Path(tempfile.gettempdir()) / f"prewar_bench_{args.docs}")
+    make_library(root, args.docs, args.chars)
+
+    with LibraryIndex(root) as idx:
+        idx.update(reconcile=True)  # 合成ライブラリは変更ジャーナルを書かない
+        print(f"{args.docs:,}文書 × {args.chars:,}字")
+        for term in TERMS:
+            idx.forget_term(term)
+            t = time.perf_counter()
+            idx.track_term(term)
+            track_s = time.perf_counter() - t
+
+            timings = []
+            for by in TERM_GROUPS:
+                samples = []
+                for _ in range(REPEAT):
+                    t = time.perf_counter()
+                    idx.term_frequency(term, by=by)
+                    samples.append(time.perf_counter() - t)
+                timings.append(f"{by} {statistics.median(samples) * 1000:.1f} ms")
+            total = sum(b.occurrences for b in idx.term_frequency(term, by="year"))
+            expected = naive(root, term)
+            mark = "" if total == expected else f"  ✗ 素朴に数えると {expected:,}件"
+            print(
+                f"  {term:<4} {total:>9,}件  登録 {track_s:.2f}秒 / 集計（中央値）"
+                f" {' / '.join(timings)}{mark}"
+            )
+            idx.forget_term(term)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+コールドスタート計測 — import + 初回 convert() の所要時間
+
+新しいプロセスを繰り返し起動し、`import senzen_word` から最初の
+`convert()` が返るまでの時間を計測する。プールのワーカーや短命な CLI が
+毎回払うコストに相当する。
+
+使い方:
+    uv run python pkg/senzen_word/benchmarks/bench_cold_start.py
+    uv run python pkg/senzen_word/benchmarks/bench_cold_start.py --runs 50
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+# 子プロセス側で実行するコード（import から初回変換までを perf_counter で囲む）
+_CHILD = """
+import time
+t0 = time.perf_counter()
+import senzen_word
+senzen_word.convert("國會ニ於テ𛀂")
+print(time.perf_counter() - t0)
+"""
+
+
+def measure(runs: int, env: dict[str, str]) -> list[float]:
+    """子プロセスを runs 回起動し、各回の所要秒数を返す"""
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _CHILD],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        samples.append(float(out.stdout.strip()))
+    return samples
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ms = sorted(s * 1000 for s in samples)
+    print(
+        f"{label:<14} median {statistics.median(ms):7.2f} ms   "
+        f"min {ms[0]:7.2f} ms   max {ms[-1]:7.2f} ms   (n={len(ms)})"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="senzen_word コールドスタート計測")
+    parser.add_argument("--runs", type=int, default=30, help="計測回数（デフォルト: 30）")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.pop("SENZEN_WORD_NO_PRECOMPILED", None)
+    _report("precompiled", measure(args.runs, env))
+
+    env["SENZEN_WORD_NO_PRECOMPILED"] = "1"
+    _report("json", measure(args.runs, env))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+find() の計測 — カテゴリ別検出の合流 vs 1パス走査
+
+戦前文書風の長い文書を作り、従来の方式（find_old_kanji / find_hentaigana /
+find_historical_kana / find_katakana_particles を順に呼んでソート）と、
+senzen_word.find() の1パス走査の所要時間を比べる。
+
+使い方:
+    uv run python pkg/senzen_word/benchmarks/bench_find.py
+    uv run python pkg/senzen_word/benchmarks/bench_find.py --chars 1000000
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+import senzen_word
+from senzen_word.kana import find_hentaigana, find_historical_kana, find_katakana_particles
+from senzen_word.kanji import find_old_kanji
+
+_SAMPLE = (
+    "日本臣民ハ法律ノ定ムル所ニ從ヒ納稅ノ義務ヲ有ス。"
+    "其ノ流祖ハ常陸國ノ人ニシテ、始メ心影流ヲ學ビ、後ニ自ラ一流ヲ開キタリ。"
+    "右ハ震災ニ關スル警察報告ナリ、カウシテ調査セシ所ヲ左ニ記サウ。\n"
+)
+
+
+def legacy_find(text: str) -> list[tuple[str, str, int, str]]:
+    found = []
+    found += [(o, n, p, "kanji") for o, n, p in find_old_kanji(text)]
+    found += [(o, n, p, "hentaigana") for o, n, p in find_hentaigana(text)]
+    found += [(o, n, p, "kana") for o, n, p in find_historical_kana(text)]
+    found += [(o, n, p, "particle") for o, n, p in find_katakana_particles(text)]
+    found.sort(key=lambda x: x[2])
+    return found
+
+
+def _time(fn, text: str, runs: int) -> float:
+    fn(text)  # ウォームアップ（テーブル構築・遅延索引）
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn(text)
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="senzen_word.find 計測")
+    parser.add_argument("--chars", type=int, default=200_000, help="文書の文字数")
+    parser.add_argument("--runs", type=int, default=5, help="計測回数")
+    args = parser.parse_args()
+
+    text = (_SAMPLE * (args.chars // len(_SAMPLE) + 1))[: args.chars]
+    assert senzen_word.find(text) == legacy_find(text)
+
+    legacy = _time(legacy_find, text, args.runs)
+    single = _time(senzen_word.find, text, args.runs)
+    print(f"文書 {len(text):,} 文字 / 検出 {len(senzen_word.find(text)):,} 件")
+    print(f"  従来（カテゴリ別 + ソート）: {legacy:8.1f} ms")
+    print(f"  1パス走査:                   {single:8.1f} ms  （{legacy / single:.1f}倍）")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+大規模異体字表の計測 — 表の件数を増やしてもメモリ・変換速度が変わらないか
+
+人工的な異体字表（CJK拡張B → URO）を件数を変えて作り、次を比較する:
+  - 表そのもののメモリ（CodepointTable と、従来の dict[int, int] 表）
+  - 約 1MB の文書を str.translate() で変換する速度
+  - 逆引き（新字体 → 旧字体候補）1回あたりの時間
+
+使い方:
+    uv run python pkg/senzen_word/benchmarks/bench_large_table.py
+"""
+
+import random
+import sys
+import time
+import tracemalloc
+
+from senzen_word._codepoint_table import CodepointTable
+
+_SAMPLE = "日本臣民ハ法律ノ定ムル所ニ從ヒ納稅ノ義務ヲ有ス。大日本帝國ハ萬世一系ノ天皇之ヲ統治ス。"
+
+
+def _mapping(size: int) -> dict[str, str]:
+    return {chr(0x20000 + i): chr(0x4E00 + i % 20000) for i in range(size)}
+
+
+def _measure_alloc(fn):
+    tracemalloc.start()
+    obj = fn()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, current
+
+
+def _document(mapping: dict[str, str], chars: int) -> str:
+    """本文に表のキーを 1% ほど混ぜた文書"""
+    rng = random.Random(0)
+    keys = list(mapping)
+    body = (_SAMPLE * (chars // len(_SAMPLE) + 1))[:chars]
+    out = list(body)
+    for i in range(0, chars, 100):
+        out[i] = rng.choice(keys)
+    return "".join(out)
+
+
+def run(size: int) -> None:
+    mapping = _mapping(size)
+    table, table_bytes = _measure_alloc(lambda: CodepointTable.from_mapping(mapping))
+    _, dict_bytes = _measure_alloc(lambda: {ord(k): ord(v) for k, v in mapping.items()})
+
+    text = _document(mapping, 1_000_000)
+    text.translate(table.translation)  # 出現文字をキャッシュに載せる（ウォームアップ）
+    t0 = time.perf_counter()
+    for _ in range(5):
+        text.translate(table.translation)
+    per_mb = (time.perf_counter() - t0) / 5 * 1000
+
+    probes = [chr(0x4E00 + i) for i in range(0, 20000, 7)]
+    t0 = time.perf_counter()
+    for ch in probes:
+        table.reverse(ch)
+    rev_us = (time.perf_counter() - t0) / len(probes) * 1e6
+
+    print(
+        f"{size:>7,} 件  表 {table_bytes / 1024:8.1f} KB (dict表 {dict_bytes / 1024:8.1f} KB)  "
+        f"キャッシュ {len(table.translation):>6,} 字  "
+        f"変換 {per_mb:6.1f} ms/MB  逆引き {rev_us:5.2f} µs"
+    )
+
+
+def main() -> int:
+    for size in (300, 5_000, 20_000, 60_000):
+        run(size)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
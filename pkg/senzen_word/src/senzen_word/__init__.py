@@ -19,19 +19,19 @@ senzen_word — 戦前日本語を現代日本語に変換するライブラリ
     from senzen_word.kana import convert_hentaigana
 """
 
-from senzen_word.kanji import convert_old_kanji, find_old_kanji
+from collections.abc import Iterable
+
+from senzen_word.kanji import convert_old_kanji
 from senzen_word.kana import (
     convert_historical_kana,
-    find_historical_kana,
     convert_katakana_particles,
-    find_katakana_particles,
     convert_hentaigana,
-    find_hentaigana,
 )
+from senzen_word._scanner import CATEGORIES, get_scanner
 
 __version__ = "0.1.0"
 
-__all__ = ["convert", "find", "__version__"]
+__all__ = ["convert", "find", "CATEGORIES", "__version__"]
 
 
 def convert(text: str) -> str:
@@ -61,31 +61,21 @@ def convert(text: str) -> str:
     return text
 
 
-def find(text: str) -> list[tuple[str, str, int, str]]:
+def find(
+    text: str, categories: Iterable[str] | None = None
+) -> list[tuple[str, str, int, str]]:
     """
     テキスト中の変換対象箇所を検出する
 
+    全カテゴリのパターンを1本のトライにまとめ、テキストを1回だけ走査する
+    （find_old_kanji 等を個別に呼んで合流させた結果と同じ内容・同じ順序）。
+
     Args:
         text: 検査対象のテキスト
+        categories: 検出するカテゴリ（省略時は全カテゴリ）
 
     Returns:
-        (変換前, 変換後, 出現位置, カテゴリ) のリスト
+        (変換前, 変換後, 出現位置, カテゴリ) のリスト（位置順）
         カテゴリ: "kanji", "hentaigana", "kana", "particle"
     """
-    found: list[tuple[str, str, int, str]] = []
-
-    for old, new, pos in find_old_kanji(text):
-        found.append((old, new, pos, "kanji"))
-
-    for old, new, pos in find_hentaigana(text):
-        found.append((old, new, pos, "hentaigana"))
-
-    for old, new, pos in find_historical_kana(text):
-        found.append((old, new, pos, "kana"))
-
-    for old, new, pos in find_katakana_particles(text):
-        found.append((old, new, pos, "particle"))
-
-    # 位置順にソート
-    found.sort(key=lambda x: x[2])
-    return found
+    return get_scanner(categories).scan(text)
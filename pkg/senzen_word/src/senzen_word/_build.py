@@ -0,0 +1,22 @@
+"""
+プリコンパイル済み変換テーブルのビルド
+
+JSON データを更新したら実行し、生成された _tables_generated.py もコミットする。
+
+使い方:
+    uv run python -m senzen_word._build
+"""
+
+import sys
+
+from senzen_word._precompiled import build
+
+
+def main() -> int:
+    path = build()
+    print(f"✓ 生成しました: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
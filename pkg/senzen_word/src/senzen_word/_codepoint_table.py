@@ -0,0 +1,113 @@
+"""
+コンパクトな 1文字→1文字 変換表
+
+Unihan / IVS 由来の異体字のように数万件規模になりうる変換表を、
+dict を何万個も作らずに扱うための表現。
+
+- 正引き: 変換前の文字をコードポイント順に並べた文字列 keys と、対応する
+  変換後の文字列 values の2本だけで持つ（i 文字目どうしが対応）。
+  検索は bisect による二分探索。str はコードポイント配列そのものなので、
+  追加の配列や dict を作らずに済む。
+- 逆引き: 変換後→変換前（新字体 → 旧字体の全候補）用に、(変換後, 変換前)
+  順に並べ替えた文字列ペアも持つ。プリコンパイル時に計算しておけば実行時の
+  並べ替えも不要になる。
+- str.translate() 用には、実際に出現した文字だけを dict に載せていく
+  遅延テーブルを渡す。変換速度は dict 参照（Cレベル）のまま、メモリは
+  「テキストに出てきた文字種」の数にしか比例しない。
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections.abc import Iterator, Mapping
+
+
+class _LazyTranslation(dict):
+    """str.translate() 用の遅延構築テーブル
+
+    初めて見たコードポイントだけ二分探索で引き、結果を dict にキャッシュする。
+    変換対象外の文字は自分自身へのマッピングとして記録する（None を返すと
+    translate が文字を削除してしまうため）。
+    """
+
+    __slots__ = ("_table",)
+
+    def __init__(self, table: CodepointTable):
+        super().__init__()
+        self._table = table
+
+    def __missing__(self, codepoint: int) -> int:
+        mapped = self._table.get(chr(codepoint))
+        result = codepoint if mapped is None else ord(mapped)
+        self[codepoint] = result
+        return result
+
+
+class CodepointTable:
+    """コードポイント順の文字列ペアで持つ 1文字→1文字 変換表
+
+    使い方:
+        table = CodepointTable.from_mapping({"國": "国", "圀": "国"})
+        table.get("國")            # "国"
+        table.reverse("国")        # ["國", "圀"]
+        "國會".translate(table.translation)
+    """
+
+    __slots__ = ("keys", "values", "rev_keys", "rev_values", "_translation")
+
+    def __init__(self, keys: str, values: str, rev_keys: str, rev_values: str):
+        if not (len(keys) == len(values) == len(rev_keys) == len(rev_values)):
+            raise ValueError("変換表の文字列長が揃っていません")
+        self.keys = keys
+        self.values = values
+        self.rev_keys = rev_keys
+        self.rev_values = rev_values
+        self._translation: _LazyTranslation | None = None
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping[str, str]) -> CodepointTable:
+        """{変換前: 変換後} の辞書から変換表を組み立てる（キーは1文字）"""
+        forward = sorted(mapping.items())
+        backward = sorted((v, k) for k, v in forward)
+        return cls(
+            "".join(k for k, _ in forward),
+            "".join(v for _, v in forward),
+            "".join(v for v, _ in backward),
+            "".join(k for _, k in backward),
+        )
+
+    # ---------- 正引き ----------
+
+    def get(self, char: str, default: str | None = None) -> str | None:
+        """char の変換先を返す（変換対象外なら default）"""
+        i = bisect.bisect_left(self.keys, char)
+        if i < len(self.keys) and self.keys[i] == char:
+            return self.values[i]
+        return default
+
+    def __contains__(self, char: object) -> bool:
+        return isinstance(char, str) and self.get(char) is not None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def items(self) -> Iterator[tuple[str, str]]:
+        """(変換前, 変換後) をコードポイント順に返す"""
+        return zip(self.keys, self.values)
+
+    # ---------- 逆引き ----------
+
+    def reverse(self, char: str) -> list[str]:
+        """char に変換される文字（旧字体・異体字）をすべて返す"""
+        lo = bisect.bisect_left(self.rev_keys, char)
+        hi = bisect.bisect_right(self.rev_keys, char, lo)
+        return list(self.rev_values[lo:hi])
+
+    # ---------- str.translate 用 ----------
+
+    @property
+    def translation(self) -> _LazyTranslation:
+        """str.translate() に渡すテーブル（初回アクセス時に作る）"""
+        if self._translation is None:
+            self._translation = _LazyTranslation(self)
+        return self._translation
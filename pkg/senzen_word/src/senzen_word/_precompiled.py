@@ -0,0 +1,136 @@
+"""
+変換テーブルのプリコンパイル
+
+旧字体テーブル（kanji/data/*.json）と変体仮名テーブル（kana/data/hentaigana.json）は、
+JSON の解析・1文字→1文字のフィルタ・統合を経て変換テーブルになる。
+この処理をプロセスごとに繰り返さないよう、統合済みのテーブルを生成モジュール
+``_tables_generated.py`` に書き出しておき、実行時はそれを import するだけで済ませる
+（Python がバイトコードをキャッシュするため、JSON 解析も ``json`` /
+``importlib.resources`` の import も不要になる）。
+テーブルは CodepointTable の4本の文字列（正引き・逆引き）としてそのまま
+書き出すので、数万件の異体字表でも読み込み時の並べ替えや dict 構築は発生しない。
+
+生成モジュールには元 JSON のダイジェスト（CRC32）を埋め込んでおき、JSON が
+更新されてダイジェストが一致しない場合は「古い」とみなして JSON 読み込みに
+フォールバックする。環境変数 SENZEN_WORD_NO_PRECOMPILED=1 でも強制的に
+JSON 経路を使える（計測・デバッグ用）。
+
+ビルド（JSON を更新したら実行する）:
+    uv run python -m senzen_word._build
+"""
+
+from __future__ import annotations
+
+import os
+import zlib
+
+from senzen_word._codepoint_table import CodepointTable
+
+# 生成モジュールの書式バージョン（書式を変えたら上げる → 旧生成物は自動的に無効）
+FORMAT_VERSION = 2
+
+# テーブル名 → そのテーブルを JSON から組み立てるモジュール
+TABLE_MODULES: dict[str, str] = {
+    "kanji": "senzen_word.kanji.converter",
+    "hentaigana": "senzen_word.kana.hentaigana",
+}
+
+GENERATED_PATH = os.path.join(os.path.dirname(__file__), "_tables_generated.py")
+
+_DISABLE_ENV = "SENZEN_WORD_NO_PRECOMPILED"
+
+
+# ---------- 読み込み ----------
+
+
+def source_digest(data_dir: str, filenames: tuple[str, ...]) -> str | None:
+    """元 JSON ファイル群のダイジェストを返す（読めなければ None）
+
+    JSON を解析せずバイト列の CRC32 だけを取るので、数十KB でも十数μs で済む。
+    ファイル名も混ぜて、統合順序の変更もダイジェストに反映させる。
+    """
+    crc = zlib.crc32(str(FORMAT_VERSION).encode())
+    for name in filenames:
+        try:
+            with open(os.path.join(data_dir, name), "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        crc = zlib.crc32(name.encode("utf-8"), crc)
+        crc = zlib.crc32(data, crc)
+    return f"{crc:08x}"
+
+
+def load(
+    name: str, data_dir: str, filenames: tuple[str, ...]
+) -> CodepointTable | None:
+    """プリコンパイル済みテーブルを返す
+
+    生成モジュールが無い・古い・無効化されている場合は None を返し、
+    呼び出し側は JSON 経路にフォールバックする。
+    """
+    if os.environ.get(_DISABLE_ENV):
+        return None
+    try:
+        from senzen_word import _tables_generated as generated
+    except ImportError:
+        return None
+    if getattr(generated, "FORMAT_VERSION", None) != FORMAT_VERSION:
+        return None
+
+    entry = generated.TABLES.get(name)
+    if entry is None:
+        return None
+    digest, *strings = entry
+    if digest != source_digest(data_dir, filenames):
+        return None
+    return CodepointTable(*strings)
+
+
+# ---------- ビルド ----------
+
+
+def render(tables: dict[str, tuple[str, CodepointTable]]) -> str:
+    """生成モジュールのソースを組み立てる
+
+    Args:
+        tables: {テーブル名: (ダイジェスト, 変換表)}
+    """
+    lines = [
+        '"""',
+        "プリコンパイル済み変換テーブル（自動生成・手で編集しないこと）",
+        "",
+        "再生成: uv run python -m senzen_word._build",
+        '"""',
+        "",
+        f"FORMAT_VERSION = {FORMAT_VERSION}",
+        "",
+        "# {名前: (ダイジェスト, 変換前, 変換後, 逆引き変換後, 逆引き変換前)}",
+        "TABLES: dict[str, tuple[str, str, str, str, str]] = {",
+    ]
+    for name, (digest, table) in tables.items():
+        lines.append(f"    {name!r}: (")
+        lines.append(f"        {digest!r},")
+        for s in (table.keys, table.values, table.rev_keys, table.rev_values):
+            lines.append(f"        {s!r},")
+        lines.append("    ),")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def build(path: str = GENERATED_PATH) -> str:
+    """全テーブルを JSON から組み立て、生成モジュールに書き出す"""
+    import importlib
+
+    tables: dict[str, tuple[str, CodepointTable]] = {}
+    for name, module_name in TABLE_MODULES.items():
+        module = importlib.import_module(module_name)
+        digest = source_digest(module._DATA_DIR, module._DATA_FILES)
+        if digest is None:
+            raise FileNotFoundError(f"{name} の元データを読めません: {module._DATA_DIR}")
+        table = CodepointTable.from_mapping(module._load_from_json())
+        tables[name] = (digest, table)
+
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(render(tables))
+    return path
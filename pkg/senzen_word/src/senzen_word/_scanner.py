@@ -0,0 +1,187 @@
+"""
+全カテゴリ一括スキャナ
+
+find() は旧字体・変体仮名・歴史的仮名遣い・カタカナ助詞の4種を検出する。
+各 find_* を順に呼ぶと、パターンごとの text.find ループ（約100回）と正規表現
+（18本）でテキストを何度も走査し、最後に全体をソートすることになる。
+
+ここでは全パターンを1本のトライにまとめ、テキストを先頭から1回だけ走査する。
+- 1文字目の索引は「出現した文字だけ」を遅延構築する dict で、旧字体・変体仮名の
+  大きな変換表（CodepointTable）もここに合流させる（表全体はコピーしない）。
+- 2文字目以降は通常のトライをたどる（パターンは高々3文字）。
+- 同じ位置で複数ヒットした場合は (カテゴリ順, パターン定義順) に並べるので、
+  結果は従来の「カテゴリごとに検出 → 位置で安定ソート」と完全に一致する。
+- カタカナ助詞の前後判定（直前・直後がカタカナでない）や、同一パターンの
+  重なりを数えない規則も従来の正規表現・find ループと同じに保つ。
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+
+from senzen_word.kana import hentaigana
+from senzen_word.kana.historical import KANA_MAPPINGS
+from senzen_word.kana.katakana_particle import COMPOUND_PARTICLES, SINGLE_PARTICLES
+from senzen_word.kanji import converter
+
+# find() のカテゴリ（この順が同一位置での並び順）
+CATEGORIES: tuple[str, ...] = ("kanji", "hentaigana", "kana", "particle")
+
+# 前後判定で使うカタカナ（katakana_particle._KATA と同じ範囲: ァ-ヶ + ー）
+_KATAKANA = frozenset(chr(c) for c in range(0x30A1, 0x30F7)) | {"ー"}
+
+# 出力条件
+_ALWAYS = 0
+_NOT_AFTER_KATAKANA = 1  # 直前がカタカナでない（複合助詞）
+_ISOLATED = 2  # 直前・直後ともカタカナでない（単一助詞）
+
+
+class _Node:
+    """トライのノード。outputs はこのノードで終わるパターン"""
+
+    __slots__ = ("outputs", "children", "simple")
+
+    def __init__(self) -> None:
+        # (カテゴリ順, パターンID, 変換前, 変換後, カテゴリ, 出力条件)
+        self.outputs: list[tuple[int, int, str, str, str, int]] = []
+        self.children: dict[str, _Node] = {}
+        # 1文字表だけのノード（旧字体など）は判定不要なので出力を直接持つ
+        self.simple: tuple[str, str, str] | None = None
+
+
+class _RootIndex(dict):
+    """1文字目 → ノード の遅延索引
+
+    初めて見た文字について、トライの1段目と1文字変換表（旧字体・変体仮名）を
+    合成したノードを作ってキャッシュする。どれにも該当しない文字は None。
+    """
+
+    def __init__(self, scanner: Scanner):
+        super().__init__()
+        self._scanner = scanner
+
+    def __missing__(self, char: str) -> _Node | None:
+        node = self._scanner._build_root(char)
+        self[char] = node
+        return node
+
+
+class Scanner:
+    """指定カテゴリの全パターンを1パスで検出するスキャナ"""
+
+    def __init__(self, categories: Iterable[str] = CATEGORIES):
+        self.categories = tuple(c for c in CATEGORIES if c in set(categories))
+        self._trie = _Node()
+        self._single_tables = []  # [(カテゴリ順, カテゴリ, CodepointTable)]
+        self._pattern_count = 0
+
+        for rank, category in enumerate(CATEGORIES):
+            if category not in self.categories:
+                continue
+            if category == "kanji":
+                self._single_tables.append((rank, category, converter._ensure_initialized()))
+            elif category == "hentaigana":
+                self._single_tables.append((rank, category, hentaigana._ensure_initialized()))
+            elif category == "kana":
+                for old, new in KANA_MAPPINGS:
+                    self._add(old, new, rank, category, _ALWAYS)
+            elif category == "particle":
+                for kata, hira in COMPOUND_PARTICLES:
+                    self._add(kata, hira, rank, category, _NOT_AFTER_KATAKANA)
+                for kata, hira in SINGLE_PARTICLES.items():
+                    self._add(kata, hira, rank, category, _ISOLATED)
+
+        self._roots = _RootIndex(self)
+
+    def _add(self, pattern: str, replacement: str, rank: int, category: str, rule: int) -> None:
+        node = self._trie
+        for char in pattern:
+            node = node.children.setdefault(char, _Node())
+        node.outputs.append((rank, self._pattern_count, pattern, replacement, category, rule))
+        self._pattern_count += 1
+
+    def _build_root(self, char: str) -> _Node | None:
+        trie_node = self._trie.children.get(char)
+        singles = []
+        for rank, category, table in self._single_tables:
+            mapped = table.get(char)
+            if mapped is not None:
+                # 1文字表はパターンIDを使わない（重なりようがない）ので -1
+                singles.append((rank, -1, char, mapped, category, _ALWAYS))
+        if not singles:
+            return trie_node
+        node = _Node()
+        node.outputs = sorted(singles + (trie_node.outputs if trie_node else []))
+        if trie_node is not None:
+            node.children = trie_node.children
+        elif len(singles) == 1:
+            _, _, old, new, category, _ = singles[0]
+            node.simple = (old, new, category)
+        return node
+
+    def scan(self, text: str) -> list[tuple[str, str, int, str]]:
+        """(変換前, 変換後, 出現位置, カテゴリ) を位置順に返す"""
+        found: list[tuple[str, str, int, str]] = []
+        roots = self._roots
+        n = len(text)
+        last_end: dict[int, int] = {}  # パターンID → 直前の一致の終端
+
+        for i, char in enumerate(text):
+            node = roots[char]
+            if node is None:
+                continue
+            if node.simple is not None:
+                old, new, category = node.simple
+                found.append((old, new, i, category))
+                continue
+
+            hits = []
+            end = i + 1
+            while True:
+                for out in node.outputs:
+                    rank, pid, old, new, category, rule = out
+                    if rule != _ALWAYS:
+                        if i > 0 and text[i - 1] in _KATAKANA:
+                            continue
+                        if rule == _ISOLATED and end < n and text[end] in _KATAKANA:
+                            continue
+                    if pid >= 0:
+                        if last_end.get(pid, 0) > i:
+                            continue
+                        last_end[pid] = end
+                    hits.append(out)
+                if not node.children or end >= n:
+                    break
+                node = node.children.get(text[end])
+                if node is None:
+                    break
+                end += 1
+
+            if len(hits) > 1:
+                hits.sort()
+            for _, _, old, new, category, _ in hits:
+                found.append((old, new, i, category))
+        return found
+
+
+# ---------- カテゴリ組ごとのキャッシュ ----------
+
+_SCANNERS: dict[tuple[str, ...], Scanner] = {}
+_LOCK = threading.Lock()
+
+
+def get_scanner(categories: Iterable[str] | None = None) -> Scanner:
+    """カテゴリの組み合わせごとに1つだけスキャナを作って使い回す"""
+    wanted = set(CATEGORIES if categories is None else categories)
+    unknown = wanted - set(CATEGORIES)
+    if unknown:
+        raise ValueError(f"未知のカテゴリ: {sorted(unknown)}")
+    key = tuple(c for c in CATEGORIES if c in wanted)
+    scanner = _SCANNERS.get(key)
+    if scanner is None:
+        with _LOCK:
+            scanner = _SCANNERS.get(key)
+            if scanner is None:
+                scanner = _SCANNERS[key] = Scanner(key)
+    return scanner
@@ -0,0 +1,25 @@
+"""
+プリコンパイル済み変換テーブル（自動生成・手で編集しないこと）
+
+再生成: uv run python -m senzen_word._build
+"""
+
+FORMAT_VERSION = 2
+
+# {名前: (ダイジェスト, 変換前, 変換後, 逆引き変換後, 逆引き変換前)}
+TABLES: dict[str, tuple[str, str, str, str, str]] = {
+    'kanji': (
+        '2c099223',
+        '乘亂亞佛來倂假傳僞價儉兒兩册剩劍劑勞勳勵勸區卷卽參單嚴囑圈國圍圓圖團堯增墮壓壘壞壤壯壹壽奧奬孃學寢實寫寬寶將專對屆屬峽嶽巖巢帶廢廣廳彈彌徑從徵德恆惠惡惱愼慘應懷戀戰戲戾拂拔拜挾插揭搖搜擇擊擔據擧擴攝收效敍敕數斷晉晚晝曆曉曾會條棧榮槇槪樂樓樞樣橫檢櫻權歐歡步歷歸殘殼毆每氣沒涉淚淨淺渴溪溫滯滿潛澁澤濕濟濱瀧瀨灣燈燒營爐爭爲犧狀狹獨獵獸獻瑤瓣甁畫當疊瘦癡發盜盡眞硏碎祕祿禪禮稅稱稻穗穩穰竊竝粹絲經綠緖緣縣縱總繩繪繼續纖缺罐聰聲聽肅腦膽臟臺與舊舍舖艷莊莖萬薰藏藝藥處虛號螢蟲蠶蠻衞裝襃覺覽觀觸謠證譯譽讀變讓豐豫貳賣賴贊踐輕轉辨辭辯遙遞遲邊郞鄕醉醫釀釋錄錢鍊鎭鐵鑄鑛關陷隨險隱隸雙雜霸靈靜顏顯飜飮餘餠騷驅驗驛髓體髙髮鬭鷄鹽麥麵黃黑默點黨齊齋齒齡龍龜欄廊朗虜殺類隆塚﨑神祥福諸都侮僧免勉勤卑喝嘆器塀墨層悔慨憎懲敏既暑梅海漢煮碑社祉祈祖祝禍穀突節練繁署者臭著褐視謁謹賓贈逸難響頻𠮷',
+        '乗乱亜仏来併仮伝偽価倹児両冊剰剣剤労勲励勧区巻即参単厳嘱圏国囲円図団尭増堕圧塁壊壌壮壱寿奥奨嬢学寝実写寛宝将専対届属峡岳巌巣帯廃広庁弾弥径従徴徳恒恵悪悩慎惨応懐恋戦戯戻払抜拝挟挿掲揺捜択撃担拠挙拡摂収効叙勅数断晋晩昼暦暁曽会条桟栄槙概楽楼枢様横検桜権欧歓歩歴帰残殻殴毎気没渉涙浄浅渇渓温滞満潜渋沢湿済浜滝瀬湾灯焼営炉争為犠状狭独猟獣献瑶弁瓶画当畳痩痴発盗尽真研砕秘禄禅礼税称稲穂穏穣窃並粋糸経緑緒縁県縦総縄絵継続繊欠缶聡声聴粛脳胆臓台与旧舎舗艶荘茎万薫蔵芸薬処虚号蛍虫蚕蛮衛装褒覚覧観触謡証訳誉読変譲豊予弐売頼賛践軽転弁辞弁遥逓遅辺郎郷酔医醸釈録銭錬鎮鉄鋳鉱関陥随険隠隷双雑覇霊静顔顕翻飲余餅騒駆験駅髄体高髪闘鶏塩麦麺黄黒黙点党斉斎歯齢竜亀欄廊朗虜殺類隆塚崎神祥福諸都侮僧免勉勤卑喝嘆器塀墨層悔慨憎懲敏既暑梅海漢煮碑社祉祈祖祝禍穀突節練繁署者臭著褐視謁謹賓贈逸難響頻吉',
+        '万与両並乗乱亀予争亜仏仮会伝体余併価侮倹偽僧免児党円冊写処剣剤剰励労効勅勉勤勧勲区医卑単即厳参双収叙台号吉喝営嘆嘱器団囲図国圏圧堕塀塁塚塩増墨壊壌壮声壱売変奥奨嬢学宝実寛寝対寿専将尭尽届属層岳峡崎巌巣巻帯帰庁広廃廊弁弁弁弐弥弾当径従徳徴応恋恒恵悔悩悪惨慎慨憎懐懲戦戯戻払抜択担拝拠拡挙挟挿捜掲揺摂撃敏数斉斎断既旧昼晋晩暁暑暦曽朗条来枢栄桜桟梅検楼楽概様槙権横欄欠欧歓歩歯歴残殴殺殻毎気没沢浄浅浜海涙渇済渉渋渓温湾湿満滝滞漢潜瀬灯炉点為焼煮犠状独狭猟献獣瑶瓶画畳痩痴発盗県真研砕碑礼社祈祉祖祝神祥禄禅禍福秘称税稲穀穂穏穣突窃竜節粋粛糸経絵継続総緑緒練縁縄縦繁繊缶署翻者聡聴胆脳臓臭舎舗艶芸茎荘著蔵薫薬虚虜虫蚕蛍蛮衛装褐褒覇視覚覧観触訳証誉読諸謁謡謹譲豊賓賛贈践転軽辞辺逓逸遅遥郎郷都酔醸釈鉄鉱銭鋳錬録鎮関闘陥険隆随隠隷雑難霊静響頻頼顔顕類飲餅駅駆騒験髄高髪鶏麦麺黄黒黙齢',
+        '萬與兩竝乘亂龜豫爭亞佛假會傳體餘倂價侮儉僞僧免兒黨圓册寫處劍劑剩勵勞效敕勉勤勸勳區醫卑單卽嚴參雙收敍臺號𠮷喝營嘆囑器團圍圖國圈壓墮塀壘塚鹽增墨壞壤壯聲壹賣變奧奬孃學寶實寬寢對壽專將堯盡屆屬層嶽峽﨑巖巢卷帶歸廳廣廢廊瓣辨辯貳彌彈當徑從德徵應戀恆惠悔惱惡慘愼慨憎懷懲戰戲戾拂拔擇擔拜據擴擧挾插搜揭搖攝擊敏數齊齋斷既舊晝晉晚曉暑曆曾朗條來樞榮櫻棧梅檢樓樂槪樣槇權橫欄缺歐歡步齒歷殘毆殺殼每氣沒澤淨淺濱海淚渴濟涉澁溪溫灣濕滿瀧滯漢潛瀨燈爐點爲燒煮犧狀獨狹獵獻獸瑤甁畫疊瘦癡發盜縣眞硏碎碑禮社祈祉祖祝神祥祿禪禍福祕稱稅稻穀穗穩穰突竊龍節粹肅絲經繪繼續總綠緖練緣繩縱繁纖罐署飜者聰聽膽腦臟臭舍舖艷藝莖莊著藏薰藥虛虜蟲蠶螢蠻衞裝褐襃霸視覺覽觀觸譯證譽讀諸謁謠謹讓豐賓贊贈踐轉輕辭邊遞逸遲遙郞鄕都醉釀釋鐵鑛錢鑄鍊錄鎭關鬭陷險隆隨隱隸雜難靈靜響頻賴顏顯類飮餠驛驅騷驗髓髙髮鷄麥麵黃黑默齡',
+    ),
+    'hentaigana': (
+        '6a87bd5e',
+        '𛀂𛀃𛀄𛀅𛀆𛀇𛀈𛀉𛀊𛀋𛀌𛀍𛀎𛀏𛀐𛀑𛀒𛀓𛀔𛀕𛀖𛀗𛀘𛀙𛀚𛀛𛀜𛀝𛀞𛀟𛀠𛀡𛀢𛀣𛀤𛀥𛀦𛀧𛀨𛀩𛀪𛀫𛀬𛀭𛀮𛀯𛀰𛀱𛀲𛀳𛀴𛀵𛀶𛀷𛀸𛀹𛀺𛀻𛀼𛀽𛀾𛀿𛁀𛁁𛁂𛁃𛁄𛁅𛁆𛁇𛁈𛁉𛁊𛁋𛁌𛁍𛁎𛁏𛁐𛁑𛁒𛁓𛁔𛁕𛁖𛁗𛁘𛁙𛁚𛁛𛁜𛁝𛁞𛁟𛁠𛁡𛁢𛁣𛁤𛁥𛁦𛁧𛁨𛁩𛁪𛁫𛁬𛁭𛁮𛁯𛁰𛁱𛁲𛁳𛁴𛁵𛁶𛁷𛁸𛁹𛁺𛁻𛁼𛁽𛁾𛁿𛂀𛂁𛂂𛂃𛂄𛂅𛂆𛂇𛂈𛂉𛂊𛂋𛂌𛂍𛂎𛂏𛂐𛂑𛂒𛂓𛂔𛂕𛂖𛂗𛂘𛂙𛂚𛂛𛂜𛂝𛂞𛂟𛂠𛂡𛂢𛂣𛂤𛂥𛂦𛂧𛂨𛂩𛂪𛂫𛂬𛂭𛂮𛂯𛂰𛂱𛂲𛂳𛂴𛂵𛂶𛂷𛂸𛂹𛂺𛂻𛂼𛂽𛂾𛂿𛃀𛃁𛃂𛃃𛃄𛃅𛃆𛃇𛃈𛃉𛃊𛃋𛃌𛃍𛃎𛃏𛃐𛃑𛃒𛃓𛃔𛃕𛃖𛃗𛃘𛃙𛃚𛃛𛃜𛃝𛃞𛃟𛃠𛃡𛃢𛃣𛃤𛃥𛃦𛄁𛄂𛄃𛄄𛄅𛄆𛄇𛄈𛄉𛄊𛄋𛄌𛄍𛄎𛄏𛄐𛄑𛄒𛄓𛄔𛄕𛄖𛄗𛄘𛄙𛄚𛄛𛄜𛄝𛄞',
+        'いいいいうううええええええおおおおかかかかかかかきききききききくくくくけけけけけけここここここさささささささししししししししすすすすすせせせせそそそそたたたたちちちちちちつつつつつてててててととととととななななななににににににぬぬぬねねねねののののののはははははははははひひひひひふふふふへへへへほほほほほまままままままみみみみむむむむめめめめももももやややややゆゆゆゆよよよよよよらららららりりりりりりるるるるるれれれれろろろろわわわわいいえををををををんええここししすすとととののははひひふふへむむりりりろろろいえ',
+        'いいいいいいいうううええええええええええおおおおかかかかかかかきききききききくくくくけけけけけけここここここここさささささささししししししししししすすすすすすすせせせせそそそそたたたたちちちちちちつつつつつてててててとととととととととななななななににににににぬぬぬねねねねののののののののはははははははははははひひひひひひひふふふふふふへへへへへほほほほほまままままままみみみみむむむむむむめめめめももももやややややゆゆゆゆよよよよよよらららららりりりりりりりりりるるるるるれれれれろろろろろろろわわわわををををををん',
+        '𛀂𛀃𛀄𛀅𛃝𛃞𛄝𛀆𛀇𛀈𛀉𛀊𛀋𛀌𛀍𛀎𛃟𛄁𛄂𛄞𛀏𛀐𛀑𛀒𛀓𛀔𛀕𛀖𛀗𛀘𛀙𛀚𛀛𛀜𛀝𛀞𛀟𛀠𛀡𛀢𛀣𛀤𛀥𛀦𛀧𛀨𛀩𛀪𛀫𛀬𛀭𛀮𛀯𛀰𛄃𛄄𛀱𛀲𛀳𛀴𛀵𛀶𛀷𛀸𛀹𛀺𛀻𛀼𛀽𛀾𛀿𛄅𛄆𛁀𛁁𛁂𛁃𛁄𛄇𛄈𛁅𛁆𛁇𛁈𛁉𛁊𛁋𛁌𛁍𛁎𛁏𛁐𛁑𛁒𛁓𛁔𛁕𛁖𛁗𛁘𛁙𛁚𛁛𛁜𛁝𛁞𛁟𛁠𛁡𛁢𛁣𛁤𛁥𛁦𛄉𛄊𛄋𛁧𛁨𛁩𛁪𛁫𛁬𛁭𛁮𛁯𛁰𛁱𛁲𛁳𛁴𛁵𛁶𛁷𛁸𛁹𛁺𛁻𛁼𛁽𛁾𛁿𛄌𛄍𛂀𛂁𛂂𛂃𛂄𛂅𛂆𛂇𛂈𛄎𛄏𛂉𛂊𛂋𛂌𛂍𛄐𛄑𛂎𛂏𛂐𛂑𛄒𛄓𛂒𛂓𛂔𛂕𛄔𛂖𛂗𛂘𛂙𛂚𛂛𛂜𛂝𛂞𛂟𛂠𛂡𛂢𛂣𛂤𛂥𛂦𛂧𛂨𛂩𛄕𛄖𛂪𛂫𛂬𛂭𛂮𛂯𛂰𛂱𛂲𛂳𛂴𛂵𛂶𛂷𛂸𛂹𛂺𛂻𛂼𛂽𛂾𛂿𛃀𛃁𛃂𛃃𛃄𛃅𛃆𛃇𛃈𛃉𛃊𛃋𛄗𛄘𛄙𛃌𛃍𛃎𛃏𛃐𛃑𛃒𛃓𛃔𛃕𛃖𛃗𛃘𛄚𛄛𛄜𛃙𛃚𛃛𛃜𛃠𛃡𛃢𛃣𛃤𛃥𛃦',
+    ),
+}
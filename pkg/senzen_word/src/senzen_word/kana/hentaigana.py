@@ -12,30 +12,42 @@ Unicode 10.0 (2017) で追加された変体仮名（Hentaigana）ブロック
 対応する現代ひらがなにマッピングする。
 
 データソース: hentaigana.json（Unicode NamesList準拠）
+通常はプリコンパイル済みの生成モジュール（senzen_word._precompiled 参照）から
+読み込み、生成物が無い・古い場合だけJSONを解析する。
 """
 
 from __future__ import annotations
 
-import json
+import os
 import threading
-from importlib import resources
-from typing import Mapping
+
+from senzen_word import _precompiled
+from senzen_word._codepoint_table import CodepointTable
+
+
+# ---------- データファイル ----------
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+_DATA_FILES = ("hentaigana.json",)
 
 
 # ---------- モジュールレベルキャッシュ ----------
 
-_TABLE: Mapping[int, int] | None = None
-_MAP: dict[str, str] | None = None
+_TABLE: CodepointTable | None = None
 _INIT_LOCK = threading.Lock()
 
 
 # ---------- データ読み込み ----------
 
 
-def _load_hentaigana_table() -> dict[str, str]:
+def _load_from_json() -> dict[str, str]:
     """data/hentaigana.json を読み込む"""
+    # JSON経路はフォールバック専用なので、import コストもここで払う
+    import json
+    from importlib import resources
+
     data_dir = resources.files("senzen_word.kana") / "data"
-    resource = data_dir / "hentaigana.json"
+    resource = data_dir / _DATA_FILES[0]
     content = resource.read_text(encoding="utf-8")
     raw = json.loads(content)
 
@@ -47,16 +59,23 @@ def _load_hentaigana_table() -> dict[str, str]:
     }
 
 
-def _ensure_initialized() -> None:
-    """変換テーブルを初期化する（スレッドセーフ）"""
-    global _TABLE, _MAP
+def _load_hentaigana_table() -> CodepointTable:
+    """変換テーブルを返す（プリコンパイル済みを優先し、無ければJSON）"""
+    table = _precompiled.load("hentaigana", _DATA_DIR, _DATA_FILES)
+    if table is None:
+        table = CodepointTable.from_mapping(_load_from_json())
+    return table
+
+
+def _ensure_initialized() -> CodepointTable:
+    """変換テーブルを初期化して返す（スレッドセーフ）"""
+    global _TABLE
     if _TABLE is not None:
-        return
+        return _TABLE
     with _INIT_LOCK:
-        if _TABLE is not None:
-            return
-        _MAP = _load_hentaigana_table()
-        _TABLE = {ord(k): ord(v) for k, v in _MAP.items()}
+        if _TABLE is None:
+            _TABLE = _load_hentaigana_table()
+        return _TABLE
 
 
 # ---------- 公開関数 ----------
@@ -74,8 +93,7 @@ def convert_hentaigana(text: str) -> str:
     """
     if not isinstance(text, str):
         raise TypeError("convert_hentaigana() expects a str input")
-    _ensure_initialized()
-    return text.translate(_TABLE or {})
+    return text.translate(_ensure_initialized().translation)
 
 
 def find_hentaigana(text: str) -> list[tuple[str, str, int]]:
@@ -88,11 +106,12 @@ def find_hentaigana(text: str) -> list[tuple[str, str, int]]:
     Returns:
         (変体仮名, 現代ひらがな, 出現位置) のリスト
     """
-    _ensure_initialized()
-    assert _MAP is not None
+    translation = _ensure_initialized().translation
 
     found = []
     for i, char in enumerate(text):
-        if char in _MAP:
-            found.append((char, _MAP[char], i))
+        code = ord(char)
+        mapped = translation[code]
+        if mapped != code:
+            found.append((char, chr(mapped), i))
     return found
@@ -4,6 +4,11 @@
 旧字体→新字体、異体字の正規化を行う。
 """
 
-from senzen_word.kanji.converter import convert_old_kanji, find_old_kanji, get_kanji_table
+from senzen_word.kanji.converter import (
+    convert_old_kanji,
+    find_old_kanji,
+    get_kanji_table,
+    get_old_forms,
+)
 
-__all__ = ["convert_old_kanji", "find_old_kanji", "get_kanji_table"]
+__all__ = ["convert_old_kanji", "find_old_kanji", "get_kanji_table", "get_old_forms"]
@@ -2,7 +2,12 @@
 旧字体 → 新字体 変換エンジン
 
 str.translate() を使ったC言語レベルの高速変換。
-変換テーブルはJSONファイルから遅延ロードし、初回のみ構築してキャッシュする。
+変換テーブルはコードポイント順の文字列で持つコンパクトな表現（CodepointTable）で、
+Unihan 規模（数万件）の異体字表を載せてもメモリ・変換速度がほぼ変わらない。
+新字体→旧字体の逆引きも同じ表で引ける。
+変換テーブルは初回のみ構築してキャッシュする。通常はプリコンパイル済みの
+生成モジュール（senzen_word._precompiled 参照）から読み込み、生成物が無い・
+古い場合だけJSONファイルを解析する。
 
 データソース:
   - joyo_old_new.json: 常用漢字の旧字体→新字体（文化庁常用漢字表準拠）
@@ -12,16 +17,23 @@ str.translate() を使ったC言語レベルの高速変換。
 
 from __future__ import annotations
 
-import json
+import os
 import threading
-from importlib import resources
-from typing import Mapping
+
+from senzen_word import _precompiled
+from senzen_word._codepoint_table import CodepointTable
+
+
+# ---------- データファイル ----------
+
+_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+# 後ろのファイルほど優先（異体字が最後に上書きする）
+_DATA_FILES = ("joyo_old_new.json", "jinmei.json", "variants.json")
 
 
 # ---------- モジュールレベルキャッシュ ----------
 
-_TABLE: Mapping[int, int] | None = None
-_MAP: dict[str, str] | None = None
+_TABLE: CodepointTable | None = None
 _INIT_LOCK = threading.Lock()
 
 
@@ -30,6 +42,10 @@ _INIT_LOCK = threading.Lock()
 
 def _load_json(filename: str) -> dict[str, str]:
     """data/ ディレクトリからJSONファイルを読み込む"""
+    # JSON経路はフォールバック専用なので、import コストもここで払う
+    import json
+    from importlib import resources
+
     data_dir = resources.files("senzen_word.kanji") / "data"
     resource = data_dir / filename
     content = resource.read_text(encoding="utf-8")
@@ -43,30 +59,35 @@ def _load_json(filename: str) -> dict[str, str]:
     }
 
 
-def _load_all_tables() -> dict[str, str]:
-    """全JSONファイルを読み込んで統合する"""
+def _load_from_json() -> dict[str, str]:
+    """全JSONファイルを読み込んで統合する
+
+    常用漢字（メインテーブル）→ 人名用漢字 → 異体字 の順に重ね、
+    後のファイルのエントリで上書きする。
+    """
     merged: dict[str, str] = {}
+    for filename in _DATA_FILES:
+        merged.update(_load_json(filename))
+    return merged
 
-    # 常用漢字（メインテーブル）
-    merged.update(_load_json("joyo_old_new.json"))
-    # 人名用漢字
-    merged.update(_load_json("jinmei.json"))
-    # 異体字（最後に上書きで優先）
-    merged.update(_load_json("variants.json"))
 
-    return merged
+def _load_all_tables() -> CodepointTable:
+    """統合済みテーブルを返す（プリコンパイル済みを優先し、無ければJSON）"""
+    table = _precompiled.load("kanji", _DATA_DIR, _DATA_FILES)
+    if table is None:
+        table = CodepointTable.from_mapping(_load_from_json())
+    return table
 
 
-def _ensure_initialized() -> None:
-    """変換テーブルを初期化する（スレッドセーフ）"""
-    global _TABLE, _MAP
+def _ensure_initialized() -> CodepointTable:
+    """変換テーブルを初期化して返す（スレッドセーフ）"""
+    global _TABLE
     if _TABLE is not None:
-        return
+        return _TABLE
     with _INIT_LOCK:
-        if _TABLE is not None:
-            return
-        _MAP = _load_all_tables()
-        _TABLE = {ord(k): ord(v) for k, v in _MAP.items()}
+        if _TABLE is None:
+            _TABLE = _load_all_tables()
+        return _TABLE
 
 
 # ---------- 公開関数 ----------
@@ -87,8 +108,7 @@ def convert_old_kanji(text: str) -> str:
     """
     if not isinstance(text, str):
         raise TypeError("convert_old_kanji() expects a str input")
-    _ensure_initialized()
-    return text.translate(_TABLE or {})
+    return text.translate(_ensure_initialized().translation)
 
 
 def find_old_kanji(text: str) -> list[tuple[str, str, int]]:
@@ -101,13 +121,14 @@ def find_old_kanji(text: str) -> list[tuple[str, str, int]]:
     Returns:
         (旧字体, 新字体, 出現位置) のリスト
     """
-    _ensure_initialized()
-    assert _MAP is not None
+    translation = _ensure_initialized().translation
 
     found = []
     for i, char in enumerate(text):
-        if char in _MAP:
-            found.append((char, _MAP[char], i))
+        code = ord(char)
+        mapped = translation[code]
+        if mapped != code:
+            found.append((char, chr(mapped), i))
     return found
 
 
@@ -118,6 +139,20 @@ def get_kanji_table() -> dict[str, str]:
     Returns:
         {旧字体: 新字体, ...} の辞書
     """
-    _ensure_initialized()
-    assert _MAP is not None
-    return dict(_MAP)
+    return dict(_ensure_initialized().items())
+
+
+def get_old_forms(char: str) -> list[str]:
+    """
+    新字体から、それに変換される旧字体・異体字をすべて返す（逆引き）
+
+    例: get_old_forms("国") → ["國", "圀", ...]（表に載っているもの）
+    二分探索で引くため、表の大きさによらず O(log n)。
+
+    Args:
+        char: 新字体（1文字）
+
+    Returns:
+        旧字体・異体字のリスト（コードポイント順。無ければ空リスト）
+    """
+    return _ensure_initialized().reverse(char)
@@ -0,0 +1,71 @@
+"""コンパクト変換表（CodepointTable）と逆引きのテスト"""
+
+import tracemalloc
+
+from senzen_word._codepoint_table import CodepointTable
+from senzen_word.kanji import convert_old_kanji, get_old_forms
+
+
+def _synthetic_mapping(size: int) -> dict[str, str]:
+    """CJK拡張B（U+20000〜）の文字を URO の文字へ割り当てた人工的な異体字表"""
+    return {chr(0x20000 + i): chr(0x4E00 + i % 20000) for i in range(size)}
+
+
+class TestCodepointTable:
+    def test_get(self):
+        table = CodepointTable.from_mapping({"國": "国", "會": "会"})
+        assert table.get("國") == "国"
+        assert table.get("国") is None
+        assert "會" in table
+        assert "会" not in table
+        assert len(table) == 2
+
+    def test_reverse_returns_all_old_forms(self):
+        table = CodepointTable.from_mapping({"國": "国", "圀": "国", "會": "会"})
+        assert table.reverse("国") == ["圀", "國"]  # コードポイント順
+        assert table.reverse("会") == ["會"]
+        assert table.reverse("山") == []
+
+    def test_translate_keeps_unmapped_chars(self):
+        """変換対象外の文字は削除されずにそのまま残る"""
+        table = CodepointTable.from_mapping({"國": "国"})
+        assert "大日本帝國 abc".translate(table.translation) == "大日本帝国 abc"
+
+    def test_translation_caches_only_seen_chars(self):
+        table = CodepointTable.from_mapping(_synthetic_mapping(50_000))
+        "あいう\U00020001".translate(table.translation)
+        assert len(table.translation) == 4
+
+    def test_large_table(self):
+        mapping = _synthetic_mapping(60_000)
+        table = CodepointTable.from_mapping(mapping)
+        text = "".join(list(mapping)[::997])
+        expected = "".join(mapping[c] for c in text)
+        assert text.translate(table.translation) == expected
+        assert len(table.reverse(chr(0x4E00))) == 3  # i = 0, 20000, 40000
+
+    def test_memory_stays_small(self):
+        """6万件でも文字列4本ぶん（各 4 バイト/文字）程度に収まる"""
+        mapping = _synthetic_mapping(60_000)
+        tracemalloc.start()
+        table = CodepointTable.from_mapping(mapping)
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(table) == 60_000
+        assert current < 4 * 60_000 * 4 * 1.5
+
+
+class TestGetOldForms:
+    def test_joyo(self):
+        assert "國" in get_old_forms("国")
+
+    def test_multiple_old_forms(self):
+        """「弁」の3旧字体"""
+        assert set(get_old_forms("弁")) >= {"辨", "瓣", "辯"}
+
+    def test_round_trip(self):
+        for old in get_old_forms("学"):
+            assert convert_old_kanji(old) == "学"
+
+    def test_modern_only_char(self):
+        assert get_old_forms("山") == []
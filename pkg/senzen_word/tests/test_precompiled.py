@@ -0,0 +1,62 @@
+"""プリコンパイル済み変換テーブルのテスト"""
+
+from senzen_word import _precompiled
+from senzen_word._codepoint_table import CodepointTable
+from senzen_word.kana import hentaigana
+from senzen_word.kanji import converter
+
+
+class TestGeneratedTables:
+    """コミット済みの生成モジュールが最新の JSON と一致すること"""
+
+    def test_kanji_is_fresh(self):
+        """JSON を更新したら `python -m senzen_word._build` で再生成すること"""
+        table = _precompiled.load("kanji", converter._DATA_DIR, converter._DATA_FILES)
+        assert table is not None
+        assert dict(table.items()) == converter._load_from_json()
+
+    def test_hentaigana_is_fresh(self):
+        table = _precompiled.load(
+            "hentaigana", hentaigana._DATA_DIR, hentaigana._DATA_FILES
+        )
+        assert table is not None
+        assert dict(table.items()) == hentaigana._load_from_json()
+
+    def test_sorted_by_codepoint(self):
+        table = _precompiled.load("kanji", converter._DATA_DIR, converter._DATA_FILES)
+        assert list(table.keys) == sorted(table.keys)
+        assert list(table.rev_keys) == sorted(table.rev_keys)
+
+
+class TestFallback:
+    """生成物が使えないときは None を返して JSON 経路に任せる"""
+
+    def test_stale_digest(self, monkeypatch):
+        monkeypatch.setattr(_precompiled, "source_digest", lambda *_: "00000000")
+        assert _precompiled.load("kanji", converter._DATA_DIR, converter._DATA_FILES) is None
+
+    def test_missing_source(self, tmp_path):
+        assert _precompiled.load("kanji", str(tmp_path), converter._DATA_FILES) is None
+
+    def test_disabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("SENZEN_WORD_NO_PRECOMPILED", "1")
+        assert _precompiled.load("kanji", converter._DATA_DIR, converter._DATA_FILES) is None
+
+    def test_json_path_gives_same_table(self, monkeypatch):
+        """フォールバック経路でも同じテーブルになる"""
+        precompiled = converter._load_all_tables()
+        monkeypatch.setenv("SENZEN_WORD_NO_PRECOMPILED", "1")
+        fallback = converter._load_all_tables()
+        assert list(fallback.items()) == list(precompiled.items())
+        assert fallback.rev_values == precompiled.rev_values
+
+
+class TestRender:
+    def test_roundtrip(self):
+        """render() の出力をそのまま実行すると元のテーブルが得られる"""
+        table = CodepointTable.from_mapping({"國": "国", "𠮷": "吉"})
+        source = _precompiled.render({"t": ("abcd1234", table)})
+        namespace: dict = {}
+        exec(source, namespace)
+        assert namespace["FORMAT_VERSION"] == _precompiled.FORMAT_VERSION
+        assert namespace["TABLES"]["t"] == ("abcd1234", "國𠮷", "国吉", "吉国", "𠮷國")
@@ -0,0 +1,75 @@
+"""一括スキャナ（find の1パス検出）のテスト"""
+
+import random
+
+import pytest
+
+import senzen_word
+from senzen_word.kana import (
+    KANA_MAPPINGS,
+    COMPOUND_PARTICLES,
+    SINGLE_PARTICLES,
+    find_hentaigana,
+    find_historical_kana,
+    find_katakana_particles,
+)
+from senzen_word.kanji import find_old_kanji, get_kanji_table
+
+
+def _reference_find(text: str) -> list[tuple[str, str, int, str]]:
+    """従来の find（カテゴリごとに検出 → 位置で安定ソート）"""
+    found = []
+    found += [(o, n, p, "kanji") for o, n, p in find_old_kanji(text)]
+    found += [(o, n, p, "hentaigana") for o, n, p in find_hentaigana(text)]
+    found += [(o, n, p, "kana") for o, n, p in find_historical_kana(text)]
+    found += [(o, n, p, "particle") for o, n, p in find_katakana_particles(text)]
+    found.sort(key=lambda x: x[2])
+    return found
+
+
+def _random_text(rng: random.Random, length: int) -> str:
+    """検出対象の断片とカタカナ・ひらがな・漢字を混ぜたランダム文"""
+    pieces = (
+        [old for old, _ in KANA_MAPPINGS]
+        + [kata for kata, _ in COMPOUND_PARTICLES]
+        + list(SINGLE_PARTICLES)
+        + list(get_kanji_table())[:50]
+        + ["\U0001B002", "\U0001B011"]
+        + list("アイウカキクサシスタチツ国民法律のはにをうー、。 ")
+    )
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+class TestSameAsReference:
+    @pytest.mark.parametrize(
+        "text",
+        [
+            "",
+            "國會ニ於テ",
+            "日本臣民ハ法律ノ定ムル所ニ從ヒ納稅ノ義務ヲ有ス",
+            "ノミウ",  # 助詞「ノミ」と仮名「ミウ」が重なる
+            "アノミ",  # 直前がカタカナなので助詞にしない
+            "カウカウカウ",
+            "\U0001B002ゐてふ",
+        ],
+    )
+    def test_examples(self, text):
+        assert senzen_word.find(text) == _reference_find(text)
+
+    def test_random_texts(self):
+        rng = random.Random(1234)
+        for _ in range(300):
+            text = _random_text(rng, rng.randint(1, 80))
+            assert senzen_word.find(text) == _reference_find(text), text
+
+
+class TestCategories:
+    def test_filter(self):
+        text = "國ノ\U0001B002さう"
+        found = senzen_word.find(text, categories=("kana", "particle"))
+        assert {f[3] for f in found} == {"kana", "particle"}
+        assert [f[:3] for f in found if f[3] == "kana"] == find_historical_kana(text)
+
+    def test_unknown_category(self):
+        with pytest.raises(ValueError):
+            senzen_word.find("國", categories=("kanji", "typo"))
@@ -0,0 +1,135 @@
+"""
+ライブラリ分析 CLI
+
+library/ 配下の文書を横断的に集計する。サブコマンド型（chars）。
+
+使い方:
+    uv run prewar analyze chars                  # 誤読候補の一覧
+    uv run prewar analyze chars --limit 100
+    uv run prewar analyze chars --format json
+    uv run prewar analyze chars --no-cache        # キャッシュを使わず全件数え直す
+    uv run prewar analyze chars --save-confusions  # あいまい検索の混同表も更新
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from scripts.library import add_library_root_argument
+from utils.char_stats import collect_stats, find_misread_candidates
+from utils.config import CONFIG
+from utils.library_fuzzy import save_confusions
+
+
+def add_chars_arguments(parser: argparse.ArgumentParser) -> None:
+    """chars サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=50,
+        help="表示する候補数の上限（デフォルト: 50）",
+    )
+    parser.add_argument(
+        "--rare-max-count",
+        type=int,
+        default=CONFIG.get("analyze.rare_max_count"),
+        help="この回数以下しか出ない漢字を「稀少」とみなす（デフォルト: 2）",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="出力形式（デフォルト: text）",
+    )
+    parser.add_argument(
+        "--save-confusions",
+        action="store_true",
+        help="修正先の候補つきの誤読候補を、あいまい検索（find --fuzzy）の混同表として保存する",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="文書ごとの集計キャッシュを使わずに全件数え直す",
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """analyze 全体の引数（共通オプション + chars サブコマンド）を追加する"""
+    add_library_root_argument(parser)
+
+    subparsers = parser.add_subparsers(dest="analyze_command", required=True)
+
+    p_chars = subparsers.add_parser("chars", help="文字統計からOCR誤読の候補を挙げる")
+    add_chars_arguments(p_chars)
+
+
+# ---------- 各サブコマンド ----------
+
+
+def cmd_chars(args: argparse.Namespace) -> int:
+    """chars サブコマンド"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    t0 = time.perf_counter()
+    stats = collect_stats(library_root, use_cache=not args.no_cache)
+    candidates = find_misread_candidates(stats, rare_max_count=args.rare_max_count)
+    elapsed = time.perf_counter() - t0
+    shown = candidates[: args.limit]
+    saved = save_confusions(library_root, candidates) if args.save_confusions else None
+
+    if args.format == "json":
+        data = [{"codepoint": c.codepoint, **asdict(c)} for c in shown]
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+        return 0
+
+    print(
+        f"文書数: {len(stats.doc_ids)}（再計算 {stats.computed} / キャッシュ {stats.reused}）"
+        f"  異なり字数: {len(set(stats.codes.tolist()))}  {elapsed:.2f}秒"
+    )
+    if not shown:
+        print("誤読候補は見つかりませんでした")
+        return 0
+
+    print()
+    for c in shown:
+        line = f"{c.char} {c.codepoint:<8} {c.count:>5}回 {c.doc_count:>4}文書  [{'・'.join(c.flags)}]"
+        if c.near_known:
+            line += f"  既知の誤読「{c.near_known}」に近い"
+        if c.suggestion:
+            line += f"  → {c.suggestion}?"
+        print(line)
+        print(f"    例: {', '.join(c.examples)}")
+
+    print()
+    print(f"→ {len(shown)}件{'（--limit で上限）' if len(candidates) > len(shown) else ''}")
+    print("  確認して誤読なら utils/text_normalizer.py の OCR_MISREAD_CORRECTIONS に追加し、")
+    print("  uv run prewar renormalize で既存文書に反映する")
+    if saved is not None:
+        print(f"  あいまい検索の混同表に {saved}組を保存しました（find --fuzzy で使う）")
+    return 0
+
+
+# ---------- エントリポイント ----------
+
+
+def run(args: argparse.Namespace) -> int:
+    """パース済み引数を受け取り、対応するサブコマンドを実行する"""
+    if args.analyze_command == "chars":
+        return cmd_chars(args)
+    return 1
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="戦前日本語OCRライブラリ分析ツール")
+    add_arguments(parser)
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
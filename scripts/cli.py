@@ -11,8 +11,16 @@
     uv run prewar ocr input/画像.png    # OCR（画像→現代語）
     uv run prewar shoot                # 範囲スクショ撮りため（macOS）
     uv run prewar search 関東 震災      # ライブラリ全文検索
+    uv run prewar grep '昭和\\d+年'      # ライブラリを正規表現で検索
+    uv run prewar kwic 震災 --sort right # 語の全用例を文脈つきで一覧
     uv run prewar index --rebuild       # 検索インデックス再構築
     uv run prewar stat                 # ライブラリ統計
+    uv run prewar stat --term 震災      # 語の月ごとの出現数
+    uv run prewar list --sort per-page # 文書の一覧（OCR の遅い順）
+    uv run prewar dedup                # 本文のほぼ同じ記録をまとめて一覧
+    uv run prewar objects --migrate    # 同じ中身の画像を1つにまとめる
+    uv run prewar renormalize          # 誤読ルール変更分だけ再正規化
+    uv run prewar analyze chars        # 文字統計からOCR誤読の候補を挙げる
     uv run prewar fix output/x.txt      # テキスト後処理（正規化/口語体化）
     uv run prewar diff <doc_id>        # 変換前後の差分を色付き表示
     uv run prewar check                # 環境チェック
@@ -27,7 +35,7 @@ import sys
 
 import questionary
 
-from scripts import diff_viewer, library, ocr_vision_llm, postprocess, setup_check
+from scripts import analyze, diff_viewer, library, ocr_vision_llm, postprocess, setup_check
 from utils.config import CONFIG
 
 
@@ -45,6 +53,14 @@ def _run_search(args: argparse.Namespace) -> int:
     return library.cmd_find(args)
 
 
+def _run_grep(args: argparse.Namespace) -> int:
+    return library.cmd_grep(args)
+
+
+def _run_kwic(args: argparse.Namespace) -> int:
+    return library.cmd_kwic(args)
+
+
 def _run_index(args: argparse.Namespace) -> int:
     return library.cmd_index(args)
 
@@ -53,6 +69,22 @@ def _run_stat(args: argparse.Namespace) -> int:
     return library.cmd_stat(args)
 
 
+def _run_list(args: argparse.Namespace) -> int:
+    return library.cmd_list(args)
+
+
+def _run_dedup(args: argparse.Namespace) -> int:
+    return library.cmd_dedup(args)
+
+
+def _run_objects(args: argparse.Namespace) -> int:
+    return library.cmd_objects(args)
+
+
+def _run_renormalize(args: argparse.Namespace) -> int:
+    return library.cmd_renormalize(args)
+
+
 # ---------- パーサ構築 ----------
 
 
@@ -68,8 +100,16 @@ def build_parser() -> argparse.ArgumentParser:
   uv run prewar ocr input/画像.png    # OCR（画像→現代語）
   uv run prewar shoot                # 範囲スクショ撮りため（macOS）
   uv run prewar search 関東 震災      # ライブラリ全文検索
+  uv run prewar grep '昭和\\d+年'      # ライブラリを正規表現で検索
+  uv run prewar kwic 震災 --sort right # 語の全用例を文脈つきで一覧
   uv run prewar index --rebuild       # 検索インデックス再構築
   uv run prewar stat                 # ライブラリ統計
+  uv run prewar stat --term 震災      # 語の月ごとの出現数
+  uv run prewar list --sort per-page # 文書の一覧（OCR の遅い順）
+  uv run prewar dedup                # 本文のほぼ同じ記録をまとめて一覧
+  uv run prewar objects --migrate    # 同じ中身の画像を1つにまとめる
+  uv run prewar renormalize          # 誤読ルール変更分だけ再正規化
+  uv run prewar analyze chars        # 文字統計からOCR誤読の候補を挙げる
   uv run prewar fix output/x.txt      # テキスト後処理（正規化/口語体化）
   uv run prewar diff <doc_id>        # 変換前後の差分を色付き表示
   uv run prewar check                # 環境チェック
@@ -94,6 +134,18 @@ def build_parser() -> argparse.ArgumentParser:
     library.add_library_root_argument(p_search)
     p_search.set_defaults(func=_run_search)
 
+    # grep（= prewar-library grep）
+    p_grep = sub.add_parser("grep", help="ライブラリを正規表現で検索")
+    library.add_grep_arguments(p_grep)
+    library.add_library_root_argument(p_grep)
+    p_grep.set_defaults(func=_run_grep)
+
+    # kwic（= prewar-library kwic）
+    p_kwic = sub.add_parser("kwic", help="語の全用例を前後の文脈つきで一覧")
+    library.add_kwic_arguments(p_kwic)
+    library.add_library_root_argument(p_kwic)
+    p_kwic.set_defaults(func=_run_kwic)
+
     # index（= prewar-library index）
     p_index = sub.add_parser("index", help="検索インデックスを更新")
     library.add_index_arguments(p_index)
@@ -102,9 +154,39 @@ def build_parser() -> argparse.ArgumentParser:
 
     # stat（= prewar-library stat）
     p_stat = sub.add_parser("stat", help="ライブラリの統計情報を表示")
+    library.add_stat_arguments(p_stat)
     library.add_library_root_argument(p_stat)
     p_stat.set_defaults(func=_run_stat)
 
+    # list（= prewar-library list）
+    p_list = sub.add_parser("list", help="文書の一覧・meta.json の書き出し")
+    library.add_list_arguments(p_list)
+    library.add_library_root_argument(p_list)
+    p_list.set_defaults(func=_run_list)
+
+    # dedup（= prewar-library dedup）
+    p_dedup = sub.add_parser("dedup", help="本文のほぼ同じ記録をまとめて一覧")
+    library.add_dedup_arguments(p_dedup)
+    library.add_library_root_argument(p_dedup)
+    p_dedup.set_defaults(func=_run_dedup)
+
+    # objects（= prewar-library objects）
+    p_objects = sub.add_parser("objects", help="画像のストアの容量・移行・ゴミ集め")
+    library.add_objects_arguments(p_objects)
+    library.add_library_root_argument(p_objects)
+    p_objects.set_defaults(func=_run_objects)
+
+    # renormalize（= prewar-library renormalize）
+    p_renorm = sub.add_parser("renormalize", help="OCR誤読ルールの変更を影響する文書だけに反映")
+    library.add_renormalize_arguments(p_renorm)
+    library.add_library_root_argument(p_renorm)
+    p_renorm.set_defaults(func=_run_renormalize)
+
+    # analyze（ライブラリ横断の集計）
+    p_analyze = sub.add_parser("analyze", help="ライブラリを横断的に集計・分析")
+    analyze.add_arguments(p_analyze)
+    p_analyze.set_defaults(func=analyze.run)
+
     # fix（= postprocess）
     p_fix = sub.add_parser("fix", help="OCRテキストを正規化/口語体化")
     postprocess.add_arguments(p_fix)
@@ -2,31 +2,69 @@
 ライブラリ検索 CLI
 
 library/ 配下に蓄積された文書を全文検索する。
-サブコマンド型（index / find / stat）。
+サブコマンド型（index / find / grep / kwic / stat / list / dedup / objects / renormalize）。
 
 使い方:
     uv run prewar-library index                  # 差分更新
     uv run prewar-library index --rebuild         # 全件再構築
+    uv run prewar-library index --reconcile       # ライブラリ全体と突き合わせ
+    uv run prewar-library index --embeddings      # 意味検索の索引も更新
+    uv run prewar-library index --shard-by year   # 年ごとのシャードを並行に更新
     uv run prewar-library find 関東 震災          # AND検索
     uv run prewar-library find 警察 --limit 50
     uv run prewar-library find 警察 --format json
+    uv run prewar-library find 警察 --format ndjson  # 全件を1行1件で流す
+    uv run prewar-library find 警察 --tag 新聞 --since 1923-09  # 絞り込み
+    uv run prewar-library find 地震の被害 --semantic  # 意味の近い文書
+    uv run prewar-library find 地震の被害 --hybrid    # 全文検索と意味検索をまとめて
+    uv run prewar-library find 太郎 --fuzzy         # OCRの誤読を見込んで
+    uv run prewar-library find 震災 --with-library ../library_b  # 複数のライブラリをまとめて
+    uv run prewar-library grep '昭和\\d+年'           # 正規表現で検索（KWIC）
+    uv run prewar-library kwic 震災 --sort right    # 語の全用例を右の文脈順に
     uv run prewar-library stat                    # 統計情報
+    uv run prewar-library stat --term 震災          # 語の月ごとの出現数
+    uv run prewar-library list --sort per-page     # 文書の一覧（OCR の遅い順）
+    uv run prewar-library dedup                   # 本文のほぼ同じ記録をまとめて一覧
+    uv run prewar-library objects --migrate       # 同じ中身の画像を1つにまとめる
+    uv run prewar-library renormalize             # 誤読ルール変更分だけ再正規化
 """
 
 import argparse
 import json
+import os
 import sys
+import unicodedata
+from collections.abc import Iterable
 from dataclasses import asdict
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 
 from utils.config import CONFIG
+from utils.library_catalog import SORTS as CATALOG_SORTS
+from utils.library_catalog import CatalogEntry, LibraryCatalog
+from utils.library_dedup import cluster_duplicates
+from utils.library_fuzzy import FuzzyHit, fuzzy_search
+from utils.library_grep import GrepMatch, GrepStats, grep
+from utils.library_hybrid import FUSIONS, HybridHit, hybrid_search
+from utils.library_kwic import SORTS, concordance, sort_kwic
+from utils.library_objects import ObjectStats, collect_garbage, migrate, object_stats
 from utils.library_search import (
+    SHARD_BY,
     IndexStats,
     LibraryIndex,
-    QueryTooShortError,
+    LibrarySearchError,
+    SearchFacets,
     SearchHit,
+    TERM_GROUPS,
+    TermBucket,
+    get_index,
 )
+from utils.library_shards import FederatedIndex
+from utils.library_vectors import SemanticHit, VectorIndex, VectorIndexError, VectorStats
+from utils.minhash import THRESHOLD
+from utils.ollama_client import OllamaConnectionError, OllamaModelNotFoundError
+from utils.renormalizer import renormalize_library
 
 
 def add_library_root_argument(parser: argparse.ArgumentParser) -> None:
@@ -46,6 +84,24 @@ def add_index_arguments(parser: argparse.ArgumentParser) -> None:
         action="store_true",
         help="既存インデックスを削除して全件再構築",
     )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="変更ジャーナルを通らなかった変更（手作業の編集など）もライブラリ全体を走査して拾う",
+    )
+    parser.add_argument(
+        "--embeddings",
+        action="store_true",
+        help="意味検索（find --semantic）の索引も更新する（Ollama の埋め込みモデルを使う）",
+    )
+    add_shard_arguments(parser)
+    parser.add_argument(
+        "--shard",
+        action="append",
+        default=[],
+        metavar="KEY",
+        help="--rebuild でこのシャード（2025・2025-03 など）だけ作り直す（複数指定可）",
+    )
 
 
 def add_find_arguments(parser: argparse.ArgumentParser) -> None:
@@ -59,8 +115,231 @@ def add_find_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         "--limit",
         type=int,
-        default=CONFIG.get("search.limit"),
-        help="表示件数の上限（デフォルト: 20）",
+        default=None,
+        help="表示件数の上限（デフォルト: 20。ndjson は指定しなければ全件）",
+    )
+    parser.add_argument(
+        "--after",
+        type=str,
+        default=None,
+        metavar="CURSOR",
+        help="前回の結果の末尾に表示されたカーソルから続きを表示",
+    )
+    add_facet_arguments(parser)
+    parser.add_argument(
+        "--semantic",
+        action="store_true",
+        help="語句の一致ではなく意味の近さで探す（index --embeddings で作った索引を使う）",
+    )
+    parser.add_argument(
+        "--hybrid",
+        action="store_true",
+        help="全文検索と意味検索を同時に引いて1つの順位にまとめる",
+    )
+    parser.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="OCRの誤読（似た字への読み違い）を見込んだ綴りでも探し、近い順に並べる",
+    )
+    parser.add_argument(
+        "--fusion",
+        choices=FUSIONS,
+        default=CONFIG.get("hybrid.fusion"),
+        help="--hybrid のまとめ方（rrf: 順位で混ぜる / weighted: スコアを揃えて重みづけ）",
+    )
+    parser.add_argument(
+        "--facets",
+        action="store_true",
+        help="検索結果全体のタグ・年・モデル・元画像の枚数ごとの件数も表示",
+    )
+    add_shard_arguments(parser)
+    parser.add_argument(
+        "--with-library",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="このライブラリもまとめて検索する（複数指定可。それぞれのインデックスを同時に引く）",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json", "ndjson"],
+        default="text",
+        help="出力形式（デフォルト: text。ndjson は1行1件で順次出力）",
+    )
+
+
+def add_facet_arguments(parser: argparse.ArgumentParser) -> None:
+    """find・stat・list 共通の文書の絞り込みの引数を追加する"""
+    parser.add_argument(
+        "--tag",
+        action="append",
+        default=[],
+        help="このタグの付いた文書だけ（複数指定でそのすべてを持つ文書）",
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        default=None,
+        metavar="DATE",
+        help="作成日がこの日以降の文書だけ（YYYY・YYYY-MM・YYYY-MM-DD）",
+    )
+    parser.add_argument(
+        "--until",
+        type=str,
+        default=None,
+        metavar="DATE",
+        help="作成日がこの日まで（その月・年の末日まで含む）の文書だけ",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default=None,
+        help="OCR か口語体変換にこのモデルを使った文書だけ",
+    )
+    parser.add_argument(
+        "--min-sources",
+        type=int,
+        default=None,
+        metavar="N",
+        help="元画像が N 枚以上の文書だけ",
+    )
+
+
+def add_shard_arguments(parser: argparse.ArgumentParser) -> None:
+    """index・find 共通のシャードの引数を追加する"""
+    parser.add_argument(
+        "--shard-by",
+        choices=list(SHARD_BY),
+        default=CONFIG.get("shards.by") or None,
+        help="インデックスを文書の作成年・月ごとのシャードに分けて使う（search.db とは別に持つ）",
+    )
+
+
+def add_stat_arguments(parser: argparse.ArgumentParser) -> None:
+    """stat サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--term",
+        type=str,
+        default=None,
+        help="この語の出現数の推移を表示（初回は全文書を数えて、以後は索引の更新に合わせて保つ）",
+    )
+    parser.add_argument(
+        "--by",
+        choices=list(TERM_GROUPS),
+        default="month",
+        help="--term の集計の区分（デフォルト: month。作成日の月・年かタグ）",
+    )
+    parser.add_argument(
+        "--forget-term",
+        type=str,
+        default=None,
+        metavar="TERM",
+        help="語を出現数の集計の対象から外す",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="出力形式（デフォルト: text。--term が無ければ json はカタログの集計）",
+    )
+    add_facet_arguments(parser)
+
+
+def add_list_arguments(parser: argparse.ArgumentParser) -> None:
+    """list サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--sort",
+        choices=list(CATALOG_SORTS),
+        default="created",
+        help="並び順（デフォルト: created＝作成日時順。ocr-seconds・per-page は OCR の遅い順）",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="表示する件数の上限（デフォルト: 全件）",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "tsv", "json", "ndjson"],
+        default="text",
+        help="出力形式（デフォルト: text。json・ndjson は meta.json の全項目をカタログから書き出す）",
+    )
+    parser.add_argument(
+        "--reconcile",
+        action="store_true",
+        help="カタログをライブラリ全体と突き合わせてから表示（手作業で meta.json を直したときなど）",
+    )
+    add_facet_arguments(parser)
+
+
+def add_grep_arguments(parser: argparse.ArgumentParser) -> None:
+    """grep サブコマンドの引数を追加する"""
+    parser.add_argument("pattern", type=str, help="正規表現（Python の re の書式）")
+    parser.add_argument(
+        "--raw",
+        action="store_true",
+        help="modern.txt に加えて ocr_raw.txt（OCR生テキスト）も照合する",
+    )
+    parser.add_argument(
+        "-i",
+        "--ignore-case",
+        action="store_true",
+        help="英字の大文字・小文字を区別しない",
+    )
+    parser.add_argument(
+        "--context",
+        type=int,
+        default=CONFIG.get("grep.context"),
+        metavar="N",
+        help="一致の前後に表示する文字数（デフォルト: 20）",
+    )
+    add_kwic_output_arguments(parser)
+
+
+def add_kwic_arguments(parser: argparse.ArgumentParser) -> None:
+    """kwic サブコマンドの引数を追加する"""
+    parser.add_argument("term", type=str, help="用例を集める語（1語）")
+    parser.add_argument(
+        "--context",
+        type=int,
+        default=CONFIG.get("kwic.context"),
+        metavar="N",
+        help="語の前後に表示する文字数（デフォルト: 20）",
+    )
+    add_kwic_output_arguments(parser)
+
+
+def add_kwic_output_arguments(parser: argparse.ArgumentParser) -> None:
+    """KWIC を出す grep / kwic 共通の並べ方・件数・出力形式の引数を追加する"""
+    parser.add_argument(
+        "--sort",
+        choices=SORTS,
+        default="position",
+        help="並べ方（position: 文書・出現順 / right: 右の文脈順 / left: 左の文脈を語の側から読んだ順）",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        help="表示する件数の上限（デフォルト: 全件。--sort があればその順の上位）",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "tsv", "json", "ndjson"],
+        default="text",
+        help="出力形式（デフォルト: text。どの形式も1件ずつ書き出す）",
+    )
+
+
+def add_dedup_arguments(parser: argparse.ArgumentParser) -> None:
+    """dedup サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        metavar="S",
+        help=f"近似重複とみなす推定類似度（Jaccard 係数）の下限（デフォルト: {THRESHOLD}）",
     )
     parser.add_argument(
         "--format",
@@ -70,8 +349,36 @@ def add_find_arguments(parser: argparse.ArgumentParser) -> None:
     )
 
 
+def add_objects_arguments(parser: argparse.ArgumentParser) -> None:
+    """objects サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help="既存の文書フォルダの画像をストア（.objects/）に登録し、同じ中身のものをまとめる",
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="どの文書からも使われていないストアの画像を消す",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="何も変えずに、空く容量の見積もりだけを表示",
+    )
+
+
+def add_renormalize_arguments(parser: argparse.ArgumentParser) -> None:
+    """renormalize サブコマンドの引数を追加する"""
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="対象文書を表示するだけで書き換えない",
+    )
+
+
 def add_arguments(parser: argparse.ArgumentParser) -> None:
-    """library 全体の引数（共通オプション + index/find/stat サブコマンド）を追加する"""
+    """library 全体の引数（共通オプション + 各サブコマンド）を追加する"""
     add_library_root_argument(parser)
 
     subparsers = parser.add_subparsers(dest="command", required=True)
@@ -82,7 +389,28 @@ def add_arguments(parser: argparse.ArgumentParser) -> None:
     p_find = subparsers.add_parser("find", help="ライブラリを全文検索")
     add_find_arguments(p_find)
 
-    subparsers.add_parser("stat", help="ライブラリの統計情報を表示")
+    p_grep = subparsers.add_parser("grep", help="ライブラリを正規表現で検索")
+    add_grep_arguments(p_grep)
+
+    p_kwic = subparsers.add_parser("kwic", help="語の全用例を前後の文脈つきで一覧")
+    add_kwic_arguments(p_kwic)
+
+    p_stat = subparsers.add_parser("stat", help="ライブラリの統計情報を表示")
+    add_stat_arguments(p_stat)
+
+    p_list = subparsers.add_parser("list", help="文書の一覧・meta.json の書き出し")
+    add_list_arguments(p_list)
+
+    p_dedup = subparsers.add_parser("dedup", help="本文のほぼ同じ記録をまとめて一覧")
+    add_dedup_arguments(p_dedup)
+
+    p_objects = subparsers.add_parser("objects", help="画像のストアの容量・移行・ゴミ集め")
+    add_objects_arguments(p_objects)
+
+    p_renorm = subparsers.add_parser(
+        "renormalize", help="OCR誤読ルールの変更を影響する文書だけに反映"
+    )
+    add_renormalize_arguments(p_renorm)
 
 
 def parse_args() -> argparse.Namespace:
@@ -94,11 +422,39 @@ def parse_args() -> argparse.Namespace:
 使用例:
   uv run prewar-library index                # 差分更新
   uv run prewar-library index --rebuild       # 全件再構築
+  uv run prewar-library index --reconcile     # ライブラリ全体と突き合わせ
+  uv run prewar-library index --embeddings    # 意味検索の索引も更新
+  uv run prewar-library index --shard-by year  # 年ごとのシャードを並行に更新
+  uv run prewar-library index --shard-by year --rebuild --shard 2025  # 1つのシャードだけ作り直す
   uv run prewar-library find 警察             # 単一語検索
   uv run prewar-library find 関東 震災         # AND検索
   uv run prewar-library find 警察 --limit 50
   uv run prewar-library find 警察 --format json
+  uv run prewar-library find 警察 --format ndjson  # 全件を1行1件で流す
+  uv run prewar-library find 警察 --after CURSOR   # 前回の続きから
+  uv run prewar-library find 警察 --tag 新聞 --since 2026-03 --facets  # 絞り込み・件数の内訳
+  uv run prewar-library find 地震の被害 --semantic  # 意味の近い文書
+  uv run prewar-library find 地震の被害 --hybrid    # 全文検索と意味検索をまとめて
+  uv run prewar-library find 太郎 --fuzzy         # OCRの誤読を見込んで（郧・郯 なども）
+  uv run prewar-library find 震災 --shard-by year  # 年ごとのシャードを同時に引く
+  uv run prewar-library find 震災 --with-library ../library_b  # 複数のライブラリをまとめて
+  uv run prewar-library grep '第[一二三]+師団'      # 正規表現で検索（KWIC）
+  uv run prewar-library kwic 震災 --sort right      # 語の全用例を右の文脈順に
+  uv run prewar-library kwic 震災 --format tsv > 震災.tsv  # 表計算ソフト用に書き出す
   uv run prewar-library stat                  # 統計情報
+  uv run prewar-library stat --term 配給 --by tag  # 語のタグごとの出現数
+  uv run prewar-library stat --tag 新聞 --format json  # 絞り込んだ範囲の OCR の時間などの集計
+  uv run prewar-library list --since 2026-03     # 文書の一覧（カタログから。meta.json は開かない）
+  uv run prewar-library list --sort per-page --limit 20  # 1ページあたりの OCR が遅い文書
+  uv run prewar-library list --format ndjson > catalog.ndjson  # 全文書の meta.json を書き出す
+  uv run prewar-library dedup                 # 本文のほぼ同じ記録（撮り直し）をまとめて一覧
+  uv run prewar-library dedup --threshold 0.9 --format json
+  uv run prewar-library objects               # 画像の容量（文書から見た合計・実際の使用量）
+  uv run prewar-library objects --migrate --dry-run  # 既存の画像をストアにまとめた場合の見積もり
+  uv run prewar-library objects --migrate     # 既存の画像をストアにまとめる
+  uv run prewar-library objects --gc          # どの文書も使っていない画像を消す
+  uv run prewar-library renormalize           # 誤読ルール変更分だけ再正規化
+  uv run prewar-library renormalize --dry-run # 対象文書の確認のみ
         """,
     )
     add_arguments(parser)
@@ -115,15 +471,32 @@ def cmd_index(args: argparse.Namespace) -> int:
         print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
         return 1
 
-    idx = LibraryIndex(library_root)
+    if args.shard_by:
+        return _index_shards(library_root, args)
+    if args.shard:
+        print("✗ --shard は --shard-by と一緒に指定してください")
+        return 1
+
+    idx = get_index(library_root)
     print(f"インデックス{'再構築' if args.rebuild else '更新'}中: {library_root}/")
 
     if args.rebuild:
         stats = idx.rebuild()
     else:
-        stats = idx.update()
+        stats = idx.update(reconcile=args.reconcile)
 
     _print_stats(stats)
+    print(f"カタログを{'再構築' if args.rebuild else '更新'}中...")
+    with LibraryCatalog(library_root) as catalog:
+        _print_stats(catalog.rebuild() if args.rebuild else catalog.update(args.reconcile))
+    if args.embeddings:
+        print("意味検索の索引を更新中...")
+        try:
+            with VectorIndex(idx) as vectors:
+                _print_vector_stats(vectors.update())
+        except (OllamaConnectionError, OllamaModelNotFoundError, VectorIndexError) as e:
+            print(f"✗ {e}")
+            return 1
     print("✓ 完了")
     return 0
 
@@ -135,23 +508,43 @@ def cmd_find(args: argparse.Namespace) -> int:
         print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
         return 1
 
-    idx = LibraryIndex(library_root)
+    if args.shard_by or args.with_library:
+        return _find_federated(library_root, args)
+
+    idx = get_index(library_root)
 
-    # インデックス未構築なら自動で update
+    # インデックス未構築なら自動で構築。構築済みでも変更ジャーナルの
+    # 未読分（新しく保存された文書など）だけは反映してから引く
     if not idx.db_path.exists():
         print("⚠ インデックス未構築のため自動で更新します...")
         idx.update()
         print()
+    else:
+        idx.update()
 
     query = " ".join(args.query)
+    facets = _facets_from_args(args)
+    if args.semantic or args.hybrid:
+        return _find_semantic(idx, query, facets, args)
+    if args.fuzzy:
+        return _find_fuzzy(idx, query, facets, args)
+    if args.format == "ndjson":
+        return _stream_ndjson(idx, query, facets, args)
+
+    limit = args.limit or CONFIG.get("search.limit")
     try:
-        hits = idx.search(query, limit=args.limit)
-    except QueryTooShortError as e:
+        page = idx.search_page(query, limit=limit, after=args.after, facets=facets)
+        counts = idx.facet_counts(query, facets) if args.facets else None
+    except LibrarySearchError as e:
         print(f"✗ {e}")
         return 1
+    hits = page.hits
 
     if args.format == "json":
-        print(json.dumps([_hit_to_dict(h) for h in hits], ensure_ascii=False, indent=2))
+        result = [_hit_to_dict(h) for h in hits]
+        if counts is not None:
+            result = {"hits": result, "facets": counts}
+        print(json.dumps(result, ensure_ascii=False, indent=2))
         return 0
 
     if not hits:
@@ -160,20 +553,350 @@ def cmd_find(args: argparse.Namespace) -> int:
 
     for h in hits:
         print(f"[{h.id}] {h.title or '(タイトルなし)'}")
+        print(f"  場所: {_display_dir(h.dir)}/")
+        print(f"  抜粋: {h.snippet}")
+        if h.line is not None:
+            page_note = f"（元画像 {h.page}枚目付近）" if h.page else ""
+            print(f"  位置: modern.txt {h.line}行目{page_note}")
+        print(f"  作成: {h.created_at}")
+        print()
+
+    print(f"→ {len(hits)}件{'（--limit で上限）' if page.next_cursor else ''}")
+    if page.next_cursor:
+        print(f"  続き: --after {page.next_cursor}")
+    if counts is not None:
+        _print_facet_counts(counts)
+    return 0
+
+
+def cmd_grep(args: argparse.Namespace) -> int:
+    """grep サブコマンド: 一致を見つけたそばから KWIC で書き出す"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    idx = get_index(library_root)
+    idx.update()
+
+    stats = GrepStats()
+    matches = grep(
+        idx,
+        args.pattern,
+        raw=args.raw,
+        ignore_case=args.ignore_case,
+        context=args.context,
+        # 並べ替えるときは全件を見てから上位を選ぶ
+        limit=args.limit if args.sort == "position" else None,
+        stats=stats,
+    )
+    try:
+        shown, _ = _write_kwic(sort_kwic(matches, args.sort, args.limit), args.format, args.context)
+    except LibrarySearchError as e:
+        print(f"✗ {e}")
+        return 1
+    except BrokenPipeError:
+        # head などに繋いで途中で閉じられた
+        sys.stderr.close()
+        return 0
+
+    if args.format == "text":
+        if not stats.matches:
+            print(f"一致なし: {args.pattern}")
+        literals = " かつ ".join("・".join(group) for group in stats.literals) or "なし（全件を照合）"
+        print(f"→ {shown}件{_limit_note(shown, stats.matches, args.limit)}（{stats.matched_docs}文書）")
+        print(f"  照合: {stats.candidates} / {stats.documents}文書（必須リテラル: {literals}）")
+    return 0
+
+
+def cmd_kwic(args: argparse.Namespace) -> int:
+    """kwic サブコマンド: 語の全出現を前後の文脈つきで書き出す"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    idx = get_index(library_root)
+    idx.update()
+
+    lines = concordance(idx, args.term, context=args.context, sort=args.sort, limit=args.limit)
+    try:
+        shown, docs = _write_kwic(lines, args.format, args.context)
+    except LibrarySearchError as e:
+        print(f"✗ {e}")
+        return 1
+    except BrokenPipeError:
+        sys.stderr.close()
+        return 0
+
+    if args.format == "text":
+        if not shown:
+            print(f"用例なし: {args.term}")
+        print(f"→ {shown}件（{docs}文書）{'（--limit で上限）' if shown == args.limit else ''}")
+    return 0
+
+
+_KWIC_COLUMNS = ("id", "source", "line", "start", "end", "left", "match", "right")
+
+
+def _write_kwic(lines: Iterable[GrepMatch], fmt: str, width: int) -> tuple[int, int]:
+    """KWIC の行を fmt（text / tsv / json / ndjson）で書き出し、(件数, 文書数) を返す
+
+    json も1件ずつ書き出す（全件をリストにしてから dumps しない）。
+    """
+    out = sys.stdout
+    count = 0
+    docs = set()
+    if fmt == "tsv":
+        out.write("\t".join(_KWIC_COLUMNS) + "\n")
+    for m in lines:
+        if fmt == "text":
+            out.write(_format_kwic(m, width) + "\n")
+        elif fmt == "tsv":
+            row = (m.id, m.source, m.line, m.start, m.end, m.left, m.match, m.right)
+            out.write("\t".join(str(v).replace("\t", " ") for v in row) + "\n")
+        else:
+            if fmt == "json":
+                out.write("[\n" if count == 0 else ",\n")
+            out.write(json.dumps(_hit_to_dict(m), ensure_ascii=False))
+            if fmt == "ndjson":
+                out.write("\n")
+        count += 1
+        docs.add(m.id)
+    if fmt == "json":
+        out.write("\n]\n" if count else "[]\n")
+    out.flush()
+    return count, len(docs)
+
+
+def _format_kwic(m: GrepMatch, width: int) -> str:
+    """KWIC の1行（一致の位置が揃うよう左の文脈を右寄せにする）"""
+    where = f"{m.id}:{m.line}" + (" (原文)" if m.source == "raw" else "")
+    return f"{where}\t{m.left:>{width}}[{m.match}]{m.right}"
+
+
+def _limit_note(shown: int, total: int, limit: int | None) -> str:
+    if limit is None or shown < limit:
+        return ""
+    return f"（--limit で上限。全{total}件）" if total > shown else "（--limit で上限）"
+
+
+def _stream_ndjson(
+    idx: LibraryIndex, query: str, facets: SearchFacets | None, args: argparse.Namespace
+) -> int:
+    """find --format ndjson: ヒットを引けた順に1行1件の JSON で書き出す"""
+    try:
+        for h in islice(idx.iter_search(query, after=args.after, facets=facets), args.limit):
+            sys.stdout.write(json.dumps(_hit_to_dict(h), ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+    except LibrarySearchError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        # head などが読むのをやめた。終了時の flush で再び失敗しないよう捨て先に向ける
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    return 0
+
+
+def _find_semantic(
+    idx: LibraryIndex, query: str, facets: SearchFacets | None, args: argparse.Namespace
+) -> int:
+    """find --semantic / --hybrid: 今ある意味検索の索引を引く
+
+    埋め込みは Ollama を呼んで時間がかかるので検索の前にはしない（新しい文書は
+    index --embeddings で入る）。--hybrid は意味検索が使えなければ全文検索だけで返す。
+    """
+    option = "--hybrid" if args.hybrid else "--semantic"
+    if facets is not None or args.after or args.facets:
+        print(f"✗ {option} では絞り込み・--after・--facets は使えません")
+        return 1
+    limit = args.limit or CONFIG.get("search.limit")
+    with VectorIndex(idx) as vectors:
+        built = bool(vectors.stat())
+        if not built and not args.hybrid:
+            print("✗ 意味検索の索引がありません（uv run prewar index --embeddings で作成してください）")
+            return 1
         try:
-            rel = h.dir.relative_to(Path.cwd())
-            dir_display = str(rel)
-        except ValueError:
-            dir_display = str(h.dir)
-        print(f"  場所: {dir_display}/")
+            if args.hybrid:
+                result = hybrid_search(idx, vectors, query, limit=limit, fusion=args.fusion)
+                if not built:
+                    result.skipped.setdefault(
+                        "semantic", "意味検索の索引がありません（index --embeddings で作成）"
+                    )
+                hits = result.hits
+            else:
+                hits = vectors.search(query, limit=limit)
+        except (
+            OllamaConnectionError,
+            OllamaModelNotFoundError,
+            VectorIndexError,
+            LibrarySearchError,
+        ) as e:
+            print(f"✗ {e}")
+            return 1
+
+    if args.format == "json":
+        rows = [_hit_to_dict(h) for h in hits]
+        if args.hybrid:
+            latency = {
+                "keyword": result.keyword_ms,
+                "semantic": result.semantic_ms,
+                "total": result.total_ms,
+            }
+            rows = {"hits": rows, "latency_ms": latency, "skipped": result.skipped}
+        print(json.dumps(rows, ensure_ascii=False, indent=2))
+        return 0
+    if args.format == "ndjson":
+        for h in hits:
+            print(json.dumps(_hit_to_dict(h), ensure_ascii=False))
+        return 0
+
+    if not hits:
+        print(f'検索結果なし: "{query}"')
+        return 0
+    for h in hits:
+        score = _hybrid_signals(h) if args.hybrid else f"類似度 {h.similarity:.3f}"
+        print(f"[{h.id}] {h.title or '(タイトルなし)'}  {score}")
+        print(f"  場所: {_display_dir(h.dir)}/")
+        print(f"  抜粋: {h.snippet}")
+        print(f"  作成: {h.created_at}")
+        print()
+    print(f"→ {len(hits)}件")
+    if args.hybrid:
+        semantic = f"{result.semantic_ms:.1f} ms" if result.semantic_ms is not None else "-"
+        print(
+            f"  時間: 全文 {result.keyword_ms:.1f} ms・意味 {semantic}"
+            f"（並行して合計 {result.total_ms:.1f} ms）"
+        )
+        if "semantic" in result.skipped:
+            print(f"  ⚠ 意味検索を使わずに表示: {result.skipped['semantic']}")
+    return 0
+
+
+def _find_fuzzy(
+    idx: LibraryIndex, query: str, facets: SearchFacets | None, args: argparse.Namespace
+) -> int:
+    """find --fuzzy: 誤読しうる綴りにも広げて引き、置換コストの小さい順に表示する"""
+    if args.after or args.facets:
+        print("✗ --fuzzy では --after・--facets は使えません")
+        return 1
+    limit = args.limit or CONFIG.get("search.limit")
+    try:
+        hits = fuzzy_search(idx, query, limit=limit, facets=facets)
+    except LibrarySearchError as e:
+        print(f"✗ {e}")
+        return 1
+
+    if args.format == "json":
+        print(json.dumps([_hit_to_dict(h) for h in hits], ensure_ascii=False, indent=2))
+        return 0
+    if args.format == "ndjson":
+        for h in hits:
+            print(json.dumps(_hit_to_dict(h), ensure_ascii=False))
+        return 0
+
+    if not hits:
+        print(f'検索結果なし: "{query}"')
+        return 0
+    for h in hits:
+        fuzzy = f"  誤読の疑い: {'・'.join(h.spellings)}（コスト {h.cost:.1f}）" if h.spellings else ""
+        print(f"[{h.id}] {h.title or '(タイトルなし)'}{fuzzy}")
+        print(f"  場所: {_display_dir(h.dir)}/")
         print(f"  抜粋: {h.snippet}")
         print(f"  作成: {h.created_at}")
         print()
+    fuzzy_count = sum(1 for h in hits if h.spellings)
+    print(f"→ {len(hits)}件（うち誤読しうる綴りでの一致 {fuzzy_count}件）")
+    return 0
+
+
+def _index_shards(library_root: Path, args: argparse.Namespace) -> int:
+    """index --shard-by: 年・月ごとのシャードを並行に更新・作り直す"""
+    if args.embeddings:
+        print("✗ --shard-by では --embeddings は使えません")
+        return 1
+    if args.shard and not args.rebuild:
+        print("✗ --shard は --rebuild と一緒に指定してください")
+        return 1
 
-    print(f"→ {len(hits)}件{'（--limit で上限）' if len(hits) >= args.limit else ''}")
+    unit = "年" if args.shard_by == "year" else "月"
+    print(f"{unit}ごとのシャードを{'再構築' if args.rebuild else '更新'}中: {library_root}/")
+    with FederatedIndex([library_root], by=args.shard_by) as fed:
+        if args.rebuild:
+            results = fed.rebuild(args.shard or None)
+        else:
+            results = fed.update(reconcile=args.reconcile)
+    if not results:
+        print(f"✗ シャードが見つかりません: {'・'.join(args.shard)}" if args.shard else "  文書なし")
+        return 1 if args.shard else 0
+    for name, stats in results.items():
+        reconciled = "（突き合わせ）" if stats.reconciled else ""
+        print(
+            f"  {name}: 追加 {stats.added}・更新 {stats.updated}・削除 {stats.removed}件{reconciled}"
+        )
+    print(f"✓ 完了（{len(results)}シャード）")
     return 0
 
 
+def _find_federated(library_root: Path, args: argparse.Namespace) -> int:
+    """find --shard-by・--with-library: 各シャード・ライブラリを同時に引いて関連度順にまとめる"""
+    if args.after or args.facets or args.semantic or args.hybrid or args.fuzzy:
+        print(
+            "✗ --shard-by・--with-library では --after・--facets・--semantic・--hybrid・--fuzzy は"
+            "使えません"
+        )
+        return 1
+    roots = [library_root, *(Path(root) for root in args.with_library)]
+    for root in roots[1:]:
+        if not root.exists():
+            print(f"✗ ライブラリディレクトリが見つかりません: {root}")
+            return 1
+
+    query = " ".join(args.query)
+    limit = args.limit or CONFIG.get("search.limit")
+    with FederatedIndex(roots, by=args.shard_by) as fed:
+        fed.update()  # 各シャードの変更ジャーナルの未読分を反映してから引く
+        try:
+            hits = fed.search(query, limit=limit, facets=_facets_from_args(args))
+        except LibrarySearchError as e:
+            print(f"✗ {e}")
+            return 1
+        n_shards = len(fed.shards())
+
+    if args.format == "json":
+        print(json.dumps([_hit_to_dict(h) for h in hits], ensure_ascii=False, indent=2))
+        return 0
+    if args.format == "ndjson":
+        for h in hits:
+            print(json.dumps(_hit_to_dict(h), ensure_ascii=False))
+        return 0
+
+    if not hits:
+        print(f'検索結果なし: "{query}"')
+        return 0
+    for h in hits:
+        print(f"[{h.id}] {h.title or '(タイトルなし)'}")
+        print(f"  場所: {_display_dir(h.dir)}/")
+        print(f"  抜粋: {h.snippet}")
+        if h.line is not None:
+            page_note = f"（元画像 {h.page}枚目付近）" if h.page else ""
+            print(f"  位置: modern.txt {h.line}行目{page_note}")
+        print(f"  作成: {h.created_at}")
+        print()
+    print(f"→ {len(hits)}件（{n_shards}シャードから）")
+    return 0
+
+
+def _hybrid_signals(hit: HybridHit) -> str:
+    """--hybrid の各ヒットの内訳（どちらの検索で何位だったか）"""
+    signals = []
+    if hit.keyword_rank is not None:
+        signals.append(f"全文 {hit.keyword_rank}位")
+    if hit.semantic_rank is not None:
+        signals.append(f"意味 {hit.semantic_rank}位 {hit.similarity:.3f}")
+    return f"スコア {hit.score:.4f}（{'・'.join(signals)}）"
+
+
 def cmd_stat(args: argparse.Namespace) -> int:
     """stat サブコマンド"""
     library_root = Path(args.library_root)
@@ -181,7 +904,21 @@ def cmd_stat(args: argparse.Namespace) -> int:
         print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
         return 1
 
-    idx = LibraryIndex(library_root)
+    idx = get_index(library_root)
+
+    if args.forget_term is not None or args.term is not None:
+        idx.update()
+        if args.forget_term is not None:
+            forgotten = idx.forget_term(args.forget_term)
+            print(f"{'✓ 集計の対象から外しました' if forgotten else '集計の対象ではありません'}: {args.forget_term}")
+        if args.term is None:
+            return 0
+        return _print_term_frequency(idx, args)
+
+    # 絞り込み・json はカタログの集計だけ（検索インデックスの統計は全体のもの）
+    facets = _facets_from_args(args)
+    if facets is not None or args.format == "json":
+        return _print_catalog_summary(library_root, facets, args.format)
 
     if not idx.db_path.exists():
         print("⚠ インデックス未構築のため自動で更新します...")
@@ -192,11 +929,359 @@ def cmd_stat(args: argparse.Namespace) -> int:
     print(f"ライブラリ: {s['library_root']}")
     print(f"文書数: {s['document_count']}")
     print(f"インデックスサイズ: {s['db_size_bytes'] / 1024:.1f} KB")
+    for table, label in _TABLE_LABELS:
+        size = s["table_bytes"].get(table, 0)
+        print(f"  {label:<22} {size / 1024:12,.1f} KB")
     if s["latest_doc_mtime"]:
         dt = datetime.fromtimestamp(s["latest_doc_mtime"])
         print(f"最終更新: {dt.strftime('%Y-%m-%d %H:%M:%S')}")
     else:
         print("最終更新: (文書なし)")
+    if tracked := idx.tracked_terms():
+        print(f"出現数を集計中の語: {'・'.join(tracked)}")
+    if not s["document_count"]:
+        return 0
+    print()
+    _print_catalog_summary(library_root, None, "text")
+
+    with VectorIndex(idx) as vectors:
+        v = vectors.stat()
+    if v:
+        ann = f"・近似検索 {v['ann_lists']}リスト" if v["ann_lists"] else ""
+        print(
+            f"意味検索: {v['passage_count']:,}パッセージ（{v['document_count']}文書・{v['model']}・"
+            f"{v['dim']}次元{ann}） {v['matrix_bytes'] / 1024:,.1f} KB"
+        )
+
+    # 原文（ocr_raw）を索引に含めたぶんのコスト
+    r = idx.raw_overhead()
+    print()
+    print("原文（ocr_raw.txt）の索引コスト:")
+    print(
+        f"  サイズ（推定）: {r['raw_bytes_estimate'] / 1024:,.1f} KB"
+        f"（全文索引のトークンの {r['raw_token_share']:.0%}＋圧縮した原文）"
+    )
+    if r["probe_count"]:
+        print(
+            f"  検索時間（中央値・{r['probe_count']}語）: 原文なし {r['latency_ms_without_raw']:.2f} ms"
+            f" → 原文あり {r['latency_ms_with_raw']:.2f} ms"
+            f"（語の正規化・字体展開 {r['expand_us']:.0f} µs/語）"
+        )
+    return 0
+
+
+def _print_catalog_summary(
+    library_root: Path, facets: SearchFacets | None, fmt: str
+) -> int:
+    """stat: カタログ（meta.json の集計）から文書・ページ数と OCR の時間を表示する"""
+    try:
+        with LibraryCatalog(library_root) as catalog:
+            catalog.update()
+            s = catalog.summary(facets)
+    except LibrarySearchError as e:
+        print(f"✗ {e}")
+        return 1
+
+    if fmt == "json":
+        print(json.dumps(asdict(s), ensure_ascii=False, indent=2))
+        return 0
+
+    print("カタログ（meta.json の集計）:")
+    if facets is not None:
+        print(f"  文書数: {s.documents:,}")
+    if not s.documents:
+        print("  （文書なし）")
+        return 0
+    print(f"  ページ数: {s.pages:,}（1文書あたり {s.pages / s.documents:.1f}）")
+    if s.first_created:
+        print(f"  作成日: {s.first_created[:10]} 〜 {s.last_created[:10]}")
+    print(f"  OCR: 計 {_format_seconds(s.ocr_seconds)}{_per_page(s.seconds_per_page, s.median_seconds_per_page)}")
+    if s.preprocess_seconds:
+        print(f"  前処理: 計 {_format_seconds(s.preprocess_seconds)}")
+    print(f"  口語体変換: {s.modernized:,}文書")
+    print("  OCRモデル:")
+    width = max(_display_width(m.model or "（不明）") for m in s.models)
+    for m in s.models:
+        name = m.model or "（不明）"
+        per_page = f"  {m.seconds_per_page:.1f}秒/ページ" if m.seconds_per_page is not None else ""
+        print(
+            f"    {name}{' ' * (width - _display_width(name))}"
+            f"  {m.documents:>8,}文書  {m.pages:>8,}ページ  計 {_format_seconds(m.ocr_seconds)}{per_page}"
+        )
+    return 0
+
+
+def _per_page(mean: float | None, median: float | None) -> str:
+    if mean is None:
+        return ""
+    return f"（1ページあたり 平均 {mean:.1f}秒・中央値 {median:.1f}秒）"
+
+
+def _format_seconds(seconds: float) -> str:
+    """秒数を「1時間2分」「3分4秒」「5.6秒」の形にする"""
+    if seconds < 60:
+        return f"{seconds:.1f}秒"
+    minutes, sec = divmod(round(seconds), 60)
+    if minutes < 60:
+        return f"{minutes}分{sec}秒"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:,}時間{minutes}分"
+
+
+def _print_term_frequency(idx: LibraryIndex, args: argparse.Namespace) -> int:
+    """stat --term: 語の出現数を区分ごとに表示する"""
+    try:
+        buckets = idx.term_frequency(args.term, by=args.by, facets=_facets_from_args(args))
+    except LibrarySearchError as e:
+        print(f"✗ {e}")
+        return 1
+
+    if args.format == "json":
+        print(json.dumps([asdict(b) for b in buckets], ensure_ascii=False, indent=2))
+        return 0
+
+    label = {"month": "月", "year": "年", "tag": "タグ"}[args.by]
+    print(f"「{args.term}」の出現数（{label}ごと・modern.txt）")
+    if not buckets:
+        print("（文書なし）")
+        return 0
+    print(_term_chart(buckets))
+    total = sum(b.occurrences for b in buckets)
+    matched = sum(b.matched_docs for b in buckets)
+    documents = sum(b.documents for b in buckets)
+    print(f"→ 計 {total:,}件（{matched:,} / {documents:,}文書）")
+    return 0
+
+
+def _term_chart(buckets: list[TermBucket], width: int = 30) -> str:
+    """区分ごとの出現数を横棒グラフの行にする"""
+    key_width = max(_display_width(b.key) for b in buckets)
+    top = max(b.occurrences for b in buckets) or 1
+    lines = []
+    for b in buckets:
+        bar = "█" * round(b.occurrences / top * width)
+        share = b.matched_docs / b.documents if b.documents else 0
+        lines.append(
+            f"  {b.key}{' ' * (key_width - _display_width(b.key))}  {bar:<{width}} {b.occurrences:>8,}件"
+            f"  {b.matched_docs:,} / {b.documents:,}文書（{share:.0%}）"
+        )
+    return "\n".join(lines)
+
+
+def _display_width(text: str) -> int:
+    """端末での表示幅（全角は2桁）"""
+    return sum(2 if unicodedata.east_asian_width(c) in "WF" else 1 for c in text)
+
+
+# stat で内訳を表示する表（stat()["table_bytes"] のキー）
+_TABLE_LABELS = [
+    ("search", "全文索引（trigram）"),
+    ("grams", "短い語の索引"),
+    ("doc_text", "本文（圧縮）"),
+    ("raw_terms", "原文の文字索引"),
+    ("documents", "文書メタデータ"),
+    ("doc_tags", "タグ"),
+    ("term_counts", "語の出現数（集計）"),
+]
+
+
+def cmd_list(args: argparse.Namespace) -> int:
+    """list サブコマンド"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    facets = _facets_from_args(args)
+    try:
+        with LibraryCatalog(library_root) as catalog:
+            catalog.update(reconcile=args.reconcile)
+            if args.format in ("json", "ndjson"):
+                _write_metas(catalog.export(facets, args.sort, args.limit), args.format)
+                return 0
+            entries = catalog.entries(facets, args.sort, args.limit)
+    except LibrarySearchError as e:
+        print(f"✗ {e}", file=sys.stderr)
+        return 1
+
+    if args.format == "tsv":
+        print("\t".join(_LIST_COLUMNS))
+        for e in entries:
+            row = (
+                e.id, e.created_at, e.pages, e.ocr_model,
+                "" if e.ocr_seconds is None else e.ocr_seconds,
+                e.modernize_model, "・".join(e.tags), e.title,
+            )  # fmt: skip
+            print("\t".join(str(v).replace("\t", " ") for v in row))
+        return 0
+
+    for e in entries:
+        print(_format_entry(e))
+    print(f"→ {len(entries):,}件")
+    return 0
+
+
+_LIST_COLUMNS = (
+    "id", "created_at", "pages", "ocr_model", "ocr_seconds", "modernize_model", "tags", "title"
+)
+
+
+def _format_entry(e: CatalogEntry) -> str:
+    """list の text 出力の1行"""
+    parts = [e.id, f"{e.pages}枚"]
+    if e.ocr_seconds is not None:
+        per_page = f"・{e.ocr_seconds / e.pages:.1f}秒/枚" if e.pages and e.ocr_seconds else ""
+        parts.append(f"OCR {e.ocr_seconds:.1f}秒{per_page}（{e.ocr_model}）")
+    if e.modernize_model:
+        parts.append(f"口語体 {e.modernize_model}")
+    if e.tags:
+        parts.append(f"[{'・'.join(e.tags)}]")
+    parts.append(e.title)
+    return "  ".join(parts)
+
+
+def _write_metas(metas: Iterable[dict], fmt: str) -> None:
+    """list --format json / ndjson: meta.json を1件ずつ書き出す"""
+    out = sys.stdout
+    count = 0
+    for meta in metas:
+        if fmt == "json":
+            out.write("[\n" if count == 0 else ",\n")
+        out.write(json.dumps(meta, ensure_ascii=False))
+        if fmt == "ndjson":
+            out.write("\n")
+        count += 1
+    if fmt == "json":
+        out.write("\n]\n" if count else "[]\n")
+    out.flush()
+
+
+def cmd_dedup(args: argparse.Namespace) -> int:
+    """dedup サブコマンド"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    idx = get_index(library_root)
+    idx.update()
+    clusters = cluster_duplicates(idx, threshold=args.threshold)
+    info = idx.document_info(doc_id for c in clusters for doc_id in c.ids)
+
+    if args.format == "json":
+        out = [
+            {
+                "ids": c.ids,
+                "dirs": [str(info[doc_id][0]) for doc_id in c.ids if doc_id in info],
+                "links": [asdict(link) for link in c.links],
+            }
+            for c in clusters
+        ]
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+        return 0
+
+    if not clusters:
+        print(f"近似重複はありません（類似度 {args.threshold} 以上）")
+        return 0
+    for n, cluster in enumerate(clusters, start=1):
+        print(f"[{n}] {len(cluster.ids)}件")
+        for doc_id in cluster.ids:
+            title = info[doc_id][1] if doc_id in info else ""
+            print(f"  {doc_id}  {title}")
+        for link in cluster.links:
+            pages = ""
+            if link.page_a or link.page_b:
+                pages = f"（ページ {link.page_a or '全体'} ↔ {link.page_b or '全体'}）"
+            print(f"    {link.a} ↔ {link.b}  類似度 {link.similarity:.2f}{pages}")
+    print()
+    print(f"✓ {len(clusters)}組・{sum(len(c.ids) for c in clusters)}件")
+    return 0
+
+
+def cmd_objects(args: argparse.Namespace) -> int:
+    """objects サブコマンド"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    if not (args.migrate or args.gc):
+        _print_object_stats(object_stats(library_root))
+        return 0
+
+    note = "（--dry-run: 見積もりのみ）" if args.dry_run else ""
+    before = object_stats(library_root)
+    if args.migrate:
+        report = migrate(library_root, dry_run=args.dry_run)
+        print(f"画像 {report.files}件{note}")
+        print(f"  ストアに登録: {report.stored}件")
+        print(f"  同じ中身の画像へのリンクに置き換え: {report.linked}件")
+        print(f"  登録済み: {report.already}件")
+        for path, reason in report.failed:
+            print(f"  ⚠ {path}: {reason}")
+        print(f"  空く容量: {_format_bytes(report.reclaimed_bytes)}")
+    if args.gc:
+        gc = collect_garbage(library_root, dry_run=args.dry_run)
+        print(f"使われていない画像の削除: {gc.removed}件・{_format_bytes(gc.reclaimed_bytes)}{note}")
+    if args.dry_run:
+        return 0
+
+    after = object_stats(library_root)
+    print()
+    _print_object_stats(after)
+    print(f"✓ 完了（使用量 {_format_bytes(before.physical_bytes - after.physical_bytes)} 減）")
+    return 0
+
+
+def _print_object_stats(stats: ObjectStats) -> None:
+    print(f"画像: {stats.files}件")
+    print(f"  文書フォルダから見た合計: {_format_bytes(stats.logical_bytes)}")
+    print(f"  実際の使用量: {_format_bytes(stats.physical_bytes)}")
+    print(f"  ストアの画像: {stats.blobs}件")
+    if stats.unreferenced_blobs:
+        print(
+            f"  使われていない画像: {stats.unreferenced_blobs}件・"
+            f"{_format_bytes(stats.unreferenced_bytes)}（--gc で削除）"
+        )
+
+
+def _format_bytes(n: int) -> str:
+    return f"{n / 1024 / 1024:,.1f} MB"
+
+
+def cmd_renormalize(args: argparse.Namespace) -> int:
+    """renormalize サブコマンド"""
+    library_root = Path(args.library_root)
+    if not library_root.exists():
+        print(f"✗ ライブラリディレクトリが見つかりません: {library_root}")
+        return 1
+
+    report = renormalize_library(library_root, dry_run=args.dry_run)
+
+    if report.baseline:
+        print("現在のOCR誤読ルールを基準として記録しました（次回からの変更を検知します）")
+        return 0
+    if not report.added_rules and not report.removed_rules:
+        print("OCR誤読ルールに変更はありません")
+        return 0
+
+    for rule in report.added_rules:
+        print(f"  + {rule.pattern} → {rule.replacement}")
+    for rule in report.removed_rules:
+        print(f"  - {rule.pattern} → {rule.replacement}")
+    print(f"候補文書: {report.candidates}件")
+
+    verb = "対象" if args.dry_run else "反映"
+    for doc_id in report.renormalized:
+        print(f"  [{doc_id}] 再正規化{verb}")
+    for doc_id in report.patched:
+        print(f"  [{doc_id}] modern.txt 置換{verb}")
+    for doc_id, reason in report.skipped:
+        print(f"  ⚠ [{doc_id}] スキップ: {reason}")
+
+    if report.index is not None:
+        _print_stats(report.index)
+    print(f"✓ {'確認のみ（--dry-run）' if args.dry_run else '完了'}")
     return 0
 
 
@@ -208,9 +1293,57 @@ def _print_stats(stats: IndexStats) -> None:
     print(f"  更新: {stats.updated}件")
     print(f"  削除: {stats.removed}件")
     print(f"  スキップ: {stats.skipped}件")
+    if stats.reconciled:
+        print("  （ライブラリ全体と突き合わせました）")
+
+
+def _print_vector_stats(stats: VectorStats) -> None:
+    print(f"  埋め込み: {stats.embedded}パッセージ（{stats.documents}文書）")
+    print(f"  使い回し: {stats.reused}パッセージ")
+    print(f"  削除: {stats.removed}パッセージ")
+    if stats.compacted:
+        print("  （消えた行を詰めてベクトルのファイルを作り直しました）")
+    if stats.ann_lists:
+        print(f"  （近似検索の索引を作り直しました: {stats.ann_lists}リスト）")
+
+
+def _facets_from_args(args: argparse.Namespace) -> SearchFacets | None:
+    facets = SearchFacets(
+        tags=tuple(args.tag),
+        since=args.since,
+        until=args.until,
+        model=args.model,
+        min_sources=args.min_sources,
+    )
+    return None if facets == SearchFacets() else facets
+
+
+# find --facets で表示する項目（facet_counts() のキー）
+_FACET_LABELS = [
+    ("tag", "タグ"),
+    ("year", "作成年"),
+    ("ocr_model", "OCRモデル"),
+    ("modernize_model", "口語体変換モデル"),
+    ("sources", "元画像の枚数"),
+]
+
+
+def _print_facet_counts(counts: dict[str, dict[str, int]]) -> None:
+    print()
+    print("内訳（検索結果全体）:")
+    for key, label in _FACET_LABELS:
+        if counts[key]:
+            print(f"  {label}: " + "  ".join(f"{v} {n}件" for v, n in counts[key].items()))
+
+
+def _display_dir(doc_dir: Path) -> str:
+    try:
+        return str(doc_dir.relative_to(Path.cwd()))
+    except ValueError:
+        return str(doc_dir)
 
 
-def _hit_to_dict(hit: SearchHit) -> dict:
+def _hit_to_dict(hit: SearchHit | SemanticHit | HybridHit | FuzzyHit | GrepMatch) -> dict:
     d = asdict(hit)
     d["dir"] = str(hit.dir)
     return d
@@ -225,8 +1358,20 @@ def run(args: argparse.Namespace) -> int:
         return cmd_index(args)
     if args.command == "find":
         return cmd_find(args)
+    if args.command == "grep":
+        return cmd_grep(args)
+    if args.command == "kwic":
+        return cmd_kwic(args)
     if args.command == "stat":
         return cmd_stat(args)
+    if args.command == "list":
+        return cmd_list(args)
+    if args.command == "dedup":
+        return cmd_dedup(args)
+    if args.command == "objects":
+        return cmd_objects(args)
+    if args.command == "renormalize":
+        return cmd_renormalize(args)
     return 1
 
 
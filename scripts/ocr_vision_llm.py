@@ -17,9 +17,15 @@
     uv run prewar-ocr input/画像.png --no-modernize   # 口語体変換をスキップ
     uv run prewar-ocr input/画像.png --legacy-output  # 旧 output/*_modern.txt も併存
     uv run prewar-ocr input/画像.png --no-save        # 保存をスキップ（コンソール出力のみ）
+    uv run prewar-ocr input/画像.png --allow-duplicates  # 取り込み済みのページでもOCRする
+
+OCR の前に、取り込む画像を知覚ハッシュでライブラリの元画像・同じ回の画像と
+照らし、もうライブラリにあるページ・二度撮りした画像は OCR にかけない
+（複数画像を1記録にまとめるときは、1枚だけの記録のページなら OCR 結果を使い回す）。
 """
 
 import argparse
+import json
 import sys
 import tempfile
 from pathlib import Path
@@ -32,6 +38,7 @@ from utils.image_preprocessor import (
     options_from_config,
     preprocess_image,
 )
+from utils.library_images import ImageCheck, check_images
 from utils.library_writer import (
     DocumentRecord,
     MetaModernize,
@@ -130,6 +137,11 @@ def add_arguments(parser: argparse.ArgumentParser) -> None:
         action="store_true",
         help="shoot 時に撮影のみ行い、OCR処理は後回しにする",
     )
+    parser.add_argument(
+        "--allow-duplicates",
+        action="store_true",
+        help="取り込み済みのページ・二度撮りした画像の確認をせずにOCRする",
+    )
     parser.add_argument(
         "--separate",
         action="store_true",
@@ -262,6 +274,50 @@ def _save_legacy_batch(text: str, image_paths: list[Path], output_dir: Path) ->
     return output_file
 
 
+def _check_duplicates(args: argparse.Namespace, image_paths: list[Path]) -> list[ImageCheck]:
+    """OCR の前に、取り込む画像が同じ回の画像・ライブラリの元画像と同じページかを調べる"""
+    if args.allow_duplicates or not CONFIG.get("image_hash.guard"):
+        return [ImageCheck(path) for path in image_paths]
+
+    print("\n[重複チェック] 取り込み済みのページ・二度撮りを確認中...")
+    checks = check_images(image_paths, Path(args.library_root))
+    for check in checks:
+        if check.duplicate_of is not None:
+            print(f"  ⚠ {check.path.name}: {check.duplicate_of.name} と同じページ（二度撮り）")
+        elif check.matches:
+            m = check.matches[0]
+            print(f"  ⚠ {check.path.name}: ライブラリの {m.doc_id}/{m.name} と同じページ")
+    return checks
+
+
+def _reused_ocr(check: ImageCheck) -> OCRResult | None:
+    """ライブラリの同じページが1枚だけの記録なら、その OCR 結果を使い回す"""
+    for m in check.matches:
+        try:
+            meta = json.loads((m.dir / "meta.json").read_text(encoding="utf-8"))
+            if len(meta.get("sources", [])) != 1:
+                continue
+            text = (m.dir / "ocr_raw.txt").read_text(encoding="utf-8")
+        except (OSError, ValueError):
+            continue
+        ocr = meta.get("ocr", {})
+        return OCRResult(
+            text=text,
+            model=ocr.get("model", ""),
+            image_path=str(m.dir / m.name),
+            elapsed_seconds=0.0,
+            prompt=ocr.get("prompt", ""),
+        )
+    return None
+
+
+def _print_near_duplicates(doc_dir: Path) -> None:
+    """保存した記録の meta.json に近似重複があれば知らせる"""
+    meta = json.loads((doc_dir / "meta.json").read_text(encoding="utf-8"))
+    for dup in meta.get("near_duplicates", []):
+        print(f"  ⚠ 本文の近い記録があります: {dup['id']}（類似度 {dup['similarity']:.2f}）")
+
+
 def _create_ocr_client(args: argparse.Namespace) -> OllamaOCRClient:
     """引数からOCRクライアントを生成する"""
     client_kwargs = {"model": args.model}
@@ -336,8 +392,12 @@ def _preprocess_images(
     return out_paths, meta
 
 
-def process_single(args: argparse.Namespace, image_path: Path) -> int:
-    """1枚の画像を処理するパイプライン"""
+def process_single(args: argparse.Namespace, image_path: Path, check: bool = True) -> int:
+    """1枚の画像を処理するパイプライン（check なら先に取り込み済みのページか確かめる）"""
+    if check and _check_duplicates(args, [image_path])[0].matches:
+        print("  → OCRをスキップしました（それでも処理するには --allow-duplicates）")
+        return 0
+
     # 前処理後画像は一時ディレクトリに置き、OCR入力に使う。
     # 保存時は save_document が temp 削除前に library へ実体コピーする。
     with tempfile.TemporaryDirectory(prefix="prewar_pre_") as tmp:
@@ -421,6 +481,7 @@ def process_single(args: argparse.Namespace, image_path: Path) -> int:
             )
             doc_dir = save_document(record, library_root=Path(args.library_root))
             print(f"\n✓ ライブラリに保存: {doc_dir}")
+            _print_near_duplicates(doc_dir)
 
             if args.legacy_output:
                 legacy_path = _save_legacy(modern, image_path, Path(args.output))
@@ -430,7 +491,18 @@ def process_single(args: argparse.Namespace, image_path: Path) -> int:
 
 
 def process_batch(args: argparse.Namespace, image_paths: list[Path]) -> int:
-    """複数画像を結合して処理するパイプライン"""
+    """複数画像を結合して処理するパイプライン
+
+    二度撮りした画像は除き、ライブラリにある1枚だけの記録と同じページは
+    その OCR 結果を使い回す。すべてのページがライブラリにあれば何もしない。
+    """
+    checks = [c for c in _check_duplicates(args, image_paths) if c.duplicate_of is None]
+    if all(c.matches for c in checks):
+        print("  → すべてのページがライブラリにあるのでスキップしました（--allow-duplicates で処理）")
+        return 0
+    image_paths = [c.path for c in checks]
+    reused = {c.path: result for c in checks if (result := _reused_ocr(c)) is not None}
+
     total = len(image_paths)
     names = ", ".join(p.name for p in image_paths)
     print(f"\n処理モード: 複数画像（{total}枚）")
@@ -447,6 +519,10 @@ def process_batch(args: argparse.Namespace, image_paths: list[Path]) -> int:
 
         for i, (path, target) in enumerate(zip(image_paths, ocr_targets)):
             print(f"\n[OCR {i + 1}/{total}] {path.name}")
+            if path in reused:
+                print(f"  ライブラリの OCR 結果を使います: {reused[path].image_path}")
+                ocr_results.append(reused[path])
+                continue
             print(f"  モデル: {args.model}")
 
             result = _run_ocr(client, target)
@@ -526,6 +602,7 @@ def process_batch(args: argparse.Namespace, image_paths: list[Path]) -> int:
             )
             doc_dir = save_document(record, library_root=Path(args.library_root))
             print(f"\n✓ ライブラリに保存: {doc_dir}")
+            _print_near_duplicates(doc_dir)
 
             if args.legacy_output:
                 legacy_path = _save_legacy_batch(modern, image_paths, Path(args.output))
@@ -561,9 +638,13 @@ def process_folder(args: argparse.Namespace, folder: Path) -> int:
 
     if args.separate:
         print(f"\n処理モード: 画像ごとに別記録（{len(images)}件）")
-        for i, image in enumerate(images, start=1):
-            print(f"\n===== {i}/{len(images)}: {image.name} =====")
-            code = process_single(args, image)
+        checks = _check_duplicates(args, images)
+        for i, check in enumerate(checks, start=1):
+            print(f"\n===== {i}/{len(images)}: {check.path.name} =====")
+            if check.duplicate_of is not None or check.matches:
+                print("  → 取り込み済み・二度撮りのためスキップ（--allow-duplicates で処理）")
+                continue
+            code = process_single(args, check.path, check=False)
             if code != 0:
                 return code
         return 0
@@ -582,7 +663,10 @@ def cmd_shoot(args: argparse.Namespace) -> int:
         return 1
 
     try:
-        images = screen_capture.shoot_session(INPUT_DIR)
+        images = screen_capture.shoot_session(
+            INPUT_DIR,
+            skip_duplicates=CONFIG.get("image_hash.guard") and not args.allow_duplicates,
+        )
     except screen_capture.ScreenCaptureError as e:
         print(f"✗ 撮影エラー: {e}")
         return 1
@@ -31,9 +31,10 @@ import argparse
 import sys
 from pathlib import Path
 
+import senzen_word
+
 from utils.config import CONFIG
 from utils.text_normalizer import normalize_text, find_normalizations
-from senzen_word.kana import find_historical_kana, find_katakana_particles
 
 
 def postprocess(
@@ -80,10 +81,16 @@ def process_file(
     original = input_path.read_text(encoding="utf-8")
     converted = postprocess(original, normalize, modernize, modernize_model)
 
-    # 変換統計
+    # 変換統計（仮名・助詞は senzen_word.find の1パス走査でまとめて検出）
     normalizations = find_normalizations(original) if normalize else []
-    kana_matches = find_historical_kana(original) if normalize else []
-    particle_matches = find_katakana_particles(original) if normalize else []
+    kana_matches: list[tuple[str, str, int]] = []
+    particle_matches: list[tuple[str, str, int]] = []
+    if normalize:
+        for old, new, pos, category in senzen_word.find(
+            original, categories=("kana", "particle")
+        ):
+            target = kana_matches if category == "kana" else particle_matches
+            target.append((old, new, pos))
 
     print(f"\n  ファイル: {input_path}")
     print(f"  OCR誤読修正: {len(normalizations)}箇所")
@@ -0,0 +1,44 @@
+"""テスト共通のヘルパー"""
+
+import json
+from pathlib import Path
+
+from utils.library_journal import record_change
+
+
+def make_doc(
+    library_root: Path,
+    doc_id: str,
+    modern: str | None = "",
+    raw: str | None = None,
+    *,
+    title: str | None = None,
+    created_at: str = "2026-01-01",
+    sources: int | None = None,
+    tags: list[str] | None = None,
+    record: bool = False,
+    **meta,
+) -> Path:
+    """library_root 配下に文書フォルダ（meta.json・modern.txt・ocr_raw.txt）を作る
+
+    title を省くと doc_id。sources を渡すと元画像の名前をその枚数ぶん meta に
+    入れ、tags を渡すとタグを入れる。ほかの meta の項目はキーワード引数で足す。
+    modern・raw が None のファイルは作らない。record なら変更ジャーナルにも記録する。
+    同じ doc_id で呼び直すと上書きする。
+    """
+    doc_dir = library_root / doc_id
+    doc_dir.mkdir(parents=True, exist_ok=True)
+    data = {"title": doc_id if title is None else title, "created_at": created_at}
+    if sources is not None:
+        data["sources"] = [f"source_{i:02d}.png" for i in range(1, sources + 1)]
+    if tags is not None:
+        data["tags"] = list(tags)
+    data.update(meta)
+    (doc_dir / "meta.json").write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    if modern is not None:
+        (doc_dir / "modern.txt").write_text(modern, encoding="utf-8")
+    if raw is not None:
+        (doc_dir / "ocr_raw.txt").write_text(raw, encoding="utf-8")
+    if record:
+        record_change(library_root, doc_id)
+    return doc_dir
@@ -0,0 +1,160 @@
+"""ライブラリのカタログ（library/.index/catalog.db）のテスト"""
+
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+from conftest import make_doc
+from utils.library_catalog import LibraryCatalog
+from utils.library_journal import record_change
+from utils.library_search import SearchFacets
+from utils.library_writer import (
+    DocumentRecord,
+    MetaModernize,
+    MetaNormalization,
+    MetaOcr,
+    MetaPreprocess,
+    save_document,
+)
+
+
+def _catalog_doc(
+    library_root: Path,
+    doc_id: str,
+    pages: int = 1,
+    seconds: float = 10.0,
+    model: str = "glm-ocr",
+    tags: list[str] | None = None,
+    **extra,
+) -> Path:
+    """保存済みの文書と同じ形の meta.json だけを持つ文書フォルダを作る"""
+    return make_doc(
+        library_root,
+        doc_id,
+        None,
+        created_at=f"{doc_id[:10]}T10:00:00+09:00",
+        sources=pages,
+        tags=tags or [],
+        schema_version=1,
+        id=doc_id,
+        ocr={"model": model, "prompt": "p", "elapsed_seconds": seconds},
+        normalization={"old_kanji": True, "historical_kana": True, "ocr_misread_correction": True},
+        modernize={"enabled": False, "model": ""},
+        note="",
+        **extra,
+    )
+
+
+def _metas(catalog: LibraryCatalog) -> dict[str, dict]:
+    return {meta["id"]: meta for meta in catalog.export()}
+
+
+def _read_meta(doc_dir: Path) -> dict:
+    return json.loads((doc_dir / "meta.json").read_text(encoding="utf-8"))
+
+
+def test_save_document_fills_catalog_and_export_round_trips(tmp_path):
+    root = tmp_path / "library"
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"png")
+    plain = save_document(
+        DocumentRecord(
+            source_paths=[image],
+            ocr_raw="題\n本文",
+            modern_text="本文",
+            ocr_meta=MetaOcr(model="glm-ocr", prompt="p", elapsed_seconds=4.0),
+            normalization=MetaNormalization(True, True, True),
+            modernize=MetaModernize(enabled=True, model="qwen"),
+            tags=["新聞", "震災"],
+        ),
+        root,
+    )
+    preprocessed = save_document(
+        DocumentRecord(
+            source_paths=[image, image],
+            ocr_raw="題",
+            modern_text="題",
+            ocr_meta=MetaOcr(model="glm-ocr", prompt="p", elapsed_seconds=6.0),
+            normalization=MetaNormalization(False, False, False),
+            modernize=MetaModernize(enabled=False, model=""),
+            preprocessed_paths=[image, image],
+            preprocess=MetaPreprocess(True, ["grayscale", "clahe"], 0.5),
+        ),
+        root,
+    )
+    # 手で足した項目・近似重複も元の形で戻る
+    meta = _read_meta(preprocessed)
+    meta["near_duplicates"] = [{"id": plain.name, "similarity": 0.91, "page": 1}]
+    meta["reviewed_by"] = {"name": "山田"}
+    (preprocessed / "meta.json").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    record_change(root, preprocessed.name)
+
+    with LibraryCatalog(root) as catalog:
+        # save_document がもう入れている
+        assert [e.id for e in catalog.entries()] == [plain.name, preprocessed.name]
+        catalog.update()
+        assert _metas(catalog) == {
+            plain.name: _read_meta(plain),
+            preprocessed.name: _read_meta(preprocessed),
+        }
+        entry = catalog.entries(SearchFacets(tags=("震災",)))[0]
+        assert (entry.id, entry.pages, entry.modernize_model, entry.tags) == (
+            plain.name, 1, "qwen", ["新聞", "震災"]
+        )  # fmt: skip
+
+
+def test_update_follows_journal_and_reconcile(tmp_path):
+    root = tmp_path / "library"
+    _catalog_doc(root, "2026-01-01_a")
+    b = _catalog_doc(root, "2026-01-02_b")
+    with LibraryCatalog(root) as catalog:
+        assert catalog.update().added == 2
+
+        _catalog_doc(root, "2026-01-02_b", tags=["新聞"])
+        record_change(root, b.name)
+        assert catalog.update().updated == 1
+        assert [e.id for e in catalog.entries(SearchFacets(tags=("新聞",)))] == [b.name]
+
+        # ジャーナルを通らない削除は突き合わせで拾う
+        shutil.rmtree(b)
+        assert catalog.update().removed == 0
+        stats = catalog.update(reconcile=True)
+        assert (stats.removed, stats.reconciled) == (1, True)
+
+        # 別プロセスの接続が開いたままでも、作り直した中身を読み書きする
+        other = sqlite3.connect(catalog.db_path)
+        other.execute("SELECT COUNT(*) FROM documents").fetchone()
+        _catalog_doc(root, "2026-01-03_c")
+        assert catalog.rebuild().added == 2
+        assert sorted(_metas(catalog)) == ["2026-01-01_a", "2026-01-03_c"]
+        assert other.execute("SELECT COUNT(*) FROM documents").fetchone() == (2,)
+        with other:
+            other.execute("DELETE FROM documents WHERE id = '2026-01-03_c'")
+        other.close()
+        assert sorted(_metas(catalog)) == ["2026-01-01_a"]
+        assert not catalog.db_path.with_name("catalog.db.build").exists()
+
+
+def test_summary_reports_seconds_per_page(tmp_path):
+    root = tmp_path / "library"
+    _catalog_doc(root, "2026-01-01_a", pages=2, seconds=20.0)
+    _catalog_doc(root, "2026-02-01_b", pages=1, seconds=4.0, model="other")
+    _catalog_doc(root, "2026-02-02_c", pages=3, seconds=0.0)  # OCR を使い回した記録
+    _catalog_doc(root, "2026-03-01_d", pages=1, seconds=30.0, tags=["新聞"])
+    with LibraryCatalog(root) as catalog:
+        catalog.update()
+        s = catalog.summary()
+        assert (s.documents, s.pages, s.ocr_seconds) == (4, 7, 54.0)
+        assert s.seconds_per_page == 54.0 / 4
+        assert s.median_seconds_per_page == 10.0  # 4・10・30
+        assert [(m.model, m.documents, m.seconds_per_page) for m in s.models] == [
+            ("glm-ocr", 3, 50.0 / 3),
+            ("other", 1, 4.0),
+        ]
+        s = catalog.summary(SearchFacets(since="2026-02", until="2026-02"))
+        assert (s.documents, s.pages, s.median_seconds_per_page) == (2, 4, 4.0)
+        assert [e.id for e in catalog.entries(sort="per-page", limit=2)] == [
+            "2026-03-01_d",
+            "2026-01-01_a",
+        ]
@@ -0,0 +1,103 @@
+"""文字統計・OCR誤読候補抽出のテスト"""
+
+import json
+import os
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+from utils.char_stats import collect_stats, count_codepoints, find_misread_candidates
+
+
+def _write_raw(library_root: Path, doc_id: str, raw: str) -> None:
+    doc_dir = library_root / doc_id
+    doc_dir.mkdir(parents=True, exist_ok=True)
+    (doc_dir / "ocr_raw.txt").write_text(raw, encoding="utf-8")
+
+
+# ---------- count_codepoints ----------
+
+
+def test_count_codepoints_matches_counter():
+    texts = ["國會ニ於テ國", "", "𠮷野家 abc\n郧", "あああ"]
+    indptr, codes, counts = count_codepoints(texts)
+    assert len(indptr) == len(texts) + 1
+    for i, text in enumerate(texts):
+        got = dict(zip(codes[indptr[i] : indptr[i + 1]].tolist(), counts[indptr[i] : indptr[i + 1]].tolist()))
+        assert got == {ord(c): n for c, n in Counter(text).items()}
+
+
+def test_count_codepoints_empty():
+    indptr, codes, counts = count_codepoints([])
+    assert indptr.tolist() == [0]
+    assert len(codes) == len(counts) == 0
+
+
+# ---------- collect_stats（キャッシュ） ----------
+
+
+@pytest.fixture
+def library(tmp_path):
+    root = tmp_path / "library"
+    _write_raw(root, "a", "山田太郎ハ東京ニ住ム" * 3)
+    _write_raw(root, "b", "鈴木次郓ノ報告。太郎ト次郎。")
+    _write_raw(root, "c", "関東大震災ノ記録。太郎")
+    (root / ".index").mkdir()
+    return root
+
+
+def test_totals_and_doc_freqs(library):
+    stats = collect_stats(library)
+    assert stats.doc_ids == ["a", "b", "c"]
+    assert stats.totals()[ord("太")] == 5
+    assert stats.doc_freqs()[ord("太")] == 3
+    assert stats.doc_freqs()[ord("郓")] == 1
+
+
+def test_cache_is_incremental(library):
+    first = collect_stats(library)
+    assert first.computed == 3
+
+    second = collect_stats(library)
+    assert (second.computed, second.reused) == (0, 3)
+    assert second.codes.tolist() == first.codes.tolist()
+
+    _write_raw(library, "b", "書き換えた本文")
+    st = os.stat(library / "b" / "ocr_raw.txt")
+    os.utime(library / "b" / "ocr_raw.txt", ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    _write_raw(library, "d", "新しい文書")
+    third = collect_stats(library)
+    assert (third.computed, third.reused) == (2, 2)
+    assert third.doc_ids == ["a", "b", "c", "d"]
+    assert third.totals()[ord("郓")] == 0
+    assert third.totals().tolist() == collect_stats(library, use_cache=False).totals().tolist()
+
+
+# ---------- find_misread_candidates ----------
+
+
+def test_non_jis_char_near_known_misread_is_first(library):
+    stats = collect_stats(library)
+    candidates = find_misread_candidates(stats, rare_max_count=0)
+    first = candidates[0]
+    # 郓 (U+90D3) は簡体字で Shift_JIS に無く、既知の誤読字 郘 (U+90D8) に近い
+    assert first.char == "郓"
+    assert "非JIS" in first.flags
+    assert first.near_known == "郘"  # いちばん近い既知の誤読字
+    assert first.suggestion == "郎"  # 近傍でいちばん多く出る JIS 漢字
+    assert first.examples == ["b"]
+
+
+def test_known_misreads_are_not_candidates(library):
+    _write_raw(library, "e", "郧")
+    candidates = find_misread_candidates(collect_stats(library))
+    assert "郧" not in [c.char for c in candidates]
+
+
+def test_rare_flag(library):
+    candidates = find_misread_candidates(collect_stats(library), rare_max_count=1)
+    by_char = {c.char: c for c in candidates}
+    assert by_char["震"].flags == ["稀少"]
+    assert "太" not in by_char  # 5回出現・JIS → 候補にならない
+    assert json.dumps([c.codepoint for c in candidates])  # 表示用の U+XXXX
@@ -0,0 +1,107 @@
+"""MinHash・LSH による近似重複の検出（near_duplicates・prewar dedup）のテスト"""
+
+import json
+import os
+import sqlite3
+
+import pytest
+
+from conftest import make_doc
+from utils.library_dedup import cluster_duplicates
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex
+from utils.library_writer import (
+    DocumentRecord,
+    MetaModernize,
+    MetaNormalization,
+    MetaOcr,
+    save_document,
+)
+
+PAGE_1 = (
+    "大正十二年九月一日午前十一時五十八分、関東地方に大地震が起こり、東京・横浜の市街は"
+    "火災によって大半が焼失した。警視庁は直ちに非常警戒を布き、各署に救護班を置いた。"
+)
+PAGE_2 = (
+    "内務省は臨時震災救護事務局を設けて、罹災者の収容と食糧の配給に当たった。"
+    "市内の小学校・寺院は避難所となり、上野公園には数万の避難者が集まったという。"
+)
+OTHER = (
+    "昭和十一年二月、帝都に大雪が降った。交通は各所で途絶し、市電は終日運転を見合わせた。"
+    "新聞各社は号外を発行し、市民は雪の中を徒歩で職場へ向かったと報じている。"
+)
+
+
+@pytest.fixture
+def library_root(tmp_path):
+    root = tmp_path / "library"
+    make_doc(root, "2026-01-01_a", PAGE_1, PAGE_1, created_at="2026-01-01", sources=1)
+    make_doc(root, "2026-01-02_b", OTHER, OTHER, created_at="2026-01-02", sources=1)
+    both = f"{PAGE_2}\n\n{PAGE_1}"
+    make_doc(root, "2026-01-03_c", both, both, created_at="2026-01-03", sources=2)
+    return root
+
+
+def test_near_copy_and_page_match(library_root):
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        # 改行位置・句読点・字体の違う撮り直し（「関東」→「關東」）
+        rescan = PAGE_1.replace("、", "\n").replace("関東", "關東")
+        matches = idx.near_duplicates(rescan)
+        assert [m.id for m in matches] == ["2026-01-01_a", "2026-01-03_c"]
+        assert matches[0].similarity == 1.0
+        # 2枚をまとめた記録とは、その2ページ目と一致する
+        assert (matches[1].page, matches[1].query_page) == (2, 0)
+        assert idx.near_duplicates(OTHER[:40] + PAGE_2[40:], threshold=0.95) == []
+
+        clusters = cluster_duplicates(idx)
+        assert [c.ids for c in clusters] == [["2026-01-01_a", "2026-01-03_c"]]
+        assert (clusters[0].links[0].page_a, clusters[0].links[0].page_b) == (0, 2)
+
+
+def test_signatures_follow_updates(library_root):
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        doc_dir = library_root / "2026-01-03_c"
+        for name in ("ocr_raw.txt", "modern.txt"):
+            (doc_dir / name).write_text(OTHER, encoding="utf-8")
+        os.utime(doc_dir / "meta.json", (0, 0))  # 変更は meta.json の更新時刻で見る
+        record_change(library_root, "2026-01-03_c")
+        idx.update()
+        assert [m.id for m in idx.near_duplicates(PAGE_1)] == ["2026-01-01_a"]
+        assert [m.id for m in idx.near_duplicates(OTHER)] == ["2026-01-02_b", "2026-01-03_c"]
+
+        idx.rebuild()
+        (library_root / "2026-01-02_b" / "meta.json").unlink()
+        idx.update(reconcile=True)
+        assert [m.id for m in idx.near_duplicates(OTHER)] == ["2026-01-03_c"]
+
+
+def test_save_document_records_near_duplicates(library_root, tmp_path):
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+    image = tmp_path / "scan.png"
+    image.write_bytes(b"png")
+    record = DocumentRecord(
+        source_paths=[image],
+        ocr_raw=PAGE_1.replace("。", "。\n"),
+        modern_text=PAGE_1,
+        ocr_meta=MetaOcr(model="m", prompt="p", elapsed_seconds=1.0),
+        normalization=MetaNormalization(True, True, True),
+        modernize=MetaModernize(enabled=False, model=""),
+    )
+    doc_dir = save_document(record, library_root)
+    meta = json.loads((doc_dir / "meta.json").read_text(encoding="utf-8"))
+    assert meta["near_duplicates"] == [
+        {"id": "2026-01-01_a", "similarity": 1.0},
+        {"id": "2026-01-03_c", "similarity": 1.0, "page": 2},
+    ]
+
+    # 移行前の版の索引とは照らさず、保存のついでに移行もしない
+    db_path = library_root / ".index" / "search.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("PRAGMA user_version = 7")
+    doc_dir = save_document(record, library_root)
+    assert "near_duplicates" not in json.loads((doc_dir / "meta.json").read_text(encoding="utf-8"))
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone() == (7,)
@@ -0,0 +1,71 @@
+"""OCR誤読を見込んだあいまい検索（混同表での綴りの展開 + 置換コストでの並べ直し）のテスト"""
+
+import pytest
+
+from conftest import make_doc
+from utils import library_fuzzy
+from utils.char_stats import MisreadCandidate
+from utils.library_fuzzy import ConfusionTable, fuzzy_search, load_confusions, save_confusions
+from utils.library_search import LibraryIndex
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "exact", "山田太郎の日記。")
+    make_doc(library_root, "misread", "山田太郓の日記。")  # 未登録の誤読（郓）が残った文書
+    make_doc(library_root, "double", "山田犬郓の日記。")
+    make_doc(library_root, "other", "鈴木次郎の手紙。")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def test_spellings_are_bounded_and_cost_ordered():
+    table = ConfusionTable(max_edits=2, limit=3)
+    table.add("郓", "郎", 0.6)
+    table.add("太", "犬", 0.5)
+    table.add("太", "大", 0.2)
+    assert table.spellings("太郎") == [("大郎", 0.2), ("犬郎", 0.5), ("太郓", 0.6)]
+    assert table.spellings("郓")[0] == ("郎", 0.6)  # 逆向き（検索語の誤読字）も
+    assert ConfusionTable(max_edits=1).spellings("日記") == []
+
+
+def test_spellings_cache_keeps_recent_terms(monkeypatch):
+    monkeypatch.setattr(library_fuzzy, "SPELLING_CACHE_SIZE", 2)
+    table = ConfusionTable()
+    table.add("郓", "郎", 0.6)
+    for term in ("太郎", "次郎", "太郎", "三郎"):
+        table.spellings(term)
+    assert list(table._cache) == ["太郎", "三郎"]
+
+
+def test_fuzzy_search_finds_misreads_ranked_by_cost(idx):
+    assert [h.id for h in idx.search("山田太郎")] == ["exact"]
+
+    table = ConfusionTable()
+    table.add("郓", "郎", 0.6)
+    table.add("太", "犬", 0.5)
+    hits = fuzzy_search(idx, "山田太郎", table=table)
+    assert [(h.id, h.cost, h.spellings) for h in hits] == [
+        ("exact", 0.0, []),
+        ("misread", 0.6, ["山田太郓"]),
+        ("double", 1.1, ["山田犬郓"]),
+    ]
+    assert "郓" in hits[1].snippet
+
+    # 短い語（grams）でも
+    hits = fuzzy_search(idx, "太郎", table=table)
+    assert {h.id for h in hits} == {"exact", "misread", "double"}
+
+
+def test_learned_confusions_round_trip(idx):
+    candidates = [
+        MisreadCandidate("郓", 5, 3, flags=["非JIS"], suggestion="郎"),
+        MisreadCandidate("丨", 1, 1, flags=["稀少"], suggestion="一"),  # 稀少なだけの字は入れない
+    ]
+    assert save_confusions(idx.library_root, candidates) == 1
+    table = load_confusions(idx.library_root)
+    assert "郓" in table.costs["郎"]
+    assert "一" not in table.costs
+    assert [h.id for h in fuzzy_search(idx, "田太郎")] == ["exact", "misread"]
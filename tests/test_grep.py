@@ -0,0 +1,98 @@
+"""正規表現検索（必須リテラルでの絞り込み + 照合）のテスト"""
+
+import sys
+
+import pytest
+
+from conftest import make_doc
+from utils import library_grep, library_search
+from utils.library_grep import GrepStats, grep, literal_groups
+from utils.library_search import LibraryIndex, LibrarySearchError
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "army", "第一師団が出動した。\n後に第十二師団も続いた。")
+    make_doc(library_root, "showa", "昭和3年の記録。", raw="昭和三年ノ記録。")
+    make_doc(library_root, "other", "師団の編成について。")
+    for i in range(5):
+        make_doc(library_root, f"filler{i}", f"関係のない記事{i}。")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def test_literal_groups():
+    assert literal_groups(r"第[一二三]+師団") == [["第"], ["一", "二", "三"], ["師団"]]
+    assert literal_groups(r"(昭和|大正)\d+年") == [["昭和", "大正"], ["年"]]
+    assert literal_groups(r"ab(cd)+ef") == [["abcd"], ["cdef"]]
+    assert literal_groups(r"警察(署)?") == [["警察"]]
+    assert literal_groups(r".+|東京") == []
+    assert literal_groups(r"[^あ]") == []
+
+
+def test_grep_without_re_parser_checks_every_document(idx, monkeypatch):
+    # re._parser（内部 API）の無い Python では絞り込まずに全文書を照合する
+    monkeypatch.setitem(sys.modules, "re._parser", None)
+    assert literal_groups(r"第[一二三]+師団") == []
+    stats = GrepStats()
+    assert [m.match for m in grep(idx, r"第[一二三]+師団", stats=stats)] == ["第一師団"]
+    assert stats.candidates == stats.documents == 8
+
+
+def test_grep_reports_kwic_with_lines(idx):
+    stats = GrepStats()
+    matches = list(grep(idx, r"第[一二三四五六七八九十]+師団", context=3, stats=stats))
+    assert [(m.id, m.line, m.match) for m in matches] == [
+        ("army", 1, "第一師団"),
+        ("army", 2, "第十二師団"),
+    ]
+    assert (matches[1].left, matches[1].right) == (" 後に", "も続い")  # 改行は空白に
+    assert stats.candidates == 1 < stats.documents == 8
+    assert (stats.matches, stats.matched_docs) == (2, 1)
+
+
+def test_grep_raw_and_limit(idx):
+    assert [m.id for m in grep(idx, r"昭和[一二三四五六七八九十]+年")] == []
+    (m,) = grep(idx, r"昭和[一二三四五六七八九十]+年", raw=True)
+    assert (m.id, m.source, m.match) == ("showa", "raw", "昭和三年")
+    assert len(list(grep(idx, r"師団", limit=1))) == 1
+
+
+def test_pattern_without_literals_scans_everything(idx):
+    stats = GrepStats()
+    matches = list(grep(idx, r"\d+", stats=stats))
+    assert stats.candidates == stats.documents
+    assert {m.id for m in matches} == {"showa"} | {f"filler{i}" for i in range(5)}
+
+
+def test_parallel_matches_inline(idx, monkeypatch):
+    inline = list(grep(idx, r"記事\d"))
+    monkeypatch.setattr(library_grep, "PARALLEL_MIN_DOCS", 0)
+    monkeypatch.setattr(library_grep, "GREP_WORKERS", 2)
+    assert list(grep(idx, r"記事\d")) == inline
+    assert len(inline) == 5
+
+
+def test_invalid_pattern(idx):
+    with pytest.raises(LibrarySearchError):
+        list(grep(idx, r"第[一二"))
+
+
+def test_match_across_passages_is_not_filtered_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 1000)
+    library_root = tmp_path / "library"
+    # 句読点の無い本文を 1000 字目で機械的に切る。一致はその区切りをまたぐ
+    head = ("あいうえおかきくけこ" * 100)[:990]
+    long_literal = "関東大震災ニ関スル警視庁ノ報告" * 5  # 断片に分けて引く長さ
+    make_doc(library_root, "across", head + long_literal + "さしすせそ" * 100)
+    make_doc(library_root, "other", "関係のない記事。")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        stats = GrepStats()
+        assert [(m.id, m.start) for m in grep(idx, r"こ関東大震災ニ関スル", stats=stats)] == [
+            ("across", 989)
+        ]
+        assert stats.candidates == 1
+        assert [m.id for m in grep(idx, long_literal + "さ+")] == ["across"]
@@ -0,0 +1,93 @@
+"""全文検索と意味検索をまとめるハイブリッド検索のテスト"""
+
+import time
+from pathlib import Path
+
+import pytest
+
+from conftest import make_doc
+from utils.library_hybrid import fuse, hybrid_search
+from utils.library_search import LibraryIndex, SearchHit
+from utils.library_vectors import HashingEmbedder, SemanticHit, VectorIndex
+from utils.ollama_client import OllamaConnectionError
+
+
+class SlowEmbedder(HashingEmbedder):
+    """delay を設定すると埋め込みのたびにその秒数待つ（あるいは例外を送出する）"""
+
+    delay = 0.0
+    error: Exception | None = None
+
+    def embed(self, texts):
+        if self.error is not None:
+            raise self.error
+        time.sleep(self.delay)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "quake", "関東大震災で東京の市街は焼けた。")
+    make_doc(library_root, "report", "震災後の警察の報告。")
+    make_doc(library_root, "riot", "米価の高騰で各地に暴動が起きた。")
+    embedder = SlowEmbedder()
+    with LibraryIndex(library_root) as idx, VectorIndex(idx, embedder) as vectors:
+        idx.update()
+        vectors.update()
+        yield idx, vectors, embedder
+
+
+def _keyword(doc_id: str, score: float) -> SearchHit:
+    return SearchHit(doc_id, Path(doc_id), doc_id, f"…{doc_id}…", "2026-01-01", score)
+
+
+def _semantic(doc_id: str, similarity: float) -> SemanticHit:
+    return SemanticHit(doc_id, Path(doc_id), doc_id, doc_id, "2026-01-01", similarity, 0, 1)
+
+
+def test_rrf_prefers_documents_found_by_both():
+    keyword = [_keyword("a", -3.0), _keyword("b", -2.0)]
+    semantic = [_semantic("c", 0.9), _semantic("b", 0.8)]
+    hits = fuse(keyword, semantic, 10, "rrf")
+    assert [h.id for h in hits] == ["b", "a", "c"]
+    b = hits[0]
+    assert (b.keyword_rank, b.keyword_score, b.semantic_rank, b.similarity) == (2, -2.0, 2, 0.8)
+    assert b.snippet == "…b…"  # 全文検索の抜粋を優先
+    assert hits[2].keyword_rank is None
+
+
+def test_weighted_uses_score_gaps():
+    keyword = [_keyword("a", -9.0), _keyword("b", -1.1), _keyword("c", -1.0)]
+    semantic = [_semantic("c", 0.9), _semantic("b", 0.2), _semantic("a", 0.1)]
+    # 順位だけなら a と c は同点だが、bm25 の差が大きい a が上に来る
+    assert [h.id for h in fuse(keyword, semantic, 2, "weighted")] == ["a", "c"]
+
+
+def test_hybrid_search_reports_both_signals(indexes):
+    idx, vectors, _ = indexes
+    result = hybrid_search(idx, vectors, "警察の報告", limit=3)
+    assert result.skipped == {}
+    assert result.semantic_ms is not None and result.total_ms >= result.keyword_ms
+    top = result.hits[0]
+    assert top.id == "report"
+    assert top.keyword_rank == 1 and top.semantic_rank is not None
+    assert {h.id for h in result.hits} == {"quake", "report", "riot"}
+
+
+def test_slow_semantic_search_falls_back_to_keywords(indexes):
+    idx, vectors, embedder = indexes
+    embedder.delay = 0.5
+    result = hybrid_search(idx, vectors, "警察の報告", limit=3, budget_ms=20)
+    assert "semantic" in result.skipped
+    assert result.semantic_ms is None
+    assert [h.id for h in result.hits] == ["report"]
+    assert result.total_ms < 400
+
+
+def test_unreachable_ollama_falls_back_to_keywords(indexes):
+    idx, vectors, embedder = indexes
+    embedder.error = OllamaConnectionError("Ollamaサーバーに接続できません。\n→ 起動してください")
+    result = hybrid_search(idx, vectors, "警察の報告", limit=3)
+    assert result.skipped == {"semantic": "Ollamaサーバーに接続できません。"}
+    assert [h.id for h in result.hits] == ["report"]
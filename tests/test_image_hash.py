@@ -0,0 +1,95 @@
+"""知覚ハッシュ（utils/image_hash.py）と元画像の索引・OCR前の重複チェックのテスト"""
+
+import random
+import shutil
+from pathlib import Path
+
+import cv2
+import numpy as np
+import pytest
+
+from utils.image_hash import ImageHashError, hash_gray, hash_image
+from utils.library_images import ImageHashIndex, check_images
+
+
+def _page(seed: int) -> np.ndarray:
+    """文字の行が並んだページの画像（ページごとに行の中身だけが違う）"""
+    rng = random.Random(seed)
+    img = np.full((1000, 700), 235, np.uint8)
+    for i in range(20):
+        line = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz   ") for _ in range(28))
+        cv2.putText(img, line, (40, 60 + i * 45), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 30, 2)
+    return img
+
+
+def _write(path: Path, img: np.ndarray) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ok, buf = cv2.imencode(path.suffix, img)
+    assert ok
+    buf.tofile(str(path))
+    return path
+
+
+def _make_doc(library_root: Path, doc_id: str, *pages: np.ndarray) -> None:
+    names = ["source.png"]
+    if len(pages) > 1:
+        names = [f"source_{i:02d}.png" for i in range(1, len(pages) + 1)]
+    for name, img in zip(names, pages):
+        _write(library_root / doc_id / name, img)
+    (library_root / doc_id / "meta.json").write_text('{"sources": []}', encoding="utf-8")
+
+
+def test_rescan_matches_and_other_pages_do_not():
+    page = _page(0)
+    h = hash_gray(page)
+    # 縮小・ドラッグした範囲のずれ・JPEG の劣化
+    rescan = cv2.resize(page, (630, 900), interpolation=cv2.INTER_AREA)[12:-5, 8:-20]
+    _, buf = cv2.imencode(".jpg", rescan, [cv2.IMWRITE_JPEG_QUALITY, 60])
+    assert h.matches(hash_gray(cv2.imdecode(buf, cv2.IMREAD_GRAYSCALE)))
+    # 同じ体裁の別のページは、行の並びが同じでも別物
+    assert not any(h.matches(hash_gray(_page(seed))) for seed in range(1, 6))
+
+
+def test_index_updates_incrementally(tmp_path):
+    root = tmp_path / "library"
+    _make_doc(root, "2026-01-01_a", _page(0))
+    _make_doc(root, "2026-01-02_b", _page(1), _page(2))
+    _write(root / "2026-01-02_b" / "preprocessed_01.png", _page(3))  # 前処理後の画像は対象外
+
+    with ImageHashIndex(root) as index:
+        stats = index.update()
+        assert (stats.added, stats.removed) == (3, 0)
+        assert index.update().added == 0
+
+        found = index.find(hash_gray(_page(2)))
+        assert [(m.doc_id, m.name) for m in found] == [("2026-01-02_b", "source_02.png")]
+        assert index.find(hash_gray(_page(3))) == []
+
+        shutil.rmtree(root / "2026-01-01_a")
+        assert index.update().removed == 1
+        assert index.find(hash_gray(_page(0))) == []
+
+
+def test_check_images_flags_double_captures_and_library_pages(tmp_path):
+    root = tmp_path / "library"
+    _make_doc(root, "2026-01-01_a", _page(0))
+    session = tmp_path / "input" / "撮影"
+    p1 = _write(session / "p001.png", _page(0))
+    p2 = _write(session / "p002.png", _page(5))
+    p3 = _write(session / "p003.png", cv2.resize(_page(5), (680, 970)))
+    broken = session / "p004.png"
+    broken.write_bytes(b"not an image")
+
+    checks = check_images([p1, p2, p3, broken], root)
+    assert [m.doc_id for m in checks[0].matches] == ["2026-01-01_a"]
+    assert (checks[1].duplicate_of, checks[1].matches) == (None, [])
+    assert checks[2].duplicate_of == p2
+    assert (checks[3].duplicate_of, checks[3].matches) == (None, [])
+    assert hash_image(p1) == hash_gray(_page(0))
+
+
+def test_unreadable_image_raises(tmp_path):
+    path = tmp_path / "empty.png"
+    path.write_bytes(b"")
+    with pytest.raises(ImageHashError):
+        hash_image(path)
@@ -0,0 +1,132 @@
+"""一括索引（バッチ書き込み・rebuild の差し替え・スキーマ v2 移行）のテスト"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from conftest import make_doc
+from utils import library_search
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex, raw_terms_of, unpack_text
+from utils.text_normalizer import normalize_before_corrections
+
+
+def _dump(idx: LibraryIndex) -> tuple:
+    with idx._read() as conn:
+        docs = conn.execute("SELECT id, title FROM documents ORDER BY id").fetchall()
+        terms = conn.execute("SELECT term, doc FROM raw_terms ORDER BY term, doc").fetchall()
+    return docs, terms
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    # バッチ境界をまたぐように小さくする
+    monkeypatch.setattr(library_search, "INDEX_BATCH_SIZE", 3)
+    library_root = tmp_path / "library"
+    for i in range(10):
+        make_doc(library_root, f"doc{i:02d}", f"第{i}号 関東大震災の記録", raw=f"郧{i} 國民")
+    return library_root
+
+
+def test_rebuild_matches_incremental_update(library):
+    with LibraryIndex(library) as incremental:
+        incremental.update()
+        expected = _dump(incremental)
+    with LibraryIndex(library) as rebuilt:
+        stats = rebuilt.rebuild()
+        assert stats.added == 10
+        assert _dump(rebuilt) == expected
+        assert len(rebuilt.search("関東大震災", limit=50)) == 10
+        assert not rebuilt.db_path.with_name("search.db.build").exists()
+
+
+def test_rebuild_keeps_other_connections_writing_to_live_index(library):
+    with LibraryIndex(library) as idx:
+        idx.update()
+        # 別プロセスの接続が開いたまま作り直しても、そちらの書き込みは失われない
+        other = sqlite3.connect(idx.db_path)
+        other.execute("SELECT COUNT(*) FROM documents").fetchone()
+        shutil.rmtree(library / "doc09")
+        assert idx.rebuild().added == 9
+        assert other.execute("SELECT COUNT(*) FROM documents").fetchone() == (9,)
+        with other:
+            other.execute("INSERT INTO tracked_terms (term) VALUES ('震災')")
+        other.close()
+        assert idx.tracked_terms() == ["震災"]
+        assert len(idx.search("関東大震災", limit=50)) == 9
+        assert not idx.db_path.with_name("search.db.build").exists()
+
+
+def test_update_replaces_fts_rows(library):
+    with LibraryIndex(library) as idx:
+        idx.update()
+        modern = library / "doc03" / "modern.txt"
+        modern.write_text("警察報告書の写し", encoding="utf-8")
+        os.utime(library / "doc03" / "meta.json", (0, 12345))
+        record_change(library, "doc03")
+
+        stats = idx.update()
+        assert (stats.added, stats.updated) == (0, 1)
+        assert [h.id for h in idx.search("警察報告")] == ["doc03"]
+        assert "doc03" not in [h.id for h in idx.search("関東大震災", limit=50)]
+        assert idx.update().updated == 0  # 変化なし
+
+
+def test_failed_rebuild_keeps_old_index(library, monkeypatch):
+    with LibraryIndex(library) as idx:
+        idx.update()
+
+        def boom(*args, **kwargs):
+            raise RuntimeError("書き込み失敗")
+
+        monkeypatch.setattr(LibraryIndex, "_write_batch", boom)
+        with pytest.raises(RuntimeError):
+            idx.rebuild()
+        assert len(idx.search("関東大震災", limit=50)) == 10
+        assert not idx.db_path.with_name("search.db.build").exists()
+
+
+def test_migrates_v1_index(library):
+    with LibraryIndex(library) as idx:
+        idx.update()
+        db_path = idx.db_path
+    # docno 列の無い・search が本文を持つ v1 の DB を再現する
+    conn = sqlite3.connect(db_path)
+    conn.create_function("unpack", 1, unpack_text)
+    conn.executescript(
+        """
+        CREATE VIRTUAL TABLE search_v1 USING fts5(id UNINDEXED, title, modern, tokenize='trigram');
+        INSERT INTO search_v1 (rowid, id, title, modern)
+            SELECT d.docno, d.id, d.title, unpack(t.modern)
+              FROM documents d JOIN doc_text t ON t.docno = d.docno;
+        DROP TABLE search;
+        ALTER TABLE search_v1 RENAME TO search;
+        DROP TABLE doc_text;
+        DROP TABLE doc_tags;
+        DROP INDEX documents_docno;
+        DROP INDEX documents_created_at;
+        DROP INDEX documents_ocr_model;
+        DROP INDEX documents_modernize_model;
+        DROP INDEX documents_source_count;
+        ALTER TABLE documents DROP COLUMN docno;
+        ALTER TABLE documents DROP COLUMN ocr_model;
+        ALTER TABLE documents DROP COLUMN modernize_model;
+        ALTER TABLE documents DROP COLUMN source_count;
+        PRAGMA user_version = 1;
+        """
+    )
+    conn.close()
+
+    with LibraryIndex(library) as idx:
+        assert len(idx.search("関東大震災", limit=50)) == 10
+        shutil.rmtree(library / "doc05")
+        assert idx.update(reconcile=True).removed == 1
+        assert len(idx.search("関東大震災", limit=50)) == 9
+
+
+def test_raw_terms_of_matches_full_normalization():
+    text = "國民ﾉ權利 郧衠 ゐる 髙橋 ｶﾞｯｺｳ 學校ニ於テ"
+    expected = {c for c in normalize_before_corrections(text) if library_search.is_raw_term(c)}
+    assert raw_terms_of(text) == expected
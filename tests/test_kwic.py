@@ -0,0 +1,76 @@
+"""コンコーダンス（語の全出現を検索インデックスの出現位置から KWIC で並べる）のテスト"""
+
+import pytest
+
+from conftest import make_doc
+from utils import library_search
+from utils.library_kwic import concordance
+from utils.library_search import LibraryIndex, QueryTooShortError
+
+
+@pytest.fixture
+def idx(tmp_path, monkeypatch):
+    # パッセージを小さくして、出現がパッセージの境目をまたぐ・2つ目以降のパッセージに入るようにする
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 40)
+    library_root = tmp_path / "library"
+    filler = "関係のない文章が続く。" * 6
+    make_doc(library_root, "a", f"大震災の記録。\n{filler}\n大震災は東京を襲った。")
+    make_doc(library_root, "b", f"{filler}大震災で家を失う。")
+    make_doc(library_root, "c", "震災後の復興。震災前の東京。")
+    make_doc(library_root, "d", "無関係な記事。")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def test_trigram_term_finds_every_occurrence(idx):
+    lines = list(concordance(idx, "大震災", context=3))
+    assert [(l.id, l.line, l.match) for l in lines] == [
+        ("a", 1, "大震災"),
+        ("a", 3, "大震災"),
+        ("b", 1, "大震災"),
+    ]
+    text = (idx.library_root / "a" / "modern.txt").read_text(encoding="utf-8")
+    assert all(text[l.start : l.end] == "大震災" for l in lines if l.id == "a")
+    assert (lines[1].left, lines[1].right) == ("く。 ", "は東京")  # 改行は空白に
+    assert lines[2].left == "続く。"
+
+
+def test_short_term_uses_grams(idx):
+    lines = list(concordance(idx, "震災", context=2))
+    assert [(l.id, l.start) for l in lines] == [
+        ("a", 1),
+        ("a", lines[1].start),
+        ("b", lines[2].start),
+        ("c", 0),
+        ("c", 7),
+    ]
+    with pytest.raises(QueryTooShortError):
+        list(concordance(idx, "震、"))
+
+
+def test_sort_by_context(idx):
+    right = [l.right for l in concordance(idx, "震災", context=2, sort="right")]
+    assert right == sorted(right)
+    left = [l.left for l in concordance(idx, "震災", context=2, sort="left")]
+    assert [s[::-1] for s in left] == sorted(s[::-1] for s in left)
+    # limit は並べた順の上位
+    assert [l.right for l in concordance(idx, "震災", context=2, sort="right", limit=2)] == right[:2]
+    assert len(list(concordance(idx, "震災", limit=2))) == 2
+    with pytest.raises(ValueError):
+        concordance(idx, "震災", sort="random")
+
+
+def test_occurrences_across_hard_cut_are_listed_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 1000)
+    library_root = tmp_path / "library"
+    # 句読点の無い本文: 1つめは 1000 字目の区切りをまたぎ、2つめは1つめの行の重なりにある
+    text = "あ" * 997 + "関東大震災" + "い" * 20 + "関東大震災" + "う" * 1000
+    make_doc(library_root, "unbroken", text)
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        lines = list(concordance(idx, "関東大震災", context=2))
+    assert [(l.start, l.left, l.match, l.right) for l in lines] == [
+        (997, "ああ", "関東大震災", "いい"),
+        (1022, "いい", "関東大震災", "うう"),
+    ]
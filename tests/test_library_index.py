@@ -0,0 +1,90 @@
+"""LibraryIndex の接続管理（使い回し・WAL・読み取りプール）のテスト"""
+
+import threading
+
+import pytest
+
+from conftest import make_doc
+from utils import library_search
+from utils.library_search import LibraryIndex, get_index
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "doc1", "関東大震災の記録")
+    make_doc(library_root, "doc2", "警察報告書の写し")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def test_schema_checked_once(idx, monkeypatch):
+    calls = []
+    original = LibraryIndex._ensure_schema
+    monkeypatch.setattr(
+        LibraryIndex, "_ensure_schema", lambda self, conn: calls.append(1) or original(self, conn)
+    )
+    for _ in range(5):
+        idx.search("関東大震災")
+        idx.stat()
+    assert calls == []
+
+
+def test_connections_are_reused(idx):
+    idx.search("関東大震災")
+    idx.search("警察報告")
+    assert len(idx._opened_readers) == 1
+
+
+def test_wal_mode(idx):
+    with idx._read() as conn:
+        (mode,) = conn.execute("PRAGMA journal_mode").fetchone()
+    assert mode == "wal"
+
+
+def test_concurrent_searches(idx):
+    errors: list[Exception] = []
+    results: list[list[str]] = []
+
+    def worker():
+        try:
+            for _ in range(20):
+                results.append([h.id for h in idx.search("関東大震災")])
+        except Exception as e:  # noqa: BLE001 - スレッド内の例外を集めて検証する
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert all(r == ["doc1"] for r in results) and len(results) == 160
+    assert len(idx._opened_readers) <= library_search.READ_POOL_SIZE
+
+
+def test_failed_write_rolls_back(idx):
+    with pytest.raises(RuntimeError):
+        with idx._write() as conn:
+            conn.execute("DELETE FROM documents")
+            raise RuntimeError("中断")
+    assert idx.stat()["document_count"] == 2
+
+
+def test_rebuild_with_open_handle(idx):
+    idx.search("関東大震災")
+    stats = idx.rebuild()
+    assert stats.added == 2
+    assert [h.id for h in idx.search("警察報告")] == ["doc2"]
+
+
+def test_close_and_reopen(idx):
+    idx.close()
+    assert [h.id for h in idx.search("警察報告")] == ["doc2"]
+
+
+def test_get_index_is_shared(tmp_path):
+    library_root = tmp_path / "library"
+    library_root.mkdir()
+    assert get_index(library_root) is get_index(library_root / ".." / "library")
@@ -0,0 +1,114 @@
+"""変更ジャーナルとジャーナル経由の差分更新のテスト"""
+
+import shutil
+import threading
+
+import pytest
+
+from conftest import make_doc
+from utils.library_journal import OP_DELETE, ChangeJournal, record_change
+from utils.library_search import LibraryIndex
+from utils.library_writer import (
+    DocumentRecord,
+    MetaModernize,
+    MetaNormalization,
+    MetaOcr,
+    save_document,
+)
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "doc1", "関東大震災の記録")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _no_walk(monkeypatch):
+    def fail(self):
+        raise AssertionError("ライブラリ全体を走査した")
+
+    monkeypatch.setattr(LibraryIndex, "_scan_documents", fail)
+
+
+def test_saved_document_is_indexed_without_walk(idx, tmp_path, monkeypatch):
+    image = tmp_path / "警察.png"
+    image.write_bytes(b"png")
+    record = DocumentRecord(
+        source_paths=[image],
+        ocr_raw="警察報告書",
+        modern_text="警察報告書の写し",
+        ocr_meta=MetaOcr(model="glm-ocr", prompt="", elapsed_seconds=1.0),
+        normalization=MetaNormalization(True, True, True),
+        modernize=MetaModernize(enabled=False, model=""),
+    )
+    doc_dir = save_document(record, library_root=idx.library_root)
+
+    _no_walk(monkeypatch)
+    stats = idx.update()
+    assert (stats.added, stats.reconciled) == (1, False)
+    assert [h.id for h in idx.search("警察報告")] == [doc_dir.name]
+
+
+def test_unjournaled_change_needs_reconcile(idx):
+    make_doc(idx.library_root, "doc2", "警察報告書の写し")
+    assert idx.update().added == 0
+
+    stats = idx.update(reconcile=True)
+    assert (stats.added, stats.reconciled) == (1, True)
+    assert [h.id for h in idx.search("警察報告")] == ["doc2"]
+
+
+def test_journaled_delete(idx, monkeypatch):
+    shutil.rmtree(idx.library_root / "doc1")
+    record_change(idx.library_root, "doc1", OP_DELETE)
+
+    _no_walk(monkeypatch)
+    assert idx.update().removed == 1
+    assert idx.search("関東大震災") == []
+
+
+def test_cursor_survives_reopen_and_journal_is_pruned(idx, monkeypatch):
+    make_doc(idx.library_root, "doc2", "警察報告書の写し")
+    record_change(idx.library_root, "doc2")
+    assert idx.update().added == 1
+    assert idx.journal.read_since(0) == []
+    idx.close()
+
+    _no_walk(monkeypatch)
+    with LibraryIndex(idx.library_root) as reopened:
+        stats = reopened.update()
+    assert (stats.added, stats.updated) == (0, 0)
+
+
+def test_rebuild_starts_after_existing_entries(idx, monkeypatch):
+    record_change(idx.library_root, "doc1")
+    idx.rebuild()
+    _no_walk(monkeypatch)
+    assert idx.update().updated == 0
+
+
+def test_concurrent_writers_get_unique_seqs(tmp_path):
+    journal = ChangeJournal(tmp_path / "library")
+    seqs: list[int] = []
+    lock = threading.Lock()
+
+    def writer(n: int):
+        for i in range(20):
+            seq = record_change(journal.library_root, f"doc{n}-{i}")
+            with lock:
+                seqs.append(seq)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(seqs) == list(range(1, 81))
+    assert [e.seq for e in journal.read_since(0)] == list(range(1, 81))
+    journal.prune(40)
+    assert journal.last_seq() == 80
+    assert len(journal.read_since(0)) == 40
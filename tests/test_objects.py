@@ -0,0 +1,81 @@
+"""画像の内容アドレス型ストア（library/.objects/）のテスト"""
+
+import shutil
+from pathlib import Path
+
+from utils.library_objects import (
+    blob_path,
+    collect_garbage,
+    file_digest,
+    migrate,
+    object_stats,
+)
+from utils.library_writer import (
+    DocumentRecord,
+    MetaModernize,
+    MetaNormalization,
+    MetaOcr,
+    save_document,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 40
+
+
+def _make_doc(library_root: Path, doc_id: str, images: dict[str, bytes]) -> Path:
+    doc_dir = library_root / doc_id
+    doc_dir.mkdir(parents=True)
+    (doc_dir / "meta.json").write_text("{}", encoding="utf-8")
+    for name, data in images.items():
+        (doc_dir / name).write_bytes(data)
+    return doc_dir
+
+
+def _record(image: Path) -> DocumentRecord:
+    return DocumentRecord(
+        source_paths=[image],
+        ocr_raw="本文",
+        modern_text="本文",
+        ocr_meta=MetaOcr(model="m", prompt="p", elapsed_seconds=1.0),
+        normalization=MetaNormalization(True, True, True),
+        modernize=MetaModernize(enabled=False, model=""),
+    )
+
+
+def test_save_links_same_image_once(tmp_path):
+    root = tmp_path / "library"
+    image = tmp_path / "scan.png"
+    image.write_bytes(PNG)
+    a = save_document(_record(image), root)
+    b = save_document(_record(image), root)
+
+    blob = blob_path(root, file_digest(image))
+    assert (a / "source.png").read_bytes() == PNG
+    assert (a / "source.png").stat().st_ino == (b / "source.png").stat().st_ino == blob.stat().st_ino
+    stats = object_stats(root)
+    assert (stats.files, stats.blobs, stats.physical_bytes) == (2, 1, len(PNG))
+
+    shutil.rmtree(a)
+    assert collect_garbage(root).removed == 0
+    shutil.rmtree(b)
+    gc = collect_garbage(root)
+    assert (gc.removed, gc.reclaimed_bytes) == (1, len(PNG))
+    assert not blob.exists()
+
+
+def test_migrate_existing_copies(tmp_path):
+    root = tmp_path / "library"
+    a = _make_doc(root, "2026-01-01_a", {"source.png": PNG, "preprocessed.png": PNG[:100]})
+    b = _make_doc(root, "2026-01-02_b", {"source_01.png": PNG, "source_02.png": b"other"})
+
+    dry = migrate(root, dry_run=True)
+    assert (dry.stored, dry.linked, dry.reclaimed_bytes) == (3, 1, len(PNG))
+    assert not (root / ".objects").exists()
+
+    report = migrate(root)
+    assert (report.files, report.stored, report.linked, report.failed) == (4, 3, 1, [])
+    assert (a / "source.png").stat().st_ino == (b / "source_01.png").stat().st_ino
+    assert (b / "source_01.png").read_bytes() == PNG
+    assert object_stats(root).physical_bytes == len(PNG) + 100 + len(b"other")
+
+    again = migrate(root)
+    assert (again.already, again.stored, again.linked) == (4, 0, 0)
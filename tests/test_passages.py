@@ -0,0 +1,172 @@
+"""パッセージ（段落）単位の索引のテスト"""
+
+import argparse
+import sqlite3
+
+import pytest
+
+from conftest import make_doc
+from scripts.library import add_find_arguments, add_library_root_argument, cmd_find
+from utils import library_search
+from utils.library_search import (
+    MAX_TERM_CHARS,
+    PASSAGE_OVERLAP,
+    LibraryIndex,
+    LibrarySearchError,
+    pack_passages,
+    passage_bounds,
+    unpack_passages,
+    unpack_text,
+)
+
+# 1段落 20 文字前後。「震災」は 8 段落目（9行目）にだけ出る
+PARAGRAPHS = [f"第{i}段の記事。本文が続く。" for i in range(12)]
+PARAGRAPHS[8] = "警視庁は震災の被害を報告した。"
+LONG = "\n".join(PARAGRAPHS)
+
+# 句読点も改行も無い 2000 字の本文。1000 字目の機械的な区切りを「関東大震災」がまたぐ
+UNBROKEN = ("あいうえおかきくけこ" * 200)[:997] + "関東大震災" + ("さしすせそ" * 200)[:998]
+
+
+@pytest.fixture
+def idx(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 40)
+    library_root = tmp_path / "library"
+    make_doc(library_root, "long", LONG, raw=LONG.replace("報告した", "上申ス"), sources=4, record=True)
+    make_doc(library_root, "short", "短い記事。", record=True)
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _search_rows(idx: LibraryIndex) -> list[int]:
+    with idx._read() as conn:
+        return [row[0] for row in conn.execute("SELECT rowid FROM search_docsize")]
+
+
+def test_passage_bounds_cover_text():
+    raw = LONG.replace("。", "ナリ。")
+    bounds = passage_bounds(LONG, raw, 40)
+    assert len(bounds) > 1
+    assert bounds[0][0] == bounds[0][2] == 0
+    assert (bounds[-1][1], bounds[-1][3]) == (len(LONG), len(raw))
+    for (_, m_end, _, r_end), (m_start, _, r_start, _) in zip(bounds, bounds[1:]):
+        assert (m_end, r_end) == (m_start, r_start)  # 隙間なく続く（重なりは search の行で足す）
+        assert LONG[m_end - 1] == "\n"  # 段落の切れ目で切る
+        assert raw[r_end - 1] in "\n。"
+    assert all(m_end - m_start <= 40 for m_start, m_end, _, _ in bounds)
+    assert passage_bounds(LONG, raw, 0) == [(0, len(LONG), 0, len(raw))]
+    assert passage_bounds("", "原文だけ。" * 20, 40)[-1][:2] == (0, 0)
+
+
+def test_search_rows_overlap_next_passage():
+    bounds = passage_bounds(UNBROKEN, "", 1000)
+    assert [b[:2] for b in bounds] == [(0, 1000), (1000, 2000)]
+    first, second = library_search._search_rows(1, "題", UNBROKEN, "", bounds)
+    assert first[2] == UNBROKEN[: 1000 + PASSAGE_OVERLAP]
+    assert second[2] == UNBROKEN[1000:]
+    assert "関東大震災" in first[2]
+
+
+def test_term_across_hard_cut_is_found(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 1000)
+    library_root = tmp_path / "library"
+    make_doc(library_root, "unbroken", UNBROKEN, record=True)
+    # 1つめの行の重なり（次のパッセージの先頭）にある出現も1回だけ数える
+    make_doc(library_root, "overlap", "さしすせそ" * 202 + "関東大震災" + "さしすせそ" * 100, record=True)
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        for term in ("関東大震災", "大震災"):
+            hits = idx.search(term)
+            assert sorted(h.id for h in hits) == ["overlap", "unbroken"]
+        (hit,) = [h for h in idx.search("関東大震災") if h.id == "unbroken"]
+        assert "[関東大震災]" in hit.snippet
+        positions = {doc_id: spans for doc_id, _, _, spans in idx.term_positions("関東大震災")}
+        assert positions == {"unbroken": [(997, 1002)], "overlap": [(1010, 1015)]}
+        with pytest.raises(LibrarySearchError):
+            idx.search("あ" * (MAX_TERM_CHARS + 1))
+
+
+def test_pack_passages_roundtrip():
+    bounds = passage_bounds(LONG, "", 40)
+    assert unpack_passages(pack_passages(bounds), len(LONG), 0) == bounds
+    assert pack_passages([(0, 5, 0, 0)]) is None
+    assert unpack_passages(None, 5, 3) == [(0, 5, 0, 3)]
+
+
+def test_hit_points_to_matching_passage(idx):
+    (hit,) = idx.search("震災の被害")
+    assert hit.id == "long"
+    assert "[震災の被害]" in hit.snippet
+    assert hit.line == 9
+    assert hit.page == 3  # 4枚のうち、本文の 3/4 付近
+    (short,) = idx.search("短い記事")
+    assert (short.line, short.page) == (1, None)
+    assert len(_search_rows(idx)) > 2
+
+
+def test_terms_in_different_passages_match_document(idx):
+    assert [h.id for h in idx.search("第0段 震災の被害")] == ["long"]
+    assert idx.search("第0段 短い記事") == []
+
+
+def test_raw_only_match_points_to_aligned_passage(idx):
+    (hit,) = idx.search("上申ス")
+    assert "[上申ス]" in hit.snippet
+    assert 7 <= hit.line <= 9
+
+
+def test_updated_document_drops_old_passages(idx):
+    make_doc(idx.library_root, "long", "差し替えた本文。", raw="差し替えた原文。", record=True)
+    idx.update()
+    assert idx.search("震災の被害") == []
+    assert idx.search("上申ス") == []
+    assert [h.id for h in idx.search("差し替えた")] == ["long"]
+    with idx._read() as conn:
+        conn.execute("INSERT INTO search (search) VALUES ('integrity-check')")
+
+
+def test_migrates_document_level_index(idx):
+    docnos = {h.id: h for h in idx.search("記事")}
+    idx.close()
+    # 1文書1行の search（v6）を再現する
+    conn = sqlite3.connect(idx.db_path)
+    conn.executescript(
+        """
+        DROP TABLE search;
+        CREATE VIRTUAL TABLE search USING fts5(
+            title, modern, raw, content = '', tokenize = 'trigram'
+        );
+        ALTER TABLE doc_text DROP COLUMN passages;
+        PRAGMA user_version = 6;
+        """
+    )
+    conn.executemany(
+        "INSERT INTO search (rowid, title, modern, raw) VALUES (?, ?, ?, ?)",
+        [
+            (docno, title, unpack_text(modern), unpack_text(raw))
+            for docno, title, modern, raw in conn.execute(
+                "SELECT d.docno, d.title, t.modern, t.raw"
+                " FROM documents d JOIN doc_text t ON t.docno = d.docno"
+            ).fetchall()
+        ],
+    )
+    conn.commit()
+    conn.close()
+
+    with LibraryIndex(idx.library_root) as reopened:
+        (hit,) = reopened.search("震災の被害")
+        assert (hit.id, hit.line) == ("long", 9)
+        assert {h.id for h in reopened.search("記事")} == docnos.keys()
+        assert len(_search_rows(reopened)) > 2
+
+
+def test_find_prints_line_and_page(idx, capsys):
+    parser = argparse.ArgumentParser()
+    add_library_root_argument(parser)
+    add_find_arguments(parser)
+    args = parser.parse_args(["震災の被害", "--library-root", str(idx.library_root)])
+    assert cmd_find(args) == 0
+    out = capsys.readouterr().out
+    assert "位置: modern.txt 9行目（元画像 3枚目付近）" in out
+    assert "→ 1件\n" in out
@@ -4,11 +4,9 @@ normalize_query() が照合用のサブセット変換のみ行うこと、お
 旧字体クエリで新字体インデックスがヒットすること（取りこぼし解消）を確認する。
 """
 
-import json
-from pathlib import Path
-
 import pytest
 
+from conftest import make_doc
 from utils.text_normalizer import normalize_query
 from utils.library_search import LibraryIndex, QueryTooShortError
 
@@ -42,23 +40,12 @@ def test_yoon_contraction_shrinks_length():
 # ---------- 検索との結合（取りこぼし解消の回帰テスト） ----------
 
 
-def _make_doc(library_root: Path, doc_id: str, title: str, modern: str) -> None:
-    """library_root 配下に最小の文書フォルダ（meta.json + modern.txt）を作る"""
-    doc_dir = library_root / doc_id
-    doc_dir.mkdir(parents=True)
-    meta = {"title": title, "created_at": "2026-01-01"}
-    (doc_dir / "meta.json").write_text(
-        json.dumps(meta, ensure_ascii=False), encoding="utf-8"
-    )
-    (doc_dir / "modern.txt").write_text(modern, encoding="utf-8")
-
-
 def test_old_kanji_query_hits_new_kanji_index(tmp_path):
     """新字体で保存された文書を、旧字体クエリで検索してヒットすること"""
     library_root = tmp_path / "library"
     library_root.mkdir()
     # インデックスには新字体「大日本帝国」が入っている
-    _make_doc(library_root, "doc1", "テスト文書", "我等ハ大日本帝国ノ臣民ナリ")
+    make_doc(library_root, "doc1", title="テスト文書", modern="我等ハ大日本帝国ノ臣民ナリ")
 
     idx = LibraryIndex(library_root)
     idx.update()
@@ -69,11 +56,21 @@ def test_old_kanji_query_hits_new_kanji_index(tmp_path):
     assert hits[0].id == "doc1"
 
 
-def test_normalized_too_short_query_raises(tmp_path):
-    """正規化「後」に3文字未満になる語は QueryTooShortError"""
+def test_normalized_short_query_uses_grams(tmp_path):
+    """正規化「後」に3文字未満になる語は trigram ではなく grams で引く"""
+    library_root = tmp_path / "library"
+    library_root.mkdir()
+    make_doc(library_root, "doc1", title="テスト文書", modern="カシノ木ヲ植ヱル")
+    idx = LibraryIndex(library_root)
+    idx.update()
+    # "クヮシ" は3文字だが正規化後は "カシ"（2文字）
+    assert [h.id for h in idx.search("クヮシ")] == ["doc1"]
+
+
+def test_short_query_with_symbol_raises(tmp_path):
+    """記号を含む短い語は grams にも無いので QueryTooShortError"""
     library_root = tmp_path / "library"
     library_root.mkdir()
     idx = LibraryIndex(library_root)
-    # "クヮシ" は3文字だが正規化後は "カシ"（2文字）→ trigram で扱えない
     with pytest.raises(QueryTooShortError):
-        idx.search("クヮシ")
+        idx.search("A.")
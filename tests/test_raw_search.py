@@ -0,0 +1,107 @@
+"""ocr_raw（原文）の索引と字体違いへの展開のテスト"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from conftest import make_doc
+from utils.library_journal import OP_DELETE, record_change
+from utils.library_search import LibraryIndex, unpack_text, variant_forms
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    # doc1: LLM の書き換えで原文の言い回しが modern から消えている
+    make_doc(library_root, "doc1", "謹んで申し上げます。", "謹テ上申ス。國家總動員ノ件")
+    make_doc(library_root, "doc2", "国家総動員法の施行について")
+    make_doc(library_root, "doc3", "龍の図", "竜ノ圖")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _ids(hits) -> list[str]:
+    return sorted(h.id for h in hits)
+
+
+def test_original_phrase_hits_raw(idx):
+    (hit,) = idx.search("謹テ上申ス")
+    assert hit.id == "doc1"
+    assert "[謹テ上申ス]" in hit.snippet
+
+
+def test_variants_match_raw(idx):
+    # 新字体で引いても原文の旧字体（國家總動員）に当たる
+    assert _ids(idx.search("国家総動員")) == ["doc1", "doc2"]
+    assert _ids(idx.search("竜ノ図")) == ["doc3"]
+
+
+def test_modern_match_ranks_above_raw_only(idx):
+    assert [h.id for h in idx.search("国家総動員")] == ["doc2", "doc1"]
+
+
+def test_short_term_hits_raw(idx):
+    assert _ids(idx.search("ノ件")) == ["doc1"]
+    assert _ids(idx.search("國")) == ["doc1", "doc2"]
+
+
+def test_variant_forms():
+    assert variant_forms("国家")[0] == "国家"
+    assert "國家" in variant_forms("国家")
+    assert "國家" in variant_forms("國家")
+    assert variant_forms("あい") == ["あい"]
+    assert len(variant_forms("国国国国国国", limit=8)) <= 8
+
+
+def _downgrade(db_path: Path, version: int) -> None:
+    """search が本文を持つ v4（version=3 なら raw 列も無い v3）の DB を再現する"""
+    raw = version >= 4
+    conn = sqlite3.connect(db_path)
+    conn.create_function("unpack", 1, unpack_text)
+    conn.executescript(
+        f"""
+        CREATE VIRTUAL TABLE search_old USING fts5(
+            id UNINDEXED, title, modern{", raw" if raw else ""}, tokenize='trigram'
+        );
+        INSERT INTO search_old (rowid, id, title, modern{", raw" if raw else ""})
+            SELECT d.docno, d.id, d.title, unpack(t.modern){", unpack(t.raw)" if raw else ""}
+              FROM documents d JOIN doc_text t ON t.docno = d.docno;
+        DROP TABLE search;
+        ALTER TABLE search_old RENAME TO search;
+        DROP TABLE doc_text;
+        PRAGMA user_version = {version};
+        """
+    )
+    conn.close()
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_migrates_old_index(idx, version):
+    idx.close()
+    _downgrade(idx.db_path, version)
+
+    with LibraryIndex(idx.library_root) as reopened:
+        assert _ids(reopened.search("謹テ上申ス")) == ["doc1"]
+        assert _ids(reopened.search("ノ件")) == ["doc1"]
+        with reopened._read() as conn:
+            assert not conn.execute(
+                "SELECT 1 FROM sqlite_schema WHERE name = 'search_content'"
+            ).fetchall()
+        # 移行後の索引から消せる（本文なしの FTS に渡す内容が doc_text と一致する）
+        record_change(reopened.library_root, "doc1", OP_DELETE)
+        (reopened.library_root / "doc1" / "meta.json").unlink()
+        assert reopened.update().removed == 1
+        with reopened._read() as conn:
+            for table, term in (("search", "謹テ上申ス"), ("grams", "件")):
+                assert not conn.execute(
+                    f"SELECT rowid FROM {table} WHERE {table} MATCH ?", (f'"{term}"',)
+                ).fetchall()
+
+
+def test_raw_overhead(idx):
+    report = idx.raw_overhead(samples=5)
+    assert 0 < report["raw_token_share"] < 1
+    assert 0 < report["raw_bytes_estimate"] < idx.db_path.stat().st_size
+    assert report["probe_count"] > 0
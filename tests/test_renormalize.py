@@ -0,0 +1,113 @@
+"""OCR誤読ルール変更時の差分再正規化のテスト
+
+raw_terms（ocr_raw の文字 → 文書）でルールが効く文書だけを絞り込み、
+口語体変換の有無に応じて modern.txt を作り直す／置換することを確認する。
+"""
+
+from pathlib import Path
+
+import pytest
+
+from conftest import make_doc
+from utils import text_normalizer
+from utils.library_search import LibraryIndex
+from utils.renormalizer import CorrectionRule, renormalize_library
+
+
+def _raw_doc(library_root: Path, doc_id: str, raw: str, modernized: bool = False) -> Path:
+    """ocr_raw.txt・modern.txt・meta.json を持つ文書フォルダを作る"""
+    modern = text_normalizer.normalize_text(raw)
+    if modernized:
+        modern = "【口語訳】" + modern
+    return make_doc(
+        library_root,
+        doc_id,
+        modern,
+        raw,
+        normalization={"ocr_misread_correction": True},
+        modernize={"enabled": modernized, "model": "test" if modernized else ""},
+    )
+
+
+@pytest.fixture
+def library(tmp_path):
+    library_root = tmp_path / "library"
+    _raw_doc(library_root, "plain", "山田太郒ハ東京ニ住ム")
+    _raw_doc(library_root, "modern", "鈴木次郒ノ報告", modernized=True)
+    _raw_doc(library_root, "other", "関東大震災ノ記録")
+    LibraryIndex(library_root).update()
+    # 現在のルールを基準として記録
+    assert renormalize_library(library_root).baseline
+    return library_root
+
+
+def test_raw_candidates_narrow_by_rare_char(library):
+    idx = LibraryIndex(library)
+    ids = [doc_id for doc_id, _ in idx.raw_candidates("郒")]
+    assert ids == ["modern", "plain"]
+    # 索引対象外（かな）だけのきっかけは全文書が候補
+    assert len(idx.raw_candidates("ハ")) == 3
+
+
+def test_added_rule_updates_only_affected_docs(library, monkeypatch):
+    monkeypatch.setitem(text_normalizer.OCR_MISREAD_CORRECTIONS, "郒", "郎")
+    other_before = (library / "other" / "modern.txt").read_text(encoding="utf-8")
+
+    report = renormalize_library(library)
+
+    assert [r.pattern for r in report.added_rules] == ["郒"]
+    assert report.candidates == 2
+    assert report.renormalized == ["plain"]
+    assert report.patched == ["modern"]
+    assert (library / "plain" / "modern.txt").read_text(encoding="utf-8").startswith("山田太郎")
+    assert (library / "modern" / "modern.txt").read_text(encoding="utf-8").startswith("【口語訳】鈴木次郎")
+    assert (library / "other" / "modern.txt").read_text(encoding="utf-8") == other_before
+    # 検索インデックスにも反映される
+    assert report.index is not None and report.index.updated == 2
+    assert [h.id for h in LibraryIndex(library).search("山田太郎")] == ["plain"]
+
+    # 2回目は変更なし
+    again = renormalize_library(library)
+    assert again.added_rules == [] and again.renormalized == []
+
+
+def test_dry_run_changes_nothing(library, monkeypatch):
+    monkeypatch.setitem(text_normalizer.OCR_MISREAD_CORRECTIONS, "郒", "郎")
+    before = (library / "plain" / "modern.txt").read_text(encoding="utf-8")
+
+    report = renormalize_library(library, dry_run=True)
+
+    assert report.renormalized == ["plain"]
+    assert (library / "plain" / "modern.txt").read_text(encoding="utf-8") == before
+    # スナップショットも更新しないので、本番実行で同じ変更が検知される
+    assert renormalize_library(library).renormalized == ["plain"]
+
+
+def test_removed_rule_cannot_be_undone_in_modernized_doc(library, monkeypatch):
+    monkeypatch.setitem(text_normalizer.OCR_MISREAD_CORRECTIONS, "郒", "郎")
+    renormalize_library(library)
+    monkeypatch.delitem(text_normalizer.OCR_MISREAD_CORRECTIONS, "郒")
+
+    report = renormalize_library(library)
+
+    assert report.renormalized == ["plain"]  # ocr_raw からやり直せば元に戻る
+    assert [doc_id for doc_id, _ in report.skipped] == ["modern"]
+
+
+def test_migrates_old_index_without_raw_terms(library):
+    """raw_terms 導入前の DB（user_version 0）は既存文書ぶんを後から作る"""
+    idx = LibraryIndex(library)
+    conn = idx._connect()
+    conn.execute("DELETE FROM raw_terms")
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    ids = [doc_id for doc_id, _ in idx.raw_candidates("郒")]
+    assert ids == ["modern", "plain"]
+
+
+def test_context_rule_trigger():
+    assert CorrectionRule("context", r"(?<=[ァ-ヶー])卜", "ト").trigger == "卜"
+    assert CorrectionRule("context", r"ab+c?(d|e)(fg)", "").trigger == "abfg"
+    assert CorrectionRule("context", r"卜(?=[ァ-ヶー])", "ト").trigger == "卜"
@@ -0,0 +1,101 @@
+"""検索の絞り込み（日付・タグ・モデル・元画像の枚数）と件数の内訳のテスト"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from conftest import make_doc
+from utils import library_search
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex, LibrarySearchError, SearchFacets
+
+
+def _facet_doc(
+    library_root: Path,
+    doc_id: str,
+    created_at: str,
+    tags: list[str],
+    ocr_model: str = "glm-ocr",
+    modernize: bool = False,
+    sources: int = 1,
+) -> None:
+    make_doc(
+        library_root,
+        doc_id,
+        "警察の報告",
+        created_at=created_at,
+        sources=sources,
+        tags=tags,
+        ocr={"model": ocr_model},
+        modernize={"enabled": modernize, "model": "qwen3.5:9b"},
+    )
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    _facet_doc(library_root, "doc1", "2026-01-15T10:00:00+09:00", ["新聞"])
+    _facet_doc(library_root, "doc2", "2026-03-01T10:00:00+09:00", ["新聞", "震災"], sources=3)
+    _facet_doc(library_root, "doc3", "2026-03-31T23:59:59+09:00", [], ocr_model="other-ocr")
+    _facet_doc(library_root, "doc4", "2026-05-01T10:00:00+09:00", ["震災"], modernize=True)
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _ids(hits) -> list[str]:
+    return sorted(h.id for h in hits)
+
+
+@pytest.mark.parametrize("query", ["警察の報告", "報告"])
+def test_facets(idx, query):
+    def ids(**kwargs):
+        return _ids(idx.search(query, facets=SearchFacets(**kwargs)))
+
+    assert ids(tags=("新聞",)) == ["doc1", "doc2"]
+    assert ids(tags=("新聞", "震災")) == ["doc2"]
+    assert ids(since="2026-03", until="2026-03") == ["doc2", "doc3"]
+    assert ids(since="2026-03-02") == ["doc3", "doc4"]
+    assert ids(until="2026-01") == ["doc1"]
+    assert ids(model="other-ocr") == ["doc3"]
+    assert ids(model="qwen3.5:9b") == ["doc4"]  # 口語体変換したものだけ
+    assert ids(min_sources=2) == ["doc2"]
+    assert ids(tags=("無い",)) == []
+
+
+def test_range_and_post_filter_agree(idx, monkeypatch):
+    facets = SearchFacets(since="2026-03-02")
+    with idx._read() as conn:
+        assert idx._facet_range(conn, facets) == (3, 4)
+    narrowed = idx.search("警察の報告", facets=facets)
+    assert _ids(narrowed) == ["doc3", "doc4"]
+    # docno の範囲を MATCH に渡さず、一致した後の確認だけで絞った場合と同じ
+    monkeypatch.setattr(library_search, "FACET_PREFILTER_DOCS", 0)
+    idx._cache.clear()
+    assert idx.search("警察の報告", facets=facets) == narrowed
+
+
+def test_bad_date(idx):
+    with pytest.raises(LibrarySearchError):
+        idx.search("警察の報告", facets=SearchFacets(since="3月"))
+
+
+def test_facet_counts(idx):
+    counts = idx.facet_counts("警察の報告", SearchFacets(since="2026-03"))
+    assert counts["tag"] == {"震災": 2, "新聞": 1}
+    assert counts["ocr_model"] == {"glm-ocr": 2, "other-ocr": 1}
+    assert counts["modernize_model"] == {"qwen3.5:9b": 1}
+    assert counts["sources"] == {"1": 2, "3": 1}
+    assert counts["year"] == {"2026": 3}
+
+
+def test_tags_follow_updates(idx):
+    meta_path = idx.library_root / "doc1" / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["tags"] = ["書簡"]
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+    record_change(idx.library_root, "doc1")
+    idx.update(reconcile=True)
+    assert _ids(idx.search("報告", facets=SearchFacets(tags=("新聞",)))) == ["doc2"]
+    assert _ids(idx.search("報告", facets=SearchFacets(tags=("書簡",)))) == ["doc1"]
@@ -0,0 +1,74 @@
+"""検索結果のページング（カーソル）・全件の順次取得・結果キャッシュのテスト"""
+
+import pytest
+
+from conftest import make_doc
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex, LibrarySearchError
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    for i in range(12):
+        # 同じ本文の文書を混ぜて、関連度が並ぶ（同点の）場合も確かめる
+        make_doc(library_root, f"doc{i:02d}", "警察の報告。" * (i % 4 + 1) + "以上")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _walk(idx: LibraryIndex, query: str, limit: int) -> list[str]:
+    ids, cursor = [], None
+    while True:
+        page = idx.search_page(query, limit, after=cursor)
+        ids += [h.id for h in page.hits]
+        if page.next_cursor is None:
+            return ids
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize("query", ["警察の報告", "報告", "警察の報告 以上"])
+def test_pages_cover_all_hits_in_order(idx, query):
+    # trigram・grams・両方の AND の各経路
+    expected = [h.id for h in idx.search(query, limit=100)]
+    assert len(expected) == 12
+    assert _walk(idx, query, 5) == expected
+    assert _walk(idx, query, 1) == expected
+    assert [h.id for h in idx.iter_search(query, page_size=5)] == expected
+
+
+def test_last_page_has_no_cursor(idx):
+    page = idx.search_page("警察の報告", 12)
+    assert len(page.hits) == 12
+    assert page.next_cursor is None
+
+
+def test_iter_search_after_cursor(idx):
+    first = idx.search_page("報告", 4)
+    rest = [h.id for h in idx.iter_search("報告", page_size=3, after=first.next_cursor)]
+    assert [h.id for h in first.hits] + rest == [h.id for h in idx.search("報告", limit=100)]
+
+
+def test_bad_cursor(idx):
+    with pytest.raises(LibrarySearchError):
+        idx.search_page("警察の報告", 5, after="abc")
+
+
+def test_cache_returns_same_hits(idx):
+    first = idx.search("警察の報告", limit=5)
+    assert len(idx._cache) == 1
+    again = idx.search("警察の報告", limit=5)
+    assert again == first
+    again.clear()  # 呼び出し側で書き換えてもキャッシュには響かない
+    assert idx.search("警察の報告", limit=5) == first
+
+
+def test_cache_invalidated_by_other_writer(idx):
+    assert len(idx.search("震災の記録")) == 0
+    # 別のインスタンス（別プロセス相当）が索引を更新する
+    make_doc(idx.library_root, "new", "震災の記録")
+    record_change(idx.library_root, "new")
+    with LibraryIndex(idx.library_root) as other:
+        other.update()
+    assert [h.id for h in idx.search("震災の記録")] == ["new"]
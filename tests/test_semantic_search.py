@@ -0,0 +1,127 @@
+"""意味検索（埋め込みベクトル）インデックスのテスト（Ollama の代わりに決定的な埋め込みを使う）"""
+
+import shutil
+
+import numpy as np
+import pytest
+
+from conftest import make_doc
+from utils import library_vectors
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex
+from utils.library_vectors import HashingEmbedder, VectorIndex, split_passages
+
+TEXTS = {
+    "quake": "関東大震災で東京の市街は焼けた。死者は十万人を超えた。",
+    "riot": "警察の報告によれば、米価の高騰で各地に暴動が起きた。",
+    "diet": "帝国議会は予算案を可決した。",
+}
+
+
+class CountingEmbedder(HashingEmbedder):
+    """埋め込んだテキストを覚えておく"""
+
+    def __init__(self, dim: int = 256):
+        super().__init__(dim)
+        self.texts: list[str] = []
+
+    def embed(self, texts):
+        self.texts += texts
+        return super().embed(texts)
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    for doc_id, text in TEXTS.items():
+        make_doc(library_root, doc_id, text, record=True)
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def test_split_passages():
+    text = "一二三。四五六。七八九十一二三四五六\n"
+    assert split_passages(text, 8) == [(0, 8), (8, 16), (16, 19)]
+    assert split_passages("  \n\n", 8) == []
+
+
+def test_search_ranks_closest_document(idx):
+    with VectorIndex(idx, HashingEmbedder()) as vectors:
+        stats = vectors.update()
+        assert (stats.documents, stats.embedded) == (3, 3)
+        hits = vectors.search("大震災の死者", limit=2)
+    assert [h.id for h in hits][0] == "quake"
+    assert len(hits) == 2
+    assert hits[0].snippet == TEXTS["quake"]
+    assert hits[0].similarity > hits[1].similarity
+
+
+def test_only_changed_passages_are_embedded(idx):
+    embedder = CountingEmbedder()
+    with VectorIndex(idx, embedder) as vectors:
+        vectors.update()
+        embedder.texts.clear()
+        assert vectors.update().embedded == 0
+
+        make_doc(idx.library_root, "quake", TEXTS["quake"] + "\n" + "救護班が派遣され" * 60, record=True)
+        idx.update()
+        stats = vectors.update()
+        assert stats.reused == 1  # 冒頭のパッセージは本文が同じ
+        assert TEXTS["quake"] not in "".join(embedder.texts)
+        assert stats.embedded == len(embedder.texts) > 0
+        assert vectors.search("救護班", limit=1)[0].id == "quake"
+
+
+def test_removed_documents_disappear(idx):
+    with VectorIndex(idx, HashingEmbedder()) as vectors:
+        vectors.update()
+        shutil.rmtree(idx.library_root / "quake")
+        record_change(idx.library_root, "quake")
+        idx.update()
+        assert vectors.update().removed == 1
+        assert "quake" not in [h.id for h in vectors.search("大震災の死者")]
+
+
+def test_model_change_reembeds_everything(idx):
+    with VectorIndex(idx, HashingEmbedder(256)) as vectors:
+        vectors.update()
+    embedder = CountingEmbedder(512)
+    with VectorIndex(idx, embedder) as vectors:
+        assert vectors.update().embedded == 3
+        assert vectors.stat()["dim"] == 512
+        assert vectors.search("大震災の死者")[0].id == "quake"
+
+
+def test_compaction_keeps_results(idx):
+    for i in range(10):
+        make_doc(idx.library_root, f"extra{i}", f"付録{i}の記事。" * 3, record=True)
+    idx.update()
+    with VectorIndex(idx, HashingEmbedder()) as vectors:
+        vectors.update()
+        before = vectors.stat()["matrix_bytes"]
+        for i in range(10):
+            shutil.rmtree(idx.library_root / f"extra{i}")
+            record_change(idx.library_root, f"extra{i}")
+        idx.update()
+        assert vectors.update().compacted
+        assert vectors.stat()["matrix_rows"] == 3
+        assert vectors.stat()["matrix_bytes"] < before
+        assert vectors.search("大震災の死者")[0].id == "quake"
+        assert len(list(vectors.db_path.parent.glob("vectors-*.f16"))) == 1
+
+
+def test_ivf_matches_exact_when_all_lists_probed(idx, monkeypatch):
+    for i in range(40):
+        make_doc(idx.library_root, f"extra{i}", f"第{i}号の付録。" + "号外" * (i % 7), record=True)
+    idx.update()
+    monkeypatch.setattr(library_vectors, "ANN_MIN_ROWS", 20)
+    with VectorIndex(idx, HashingEmbedder()) as vectors:
+        assert vectors.update().ann_lists > 1
+        assert vectors.stat()["ann_lists"] > 1
+        monkeypatch.setattr(library_vectors, "NPROBE", 1000)
+        for query in ["大震災の死者", "第3号の号外"]:
+            approx = vectors.search(query, limit=5)
+            exact = vectors.search(query, limit=5, exact=True)
+            assert [h.id for h in approx] == [h.id for h in exact]
+            assert np.allclose([h.similarity for h in approx], [h.similarity for h in exact])
@@ -0,0 +1,66 @@
+"""年・月ごとのシャードとライブラリをまたぐ連合検索（FederatedIndex）のテスト"""
+
+import pytest
+
+from conftest import make_doc
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex, SearchFacets
+from utils.library_shards import FederatedIndex
+
+
+@pytest.fixture
+def library_root(tmp_path):
+    root = tmp_path / "library"
+    make_doc(root, "2025-03-01_a", "関東大震災の記録。", created_at="2025-03-01")
+    make_doc(root, "2026-01-10_b", "震災後の復興計画。関東大震災の教訓。", created_at="2026-01-10")
+    make_doc(root, "2026-05-02_c", "警察の報告。", created_at="2026-05-02")
+    make_doc(root, "notes", "関東大震災の覚え書き。")  # 日付で始まらない ID
+    return root
+
+
+def test_year_shards_search_and_rebuild_independently(library_root):
+    with FederatedIndex([library_root], by="year") as fed:
+        stats = fed.update()
+        assert {name: s.added for name, s in stats.items()} == {"2025": 1, "2026": 2, "other": 1}
+        assert (library_root / ".index" / "shards" / "year" / "2026.db").exists()
+        assert not (library_root / ".index" / "search.db").exists()
+
+        hits = fed.search("関東大震災")
+        assert sorted(h.id for h in hits) == ["2025-03-01_a", "2026-01-10_b", "notes"]
+        assert [h.score for h in hits] == sorted(h.score for h in hits)
+        # 作成日の範囲に入らない年のシャードは引かない（日付の無い ID のシャードは引く）
+        hits = fed.search("関東大震災", facets=SearchFacets(since="2026-01"))
+        assert sorted(h.id for h in hits) == ["2026-01-10_b", "notes"]
+        assert [h.id for h in fed.search("震災", limit=1)] == ["2026-01-10_b"]
+
+        assert list(fed.rebuild(["2025"])) == ["2025"]
+        assert [h.id for h in fed.search("記録")] == ["2025-03-01_a"]
+
+
+def test_journal_entries_survive_other_readers(library_root):
+    with FederatedIndex([library_root], by="year") as fed:
+        fed.update()
+        make_doc(library_root, "2026-06-01_d", "関東大震災の写真。", created_at="2026-06-01")
+        make_doc(library_root, "2027-01-01_e", "関東大震災の回顧。", created_at="2027-01-01")
+        record_change(library_root, "2026-06-01_d")
+        record_change(library_root, "2027-01-01_e")
+
+        # search.db が先に読んでジャーナルを消しても、シャードの未読分は残る
+        with LibraryIndex(library_root) as idx:
+            idx.update()
+        stats = fed.update()
+        assert (stats["2026"].added, stats["2026"].reconciled) == (1, False)
+        assert stats["2027"].added == 1  # 新しい年のシャードはライブラリの走査で見つける
+        assert len(fed.search("関東大震災")) == 5
+
+
+def test_multiple_libraries(library_root, tmp_path):
+    other = tmp_path / "library_b"
+    make_doc(other, "2026-02-01_x", "関東大震災の被害調査。", created_at="2026-02-01")
+    with FederatedIndex([library_root, other]) as fed:
+        assert list(fed.update()) == ["library", "library_b"]
+        hits = fed.search("関東大震災")
+        assert {h.dir.parent.name for h in hits} == {"library", "library_b"}
+        assert len(hits) == 4
+    with pytest.raises(ValueError):
+        FederatedIndex([library_root], by="week")
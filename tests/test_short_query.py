@@ -0,0 +1,79 @@
+"""1〜2文字の語の検索（grams）のテスト"""
+
+import os
+import sqlite3
+
+import pytest
+
+from conftest import make_doc
+from utils.library_journal import record_change
+from utils.library_search import LibraryIndex, gram_text, make_snippet
+
+
+@pytest.fixture
+def idx(tmp_path):
+    library_root = tmp_path / "library"
+    make_doc(library_root, "doc1", "関東大震災の記録。警察の報告。")
+    make_doc(library_root, "doc2", "陸軍省より警察へ通牒")
+    make_doc(library_root, "doc3", "震える手で災いを記す")
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        yield idx
+
+
+def _ids(hits) -> list[str]:
+    return sorted(h.id for h in hits)
+
+
+def test_two_char_term(idx):
+    assert _ids(idx.search("震災")) == ["doc1"]  # doc3 は「震」「災」が離れている
+    assert _ids(idx.search("警察")) == ["doc1", "doc2"]
+
+
+def test_one_char_term(idx):
+    assert _ids(idx.search("震")) == ["doc1", "doc3"]
+
+
+def test_short_and_trigram_terms_are_anded(idx):
+    assert _ids(idx.search("警察 陸軍省")) == ["doc2"]
+    assert _ids(idx.search("震災 陸軍省")) == []
+    assert _ids(idx.search("警察 震災")) == ["doc1"]
+
+
+def test_old_kanji_short_term(idx):
+    assert _ids(idx.search("關東")) == ["doc1"]
+
+
+def test_short_only_snippet(idx):
+    (hit,) = idx.search("震災")
+    assert "[震災]" in hit.snippet
+
+
+def test_updated_doc_leaves_no_stale_grams(idx):
+    (idx.library_root / "doc1" / "modern.txt").write_text("平穏な一日", encoding="utf-8")
+    os.utime(idx.library_root / "doc1" / "meta.json", (0, 12345))
+    record_change(idx.library_root, "doc1")
+    assert idx.update().updated == 1
+    assert idx.search("震災") == []
+    assert _ids(idx.search("平穏")) == ["doc1"]
+
+
+def test_migrates_v2_index(idx):
+    idx.close()
+    conn = sqlite3.connect(idx.db_path)
+    conn.executescript("DROP TABLE grams; PRAGMA user_version = 2;")
+    conn.close()
+
+    with LibraryIndex(idx.library_root) as reopened:
+        assert _ids(reopened.search("警察")) == ["doc1", "doc2"]
+
+
+def test_gram_text():
+    assert sorted(gram_text("震災。A1").split()) == ["1", "A", "A1", "災", "震", "震災"]
+    assert gram_text("震災。A1") == gram_text("震災。A1")
+
+
+def test_make_snippet():
+    text = "一二三四五六七八九十関東大震災の記録一二三四五六七八九十"
+    assert make_snippet(text, ["震災"], width=8) == "...関東大[震災]の記録..."
+    assert make_snippet("短い", ["無い"]) == "短い"
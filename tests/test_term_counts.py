@@ -0,0 +1,76 @@
+"""語の出現数の集計（term_counts を索引の更新に合わせて保つ）のテスト"""
+
+import pytest
+
+from conftest import make_doc
+from utils import library_search
+from utils.library_search import LibraryIndex, SearchFacets, TermBucket
+
+
+@pytest.fixture
+def library_root(tmp_path):
+    root = tmp_path / "library"
+    make_doc(root, "a", "震災の後、震災の記録を集めた。", created_at="2026-01-05", tags=["新聞"])
+    make_doc(root, "b", "震災と配給。", created_at="2026-01-20", tags=["新聞", "公文書"])
+    make_doc(root, "c", "配給の記録。配給所の開設。", created_at="2026-02-03", tags=["公文書"])
+    make_doc(root, "d", "無関係な記事。", created_at="2026-02-10")
+    return root
+
+
+def test_term_frequency_by_month_and_tag(library_root):
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        assert idx.term_frequency("震災") == [
+            TermBucket("2026-01", 2, 2, 3),
+            TermBucket("2026-02", 2, 0, 0),
+        ]
+        assert idx.term_frequency("配給", by="tag") == [
+            TermBucket("公文書", 2, 2, 3),
+            TermBucket("新聞", 2, 1, 1),
+        ]
+        assert idx.term_frequency("配給", by="year", facets=SearchFacets(tags=("新聞",))) == [
+            TermBucket("2026", 2, 1, 1)
+        ]
+        # 3文字の語（trigram 1つ）
+        assert idx.term_frequency("配給所") == [
+            TermBucket("2026-01", 2, 0, 0),
+            TermBucket("2026-02", 2, 1, 1),
+        ]
+        assert idx.tracked_terms() == ["配給", "配給所", "震災"]
+        with pytest.raises(ValueError):
+            idx.term_frequency("震災", by="week")
+
+
+def test_counts_follow_updates_and_rebuild(library_root):
+    with LibraryIndex(library_root) as idx:
+        idx.update()
+        idx.track_term("震災")
+        idx.track_term("震災の記録")
+
+        make_doc(library_root, "d", "震災の記録。震災", created_at="2026-02-10")
+        make_doc(library_root, "e", "大震災。", created_at="2026-03-01")
+        idx.update(reconcile=True)
+        assert [b.occurrences for b in idx.term_frequency("震災")] == [3, 2, 1]
+        assert [b.occurrences for b in idx.term_frequency("震災の記録")] == [1, 1, 0]
+
+        idx.rebuild()
+        assert idx.tracked_terms() == ["震災", "震災の記録"]
+        assert [b.occurrences for b in idx.term_frequency("震災")] == [3, 2, 1]
+
+        assert idx.forget_term("震災")
+        assert idx.tracked_terms() == ["震災の記録"]
+
+
+def test_counts_include_occurrences_across_passage_cut(tmp_path, monkeypatch):
+    monkeypatch.setattr(library_search, "PASSAGE_CHARS", 1000)
+    root = tmp_path / "library"
+    # 句読点の無い本文: 1つめは 1000 字目の区切りをまたぎ、2つめは1つめの行の重なりにある
+    make_doc(root, "a", "あ" * 997 + "関東大震災" + "い" * 20 + "関東大震災" + "う" * 1000, created_at="2026-01-05")
+    with LibraryIndex(root) as idx:
+        idx.update()
+        assert [b.occurrences for b in idx.term_frequency("関東大震災")] == [2]
+        idx.track_term("大震災")
+        # 索引の更新で数え直すときも区切りをまたぐ出現を数える
+        make_doc(root, "b", "え" * 998 + "大震災" + "え" * 1000, created_at="2026-01-06")
+        idx.update(reconcile=True)
+        assert [b.occurrences for b in idx.term_frequency("大震災")] == [3]
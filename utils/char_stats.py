@@ -0,0 +1,418 @@
+"""
+コーパス全体の文字統計と OCR誤読候補の抽出
+
+OCR_MISREAD_CORRECTIONS は運用しながら手で育てる前提だが、ライブラリが大きく
+なると「どの字が怪しいか」を目で探すのは無理になる。ここではライブラリ全体の
+ocr_raw.txt の文字を数え、誤読の疑いがある字を候補として挙げる。
+
+数え方:
+- 各文書を UTF-32 に符号化して NumPy 配列（コードポイント列）として見る
+- 複数文書をまとめ、コードポイントをその束の中での通し番号（異なり字数 K 未満）に
+  詰めてから、(文書番号 * K + 通し番号) を np.bincount で数える。
+  ソートを使わないので文字数に対して線形で、Python の文字ループもない
+- コーパス全体の出現数・出現文書数も np.bincount で集計する
+
+キャッシュ:
+  文書ごとの集計結果を library/.index/char_stats.npz に CSR 形式で保存し、
+  ocr_raw.txt の mtime・サイズが変わっていない文書は再計算しない。
+
+誤読候補の判定（CJK 統合漢字のうち、次のいずれか）:
+- 稀少: コーパス全体での出現数が rare_max_count 以下
+- 非JIS: Shift_JIS（cp932）で表せない字。簡体字など、戦前の日本語文書には
+  まず出てこない字は OCR の誤読である可能性が高い（郧・郯 など）
+- 拡張ブロック: CJK 統合漢字拡張A/B 以降・互換漢字
+さらに、既知の誤読字（OCR_MISREAD_CORRECTIONS のキー）とコードポイントが近い字は
+優先して挙げる。CJK 漢字は部首・画数順に並んでいるので、近いコードポイントは
+字形が似ていることが多い。修正先の提案には、同じ近傍でコーパス中の出現が
+最も多い JIS 漢字を使う。
+"""
+
+import json
+import os
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.library_journal import INDEX_DIR_NAME
+from utils.text_normalizer import OCR_MISREAD_CORRECTIONS
+
+# ---------- 定数 ----------
+
+CACHE_NAME = "char_stats.npz"
+CACHE_VERSION = 1
+
+RARE_MAX_COUNT = CONFIG.get("analyze.rare_max_count")
+NEIGHBOR_WINDOW = CONFIG.get("analyze.neighbor_window")
+
+_BATCH_DOCS = 4096  # まとめて読み込む文書数
+_MAX_CELLS = 1 << 23  # 1回の bincount の (文書数 × 異なり字数) の上限（メモリ約64MB）
+_MAX_CODEPOINT = 0x110000
+
+# CJK 統合漢字の各ブロック（基本ブロック以外は「拡張ブロック」扱い）
+_CJK_BASIC = (0x4E00, 0x9FFF)
+_CJK_OTHER = (
+    (0x3400, 0x4DBF),  # 拡張A
+    (0xF900, 0xFAFF),  # 互換漢字
+    (0x20000, 0x3FFFF),  # 拡張B〜（補助漢字面・第三漢字面）
+)
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class CharStats:
+    """コーパス全体の文字統計（文書ごとの集計を CSR 形式で保持）
+
+    文書 i の文字は codes[indptr[i]:indptr[i+1]]、その出現数は counts の同じ範囲。
+    """
+
+    doc_ids: list[str]
+    indptr: np.ndarray  # int64, len = 文書数 + 1
+    codes: np.ndarray  # uint32
+    counts: np.ndarray  # uint32
+    reused: int = 0  # キャッシュを使った文書数
+    computed: int = 0  # 今回数え直した文書数
+
+    def totals(self) -> np.ndarray:
+        """コードポイント → コーパス全体の出現数（長さ 0x110000）"""
+        return np.bincount(self.codes, weights=self.counts, minlength=_MAX_CODEPOINT).astype(
+            np.int64
+        )
+
+    def doc_freqs(self) -> np.ndarray:
+        """コードポイント → 出現文書数（各文書内で codes は重複しない）"""
+        return np.bincount(self.codes, minlength=_MAX_CODEPOINT)
+
+    def docs_containing(self, codes: list[int], limit: int = 3) -> dict[int, list[str]]:
+        """各コードポイントを含む文書 ID を先頭から limit 件ずつ返す
+
+        全文書の codes を1回だけ走査する（字ごとに走査すると候補数に比例して遅い）。
+        """
+        result: dict[int, list[str]] = {code: [] for code in codes}
+        positions = np.flatnonzero(np.isin(self.codes, np.asarray(codes, dtype=np.uint32)))
+        rows = np.searchsorted(self.indptr, positions, side="right") - 1
+        for code, row in zip(self.codes[positions].tolist(), rows.tolist()):
+            docs = result[code]
+            if len(docs) < limit:
+                docs.append(self.doc_ids[row])
+        return result
+
+
+@dataclass
+class MisreadCandidate:
+    """誤読候補1件"""
+
+    char: str
+    count: int  # コーパス全体の出現数
+    doc_count: int  # 出現文書数
+    flags: list[str] = field(default_factory=list)  # "稀少" / "非JIS" / "拡張ブロック"
+    near_known: str = ""  # コードポイントが近い既知の誤読字（無ければ空）
+    suggestion: str = ""  # 修正先の候補（近傍で最頻の JIS 漢字）
+    examples: list[str] = field(default_factory=list)  # 出現文書 ID（数件）
+
+    @property
+    def codepoint(self) -> str:
+        return f"U+{ord(self.char):04X}"
+
+
+@dataclass
+class _Cache:
+    """char_stats.npz の中身"""
+
+    doc_ids: list[str]
+    sigs: list[tuple[int, int]]  # (mtime_ns, サイズ)
+    indptr: np.ndarray
+    codes: np.ndarray
+    counts: np.ndarray
+
+
+# ---------- 集計 ----------
+
+
+def count_codepoints(texts: list[str]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """複数テキストの文字を文書ごとに数える
+
+    Returns:
+        (indptr, codes, counts) の CSR 形式。文書内の codes は昇順。
+    """
+    n_docs = len(texts)
+    # UTF-32LE のバイト列はそのままコードポイント配列として読める（BOM なし）
+    encoded = [t.encode("utf-32-le") for t in texts]
+    lengths = np.fromiter((len(b) // 4 for b in encoded), dtype=np.int64, count=n_docs)
+    cps = np.frombuffer(b"".join(encoded), dtype="<u4")
+    starts = np.zeros(n_docs + 1, dtype=np.int64)
+    np.cumsum(lengths, out=starts[1:])
+
+    # この束に出てくる字を通し番号 0..K-1 に詰める（昇順なので文書内の codes も昇順）
+    present = np.flatnonzero(np.bincount(cps, minlength=1))
+    k = max(len(present), 1)
+    lut = np.zeros(int(present[-1]) + 1 if len(present) else 1, dtype=np.int32)
+    lut[present] = np.arange(len(present), dtype=np.int32)
+    dense = lut[cps]
+    present = present.astype(np.uint32)
+
+    indptr = np.zeros(n_docs + 1, dtype=np.int64)
+    codes_parts: list[np.ndarray] = []
+    counts_parts: list[np.ndarray] = []
+    step = max(1, _MAX_CELLS // k)
+    for lo in range(0, n_docs, step):
+        hi = min(lo + step, n_docs)
+        seg = slice(starts[lo], starts[hi])
+        # (文書数 × K) ≦ _MAX_CELLS なので int32 で足りる
+        doc_base = np.repeat(np.arange(0, (hi - lo) * k, k, dtype=np.int32), lengths[lo:hi])
+        grid = np.bincount(doc_base + dense[seg], minlength=(hi - lo) * k)
+        cells = np.flatnonzero(grid)
+        codes_parts.append(present[cells % k])
+        counts_parts.append(grid[cells].astype(np.uint32))
+        np.cumsum(
+            np.bincount(cells // k, minlength=hi - lo), out=indptr[lo + 1 : hi + 1]
+        )
+        indptr[lo + 1 : hi + 1] += indptr[lo]
+
+    codes = np.concatenate(codes_parts) if codes_parts else np.zeros(0, np.uint32)
+    counts = np.concatenate(counts_parts) if counts_parts else np.zeros(0, np.uint32)
+    return indptr, codes, counts
+
+
+def collect_stats(library_root: Path, use_cache: bool = True) -> CharStats:
+    """ライブラリ全体の ocr_raw.txt を数える（キャッシュがあれば差分だけ）
+
+    Args:
+        library_root: ライブラリのルートディレクトリ
+        use_cache: False ならキャッシュを読まずに全件数え直す（書き出しはする）
+    """
+    cache_path = library_root / INDEX_DIR_NAME / CACHE_NAME
+    cache = _load_cache(cache_path) if use_cache else None
+    cache_rows = {doc_id: i for i, doc_id in enumerate(cache.doc_ids)} if cache else {}
+
+    doc_ids: list[str] = []
+    sigs: list[tuple[int, int]] = []
+    sources: list[int] = []  # キャッシュの行番号、または -1 - (今回数える順番)
+    pending: list[str] = []
+
+    for doc_id, raw_path, sig in _iter_raw_files(library_root):
+        row = cache_rows.get(doc_id)
+        doc_ids.append(doc_id)
+        sigs.append(sig)
+        if row is not None and cache.sigs[row] == sig:
+            sources.append(row)
+        else:
+            sources.append(-1 - len(pending))
+            pending.append(raw_path)
+
+    fresh = _count_files(pending)
+    stats = _gather(doc_ids, np.asarray(sources, dtype=np.int64), cache, fresh)
+    stats.computed = len(pending)
+    stats.reused = len(doc_ids) - len(pending)
+    if stats.computed or cache is None or len(cache.doc_ids) != len(doc_ids):
+        _save_cache(cache_path, stats, sigs)
+    return stats
+
+
+# ---------- 誤読候補 ----------
+
+
+def find_misread_candidates(
+    stats: CharStats,
+    rare_max_count: int = RARE_MAX_COUNT,
+    window: int = NEIGHBOR_WINDOW,
+    known: dict[str, str] | None = None,
+) -> list[MisreadCandidate]:
+    """誤読の疑いがある字を並べて返す
+
+    並び順: 既知の誤読字に近いもの → フラグの多いもの → 出現数の少ないもの。
+    既に OCR_MISREAD_CORRECTIONS にある字は（修正済みなので）出さない。
+    """
+    known = OCR_MISREAD_CORRECTIONS if known is None else known
+    totals = stats.totals()
+    dfs = stats.doc_freqs()
+
+    present = np.flatnonzero(totals)
+    cjk_basic = (present >= _CJK_BASIC[0]) & (present <= _CJK_BASIC[1])
+    cjk_other = np.zeros_like(cjk_basic)
+    for lo, hi in _CJK_OTHER:
+        cjk_other |= (present >= lo) & (present <= hi)
+    rare = totals[present] <= rare_max_count
+
+    # 非JIS 判定は字ごとに encode するしかないので、CJK の字だけに絞ってから行う
+    cjk_codes = present[cjk_basic | cjk_other]
+    jis = {int(c) for c in cjk_codes if _is_jis(chr(c))}
+
+    # 修正先提案用: JIS で表せる漢字の出現数（近傍の最頻字を探す）
+    jis_totals = np.zeros_like(totals)
+    jis_list = np.fromiter(jis, dtype=np.int64, count=len(jis))
+    jis_totals[jis_list] = totals[jis_list]
+
+    known_codes = sorted(ord(k) for k in known if len(k) == 1)
+
+    candidates: list[MisreadCandidate] = []
+    for code, is_basic, is_other, is_rare in zip(
+        present.tolist(), cjk_basic.tolist(), cjk_other.tolist(), rare.tolist()
+    ):
+        if not (is_basic or is_other):
+            continue
+        char = chr(code)
+        if char in known:
+            continue
+        flags = []
+        if is_rare:
+            flags.append("稀少")
+        if code not in jis:
+            flags.append("非JIS")
+        if is_other:
+            flags.append("拡張ブロック")
+        if not flags:
+            continue
+
+        near = [k for k in known_codes if abs(k - code) <= window]
+        lo, hi = max(code - window, 0), code + window + 1
+        neighborhood = jis_totals[lo:hi].copy()
+        neighborhood[code - lo] = 0
+        best = int(np.argmax(neighborhood))
+
+        candidates.append(
+            MisreadCandidate(
+                char=char,
+                count=int(totals[code]),
+                doc_count=int(dfs[code]),
+                flags=flags,
+                near_known=chr(min(near, key=lambda k: abs(k - code))) if near else "",
+                suggestion=chr(lo + best) if neighborhood[best] > 0 else "",
+            )
+        )
+
+    examples = stats.docs_containing([ord(c.char) for c in candidates])
+    for c in candidates:
+        c.examples = examples[ord(c.char)]
+
+    candidates.sort(key=lambda c: (not c.near_known, -len(c.flags), c.count, c.char))
+    return candidates
+
+
+# ---------- private ----------
+
+
+def _is_jis(char: str) -> bool:
+    try:
+        char.encode("cp932")
+        return True
+    except UnicodeEncodeError:
+        return False
+
+
+def _iter_raw_files(library_root: Path) -> Iterator[tuple[str, str, tuple[int, int]]]:
+    """(文書ID, ocr_raw.txt のパス, (mtime_ns, サイズ)) を文書ID順に返す
+
+    '.' で始まるフォルダ（`.index` 等）は除外する。
+    """
+    if not library_root.exists():
+        return
+    with os.scandir(library_root) as it:
+        entries = sorted(
+            (e for e in it if e.is_dir() and not e.name.startswith(".")),
+            key=lambda e: e.name,
+        )
+    for entry in entries:
+        raw_path = os.path.join(entry.path, "ocr_raw.txt")
+        try:
+            st = os.stat(raw_path)
+        except OSError:
+            continue
+        yield entry.name, raw_path, (st.st_mtime_ns, st.st_size)
+
+
+def _read_text(path: str) -> str:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"⚠ ocr_raw.txt を読めません ({path}): {e}")
+        return ""
+
+
+def _count_files(paths: list[str]) -> CharStats:
+    """ファイル群を _BATCH_DOCS 件ずつ読んで数え、1つの CSR にまとめる"""
+    indptrs = [np.zeros(1, dtype=np.int64)]
+    codes: list[np.ndarray] = []
+    counts: list[np.ndarray] = []
+    offset = 0
+    for start in range(0, len(paths), _BATCH_DOCS):
+        texts = [_read_text(p) for p in paths[start : start + _BATCH_DOCS]]
+        indptr, c, n = count_codepoints(texts)
+        indptrs.append(indptr[1:] + offset)
+        codes.append(c)
+        counts.append(n)
+        offset += len(c)
+    return CharStats(
+        doc_ids=[],
+        indptr=np.concatenate(indptrs),
+        codes=np.concatenate(codes) if codes else np.zeros(0, np.uint32),
+        counts=np.concatenate(counts) if counts else np.zeros(0, np.uint32),
+    )
+
+
+def _gather(
+    doc_ids: list[str], sources: np.ndarray, cache: _Cache | None, fresh: CharStats
+) -> CharStats:
+    """キャッシュの行と今回数えた行を、文書順の1つの CSR に並べ直す
+
+    行ごとにスライスを連結すると文書数に比例した Python ループになるので、
+    「元配列上の添字」を np.repeat で一括生成して1回の取り出しで済ませる。
+    """
+    if cache is not None:
+        src_indptr = np.concatenate([cache.indptr, fresh.indptr[1:] + cache.indptr[-1]])
+        src_codes = np.concatenate([cache.codes, fresh.codes])
+        src_counts = np.concatenate([cache.counts, fresh.counts])
+        n_cached = len(cache.indptr) - 1
+    else:
+        src_indptr, src_codes, src_counts = fresh.indptr, fresh.codes, fresh.counts
+        n_cached = 0
+
+    rows = np.where(sources >= 0, sources, n_cached + (-1 - sources))
+    starts = src_indptr[rows]
+    lengths = src_indptr[rows + 1] - starts
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    index = np.repeat(starts - indptr[:-1], lengths) + np.arange(indptr[-1])
+    return CharStats(
+        doc_ids=doc_ids,
+        indptr=indptr,
+        codes=src_codes[index].astype(np.uint32, copy=False),
+        counts=src_counts[index].astype(np.uint32, copy=False),
+    )
+
+
+def _load_cache(path: Path) -> _Cache | None:
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != CACHE_VERSION:
+                return None
+            return _Cache(
+                doc_ids=json.loads(str(data["doc_ids"])),
+                sigs=list(zip(data["mtime_ns"].tolist(), data["size"].tolist())),
+                indptr=data["indptr"],
+                codes=data["codes"],
+                counts=data["counts"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _save_cache(path: Path, stats: CharStats, sigs: list[tuple[int, int]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp.npz")
+    np.savez(
+        tmp,
+        version=np.array(CACHE_VERSION),
+        doc_ids=np.array(json.dumps(stats.doc_ids, ensure_ascii=False)),
+        mtime_ns=np.array([s[0] for s in sigs], dtype=np.int64),
+        size=np.array([s[1] for s in sigs], dtype=np.int64),
+        indptr=stats.indptr,
+        codes=stats.codes,
+        counts=stats.counts,
+    )
+    os.replace(tmp, path)
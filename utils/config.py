@@ -27,12 +27,80 @@ from typing import Any
 # config.toml で上書きできるキーの一覧でもある。
 
 _DEFAULTS: dict[str, Any] = {
-    "models": {"ocr": "glm-ocr", "modernize": "qwen3.5:9b"},
+    "models": {"ocr": "glm-ocr", "modernize": "qwen3.5:9b", "embed": "bge-m3"},
     "paths": {"input": "input", "output": "output", "library": "library"},
     "chunk": {"size": 2000, "overlap": 200},
     "llm": {"temperature": 0.5, "top_p": 0.9, "top_k": 40, "repeat_penalty": 1.1},
-    "search": {"limit": 20, "min_query_chars": 3},
+    "search": {
+        "limit": 20,
+        "min_query_chars": 3,
+        "read_pool_size": 4,   # 同時に検索できる読み取り接続の数
+        "cache_size_mb": 64,   # SQLite のページキャッシュ（接続ごと）
+        "mmap_size_mb": 256,   # インデックスをメモリマップで読む上限
+        "weight_title": 3.0,   # bm25 の列の重み: タイトル
+        "weight_modern": 1.0,  # 同: 現代語テキスト
+        "weight_raw": 0.5,     # 同: OCR生テキスト（ocr_raw.txt）
+        "max_variants": 16,    # 1語を字体違い（国/國…）に展開する上限
+        "result_cache_size": 128,  # 検索結果の LRU キャッシュの件数（0 で使わない）
+        "page_size": 200,      # 全件を流すとき（--format ndjson）1回に引く件数
+        "facet_prefilter_docs": 1000,  # 絞り込みの該当がこれ以下なら、その範囲を全文検索に先に渡す
+    },
+    "semantic": {
+        "batch_size": 32,       # 1回の埋め込み呼び出しに渡すパッセージ数
+        "passage_chars": 400,   # 埋め込む1パッセージの長さの目安（文字数）
+        "ann_min_rows": 20000,  # パッセージがこれ以上なら IVF の近似検索にする
+        "nprobe": 16,           # 近似検索で比べる IVF のリスト数（多いほど正確で遅い）
+    },
+    "hybrid": {
+        "fusion": "rrf",          # 全文検索と意味検索のまとめ方（rrf / weighted）
+        "rrf_k": 60,              # RRF の順位の下駄
+        "keyword_weight": 1.0,    # 全文検索の重み
+        "semantic_weight": 1.0,   # 意味検索の重み
+        "candidates": 50,         # それぞれの検索から引く候補の文書数
+        "budget_ms": 500,         # 意味検索を待つ上限（過ぎたら全文検索の結果だけで返す）
+    },
+    "fuzzy": {
+        "max_edits": 2,           # 1語で誤読しうる字に置き換える字数の上限
+        "max_variants": 32,       # 1語あたりの綴りの上限
+        "dict_cost": 0.3,         # OCR_MISREAD_CORRECTIONS の組の置換コスト
+        "learned_cost": 0.6,      # analyze chars --save-confusions で推定した組の置換コスト
+        "candidates": 100,        # コストで並べ直す候補の文書数
+    },
+    "grep": {
+        "workers": 0,               # 照合のプロセス数（0 で CPU 数）
+        "context": 20,              # KWIC の前後の文字数
+        "parallel_min_docs": 200,   # 候補がこの件数以上ならプロセスを分けて照合する
+    },
+    "kwic": {
+        "context": 20,              # 語の前後に切り出す文字数
+    },
+    "index": {
+        "workers": 8,                  # 索引時にファイルを読むスレッド数
+        "batch_size": 500,             # まとめて書き込む文書数
+        "optimize_ratio": 0.2,         # 差分が全文書のこの割合以上なら FTS を optimize する
+        "reconcile_hours": 24,         # ライブラリ全体との突き合わせの間隔（0 で自動ではしない）
+        "passage_chars": 1000,         # 検索の1単位（パッセージ）の長さの上限（0 で文書ごと。変えたら rebuild）
+    },
+    "dedup": {
+        "num_perm": 128,    # MinHash の署名の長さ（変えたら index --rebuild）
+        "bands": 32,        # LSH のバンド数（num_perm を割り切る数。多いほど似ていない組も候補に）
+        "shingle": 4,       # 何文字ずつの並びで本文を比べるか（変えたら index --rebuild）
+        "min_chars": 50,    # 記号・空白を除いてこれより短い文書・ページは比べない
+        "threshold": 0.7,   # 近似重複とみなす類似度（推定 Jaccard 係数）の下限
+    },
+    "shards": {
+        "by": "",     # index・find を年・月ごとのシャードで（"year" / "month"。空なら分けない）
+        "workers": 4, # シャードを並行に検索・更新するスレッド数
+    },
+    "renormalize": {
+        "common_df_ratio": 0.5,  # この割合を超える文書に出る文字は転置リストを持たない
+        "common_min_docs": 100,  # 文書数がこれ未満のうちは上の判定をしない
+    },
     "diff": {"color": True, "context": 30},
+    "analyze": {
+        "rare_max_count": 2,   # コーパス全体でこの回数以下しか出ない漢字を「稀少」とみなす
+        "neighbor_window": 32, # 既知の誤読字・修正先候補を探すコードポイントの幅（±）
+    },
     "preprocess": {
         "enabled": True,      # デフォルトON（--no-preprocess で実行時OFF）
         "deskew": True,       # 傾き補正
@@ -40,6 +108,17 @@ _DEFAULTS: dict[str, Any] = {
         "contrast": True,     # CLAHEコントラスト強調
         "binarize": "none",   # "none" | "otsu" | "adaptive"（既定OFF）
     },
+    "objects": {
+        "enabled": True,      # 保存する画像を library/.objects/ の blob へのハードリンクにする（false でコピー）
+        "workers": 4,         # 既存ライブラリの移行で画像をハッシュするスレッド数
+    },
+    "image_hash": {
+        "guard": True,        # OCR の前に取り込む画像をライブラリ・同じ回の画像と照らす（--allow-duplicates で実行時OFF）
+        "hash_size": 16,      # pHash・dHash の一辺（ビット数はその2乗。変えると次の照合で全部ハッシュし直す）
+        "phash_max_distance": 40,  # 同じページとみなす pHash の違うビット数の上限
+        "dhash_max_distance": 48,  # 同じく dHash の上限（両方を満たせば同じページ）
+        "workers": 4,         # ライブラリの元画像をハッシュするスレッド数
+    },
     "progress": {
         "enabled": True,      # 進捗表示(スピナー/バー)のON/OFF。非TTY時は自動でOFF扱い
         "spinner": "dots",    # rich スピナー種別: "dots" | "line" | "arc" 等
@@ -0,0 +1,134 @@
+"""
+画像の知覚ハッシュ（pHash・dHash）モジュール
+
+同じページを二度撮った画像や、もうライブラリにあるページの画像を、OCR に
+かける前に見分けるための指紋を作る。ファイルの中身のハッシュと違い、撮り直し・
+縮尺・JPEG の劣化・ドラッグした範囲の多少の違いがあっても近い値になる。
+
+作り方（OpenCV）:
+  1. グレースケールで読み、長辺 TRIM_SIDE 画素に縮める
+  2. 大津の二値化で文字（インク）を取り、点・シミだけの行・列を除いた文字のある
+     範囲で切り抜く（余白の取り方の違いを消す。これが無いと1〜2%ずれただけで別物になる）
+  3. pHash: 一辺 HASH_SIZE×4 に縮めて DCT をとり、低周波の HASH_SIZE×HASH_SIZE
+     （直流成分を除く）が中央値より大きいかどうか
+     dHash: HASH_SIZE+1 × HASH_SIZE に縮め、横に隣り合う画素の大小
+本文のページはどれも「行の並んだ長方形」で、8×8（64bit）のハッシュでは別の
+ページとの差が撮り直しの揺れと重なる。そのため一辺 16（256bit）を既定にする。
+違うビット数が pHash で PHASH_MAX_DISTANCE 以下、かつ dHash で
+DHASH_MAX_DISTANCE 以下なら同じページとみなす。
+
+使い方:
+    from utils.image_hash import hash_image
+
+    a = hash_image(Path("input/p001.png"))
+    b = hash_image(Path("library/2026-03-01_p001/source.png"))
+    print(a.distance(b), a.matches(b))
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from utils.config import CONFIG
+
+# ---------- 定数 ----------
+
+HASH_SIZE = CONFIG.get("image_hash.hash_size")
+PHASH_MAX_DISTANCE = CONFIG.get("image_hash.phash_max_distance")
+DHASH_MAX_DISTANCE = CONFIG.get("image_hash.dhash_max_distance")
+
+TRIM_SIDE = 512  # 切り抜きの前に縮める長辺の画素数
+_MIN_TRIM = 16  # 文字の範囲がこれより狭ければ切り抜かない（白紙・ほぼ図版だけの画像）
+_SPECK_RATIO = 0.005  # 行・列の画素のうち文字がこの割合以下なら余白（点・シミ）とみなす
+
+
+# ---------- データクラス ----------
+
+
+@dataclass(frozen=True)
+class ImageHash:
+    """画像1枚の知覚ハッシュ（どちらも HASH_SIZE² ビットを詰めたバイト列）"""
+
+    phash: bytes
+    dhash: bytes
+
+    def distance(self, other: "ImageHash") -> tuple[int, int]:
+        """(pHash の違うビット数, dHash の違うビット数)"""
+        return _hamming(self.phash, other.phash), _hamming(self.dhash, other.dhash)
+
+    def matches(self, other: "ImageHash") -> bool:
+        """同じページの画像とみなせるか"""
+        p, d = self.distance(other)
+        return p <= PHASH_MAX_DISTANCE and d <= DHASH_MAX_DISTANCE
+
+
+# ---------- 例外クラス ----------
+
+
+class ImageHashError(Exception):
+    """画像を読み込めずハッシュを作れない場合の例外"""
+
+    pass
+
+
+# ---------- 公開関数 ----------
+
+
+def hash_image(path: Path) -> ImageHash:
+    """画像ファイルの知覚ハッシュ（日本語パス可）。読めなければ ImageHashError"""
+    try:
+        data = np.fromfile(str(path), dtype=np.uint8)
+    except OSError as e:
+        raise ImageHashError(f"画像を読み込めません: {path}\n→ {e}") from e
+    gray = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE) if len(data) else None
+    if gray is None:
+        raise ImageHashError(f"画像をデコードできません（破損/非対応形式）: {path}")
+    return hash_gray(gray)
+
+
+def hash_gray(gray: np.ndarray) -> ImageHash:
+    """グレースケール画像の知覚ハッシュ"""
+    page = _trim(_shrink(gray)).astype(np.float32)
+    n = HASH_SIZE
+    small = cv2.resize(page, (n * 4, n * 4), interpolation=cv2.INTER_AREA)
+    low = cv2.dct(small)[:n, :n].flatten()[1:]
+    phash = np.append(low > np.median(low), False)
+    small = cv2.resize(page, (n + 1, n), interpolation=cv2.INTER_AREA)
+    dhash = (small[:, 1:] > small[:, :-1]).flatten()
+    return ImageHash(np.packbits(phash).tobytes(), np.packbits(dhash).tobytes())
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _shrink(gray: np.ndarray) -> np.ndarray:
+    h, w = gray.shape[:2]
+    scale = TRIM_SIDE / max(h, w)
+    if scale >= 1:
+        return gray
+    size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def _trim(gray: np.ndarray) -> np.ndarray:
+    """文字（暗い画素）のある範囲で切り抜く
+
+    行・列ごとの文字の画素数が _SPECK_RATIO に満たない端は余白とみなす
+    （紙のシミ・点を範囲に入れない）。
+    """
+    _, ink = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV | cv2.THRESH_OTSU)
+    ink = ink > 0
+    rows = np.flatnonzero(ink.sum(axis=1) > ink.shape[1] * _SPECK_RATIO)
+    cols = np.flatnonzero(ink.sum(axis=0) > ink.shape[0] * _SPECK_RATIO)
+    if len(rows) == 0 or len(cols) == 0:
+        return gray
+    top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+    if bottom - top < _MIN_TRIM or right - left < _MIN_TRIM:
+        return gray
+    return gray[top:bottom, left:right]
+
+
+def _hamming(a: bytes, b: bytes) -> int:
+    return int(np.unpackbits(np.frombuffer(a, np.uint8) ^ np.frombuffer(b, np.uint8)).sum())
@@ -0,0 +1,851 @@
+"""
+ライブラリのカタログ（library/.index/catalog.db）
+
+文書ごとの集計（OCR にかかった時間・使ったモデル・1文書あたりの枚数など）や
+一覧・書き出しは、今までは全文書の meta.json を開かないとできなかった。
+ここでは meta.json の全項目を正規化した列・表で SQLite に持ち、stat・list を
+文書数によらず SQL だけで返す。
+
+  - documents: 1文書1行（作成日時・題・OCR モデル・秒数・正規化の有無 …）
+  - doc_files・doc_tags・preprocess_steps・near_duplicates: 順番つきの一覧
+  - prompts: OCR のプロンプト（同じ文を文書ごとに持たない）
+  - extra: 知らないキーや形の違う項目は JSON のまま残す（書き出しで元に戻す）
+
+documents・doc_tags の列名は検索インデックスと同じにしてあり、絞り込み
+（SearchFacets）は library_search.facet_filter() をそのまま使う。
+
+save_document は書き終えた文書をすぐカタログにも入れる。ほかの変更（再正規化・
+手作業の編集・削除）は、検索インデックスと同じく変更ジャーナルの未読分
+（読み手名 "catalog"）と、まれに行う全体の突き合わせ（reconcile）で拾う。
+rebuild() は meta.json の読み込み・解析をスレッドで並行して、一時ファイルに
+組み立ててから差し替える。
+
+使い方:
+    from pathlib import Path
+    from utils.library_catalog import LibraryCatalog
+
+    with LibraryCatalog(Path("library")) as catalog:
+        catalog.update()
+        s = catalog.summary()
+        print(s.documents, s.pages, s.seconds_per_page)
+        for meta in catalog.export():
+            ...
+"""
+
+import json
+import os
+import sqlite3
+import stat
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.library_journal import BUSY_TIMEOUT_SECONDS, INDEX_DIR_NAME, ChangeJournal
+from utils.library_search import (
+    INDEX_BATCH_SIZE,
+    INDEX_WORKERS,
+    RECONCILE_HOURS,
+    IndexStats,
+    SearchFacets,
+    facet_filter,
+    install_build,
+)
+
+# ---------- 定数 ----------
+
+CATALOG_DB_NAME = "catalog.db"
+JOURNAL_READER = "catalog"  # 変更ジャーナルの読み手名
+SCHEMA_VERSION = 1  # catalog.db の表の版（変えたら次の update() で作り直す）
+# これだけ読みに来ていないカタログは、ほかの読み手がジャーナルを消すときに待たない
+_READER_STALE_SECONDS = RECONCILE_HOURS * 3600 if RECONCILE_HOURS > 0 else None
+
+# list の並び順（documents d の ORDER BY）
+SORTS = {
+    "created": "d.created_at, d.id",
+    "title": "d.title, d.id",
+    "pages": "d.source_count DESC, d.id",
+    "ocr-seconds": "d.ocr_seconds DESC, d.id",
+    "per-page": "d.ocr_seconds / d.source_count DESC, d.id",
+}
+
+# 1ページあたりの秒数に数える文書（OCR を使い回した 0 秒の記録は除く）
+_TIMED = "d.ocr_seconds > 0 AND d.source_count > 0"
+
+# 正規化して列に入れる meta.json のセクション: キー → {項目: 型}
+_SECTIONS = {
+    "ocr": {"model": str, "prompt": str, "elapsed_seconds": float},
+    "normalization": {"old_kanji": bool, "historical_kana": bool, "ocr_misread_correction": bool},
+    "modernize": {"enabled": bool, "model": str},
+    "preprocess": {"enabled": bool, "steps": list, "elapsed_seconds": float},
+}
+_DUPLICATE_FIELDS = {"id": str, "similarity": float, "page": int, "own_page": int}
+
+_COLUMNS = (
+    "id", "mtime_ns", "schema_version", "created_at", "title", "note", "source_count",
+    "ocr_model", "ocr_prompt", "ocr_seconds", "old_kanji", "historical_kana",
+    "ocr_misread_correction", "modernize_enabled", "modernize_model",
+    "preprocess_enabled", "preprocess_seconds", "extra",
+)  # fmt: skip
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class CatalogEntry:
+    """一覧の1件"""
+
+    id: str
+    dir: Path
+    created_at: str
+    title: str
+    pages: int  # 元画像の枚数
+    ocr_model: str
+    ocr_seconds: float | None
+    modernize_model: str  # 口語体変換をしていなければ ""
+    tags: list[str] = field(default_factory=list)
+
+
+@dataclass
+class ModelSummary:
+    """OCR モデルごとの集計"""
+
+    model: str
+    documents: int
+    pages: int
+    ocr_seconds: float
+    seconds_per_page: float | None  # 使い回した記録を除いた1ページあたり
+
+
+@dataclass
+class CatalogSummary:
+    """カタログ全体（または絞り込んだ範囲）の集計"""
+
+    documents: int = 0
+    pages: int = 0
+    ocr_seconds: float = 0.0
+    seconds_per_page: float | None = None  # 時間の合計 ÷ ページ数（0 秒の記録は除く）
+    median_seconds_per_page: float | None = None  # 文書ごとの1ページあたりの中央値
+    preprocess_seconds: float = 0.0
+    modernized: int = 0  # 口語体変換をした文書
+    first_created: str | None = None
+    last_created: str | None = None
+    models: list[ModelSummary] = field(default_factory=list)
+
+
+@dataclass
+class _CatalogRow:
+    """meta.json 1件を表に分けたもの"""
+
+    columns: dict
+    files: list[tuple[str, int, str]]  # (種類, 順番, ファイル名)
+    tags: list[str]
+    steps: list[str]
+    duplicates: list[dict]
+
+
+# ---------- メインクラス ----------
+
+
+class LibraryCatalog:
+    """ライブラリの meta.json を正規化して持つカタログ（library/.index/catalog.db）"""
+
+    def __init__(self, library_root: Path, workers: int = INDEX_WORKERS):
+        self.library_root = Path(library_root)
+        self._workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def __enter__(self) -> "LibraryCatalog":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def db_path(self) -> Path:
+        return self.library_root / INDEX_DIR_NAME / CATALOG_DB_NAME
+
+    @property
+    def journal(self) -> ChangeJournal:
+        return ChangeJournal(self.library_root)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # ---------- public API ----------
+
+    def update(self, reconcile: bool = False) -> IndexStats:
+        """変更ジャーナルの未読分の文書を読み直す
+
+        まだジャーナルを読んだことがない・reconcile=True・前回の突き合わせから
+        index.reconcile_hours 時間以上たったときは、ライブラリ全体と突き合わせる
+        （meta.json の更新時刻が変わった文書だけ読み直す）。
+        """
+        with self._lock:
+            conn = self._db()
+            with conn:
+                # 別プロセスの update() とカーソルを取り合わないよう最初から書き込みロック
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = _get_state(conn, "journal_seq")
+                reconciled_at = _get_state(conn, "reconciled_at") or 0
+                due = RECONCILE_HOURS > 0 and time.time() - reconciled_at >= RECONCILE_HOURS * 3600
+                if reconcile or cursor is None or due:
+                    seq = self.journal.last_seq()
+                    stats = self._sync(conn)
+                    _set_state(conn, "reconciled_at", time.time())
+                else:
+                    entries = self.journal.read_since(cursor)
+                    seq = entries[-1].seq if entries else cursor
+                    stats = self._sync(conn, {e.doc for e in entries})
+                _set_state(conn, "journal_seq", seq)
+        self.journal.prune(seq, JOURNAL_READER, _READER_STALE_SECONDS)
+        return stats
+
+    def record(self, doc_ids: Iterable[str]) -> IndexStats:
+        """指定した文書だけを読み直す（save_document が書き終えた文書を入れる）"""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                return self._sync(conn, doc_ids)
+
+    def rebuild(self) -> IndexStats:
+        """全文書の meta.json を並行に読んで作り直す
+
+        一時ファイル（catalog.db.build）に組み立ててから catalog.db に写す
+        （library_search.install_build）ので、途中で失敗しても今のカタログは
+        そのまま残る。
+        """
+        with self._lock:
+            build_path = self.db_path.with_name(self.db_path.name + ".build")
+            build_path.unlink(missing_ok=True)
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _connect(build_path)
+            try:
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+                _ensure_schema(conn)
+                seq = self.journal.last_seq()
+                # ここから先のエントリをほかの読み手が消さないよう、先に位置を記録する
+                self.journal.prune(seq, JOURNAL_READER, _READER_STALE_SECONDS)
+                stats = self._sync(conn)
+                _set_state(conn, "journal_seq", seq)
+                _set_state(conn, "reconciled_at", time.time())
+                conn.commit()
+            except BaseException:
+                conn.close()
+                build_path.unlink(missing_ok=True)
+                raise
+            conn.close()
+
+            if self.db_path.exists():
+                # ほかのプロセスが開いているかもしれないので、ファイルは差し替えずに写す
+                install_build(build_path, self._db())
+            else:
+                os.replace(build_path, self.db_path)
+            return stats
+
+    def entries(
+        self,
+        facets: SearchFacets | None = None,
+        sort: str = "created",
+        limit: int | None = None,
+    ) -> list[CatalogEntry]:
+        """文書の一覧（facets で絞り込み、SORTS の順に最大 limit 件）"""
+        where, params = self._where(facets)
+        with self._lock:
+            rows = self._db().execute(
+                f"""
+                SELECT d.id, COALESCE(d.created_at, ''), COALESCE(d.title, ''), d.source_count,
+                       COALESCE(d.ocr_model, ''), d.ocr_seconds,
+                       CASE WHEN d.modernize_enabled THEN d.modernize_model ELSE '' END,
+                       (SELECT json_group_array(tag) FROM
+                          (SELECT tag FROM doc_tags t WHERE t.docno = d.docno ORDER BY t.position))
+                  FROM documents d
+                 {where}
+                 ORDER BY {SORTS[sort]}
+                 LIMIT ?
+                """,
+                [*params, -1 if limit is None else limit],
+            ).fetchall()
+        return [
+            CatalogEntry(
+                doc_id, self.library_root / doc_id, created_at, title, pages,
+                ocr_model, ocr_seconds, modernize_model, json.loads(tags),
+            )  # fmt: skip
+            for doc_id, created_at, title, pages, ocr_model, ocr_seconds, modernize_model, tags in rows
+        ]
+
+    def export(
+        self,
+        facets: SearchFacets | None = None,
+        sort: str = "created",
+        limit: int | None = None,
+    ) -> Iterator[dict]:
+        """文書の meta.json をカタログから組み立て直して、SORTS の順に返す
+
+        meta.json を開かずに済む。id はフォルダ名で埋める。
+        """
+        where, params = self._where(facets)
+        columns = ", ".join(f"d.{c}" for c in _COLUMNS)
+        with self._lock:
+            conn = self._db()
+            rows = conn.execute(
+                f"""
+                SELECT d.docno, {columns}, p.text
+                  FROM documents d LEFT JOIN prompts p ON p.id = d.ocr_prompt
+                 {where}
+                 ORDER BY {SORTS[sort]}
+                 LIMIT ?
+                """,
+                [*params, -1 if limit is None else limit],
+            ).fetchall()
+        for i in range(0, len(rows), INDEX_BATCH_SIZE):
+            batch = rows[i : i + INDEX_BATCH_SIZE]
+            with self._lock:
+                children = _load_children(self._db(), [row[0] for row in batch])
+            for row in batch:
+                values = dict(zip(_COLUMNS, row[1:-1]))
+                values["ocr_prompt"] = row[-1]
+                yield _join_meta(values, children.get(row[0], {}))
+
+    def summary(self, facets: SearchFacets | None = None) -> CatalogSummary:
+        """文書数・ページ数・OCR の時間などの集計（facets で絞り込み）"""
+        where, params = self._where(facets)
+        and_timed = f"{where} AND {_TIMED}" if where else f"WHERE {_TIMED}"
+        with self._lock:
+            conn = self._db()
+            (
+                documents, pages, ocr_seconds, timed_seconds, timed_pages,
+                preprocess_seconds, modernized, first_created, last_created,
+            ) = conn.execute(
+                f"""
+                SELECT COUNT(*), COALESCE(SUM(d.source_count), 0), COALESCE(SUM(d.ocr_seconds), 0),
+                       COALESCE(SUM(CASE WHEN {_TIMED} THEN d.ocr_seconds END), 0),
+                       COALESCE(SUM(CASE WHEN {_TIMED} THEN d.source_count END), 0),
+                       COALESCE(SUM(d.preprocess_seconds), 0),
+                       COALESCE(SUM(d.modernize_enabled = 1), 0),
+                       MIN(d.created_at), MAX(d.created_at)
+                  FROM documents d
+                 {where}
+                """,
+                params,
+            ).fetchone()  # fmt: skip
+            (timed,) = conn.execute(
+                f"SELECT COUNT(*) FROM documents d {and_timed}", params
+            ).fetchone()
+            median = None
+            if timed:
+                median = _median(
+                    [
+                        value
+                        for (value,) in conn.execute(
+                            f"""
+                            SELECT d.ocr_seconds / d.source_count FROM documents d
+                             {and_timed}
+                             ORDER BY 1 LIMIT ? OFFSET ?
+                            """,
+                            [*params, 2 - timed % 2, (timed - 1) // 2],
+                        )
+                    ]
+                )
+            models = [
+                ModelSummary(model, n, n_pages, seconds, t_sec / t_pages if t_pages else None)
+                for model, n, n_pages, seconds, t_sec, t_pages in conn.execute(
+                    f"""
+                    SELECT COALESCE(d.ocr_model, ''), COUNT(*), COALESCE(SUM(d.source_count), 0),
+                           COALESCE(SUM(d.ocr_seconds), 0),
+                           COALESCE(SUM(CASE WHEN {_TIMED} THEN d.ocr_seconds END), 0),
+                           COALESCE(SUM(CASE WHEN {_TIMED} THEN d.source_count END), 0)
+                      FROM documents d
+                     {where}
+                     GROUP BY 1
+                     ORDER BY 2 DESC, 1
+                    """,
+                    params,
+                )
+            ]
+        return CatalogSummary(
+            documents=documents,
+            pages=pages,
+            ocr_seconds=ocr_seconds,
+            seconds_per_page=timed_seconds / timed_pages if timed_pages else None,
+            median_seconds_per_page=median,
+            preprocess_seconds=preprocess_seconds,
+            modernized=modernized,
+            first_created=first_created,
+            last_created=last_created,
+            models=models,
+        )
+
+    def count(self) -> int:
+        """カタログにある文書の数"""
+        with self._lock:
+            return self._db().execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    # ---------- private ----------
+
+    def _where(self, facets: SearchFacets | None) -> tuple[str, list]:
+        """絞り込みの WHERE 句（無ければ空文字）とパラメータ"""
+        filtered = facet_filter(facets) if facets is not None else None
+        if filtered is None:
+            return "", []
+        return f"WHERE {filtered[0]}", filtered[1]
+
+    def _sync(self, conn: sqlite3.Connection, doc_ids: Iterable[str] | None = None) -> IndexStats:
+        """ライブラリの meta.json にカタログを合わせる（_lock と書き込みのトランザクションの中で）
+
+        doc_ids を渡せばその文書だけ、None ならライブラリ全体を見る。
+        """
+        # {id: (docno, 読んだときの meta.json の更新時刻)}
+        if doc_ids is None:
+            stats = IndexStats(reconciled=True)
+            found = _scan_metas(self.library_root)
+            existing = {
+                doc_id: (docno, mtime_ns)
+                for doc_id, docno, mtime_ns in conn.execute(
+                    "SELECT id, docno, mtime_ns FROM documents"
+                )
+            }
+        else:
+            stats = IndexStats()
+            doc_ids = set(doc_ids)
+            found = _stat_metas(self.library_root, doc_ids)
+            existing = {}
+            for doc_id in doc_ids:
+                row = conn.execute(
+                    "SELECT docno, mtime_ns FROM documents WHERE id = ?", (doc_id,)
+                ).fetchone()
+                if row is not None:
+                    existing[doc_id] = row
+
+        removed = existing.keys() - found.keys()
+        if removed:
+            _delete_children(conn, [existing[doc_id][0] for doc_id in removed])
+            conn.executemany("DELETE FROM documents WHERE id = ?", ((d,) for d in removed))
+            stats.removed = len(removed)
+
+        changed = sorted(
+            doc_id
+            for doc_id, mtime_ns in found.items()
+            if doc_id not in existing or existing[doc_id][1] != mtime_ns
+        )
+        prompts: dict[str, int] = {}
+        with ThreadPoolExecutor(self._workers, thread_name_prefix="catalog") as pool:
+            for i in range(0, len(changed), INDEX_BATCH_SIZE):
+                batch = changed[i : i + INDEX_BATCH_SIZE]
+                paths = [self.library_root / doc_id / "meta.json" for doc_id in batch]
+                for doc_id, row in zip(batch, pool.map(_read_row, paths)):
+                    if row is None:
+                        stats.skipped += 1
+                        continue
+                    row.columns["mtime_ns"] = found[doc_id]
+                    docno = existing[doc_id][0] if doc_id in existing else None
+                    if docno is None:
+                        stats.added += 1
+                    else:
+                        _delete_children(conn, [docno])
+                        stats.updated += 1
+                    _write_row(conn, docno, row, prompts)
+        if stats.removed or stats.updated:
+            conn.execute(
+                "DELETE FROM prompts WHERE id NOT IN"
+                " (SELECT ocr_prompt FROM documents WHERE ocr_prompt IS NOT NULL)"
+            )
+        return stats
+
+    def _db(self) -> sqlite3.Connection:
+        """catalog.db への接続（_lock を持って使う）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = _connect(self.db_path)
+            conn.execute("PRAGMA journal_mode = WAL")
+            if _get_version(conn) not in (None, SCHEMA_VERSION):
+                # 表の形が変わった: 作り直して、次の update() で全体と突き合わせる
+                with conn:
+                    for (name,) in conn.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'table'"
+                    ).fetchall():
+                        conn.execute(f"DROP TABLE IF EXISTS {name}")
+            _ensure_schema(conn)
+            self._conn = conn
+        return self._conn
+
+
+# ---------- 公開関数 ----------
+
+
+def record_document(library_root: Path, doc_id: str) -> None:
+    """書き終えた文書1件をカタログに入れる（save_document から呼ぶ）
+
+    カタログに書けなくても文書の保存は失敗にしない（変更ジャーナルに載って
+    いるので、次の update() で入る）。
+    """
+    try:
+        with LibraryCatalog(library_root, workers=1) as catalog:
+            catalog.record([doc_id])
+    except sqlite3.Error:
+        pass
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    return sqlite3.connect(path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False)
+
+
+def _ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS documents (
+            docno                   INTEGER PRIMARY KEY,
+            id                      TEXT NOT NULL UNIQUE,  -- 文書フォルダ名
+            mtime_ns                INTEGER NOT NULL,      -- 読んだときの meta.json の更新時刻
+            schema_version          INTEGER,
+            created_at              TEXT,
+            title                   TEXT,
+            note                    TEXT,
+            source_count            INTEGER NOT NULL DEFAULT 0,
+            ocr_model               TEXT,                  -- NULL なら ocr セクションなし
+            ocr_prompt              INTEGER REFERENCES prompts (id),
+            ocr_seconds             REAL,
+            old_kanji               INTEGER,               -- NULL なら normalization セクションなし
+            historical_kana         INTEGER,
+            ocr_misread_correction  INTEGER,
+            modernize_enabled       INTEGER,               -- NULL なら modernize セクションなし
+            modernize_model         TEXT,
+            preprocess_enabled      INTEGER,               -- NULL なら preprocess セクションなし
+            preprocess_seconds      REAL,
+            extra                   TEXT                   -- 列にしなかった項目（JSON）
+        );
+        CREATE INDEX IF NOT EXISTS documents_created_at ON documents (created_at);
+        CREATE INDEX IF NOT EXISTS documents_ocr_model ON documents (ocr_model);
+        CREATE INDEX IF NOT EXISTS documents_modernize_model ON documents (modernize_model);
+        CREATE TABLE IF NOT EXISTS doc_files (
+            docno     INTEGER NOT NULL,
+            kind      TEXT NOT NULL,      -- 'source'・'preprocessed'
+            position  INTEGER NOT NULL,
+            name      TEXT NOT NULL,
+            PRIMARY KEY (docno, kind, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS doc_tags (
+            tag       TEXT NOT NULL,
+            docno     INTEGER NOT NULL,
+            position  INTEGER NOT NULL,
+            PRIMARY KEY (tag, docno)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS doc_tags_docno ON doc_tags (docno);
+        CREATE TABLE IF NOT EXISTS preprocess_steps (
+            docno     INTEGER NOT NULL,
+            position  INTEGER NOT NULL,
+            step      TEXT NOT NULL,
+            PRIMARY KEY (docno, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS near_duplicates (
+            docno       INTEGER NOT NULL,
+            position    INTEGER NOT NULL,
+            other       TEXT NOT NULL,
+            similarity  REAL NOT NULL,
+            page        INTEGER,
+            own_page    INTEGER,
+            PRIMARY KEY (docno, position)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS prompts (
+            id    INTEGER PRIMARY KEY,
+            text  TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS catalog_state (
+            key    TEXT PRIMARY KEY,
+            value
+        ) WITHOUT ROWID;
+        """
+    )
+    if _get_version(conn) is None:
+        _set_state(conn, "schema_version", SCHEMA_VERSION)
+        conn.commit()
+
+
+def _get_version(conn: sqlite3.Connection) -> int | None:
+    try:
+        return _get_state(conn, "schema_version")
+    except sqlite3.OperationalError:
+        return None  # まだ表が無い
+
+
+def _get_state(conn: sqlite3.Connection, key: str):
+    row = conn.execute("SELECT value FROM catalog_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(conn: sqlite3.Connection, key: str, value) -> None:
+    conn.execute("INSERT OR REPLACE INTO catalog_state (key, value) VALUES (?, ?)", (key, value))
+
+
+def _scan_metas(library_root: Path) -> dict[str, int]:
+    """ライブラリの文書の {id: meta.json の更新時刻 ns}（'.' で始まるフォルダは除く）"""
+    found: dict[str, int] = {}
+    try:
+        entries = os.scandir(library_root)
+    except FileNotFoundError:
+        return found
+    with entries:
+        for entry in entries:
+            if entry.name.startswith(".") or not entry.is_dir():
+                continue
+            try:
+                st = os.stat(os.path.join(entry.path, "meta.json"))
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                found[entry.name] = st.st_mtime_ns
+    return found
+
+
+def _stat_metas(library_root: Path, doc_ids: Iterable[str]) -> dict[str, int]:
+    """指定した文書だけを _scan_metas() と同じ形で返す（無いものは含めない）"""
+    found: dict[str, int] = {}
+    for doc_id in doc_ids:
+        # ジャーナルの中身は信用しすぎない（パス区切りや隠しフォルダは文書ではない）
+        if not doc_id or doc_id.startswith(".") or os.sep in doc_id or "/" in doc_id:
+            continue
+        try:
+            st = os.stat(library_root / doc_id / "meta.json")
+        except OSError:
+            continue
+        if stat.S_ISREG(st.st_mode):
+            found[doc_id] = st.st_mtime_ns
+    return found
+
+
+def _read_row(path: Path) -> _CatalogRow | None:
+    """meta.json を読んで表に分ける（読めない・JSON の object でなければ None）"""
+    try:
+        meta = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(meta, dict):
+        return None
+    return _split_meta(path.parent.name, meta)
+
+
+def _is_type(value, kind: type) -> bool:
+    """JSON の値が kind か（bool は int・float に数えず、float には int も含める）"""
+    if kind is bool:
+        return isinstance(value, bool)
+    if isinstance(value, bool):
+        return False
+    if kind is float:
+        return isinstance(value, (int, float))
+    if kind is list:
+        return isinstance(value, list) and all(isinstance(v, str) for v in value)
+    return isinstance(value, kind)
+
+
+def _pop_section(rest: dict, key: str) -> dict | None:
+    """rest からセクションを取り出す（項目がそろっていなければ残して None）"""
+    fields = _SECTIONS[key]
+    value = rest.get(key)
+    if not (
+        isinstance(value, dict)
+        and value.keys() == fields.keys()
+        and all(_is_type(value[k], kind) for k, kind in fields.items())
+    ):
+        return None
+    return rest.pop(key)
+
+
+def _pop_value(rest: dict, key: str, kind: type):
+    """rest から key を取り出す（無い・型が違えば残して None）"""
+    if key in rest and _is_type(rest[key], kind):
+        return rest.pop(key)
+    return None
+
+
+def _split_meta(doc_id: str, meta: dict) -> _CatalogRow:
+    """meta.json を列と一覧に分ける（列にならない項目は extra に残す）"""
+    rest = dict(meta)
+    if rest.get("id") == doc_id:
+        del rest["id"]
+    columns = {
+        "id": doc_id,
+        "schema_version": _pop_value(rest, "schema_version", int),
+        "created_at": _pop_value(rest, "created_at", str),
+        "title": _pop_value(rest, "title", str),
+        "note": _pop_value(rest, "note", str),
+    }
+    sources = _pop_value(rest, "sources", list) or []
+    tags = _pop_value(rest, "tags", list) or []
+    columns["source_count"] = len(sources)
+    files = [("source", i, name) for i, name in enumerate(sources)]
+
+    if (ocr := _pop_section(rest, "ocr")) is not None:
+        columns.update(
+            ocr_model=ocr["model"], ocr_prompt=ocr["prompt"], ocr_seconds=ocr["elapsed_seconds"]
+        )
+    if (norm := _pop_section(rest, "normalization")) is not None:
+        columns.update(norm)
+    if (modernize := _pop_section(rest, "modernize")) is not None:
+        columns.update(modernize_enabled=modernize["enabled"], modernize_model=modernize["model"])
+    steps: list[str] = []
+    preprocessed = rest.get("preprocessed_sources")
+    if _is_type(preprocessed, list) and (preprocess := _pop_section(rest, "preprocess")):
+        # preprocessed_sources は preprocess セクションと一緒に書かれる
+        del rest["preprocessed_sources"]
+        files += [("preprocessed", i, name) for i, name in enumerate(preprocessed)]
+        steps = preprocess["steps"]
+        columns.update(
+            preprocess_enabled=preprocess["enabled"],
+            preprocess_seconds=preprocess["elapsed_seconds"],
+        )
+    duplicates: list[dict] = []
+    near = rest.get("near_duplicates")
+    if isinstance(near, list) and near and all(_is_duplicate(entry) for entry in near):
+        duplicates = rest.pop("near_duplicates")
+    columns["extra"] = json.dumps(rest, ensure_ascii=False) if rest else None
+    return _CatalogRow(columns, files, tags, steps, duplicates)
+
+
+def _is_duplicate(entry) -> bool:
+    return (
+        isinstance(entry, dict)
+        and {"id", "similarity"} <= entry.keys() <= _DUPLICATE_FIELDS.keys()
+        and all(_is_type(v, _DUPLICATE_FIELDS[k]) for k, v in entry.items())
+    )
+
+
+def _join_meta(values: dict, children: dict) -> dict:
+    """_split_meta() の逆（save_document と同じキーの順に組み立てる）"""
+    meta: dict = {}
+    if values["schema_version"] is not None:
+        meta["schema_version"] = values["schema_version"]
+    meta["id"] = values["id"]
+    for key in ("created_at", "title"):
+        if values[key] is not None:
+            meta[key] = values[key]
+    files = children.get("files", {})
+    meta["sources"] = files.get("source", [])
+    if values["ocr_model"] is not None:
+        meta["ocr"] = {
+            "model": values["ocr_model"],
+            "prompt": values["ocr_prompt"],
+            "elapsed_seconds": values["ocr_seconds"],
+        }
+    if values["old_kanji"] is not None:
+        meta["normalization"] = {
+            key: bool(values[key]) for key in _SECTIONS["normalization"]
+        }
+    if values["modernize_enabled"] is not None:
+        meta["modernize"] = {
+            "enabled": bool(values["modernize_enabled"]),
+            "model": values["modernize_model"],
+        }
+    meta["tags"] = children.get("tags", [])
+    if values["note"] is not None:
+        meta["note"] = values["note"]
+    if values["preprocess_enabled"] is not None:
+        meta["preprocessed_sources"] = files.get("preprocessed", [])
+        meta["preprocess"] = {
+            "enabled": bool(values["preprocess_enabled"]),
+            "steps": children.get("steps", []),
+            "elapsed_seconds": values["preprocess_seconds"],
+        }
+    if duplicates := children.get("duplicates"):
+        meta["near_duplicates"] = duplicates
+    if values["extra"] is not None:
+        meta.update(json.loads(values["extra"]))
+    return meta
+
+
+def _write_row(
+    conn: sqlite3.Connection, docno: int | None, row: _CatalogRow, prompts: dict[str, int]
+) -> None:
+    """1文書の行を書く（docno が None なら新しく振る。prompts はプロンプト → id のキャッシュ）"""
+    columns = dict(row.columns)
+    if (prompt := columns.get("ocr_prompt")) is not None:
+        if prompt not in prompts:
+            conn.execute("INSERT OR IGNORE INTO prompts (text) VALUES (?)", (prompt,))
+            (prompts[prompt],) = conn.execute(
+                "SELECT id FROM prompts WHERE text = ?", (prompt,)
+            ).fetchone()
+        columns["ocr_prompt"] = prompts[prompt]
+    names = ["docno", *columns]
+    cur = conn.execute(
+        f"INSERT OR REPLACE INTO documents ({', '.join(names)})"
+        f" VALUES ({', '.join('?' * len(names))})",
+        [docno, *columns.values()],
+    )
+    docno = cur.lastrowid if docno is None else docno
+    conn.executemany(
+        "INSERT INTO doc_files (docno, kind, position, name) VALUES (?, ?, ?, ?)",
+        ((docno, kind, position, name) for kind, position, name in row.files),
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO doc_tags (tag, docno, position) VALUES (?, ?, ?)",
+        ((tag, docno, i) for i, tag in enumerate(row.tags)),
+    )
+    conn.executemany(
+        "INSERT INTO preprocess_steps (docno, position, step) VALUES (?, ?, ?)",
+        ((docno, i, step) for i, step in enumerate(row.steps)),
+    )
+    conn.executemany(
+        """
+        INSERT INTO near_duplicates (docno, position, other, similarity, page, own_page)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            (docno, i, d["id"], d["similarity"], d.get("page"), d.get("own_page"))
+            for i, d in enumerate(row.duplicates)
+        ),
+    )
+
+
+def _delete_children(conn: sqlite3.Connection, docnos: list[int]) -> None:
+    for table in ("doc_files", "doc_tags", "preprocess_steps", "near_duplicates"):
+        conn.executemany(f"DELETE FROM {table} WHERE docno = ?", ((docno,) for docno in docnos))
+
+
+def _load_children(conn: sqlite3.Connection, docnos: list[int]) -> dict[int, dict]:
+    """文書ごとのファイル名・タグ・前処理・近似重複の一覧（docno → 種類 → 一覧）"""
+    children: dict[int, dict] = {}
+    marks = ", ".join("?" * len(docnos))
+    for docno, kind, name in conn.execute(
+        f"SELECT docno, kind, name FROM doc_files WHERE docno IN ({marks})"
+        " ORDER BY docno, kind, position",
+        docnos,
+    ):
+        children.setdefault(docno, {}).setdefault("files", {}).setdefault(kind, []).append(name)
+    for docno, tag in conn.execute(
+        f"SELECT docno, tag FROM doc_tags WHERE docno IN ({marks}) ORDER BY docno, position",
+        docnos,
+    ):
+        children.setdefault(docno, {}).setdefault("tags", []).append(tag)
+    for docno, step in conn.execute(
+        f"SELECT docno, step FROM preprocess_steps WHERE docno IN ({marks})"
+        " ORDER BY docno, position",
+        docnos,
+    ):
+        children.setdefault(docno, {}).setdefault("steps", []).append(step)
+    for docno, other, similarity, page, own_page in conn.execute(
+        f"SELECT docno, other, similarity, page, own_page FROM near_duplicates"
+        f" WHERE docno IN ({marks}) ORDER BY docno, position",
+        docnos,
+    ):
+        entry = {"id": other, "similarity": similarity}
+        if page is not None:
+            entry["page"] = page
+        if own_page is not None:
+            entry["own_page"] = own_page
+        children.setdefault(docno, {}).setdefault("duplicates", []).append(entry)
+    return children
+
+
+def _median(values: list[float]) -> float:
+    """真ん中の1つか2つの値（summary() で並べて取り出したもの）の中央値"""
+    return sum(values) / len(values)
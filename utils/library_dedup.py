@@ -0,0 +1,88 @@
+"""
+近似重複の検出モジュール（prewar dedup・保存時の重複の知らせ）
+
+同じページを別の日に撮り直して OCR すると、ほぼ同じ本文の記録がライブラリに
+いくつもでき、検索結果に同じ内容が並ぶ。検索インデックス（search.db）は文書・
+ページごとの MinHash 署名と LSH のバケットを持っている（utils/minhash.py・
+LibraryIndex.near_duplicates()）ので、ここではそれを使って
+  - 保存しようとしている本文に近い索引済みの文書を引き（find_near_duplicates）、
+  - ライブラリ全体の近似重複の組をつないでまとまり（クラスタ）にする
+    （cluster_duplicates）。
+保存時の照合は索引にある文書とだけ比べる（変更ジャーナルにあってまだ索引に
+入っていない文書とは比べない）。
+
+使い方:
+    from pathlib import Path
+    from utils.library_dedup import cluster_duplicates
+    from utils.library_search import LibraryIndex
+
+    with LibraryIndex(Path("library")) as idx:
+        idx.update()
+        for cluster in cluster_duplicates(idx):
+            print(cluster.ids)
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.library_search import (
+    DuplicateLink,
+    DuplicateMatch,
+    LibraryIndex,
+    read_near_duplicates,
+)
+from utils.minhash import THRESHOLD
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class DuplicateCluster:
+    """近似重複でつながった文書のまとまり"""
+
+    ids: list[str]  # 作成日の古い順
+    links: list[DuplicateLink] = field(default_factory=list)
+
+
+# ---------- 公開関数 ----------
+
+
+def find_near_duplicates(
+    library_root: Path, text: str, pages: int = 1, threshold: float = THRESHOLD
+) -> list[DuplicateMatch]:
+    """本文 text に近い索引済みの文書（検索インデックスが無い・読めなければ空）
+
+    save_document から呼ぶので、索引は読み取り専用で開き、移行（版上げ）が
+    済んでいない・ロック中の索引とは照らさない（次の index で移行する）。
+    """
+    return read_near_duplicates(library_root, text, pages=pages, threshold=threshold)
+
+
+def cluster_duplicates(index: LibraryIndex, threshold: float = THRESHOLD) -> list[DuplicateCluster]:
+    """索引済みの文書の近似重複の組をつないだまとまりを、大きい順に返す"""
+    links = index.duplicate_links(threshold)
+    parent: dict[str, str] = {}
+
+    def find(doc_id: str) -> str:
+        root = parent.setdefault(doc_id, doc_id)
+        while root != parent[root]:
+            root = parent[root]
+        while parent[doc_id] != root:
+            parent[doc_id], doc_id = root, parent[doc_id]
+        return root
+
+    for link in links:
+        parent[find(link.a)] = find(link.b)
+
+    groups: dict[str, DuplicateCluster] = {}
+    for doc_id in parent:
+        groups.setdefault(find(doc_id), DuplicateCluster([])).ids.append(doc_id)
+    for link in links:
+        groups[find(link.a)].links.append(link)
+
+    info = index.document_info(parent)
+    clusters = list(groups.values())
+    for cluster in clusters:
+        cluster.ids.sort(key=lambda doc_id: (info[doc_id][2] if doc_id in info else "", doc_id))
+    clusters.sort(key=lambda c: (-len(c.ids), c.ids[0]))
+    return clusters
@@ -0,0 +1,263 @@
+"""
+OCR誤読を見込んだあいまい検索モジュール（prewar search --fuzzy）
+
+GLM-OCR は字形の似た字を読み違える（「郎」を「郧」「郘」「郯」など）。
+OCR_MISREAD_CORRECTIONS にある誤読は口語体変換の前に直るが、まだ登録していない
+誤読は modern.txt にも残り、その文書は正しい字の検索語では見つからない。
+
+あいまい検索では、検索語の字を誤読で入れ替わりうる字（混同表）に置き換えた
+綴りを作り、元の語との OR で検索インデックス（trigram の search・短い語の grams）
+を1回だけ引く。見つかった候補は、実際に一致した綴りの置換コストの合計
+（重みつきの編集距離。正しい綴りで一致した語は 0）の小さい順、同じなら全文
+検索の順位で並べ直す。
+
+混同表（ConfusionTable）:
+  - OCR_MISREAD_CORRECTIONS の組（誤読字 ↔ 正しい字）。コスト DICT_COST
+  - prewar analyze chars --save-confusions で保存した、文字統計から推定した
+    誤読候補と修正先の組（library/.index/confusions.json）。コスト LEARNED_COST
+  どちらも向きを問わず（検索語に誤読字が入っていても）使う。
+
+1語の綴りは置換 MAX_EDITS 字まで・コストの小さい順に MAX_VARIANTS 個までに
+抑える（ヒープでコストの小さい綴りから作り、上限で止める）。綴りは語ごとに
+最近使った SPELLING_CACHE_SIZE 語ぶんキャッシュする。混同表はファイルの更新時刻が変わるまで使い回す。
+
+使い方:
+    from pathlib import Path
+    from utils.library_fuzzy import fuzzy_search
+    from utils.library_search import LibraryIndex
+
+    with LibraryIndex(Path("library")) as idx:
+        for h in fuzzy_search(idx, "太郎 日記"):
+            print(h.id, h.cost, h.spellings, h.snippet)
+"""
+
+import heapq
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.char_stats import MisreadCandidate
+from utils.config import CONFIG
+from utils.library_journal import INDEX_DIR_NAME
+from utils.library_search import LibraryIndex, SearchFacets
+from utils.text_normalizer import OCR_MISREAD_CORRECTIONS
+
+# ---------- 定数 ----------
+
+MAX_EDITS = CONFIG.get("fuzzy.max_edits")  # 1語で置き換える字数の上限
+MAX_VARIANTS = CONFIG.get("fuzzy.max_variants")  # 1語あたりの綴りの上限（元の語を除く）
+DICT_COST = CONFIG.get("fuzzy.dict_cost")  # OCR_MISREAD_CORRECTIONS の組の置換コスト
+LEARNED_COST = CONFIG.get("fuzzy.learned_cost")  # 文字統計から推定した組の置換コスト
+CANDIDATES = CONFIG.get("fuzzy.candidates")  # 並べ直す候補の文書数（limit より少なければ limit）
+SPELLING_CACHE_SIZE = 1024  # 綴りをキャッシュしておく語数（LRU）
+
+CONFUSIONS_NAME = "confusions.json"
+# 文字統計の誤読候補のうち、混同表に入れるもの（稀少なだけの字は正しい字のことが多い）
+_LEARN_FLAGS = {"非JIS", "拡張ブロック"}
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class FuzzyHit:
+    """あいまい検索の結果1件"""
+
+    id: str
+    dir: Path
+    title: str
+    snippet: str
+    created_at: str
+    score: float  # 全文検索の関連度（bm25。小さいほど上位）
+    cost: float  # 一致した綴りの置換コストの合計（全部の語が元の綴りで一致すれば 0）
+    spellings: list[str] = field(default_factory=list)  # 元の綴りの代わりに一致した綴り
+
+
+@dataclass
+class ConfusionTable:
+    """字 → 誤読で入れ替わりうる字と置換コスト"""
+
+    costs: dict[str, dict[str, float]] = field(default_factory=dict)
+    max_edits: int = MAX_EDITS
+    limit: int = MAX_VARIANTS
+    _cache: OrderedDict[str, list[tuple[str, float]]] = field(default_factory=OrderedDict, repr=False)
+    _cache_lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, a: str, b: str, cost: float) -> None:
+        """a ↔ b を（両向きに）登録する。既にあれば安いほうのコスト"""
+        if a == b or len(a) != 1 or len(b) != 1:
+            return
+        for x, y in ((a, b), (b, a)):
+            alts = self.costs.setdefault(x, {})
+            alts[y] = min(cost, alts.get(y, cost))
+        with self._cache_lock:
+            self._cache.clear()
+
+    def spellings(self, term: str) -> list[tuple[str, float]]:
+        """term の字を置き換えた綴りと置換コストの合計（コストの小さい順。term 自身は含まない）"""
+        with self._cache_lock:
+            found = self._cache.get(term)
+            if found is not None:
+                self._cache.move_to_end(term)
+                return found
+        found = self._best_spellings(term)
+        with self._cache_lock:
+            self._cache[term] = found
+            while len(self._cache) > SPELLING_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return found
+
+    def _best_spellings(self, term: str) -> list[tuple[str, float]]:
+        """コストの小さい綴りから limit 個を作る（全部の組み合わせは作らない）
+
+        状態は置き換えうる字ごとの選択（0 = 元の字、j = コスト j 番目の字）。
+        状態からは、0 でない一番後ろの位置以降の1か所を次の字に進めた状態へ
+        進む（どの状態にも1通りでたどり着き、コストは減らない）。同じコストの
+        綴りは綴りの順に並べたいので、limit 個目と同じコストのものは取り切る。
+        """
+        slots = [
+            (i, sorted(self.costs[char].items(), key=lambda kv: (kv[1], kv[0])))
+            for i, char in enumerate(term)
+            if char in self.costs
+        ]
+
+        def spelling(picks: tuple[int, ...]) -> tuple[str, float]:
+            chars = list(term)
+            cost = 0.0
+            for (i, alts), j in zip(slots, picks):
+                if j:
+                    chars[i], c = alts[j - 1]
+                    cost += c
+            return "".join(chars), cost
+
+        found: list[tuple[str, float]] = []
+        heap: list[tuple[float, str, tuple[int, ...]]] = []
+
+        def push_next(picks: tuple[int, ...]) -> None:
+            last = max((p for p, j in enumerate(picks) if j), default=0)
+            edits = sum(1 for j in picks if j)
+            for p in range(last, len(slots)):
+                if picks[p] == len(slots[p][1]) or (not picks[p] and edits >= self.max_edits):
+                    continue
+                nxt = picks[:p] + (picks[p] + 1,) + picks[p + 1 :]
+                text, cost = spelling(nxt)
+                heapq.heappush(heap, (cost, text, nxt))
+
+        push_next((0,) * len(slots))
+        while heap and (len(found) < self.limit or (found and heap[0][0] <= found[-1][1])):
+            cost, text, picks = heapq.heappop(heap)
+            found.append((text, cost))
+            push_next(picks)
+        found.sort(key=lambda sc: (sc[1], sc[0]))
+        return found[: self.limit]
+
+
+# ---------- 公開関数 ----------
+
+
+def fuzzy_search(
+    index: LibraryIndex,
+    query: str,
+    limit: int = 20,
+    facets: SearchFacets | None = None,
+    table: ConfusionTable | None = None,
+) -> list[FuzzyHit]:
+    """query の各語を誤読しうる綴りにも広げて検索し、置換コストの小さい順に limit 件返す
+
+    検索エラー（LibrarySearchError）はそのまま送出する。table を省くと
+    load_confusions(index.library_root)。
+    """
+    table = table if table is not None else load_confusions(index.library_root)
+    options: dict[str, dict[str, float]] = {}
+
+    def spellings(term: str) -> list[str]:
+        options[term] = {term: 0.0, **dict(table.spellings(term))}
+        return list(options[term])
+
+    hits = index.search(query, limit=max(limit, CANDIDATES), facets=facets, spellings=spellings)
+    ids = [h.id for h in hits]
+    modern = dict(index.document_texts(ids))
+    raw = dict(index.document_texts(ids, source="raw"))
+
+    ranked = []
+    for rank, h in enumerate(hits):
+        text = f"{h.title}\n{modern.get(h.id, '')}\n{raw.get(h.id, '')}"
+        cost = 0.0
+        matched = []
+        for term, costs in options.items():
+            if term in text:
+                continue
+            # 元の綴りが無い（字体違いで原文に一致した語を除く）なら一番安い綴り
+            found = [(c, s) for s, c in costs.items() if c and s in text]
+            if found:
+                c, s = min(found)
+                cost += c
+                matched.append(s)
+        ranked.append(
+            (cost, rank, FuzzyHit(h.id, h.dir, h.title, h.snippet, h.created_at, h.score, cost, matched))
+        )
+    ranked.sort(key=lambda r: r[:2])
+    return [hit for *_, hit in ranked[:limit]]
+
+
+def load_confusions(library_root: Path) -> ConfusionTable:
+    """OCR_MISREAD_CORRECTIONS と保存済みの推定した組から混同表を作る
+
+    library_root ごとに、confusions.json の更新時刻と OCR_MISREAD_CORRECTIONS が
+    変わるまで同じ表（綴りのキャッシュごと）を返す。
+    """
+    path = confusions_path(library_root)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    key = (mtime, tuple(OCR_MISREAD_CORRECTIONS.items()))
+    with _TABLES_LOCK:
+        cached = _TABLES.get(path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+    table = ConfusionTable()
+    for wrong, correct in OCR_MISREAD_CORRECTIONS.items():
+        table.add(wrong, correct, DICT_COST)
+    if mtime is not None:
+        try:
+            pairs = json.loads(path.read_text(encoding="utf-8")).get("pairs", [])
+        except (json.JSONDecodeError, OSError):
+            pairs = []
+        for pair in pairs:
+            table.add(pair["char"], pair["suggestion"], LEARNED_COST)
+    with _TABLES_LOCK:
+        _TABLES[path] = (key, table)
+    return table
+
+
+def save_confusions(library_root: Path, candidates: list[MisreadCandidate]) -> int:
+    """文字統計の誤読候補から、修正先の候補つきで誤読らしいものを混同表に保存する
+
+    非JIS・拡張ブロックの字か、既知の誤読字に近い字だけを入れる。保存した組の数を返す。
+    """
+    pairs = [
+        {"char": c.char, "suggestion": c.suggestion, "count": c.count}
+        for c in candidates
+        if c.suggestion and (c.near_known or _LEARN_FLAGS & set(c.flags))
+    ]
+    path = confusions_path(library_root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps({"pairs": pairs}, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+    return len(pairs)
+
+
+def confusions_path(library_root: Path) -> Path:
+    return library_root / INDEX_DIR_NAME / CONFUSIONS_NAME
+
+
+# ---------- 内部ヘルパー ----------
+
+_TABLES: dict[Path, tuple[tuple, ConfusionTable]] = {}
+_TABLES_LOCK = threading.Lock()
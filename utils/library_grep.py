@@ -0,0 +1,312 @@
+"""
+ライブラリの正規表現検索モジュール（prewar grep）
+
+FTS5 は正規表現を引けないので、「第[一二三四五六七八九十]+師団」「昭和\\d+年」の
+ような検索は本文を1件ずつ照合するしかない。全文書を読むと大きなライブラリでは
+数分かかるので、次の2段で行う。
+
+  1. 正規表現を解析し、一致する文字列が必ず含む文字列（必須リテラル）を
+     取り出す（例: 「第」「師団」、「昭和」「年」）。これを検索インデックスで
+     引いて候補文書を絞る（3文字以上は trigram の search、短い語は grams）
+  2. 候補の modern.txt（--raw なら ocr_raw.txt も）を実際の正規表現で照合する。
+     候補が多いときはプロセスプールで並列に照合する（re は GIL を手放さない
+     のでスレッドでは速くならない）
+
+一致は KWIC（前後の文脈つき）で、文書 ID 順に照合したそばから返す。
+
+使い方:
+    from pathlib import Path
+    from utils.library_grep import grep
+    from utils.library_search import LibraryIndex
+
+    with LibraryIndex(Path("library")) as idx:
+        for m in grep(idx, r"昭和\\d+年"):
+            print(m.id, m.line, m.left, m.match, m.right)
+
+必須リテラルが1つも取れない正規表現（「.+」や「[ぁ-ん]+」だけのもの）は
+絞り込めないので全文書を照合する。
+"""
+
+import multiprocessing
+import os
+import re
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from itertools import chain
+from pathlib import Path
+
+from utils.config import CONFIG
+from utils.library_search import LibraryIndex, LibrarySearchError
+
+# ---------- 定数 ----------
+
+GREP_WORKERS = CONFIG.get("grep.workers")  # 照合のプロセス数（0 で CPU 数）
+GREP_CONTEXT = CONFIG.get("grep.context")  # KWIC の前後の文字数
+PARALLEL_MIN_DOCS = CONFIG.get("grep.parallel_min_docs")  # 候補がこれ以上ならプロセスプールで照合
+
+MAX_CLASS_CHARS = 16  # 文字クラスの文字をこの数まで OR の候補として絞り込みに使う
+SOURCES = {"modern": "modern.txt", "raw": "ocr_raw.txt"}
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class GrepMatch:
+    """正規表現の一致1件（KWIC の1行）"""
+
+    id: str
+    dir: Path
+    source: str  # "modern"（modern.txt）か "raw"（ocr_raw.txt）
+    line: int  # 一致の先頭の行番号（1始まり）
+    start: int  # 本文中の一致の位置（文字）
+    end: int
+    left: str  # 一致の前 context 文字（改行は空白に）
+    match: str
+    right: str  # 一致の後 context 文字
+
+
+@dataclass
+class GrepStats:
+    """照合の集計（grep() が進むにつれて埋まる）"""
+
+    literals: list[list[str]] = field(default_factory=list)  # 絞り込みに使った必須リテラル
+    documents: int = 0  # 索引済みの全文書数
+    candidates: int = 0  # 絞り込んだ候補文書数（照合した文書数）
+    matched_docs: int = 0  # 一致のあった文書数
+    matches: int = 0
+
+
+# ---------- 公開関数 ----------
+
+
+def grep(
+    index: LibraryIndex,
+    pattern: str,
+    raw: bool = False,
+    ignore_case: bool = False,
+    context: int = GREP_CONTEXT,
+    limit: int | None = None,
+    stats: GrepStats | None = None,
+) -> Iterator[GrepMatch]:
+    """pattern に一致する箇所を文書 ID 順に返す（limit 件で打ち切る）
+
+    正規表現として不正なら LibrarySearchError。stats を渡すと集計を入れる。
+    """
+    flags = re.IGNORECASE if ignore_case else 0
+    try:
+        re.compile(pattern, flags)
+    except re.error as e:
+        raise LibrarySearchError(f"正規表現が不正です: {e}") from None
+    stats = stats if stats is not None else GrepStats()
+    stats.literals = literal_groups(pattern, flags)
+    stats.documents = len(index.documents())
+    candidates = index.literal_candidates(stats.literals, raw=raw)
+    stats.candidates = len(candidates)
+
+    sources = ("modern", "raw") if raw else ("modern",)
+    match_doc = partial(_grep_document, pattern=pattern, flags=flags, sources=sources, context=context)
+    if len(candidates) < PARALLEL_MIN_DOCS:
+        yield from _limited(map(match_doc, candidates), stats, limit)
+        return
+    workers = GREP_WORKERS or os.cpu_count() or 1
+    # fork はスレッドを持つ親（検索の接続プールなど）から安全に使えないので spawn
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        chunksize = max(1, min(64, len(candidates) // (workers * 8)))
+        results = pool.map(match_doc, candidates, chunksize=chunksize)
+        try:
+            yield from _limited(results, stats, limit)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def literal_groups(pattern: str, flags: int = 0) -> list[list[str]]:
+    """pattern に一致する文字列が必ず含む文字列の条件
+
+    [[a, b], [c]] は「a か b のどちらか」かつ「c」を含むという意味。通常文字の
+    並び、1回以上の繰り返し、グループ、全部の選択肢に必須リテラルがある選択
+    （|）、文字を列挙しただけの文字クラス（[一二三] は「一」「二」「三」の OR）
+    から拾う。文字クラス・0回を許す繰り返し・先読み/後読みは、そこで
+    リテラルの並びが切れる。正規表現として不正なら空（= 絞り込まない）。
+    """
+    parsed = _parse(pattern, flags)
+    if parsed is None:
+        return []
+    groups = []
+    for group in _sequence_literals(parsed):
+        group = list(dict.fromkeys(group))
+        if all(group) and group not in groups:
+            groups.append(group)
+    return groups
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _limited(results, stats: GrepStats, limit: int | None) -> Iterator[GrepMatch]:
+    for matches in results:
+        if matches:
+            stats.matched_docs += 1
+        for m in matches:
+            if limit is not None and stats.matches >= limit:
+                return
+            stats.matches += 1
+            yield m
+
+
+@lru_cache(maxsize=8)
+def _compile(pattern: str, flags: int) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+def _grep_document(
+    candidate: tuple[str, Path],
+    pattern: str,
+    flags: int,
+    sources: tuple[str, ...],
+    context: int,
+) -> list[GrepMatch]:
+    """1文書の本文を照合する（プロセスプールから呼ぶので引数は pickle できる値だけ）"""
+    doc_id, doc_dir = candidate
+    regex = _compile(pattern, flags)
+    matches = []
+    for source in sources:
+        try:
+            text = (doc_dir / SOURCES[source]).read_text(encoding="utf-8")
+        except OSError:
+            continue
+        # 空文字への一致（「a*」など）は KWIC にならない
+        spans = [m.span() for m in regex.finditer(text) if m.end() > m.start()]
+        matches += kwic_lines(doc_id, doc_dir, source, text, spans, context)
+    return matches
+
+
+def kwic_lines(
+    doc_id: str,
+    doc_dir: Path,
+    source: str,
+    text: str,
+    spans: list[tuple[int, int]],
+    context: int,
+) -> list[GrepMatch]:
+    """text の spans（(開始, 終了) の昇順）を KWIC の行にする（行番号は改行を数えて出す）"""
+    lines = []
+    line, counted = 1, 0
+    for start, end in spans:
+        line += text.count("\n", counted, start)
+        counted = start
+        lines.append(
+            GrepMatch(
+                id=doc_id,
+                dir=doc_dir,
+                source=source,
+                line=line,
+                start=start,
+                end=end,
+                left=_flat(text[max(0, start - context) : start]),
+                match=_flat(text[start:end]),
+                right=_flat(text[end : end + context]),
+            )
+        )
+    return lines
+
+
+def _flat(text: str) -> str:
+    return text.replace("\r", "").replace("\n", " ")
+
+
+# 文字を消費しない（前後のリテラルの並びを切らない）位置の指定
+_ZERO_WIDTH = {"AT"}
+_REPEATS = {"MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"}
+
+
+def _parse(pattern: str, flags: int) -> list | None:
+    """pattern を re の構文解析器で (op, av) の並びにする
+
+    re._parser は re の内部 API で、版によっては無い。無いときや正規表現として
+    不正なときは None（= 絞り込まない）。op は名前（op.name）で見るので
+    re._constants は使わない。
+    """
+    try:
+        import re._parser as sre_parse
+    except ImportError:
+        return None
+    try:
+        return list(sre_parse.parse(pattern, flags))
+    except re.error:
+        return None
+
+
+def _sequence_literals(items: list) -> list[list[str]]:
+    """正規表現の並び（sre_parse の (op, av) のリスト）の必須リテラルの条件"""
+    groups: list[list[str]] = []
+    run = ""
+    for op, av in items:
+        exact = _exact([(op, av)])
+        if exact is not None:
+            run += exact
+            continue
+        if op.name in _REPEATS and av[0] >= 1 and (body := _exact(list(av[2]))) is not None:
+            # 最初の av[0] 回は前と、最後の av[0] 回は後ろとつながる
+            groups.append([run + body * av[0]])
+            run = body * av[0]
+            continue
+        if run:
+            groups.append([run])
+            run = ""
+        if op.name == "SUBPATTERN":
+            groups += _sequence_literals(list(av[-1]))
+        elif op.name in _REPEATS and av[0] >= 1:
+            groups += _sequence_literals(list(av[2]))
+        elif op.name == "IN" and (chars := _class_chars(av)):
+            groups.append(chars)
+        elif op.name == "BRANCH":
+            groups += _branch_literals(av[1])
+    if run:
+        groups.append([run])
+    return groups
+
+
+def _branch_literals(branches) -> list[list[str]]:
+    """選択（a|b|…）の必須リテラル: 各選択肢から一番長い必須リテラルを1つずつ OR でつなぐ"""
+    alternatives = []
+    for branch in branches:
+        groups = _sequence_literals(list(branch))
+        if not groups:
+            return []  # 必須リテラルの無い選択肢があると何も言えない
+        alternatives.append(max(groups, key=lambda g: min(map(len, g))))
+    return [list(chain.from_iterable(alternatives))]
+
+
+def _class_chars(items) -> list[str]:
+    """文字を列挙しただけの文字クラス（[一二三]）なら、その文字（多すぎれば空）"""
+    if len(items) > MAX_CLASS_CHARS or any(op.name != "LITERAL" for op, _ in items):
+        return []
+    return [chr(av) for _, av in items]
+
+
+def _exact(items: list) -> str | None:
+    """items がちょうど1つの文字列にしか一致しないならその文字列（でなければ None）"""
+    chars = []
+    for op, av in items:
+        if op.name == "LITERAL":
+            chars.append(chr(av))
+        elif op.name in _ZERO_WIDTH:
+            continue
+        elif op.name == "IN" and len(av) == 1 and av[0][0].name == "LITERAL":
+            chars.append(chr(av[0][1]))  # [字] のような1文字だけの文字クラス
+        elif op.name == "SUBPATTERN":
+            inner = _exact(list(av[-1]))
+            if inner is None:
+                return None
+            chars.append(inner)
+        elif op.name in _REPEATS and av[0] == av[1]:
+            inner = _exact(list(av[2]))
+            if inner is None:
+                return None
+            chars.append(inner * av[0])
+        else:
+            return None
+    return "".join(chars)
@@ -0,0 +1,178 @@
+"""
+ハイブリッド検索モジュール（全文検索 + 意味検索）
+
+全文検索（FTS5 の bm25）は言い回しの違う文書を、意味検索（埋め込みの類似度）は
+固有名詞や字面の一致を取りこぼす。両方を同時に引き、1つの順位にまとめる（F2）。
+
+使い方:
+    from pathlib import Path
+    from utils.library_hybrid import hybrid_search
+    from utils.library_search import LibraryIndex
+    from utils.library_vectors import VectorIndex
+
+    with LibraryIndex(Path("library")) as idx, VectorIndex(idx) as vectors:
+        result = hybrid_search(idx, vectors, "地震の被害", limit=20)
+        for h in result.hits:
+            print(h.id, h.score, h.keyword_rank, h.semantic_rank)
+        print(result.keyword_ms, result.semantic_ms, result.skipped)
+
+まとめ方（FUSION）:
+  - rrf: 各検索での順位 r（1始まり）ごとに 重み / (RRF_K + r) を足す
+    （Reciprocal Rank Fusion）。bm25 と類似度の尺度の違いを気にせず混ぜられる。
+  - weighted: 各検索のスコアを上位候補の中で 0〜1 に揃え、重みをかけて足す。
+
+意味検索はスレッドで全文検索と同時に走らせる。BUDGET_MS を過ぎても返らない
+ときや、Ollama に接続できないときは待たずに全文検索の結果だけで返し、
+HybridResult.skipped に理由を残す。
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.config import CONFIG
+from utils.library_search import LibraryIndex, SearchHit
+from utils.library_vectors import SemanticHit, VectorIndex, VectorIndexError
+from utils.ollama_client import OllamaConnectionError, OllamaModelNotFoundError
+
+# ---------- 定数 ----------
+
+FUSION = CONFIG.get("hybrid.fusion")  # "rrf" か "weighted"
+RRF_K = CONFIG.get("hybrid.rrf_k")  # RRF の順位の下駄（大きいほど下位も効く）
+KEYWORD_WEIGHT = CONFIG.get("hybrid.keyword_weight")
+SEMANTIC_WEIGHT = CONFIG.get("hybrid.semantic_weight")
+CANDIDATES = CONFIG.get("hybrid.candidates")  # 各検索から引く候補の文書数（limit より少なければ limit）
+BUDGET_MS = CONFIG.get("hybrid.budget_ms")  # 意味検索を待つ上限（全文検索の開始から）
+
+FUSIONS = ("rrf", "weighted")
+
+# 意味検索を走らせるスレッド（時間切れで見捨てた検索が残っても次の検索を待たせない数）
+_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="hybrid")
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class HybridHit:
+    """ハイブリッド検索の結果1件"""
+
+    id: str
+    dir: Path
+    title: str
+    snippet: str  # 全文検索で当たればその抜粋、意味検索だけなら一番近いパッセージ
+    created_at: str
+    score: float  # まとめた後のスコア（大きいほど上位）
+    keyword_rank: int | None = None  # 全文検索での順位（1始まり。当たらなければ None）
+    keyword_score: float | None = None  # 同: bm25（小さいほど上位）
+    semantic_rank: int | None = None  # 意味検索での順位
+    similarity: float | None = None  # 同: コサイン類似度
+
+
+@dataclass
+class HybridResult:
+    """ハイブリッド検索の結果と、それぞれの検索にかかった時間"""
+
+    hits: list[HybridHit]
+    keyword_ms: float
+    semantic_ms: float | None  # 使わなかった（時間切れ・失敗）ときは None
+    total_ms: float
+    skipped: dict[str, str] = field(default_factory=dict)  # 使わなかった検索 → 理由
+
+
+# ---------- 公開関数 ----------
+
+
+def hybrid_search(
+    index: LibraryIndex,
+    vectors: VectorIndex,
+    query: str,
+    limit: int = 20,
+    fusion: str = FUSION,
+    budget_ms: float = BUDGET_MS,
+) -> HybridResult:
+    """全文検索と意味検索を同時に引いて、fusion でまとめた上位 limit 件を返す
+
+    全文検索のエラー（LibrarySearchError）はそのまま送出する。
+    """
+    if fusion not in FUSIONS:
+        raise ValueError(f"fusion は {' / '.join(FUSIONS)} のいずれか: {fusion}")
+    depth = max(limit, CANDIDATES)
+    start = time.perf_counter()
+    semantic = _EXECUTOR.submit(_timed, vectors.search, query, depth)
+
+    keyword_hits = index.search(query, limit=depth)
+    keyword_ms = (time.perf_counter() - start) * 1000
+
+    skipped = {}
+    semantic_hits: list[SemanticHit] = []
+    semantic_ms = None
+    remaining = max(0.0, budget_ms / 1000 - (time.perf_counter() - start))
+    try:
+        semantic_hits, semantic_ms = semantic.result(timeout=remaining)
+    except FutureTimeoutError:
+        skipped["semantic"] = f"{budget_ms:.0f} ms 以内に返らなかった"
+    except (OllamaConnectionError, OllamaModelNotFoundError, VectorIndexError) as e:
+        skipped["semantic"] = str(e).splitlines()[0]
+
+    hits = fuse(keyword_hits, semantic_hits, limit, fusion)
+    total_ms = (time.perf_counter() - start) * 1000
+    return HybridResult(hits, keyword_ms, semantic_ms, total_ms, skipped)
+
+
+def fuse(
+    keyword_hits: list[SearchHit],
+    semantic_hits: list[SemanticHit],
+    limit: int,
+    fusion: str = FUSION,
+) -> list[HybridHit]:
+    """2つの検索結果（それぞれ上位から順）を1つの順位にまとめる"""
+    if fusion == "rrf":
+        keyword_scores = [KEYWORD_WEIGHT / (RRF_K + r) for r in range(1, len(keyword_hits) + 1)]
+        semantic_scores = [SEMANTIC_WEIGHT / (RRF_K + r) for r in range(1, len(semantic_hits) + 1)]
+    else:
+        # bm25 は小さいほど上位なので符号を反転してから揃える
+        keyword_scores = [KEYWORD_WEIGHT * s for s in _unit_range([-h.score for h in keyword_hits])]
+        semantic_scores = [SEMANTIC_WEIGHT * s for s in _unit_range([h.similarity for h in semantic_hits])]
+
+    fused: dict[str, HybridHit] = {}
+    for rank, (h, score) in enumerate(zip(keyword_hits, keyword_scores), 1):
+        fused[h.id] = HybridHit(
+            h.id, h.dir, h.title, h.snippet, h.created_at, score,
+            keyword_rank=rank, keyword_score=h.score,
+        )
+    for rank, (h, score) in enumerate(zip(semantic_hits, semantic_scores), 1):
+        hit = fused.get(h.id)
+        if hit is None:
+            hit = fused[h.id] = HybridHit(h.id, h.dir, h.title, h.snippet, h.created_at, 0.0)
+        hit.score += score
+        hit.semantic_rank = rank
+        hit.similarity = h.similarity
+
+    # 同点は全文検索の順位、次に意味検索の順位の順
+    ranked = sorted(
+        fused.values(),
+        key=lambda h: (-h.score, h.keyword_rank or len(fused) + 1, h.semantic_rank or len(fused) + 1),
+    )
+    return ranked[:limit]
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _unit_range(values: list[float]) -> list[float]:
+    """最小 0・最大 1 に揃える（全部同じ値なら全部 1）"""
+    if not values:
+        return []
+    low, high = min(values), max(values)
+    if high == low:
+        return [1.0] * len(values)
+    return [(v - low) / (high - low) for v in values]
@@ -0,0 +1,308 @@
+"""
+ライブラリの元画像の知覚ハッシュ索引モジュール（OCR前の重複画像チェック）
+
+範囲スクショの撮り重ねや、もうライブラリにあるページを取り込み直すと、同じ
+画像を GLM-OCR にかけ直して時間を使う。ここではライブラリの各文書の元画像
+（source.png・source_01.png …）の知覚ハッシュ（utils/image_hash.py）を
+library/.index/images.db に持ち、取り込む画像を OCR の前に照らし合わせる。
+
+索引の更新（update）はライブラリを走査して、元画像のファイルの更新時刻・
+サイズが変わったもの・新しいものだけをハッシュし（スレッドで並行）、消えた
+文書・画像の行を消す。照合（find）は全行のハッシュを NumPy の配列に載せて
+違うビット数をまとめて数える（10万枚でも数ミリ秒）。ハッシュの一辺
+（image_hash.hash_size）を変えたら、次の更新で全部ハッシュし直す。
+
+使い方:
+    from pathlib import Path
+    from utils.library_images import check_images
+
+    for check in check_images([Path("input/p001.png")], Path("library")):
+        if check.duplicate_of or check.matches:
+            print(check.path, check.duplicate_of, check.matches[:1])
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.image_hash import (
+    DHASH_MAX_DISTANCE,
+    HASH_SIZE,
+    PHASH_MAX_DISTANCE,
+    ImageHash,
+    ImageHashError,
+    hash_image,
+)
+from utils.library_journal import BUSY_TIMEOUT_SECONDS, INDEX_DIR_NAME
+
+# ---------- 定数 ----------
+
+IMAGES_DB_NAME = "images.db"
+WORKERS = CONFIG.get("image_hash.workers")  # 元画像をハッシュするスレッド数
+WRITE_BATCH = 256  # 何枚ごとにコミットするか
+
+# save_document が書く元画像の名前（前処理後の preprocessed* は含めない）
+_SOURCE_NAME = re.compile(r"source(?:_\d+)?\.(?:png|jpe?g|tiff?|bmp)", re.IGNORECASE)
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class ImageMatch:
+    """取り込む画像と同じページとみなせるライブラリの元画像1枚"""
+
+    doc_id: str
+    name: str  # 文書フォルダの中のファイル名（source_02.png など）
+    dir: Path
+    phash_distance: int
+    dhash_distance: int
+
+
+@dataclass
+class ImageCheck:
+    """取り込む画像1枚の照合結果"""
+
+    path: Path
+    duplicate_of: Path | None = None  # 同じ回に先に取り込む、同じページの画像
+    matches: list[ImageMatch] = field(default_factory=list)  # ライブラリの元画像（近い順）
+
+
+@dataclass
+class ImageIndexStats:
+    """索引の更新1回の集計"""
+
+    added: int = 0
+    removed: int = 0
+    failed: int = 0  # 読めずにハッシュできなかった画像
+
+
+# ---------- メインクラス ----------
+
+
+class ImageHashIndex:
+    """ライブラリの元画像の知覚ハッシュ索引（library/.index/images.db）"""
+
+    def __init__(self, library_root: Path, workers: int = WORKERS):
+        self.library_root = Path(library_root)
+        self._workers = max(1, workers)
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._snapshot: tuple[list[tuple[str, str]], np.ndarray, np.ndarray] | None = None
+
+    def __enter__(self) -> "ImageHashIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def db_path(self) -> Path:
+        return self.library_root / INDEX_DIR_NAME / IMAGES_DB_NAME
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._snapshot = None
+
+    # ---------- public API ----------
+
+    def update(self) -> ImageIndexStats:
+        """ライブラリの元画像に合わせて、変わった・新しい画像だけハッシュし直す"""
+        stats = ImageIndexStats()
+        current = _scan_sources(self.library_root)
+        with self._lock:
+            conn = self._db()
+            stored = {
+                (doc_id, name): (mtime_ns, size)
+                for doc_id, name, mtime_ns, size in conn.execute(
+                    "SELECT doc_id, name, mtime_ns, size FROM images"
+                )
+            }
+            removed = stored.keys() - current.keys()
+            changed = sorted(key for key, st in current.items() if stored.get(key) != st)
+            with conn:
+                conn.executemany("DELETE FROM images WHERE doc_id = ? AND name = ?", removed)
+            stats.removed = len(removed)
+
+            with ThreadPoolExecutor(self._workers, thread_name_prefix="imghash") as pool:
+                for i in range(0, len(changed), WRITE_BATCH):
+                    batch = changed[i : i + WRITE_BATCH]
+                    rows = []
+                    for (doc_id, name), h in zip(batch, pool.map(self._hash_source, batch)):
+                        if h is None:
+                            stats.failed += 1
+                            continue
+                        rows.append((doc_id, name, *current[(doc_id, name)], h.phash, h.dhash))
+                    with conn:
+                        conn.executemany(
+                            """
+                            INSERT OR REPLACE INTO images (doc_id, name, mtime_ns, size, phash, dhash)
+                            VALUES (?, ?, ?, ?, ?, ?)
+                            """,
+                            rows,
+                        )
+                    stats.added += len(rows)
+            if removed or changed:
+                self._snapshot = None
+        return stats
+
+    def find(self, h: ImageHash, limit: int = 5) -> list[ImageMatch]:
+        """h と同じページとみなせる元画像を、pHash の近い順に最大 limit 枚返す"""
+        keys, phashes, dhashes = self._load_snapshot()
+        if not keys:
+            return []
+        p = _distances(phashes, h.phash)
+        d = _distances(dhashes, h.dhash)
+        rows = np.flatnonzero((p <= PHASH_MAX_DISTANCE) & (d <= DHASH_MAX_DISTANCE))
+        rows = rows[np.argsort(p[rows], kind="stable")][:limit]
+        return [
+            ImageMatch(
+                keys[row][0],
+                keys[row][1],
+                self.library_root / keys[row][0],
+                int(p[row]),
+                int(d[row]),
+            )
+            for row in rows
+        ]
+
+    def count(self) -> int:
+        """索引にある元画像の枚数"""
+        with self._lock:
+            return self._db().execute("SELECT count(*) FROM images").fetchone()[0]
+
+    # ---------- private ----------
+
+    def _hash_source(self, key: tuple[str, str]) -> ImageHash | None:
+        try:
+            return hash_image(self.library_root / key[0] / key[1])
+        except ImageHashError:
+            return None
+
+    def _load_snapshot(self) -> tuple[list[tuple[str, str]], np.ndarray, np.ndarray]:
+        with self._lock:
+            if self._snapshot is None:
+                rows = self._db().execute(
+                    "SELECT doc_id, name, phash, dhash FROM images ORDER BY doc_id, name"
+                ).fetchall()
+                keys = [(doc_id, name) for doc_id, name, _, _ in rows]
+                self._snapshot = (
+                    keys,
+                    _hash_matrix(row[2] for row in rows),
+                    _hash_matrix(row[3] for row in rows),
+                )
+            return self._snapshot
+
+    def _db(self) -> sqlite3.Connection:
+        """images.db への接続（_lock を持って使う）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS images (
+                    doc_id    TEXT NOT NULL,
+                    name      TEXT NOT NULL,      -- 文書フォルダの中の元画像のファイル名
+                    mtime_ns  INTEGER NOT NULL,   -- ハッシュしたときのファイルの更新時刻・サイズ
+                    size      INTEGER NOT NULL,
+                    phash     BLOB NOT NULL,
+                    dhash     BLOB NOT NULL,
+                    PRIMARY KEY (doc_id, name)
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS image_state (
+                    key    TEXT PRIMARY KEY,
+                    value
+                ) WITHOUT ROWID;
+                """
+            )
+            row = conn.execute("SELECT value FROM image_state WHERE key = 'hash_size'").fetchone()
+            if row is None or row[0] != HASH_SIZE:
+                with conn:
+                    conn.execute("DELETE FROM images")
+                    conn.execute(
+                        "INSERT OR REPLACE INTO image_state (key, value) VALUES ('hash_size', ?)",
+                        (HASH_SIZE,),
+                    )
+            self._conn = conn
+        return self._conn
+
+
+# ---------- 公開関数 ----------
+
+
+def check_images(paths: Iterable[Path], library_root: Path) -> list[ImageCheck]:
+    """取り込む画像を、同じ回に先に取り込む画像とライブラリの元画像に照らす
+
+    ライブラリの索引は先に差分更新する。同じ回の画像と重なる画像はライブラリとは
+    照らさない（先の画像の結果を見ればよい）。読めない画像は照らさずに返す
+    （OCR の段階でエラーを出す）。
+    """
+    checks = []
+    seen: list[tuple[Path, ImageHash]] = []
+    with ImageHashIndex(library_root) as index:
+        index.update()
+        for path in paths:
+            check = ImageCheck(Path(path))
+            checks.append(check)
+            try:
+                h = hash_image(check.path)
+            except ImageHashError:
+                continue
+            check.duplicate_of = next((p for p, other in seen if h.matches(other)), None)
+            if check.duplicate_of is None:
+                seen.append((check.path, h))
+                check.matches = index.find(h)
+    return checks
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _scan_sources(library_root: Path) -> dict[tuple[str, str], tuple[int, int]]:
+    """ライブラリの元画像の {(文書 ID, ファイル名): (更新時刻 ns, サイズ)}"""
+    found: dict[tuple[str, str], tuple[int, int]] = {}
+    try:
+        docs = os.scandir(library_root)
+    except FileNotFoundError:
+        return found
+    with docs:
+        for doc in docs:
+            if doc.name.startswith(".") or not doc.is_dir():
+                continue
+            try:
+                files = os.scandir(doc.path)
+            except OSError:
+                continue
+            with files:
+                for entry in files:
+                    if _SOURCE_NAME.fullmatch(entry.name) and entry.is_file():
+                        st = entry.stat()
+                        found[(doc.name, entry.name)] = (st.st_mtime_ns, st.st_size)
+    return found
+
+
+def _hash_matrix(blobs: Iterable[bytes]) -> np.ndarray:
+    """ハッシュのバイト列を1行1枚の uint8 の行列にする"""
+    data = b"".join(blobs)
+    width = max(1, (HASH_SIZE * HASH_SIZE + 7) // 8)
+    return np.frombuffer(data, dtype=np.uint8).reshape(-1, width)
+
+
+def _distances(matrix: np.ndarray, h: bytes) -> np.ndarray:
+    """行列の各行と h の違うビット数"""
+    q = np.frombuffer(h, dtype=np.uint8)
+    return np.bitwise_count(matrix ^ q).sum(axis=1, dtype=np.int32)
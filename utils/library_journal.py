@@ -0,0 +1,180 @@
+"""
+ライブラリ変更ジャーナルモジュール
+
+library/ に文書を書き込む処理（save_document・再正規化など）は、書き終えた
+文書の ID をこのジャーナル（library/.index/journal.db）に追記する。
+検索インデックスは前回読んだ位置（カーソル）より後のエントリだけを見て
+差分更新するので、文書が何万件あっても更新コストは変更件数ぶんで済む。
+ライブラリ全体の走査は、手作業の編集などジャーナルを通らない変更を拾う
+ための「突き合わせ（reconcile）」としてまれに行うだけになる。
+
+ジャーナルは SQLite の1テーブルで、追記は BEGIN IMMEDIATE のトランザクション
+で行う。複数プロセスから同時に追記しても SQLite のロックで直列化され、
+連番（seq）はコミット順に単調増加する（読み手が後から番号の抜けを
+見つけることはない）。インデックスの rebuild では消えないよう search.db とは
+別ファイルにしている。
+
+読み手（search.db・日付で分けた各シャード）は読み終えた位置を readers 表に
+記録し、エントリはすべての読み手が読み終えてから消す。
+
+使い方:
+    from utils.library_journal import record_change
+
+    record_change(library_root, doc_dir.name)  # 文書を書き終えた後に呼ぶ
+"""
+
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+# ---------- 定数 ----------
+
+INDEX_DIR_NAME = ".index"  # インデックス類を置くフォルダ（文書としては扱わない）
+JOURNAL_DB_NAME = "journal.db"
+BUSY_TIMEOUT_SECONDS = 30.0  # 他プロセスの追記を待つ上限
+
+OP_UPSERT = "upsert"  # 追加・更新
+OP_DELETE = "delete"  # 削除
+DEFAULT_READER = "search"  # search.db の読み手名（シャードは "shards/year/2026" など）
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class JournalEntry:
+    """ジャーナル1件"""
+
+    seq: int
+    doc: str
+    op: str
+
+
+# ---------- メインクラス ----------
+
+
+class ChangeJournal:
+    """library/.index/journal.db への追記・読み出し
+
+    接続は呼び出しごとに開いて閉じる（書き込み側は文書1件に1回程度しか
+    呼ばないため）。
+    """
+
+    def __init__(self, library_root: Path):
+        self.library_root = library_root
+
+    @property
+    def path(self) -> Path:
+        return self.library_root / INDEX_DIR_NAME / JOURNAL_DB_NAME
+
+    def record(self, doc_ids: Iterable[str], op: str = OP_UPSERT) -> int:
+        """文書 ID を追記し、最後に振った seq を返す（何も無ければ現在の末尾）"""
+        rows = [(doc_id, op) for doc_id in doc_ids]
+        conn = self._connect(create=True)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany("INSERT INTO changes (doc, op) VALUES (?, ?)", rows)
+            seq = _last_seq(conn)
+            conn.commit()
+            return seq
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def last_seq(self) -> int:
+        """これまでに振った最大の seq（ジャーナルが無ければ 0）"""
+        conn = self._connect()
+        if conn is None:
+            return 0
+        try:
+            return _last_seq(conn)
+        finally:
+            conn.close()
+
+    def read_since(self, seq: int) -> list[JournalEntry]:
+        """seq より後のエントリを古い順に返す"""
+        conn = self._connect()
+        if conn is None:
+            return []
+        try:
+            return [
+                JournalEntry(*row)
+                for row in conn.execute(
+                    "SELECT seq, doc, op FROM changes WHERE seq > ? ORDER BY seq", (seq,)
+                )
+            ]
+        finally:
+            conn.close()
+
+    def prune(
+        self, seq: int, reader: str = DEFAULT_READER, stale_after: float | None = None
+    ) -> None:
+        """reader が seq まで読み終えたことを記録し、全読み手が読み終えたエントリを消す
+
+        読み手はインデックスごと（search.db・日付で分けた各シャード）。
+        stale_after 秒以上読みに来ていない読み手は待たない（その読み手は次の
+        更新で全件の突き合わせをするので、エントリが消えていても取りこぼさない）。
+        AUTOINCREMENT なので、消しても seq が再利用されることはない。
+        """
+        # ジャーナルがまだ無くても読み手の位置は残す（後から書かれたエントリを待たせる）
+        conn = self._connect(create=True)
+        now = time.time()
+        since = now - stale_after if stale_after is not None else 0.0
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO readers (name, seq, read_at) VALUES (?, ?, ?)",
+                (reader, seq, now),
+            )
+            (low,) = conn.execute(
+                "SELECT MIN(seq) FROM readers WHERE read_at >= ?", (since,)
+            ).fetchone()
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (min(low, seq),))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def _connect(self, create: bool = False) -> sqlite3.Connection | None:
+        """ジャーナルを開く。create=False でファイルが無ければ None"""
+        if not create and not self.path.exists():
+            return None
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # BEGIN を自分で発行するので暗黙のトランザクションは使わない
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS changes (
+                seq  INTEGER PRIMARY KEY AUTOINCREMENT,
+                doc  TEXT NOT NULL,
+                op   TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS readers (
+                name     TEXT PRIMARY KEY,
+                seq      INTEGER NOT NULL,
+                read_at  REAL NOT NULL
+            );
+            """
+        )
+        return conn
+
+
+def _last_seq(conn: sqlite3.Connection) -> int:
+    # prune で消したエントリの番号も含めるため、MAX(seq) ではなく sqlite_sequence を見る
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+    return row[0] if row else 0
+
+
+# ---------- 便利関数 ----------
+
+
+def record_change(library_root: Path, doc_id: str, op: str = OP_UPSERT) -> int:
+    """文書1件の変更をジャーナルに追記する"""
+    return ChangeJournal(library_root).record([doc_id], op)
@@ -0,0 +1,93 @@
+"""
+コンコーダンス（KWIC）モジュール（prewar kwic）
+
+検索結果（SearchHit）は1文書に抜粋1つだが、用例を調べるには語の全出現を
+前後の文脈つきで並べ、文脈で並べ替えて見たい。ここでは検索インデックスの
+出現位置（search の trigram の位置。短い語は grams で絞った文書の本文）から
+全出現を取り出し、doc_text の圧縮本文から前後 context 文字を切り出す。
+文書ファイルは読まない。
+
+並べ方（SORT）:
+  - position: 文書（docno）順・文書内の出現順。取り出したそばから返す
+  - right: 語の右の文脈の順（語に続く表現ごとにまとまる）
+  - left: 語の左の文脈を語の側から読んだ順（語に前置する表現ごとにまとまる）
+
+left・right はキー（文脈の文字列。left は反転したもの）を1件ごとに1回だけ
+作ってから並べ、limit があれば上位 limit 件だけをヒープで選ぶ。
+
+使い方:
+    from pathlib import Path
+    from utils.library_kwic import concordance
+    from utils.library_search import LibraryIndex
+
+    with LibraryIndex(Path("library")) as idx:
+        for line in concordance(idx, "震災", sort="right"):
+            print(line.id, line.line, line.left, line.match, line.right)
+"""
+
+import heapq
+from collections.abc import Iterable, Iterator
+from itertools import islice
+
+from utils.config import CONFIG
+from utils.library_grep import GrepMatch, kwic_lines
+from utils.library_search import LibraryIndex
+
+# ---------- 定数 ----------
+
+KWIC_CONTEXT = CONFIG.get("kwic.context")  # 語の前後に切り出す文字数
+SORTS = ("position", "right", "left")
+
+
+# ---------- 公開関数 ----------
+
+
+def concordance(
+    index: LibraryIndex,
+    term: str,
+    context: int = KWIC_CONTEXT,
+    sort: str = "position",
+    limit: int | None = None,
+) -> Iterator[GrepMatch]:
+    """term の modern.txt での全出現を KWIC の行（GrepMatch）で返す
+
+    term は1語（normalize_query() で正規化して引く）。QueryTooShortError は
+    そのまま送出する。
+    """
+    if sort not in SORTS:
+        raise ValueError(f"sort は {' / '.join(SORTS)} のいずれか: {sort}")
+    return sort_kwic(_occurrences(index, term, context), sort, limit)
+
+
+def sort_kwic(
+    lines: Iterable[GrepMatch], sort: str = "position", limit: int | None = None
+) -> Iterator[GrepMatch]:
+    """KWIC の行を sort の順に並べる（position は来た順のまま流す）
+
+    同じ文脈の行は来た順（文書順）に並ぶ。
+    """
+    if sort == "position":
+        return islice(lines, limit)
+    if sort == "right":
+        key = _right_key
+    else:
+        key = _left_key
+    if limit is not None:
+        return iter(heapq.nsmallest(limit, lines, key=key))
+    return iter(sorted(lines, key=key))
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _right_key(line: GrepMatch) -> tuple[str, str]:
+    return line.match, line.right
+
+
+def _left_key(line: GrepMatch) -> tuple[str, str]:
+    return line.match, line.left[::-1]
+
+
+def _occurrences(index: LibraryIndex, term: str, context: int) -> Iterator[GrepMatch]:
+    for doc_id, doc_dir, text, spans in index.term_positions(term):
+        yield from kwic_lines(doc_id, doc_dir, "modern", text, spans, context)
@@ -0,0 +1,266 @@
+"""
+ライブラリの画像の内容アドレス型ストア（library/.objects/）
+
+save_document は元画像・前処理後画像を文書フォルダにコピーしていた。同じ画像を
+処理し直したり、--separate と結合の両方で保存したりすると、大きな PNG・TIFF が
+文書の数だけ増え、遅いディスクでは保存時間の大半がコピーになる。
+
+ここでは画像の中身の SHA-256 を名前にした blob を library/.objects/ab/cdef… に
+1つだけ置き、文書フォルダの source.png などはその blob へのハードリンクにする。
+  - 同じ中身の画像を何度保存しても、ディスク上の実体は1つ（2回目からはコピーしない）
+  - 文書フォルダの見た目（ファイル名・中身）は今まで通りで、ほかのツールから普通に読める
+  - 文書を消すとリンクが1つ減るだけ。どの文書からもリンクされていない blob
+    （リンク数 1）は collect_garbage() で消す
+ハードリンクを作れないファイルシステム（exFAT・一部のネットワークドライブ）では
+今まで通りコピーする（blob はどこからも参照されないので次のゴミ集めで消える）。
+画像は書き換えずに使う前提（ハードリンク同士は同じ実体なので、1つを上書きすると
+同じ画像を持つ全文書が変わる）。
+
+既存のライブラリは migrate() で、文書フォルダの画像を blob に登録し、同じ中身の
+画像をリンクに置き換える（meta.json は変えないので検索インデックスの更新は
+起きない）。
+
+使い方:
+    from pathlib import Path
+    from utils.library_objects import collect_garbage, migrate
+
+    report = migrate(Path("library"))
+    print(report.linked, report.reclaimed_bytes)
+    collect_garbage(Path("library"))
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.config import CONFIG
+
+# ---------- 定数 ----------
+
+OBJECTS_DIR_NAME = ".objects"
+ENABLED = CONFIG.get("objects.enabled")  # 保存時に blob へのハードリンクにするか
+WORKERS = CONFIG.get("objects.workers")  # 移行で画像をハッシュするスレッド数
+
+_CHUNK = 1 << 20  # ハッシュするときに一度に読むバイト数
+_TMP_SUFFIX = ".tmp"
+_STALE_TMP_SECONDS = 3600  # これより古い書きかけの一時ファイルはゴミ集めで消す
+# save_document が文書フォルダに置く画像の名前
+_IMAGE_NAME = re.compile(
+    r"(?:source|preprocessed)(?:_\d+)?\.(?:png|jpe?g|tiff?|bmp)", re.IGNORECASE
+)
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class MigrationReport:
+    """migrate() の結果"""
+
+    files: int = 0  # 調べた画像の数
+    stored: int = 0  # そのまま blob として登録した画像（初めて見た中身）
+    linked: int = 0  # 同じ中身の blob へのリンクに置き換えた画像
+    already: int = 0  # もともと blob へのリンクだった画像
+    reclaimed_bytes: int = 0  # 置き換えで空いた容量
+    failed: list[tuple[str, str]] = field(default_factory=list)  # (パス, 理由)
+
+
+@dataclass
+class GcReport:
+    """collect_garbage() の結果"""
+
+    removed: int = 0
+    reclaimed_bytes: int = 0
+
+
+@dataclass
+class ObjectStats:
+    """ライブラリの画像の容量（object_stats() の結果）"""
+
+    files: int = 0  # 文書フォルダの画像の数
+    logical_bytes: int = 0  # 文書フォルダから見た合計（リンクも1つずつ数える）
+    physical_bytes: int = 0  # 実体ごとに1回だけ数えた合計
+    blobs: int = 0
+    unreferenced_blobs: int = 0  # どの文書からもリンクされていない blob
+    unreferenced_bytes: int = 0
+
+
+# ---------- 公開関数 ----------
+
+
+def file_digest(path: Path) -> str:
+    """ファイルの中身の SHA-256（16進）"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def blob_path(library_root: Path, digest: str) -> Path:
+    return Path(library_root) / OBJECTS_DIR_NAME / digest[:2] / digest[2:]
+
+
+def place_file(library_root: Path, src: Path, dest: Path) -> bool:
+    """src を dest に置く（blob へのハードリンクなら True、コピーしたなら False）
+
+    同じ中身の blob がまだ無ければ、先に src を blob としてストアに入れる。
+    """
+    blob = blob_path(library_root, file_digest(src))
+    if not blob.exists():
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp = blob.with_name(f"{blob.name}.{os.getpid()}.{threading.get_ident()}{_TMP_SUFFIX}")
+        shutil.copy2(src, tmp)
+        os.replace(tmp, blob)
+    try:
+        os.link(blob, dest)
+        return True
+    except OSError:
+        shutil.copy2(src, dest)
+        return False
+
+
+def migrate(library_root: Path, dry_run: bool = False, workers: int = WORKERS) -> MigrationReport:
+    """既存の文書フォルダの画像を blob に登録し、同じ中身のものをリンクにまとめる
+
+    初めて見た中身の画像は、コピーせずにそのファイルへのハードリンクを blob にする。
+    同じ中身の blob が既にある画像は、blob へのリンクに置き換える（一時的な名前で
+    リンクを作ってから置き換えるので、途中で止まっても画像は欠けない）。
+    dry_run なら何も変えずに結果だけ返す。
+    """
+    report = MigrationReport()
+    root = Path(library_root)
+    paths = list(_iter_images(root))
+    planned: set[str] = set()  # dry_run で登録したことにした blob
+    with ThreadPoolExecutor(max(1, workers), thread_name_prefix="objects") as pool:
+        for path, digest in zip(paths, pool.map(_digest_or_none, paths)):
+            report.files += 1
+            if digest is None:
+                report.failed.append((str(path), "読み込めません"))
+                continue
+            blob = blob_path(root, digest)
+            try:
+                _migrate_file(path, blob, digest, dry_run, planned, report)
+            except OSError as e:
+                report.failed.append((str(path), str(e)))
+    return report
+
+
+def collect_garbage(library_root: Path, dry_run: bool = False) -> GcReport:
+    """どの文書からもリンクされていない blob と、古い書きかけの一時ファイルを消す"""
+    report = GcReport()
+    now = time.time()
+    for path, st in _iter_blobs(Path(library_root)):
+        if path.name.endswith(_TMP_SUFFIX):
+            if now - st.st_mtime < _STALE_TMP_SECONDS:
+                continue
+        elif st.st_nlink > 1:
+            continue
+        report.removed += 1
+        report.reclaimed_bytes += st.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return report
+
+
+def object_stats(library_root: Path) -> ObjectStats:
+    """文書フォルダの画像と blob の容量"""
+    stats = ObjectStats()
+    root = Path(library_root)
+    seen: set[tuple[int, int]] = set()
+    for path in _iter_images(root):
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        stats.files += 1
+        stats.logical_bytes += st.st_size
+        if (st.st_dev, st.st_ino) not in seen:
+            seen.add((st.st_dev, st.st_ino))
+            stats.physical_bytes += st.st_size
+    for path, st in _iter_blobs(root):
+        if path.name.endswith(_TMP_SUFFIX):
+            continue
+        stats.blobs += 1
+        if st.st_nlink <= 1:
+            stats.unreferenced_blobs += 1
+            stats.unreferenced_bytes += st.st_size
+            stats.physical_bytes += st.st_size
+    return stats
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _migrate_file(
+    path: Path, blob: Path, digest: str, dry_run: bool, planned: set[str], report: MigrationReport
+) -> None:
+    st = path.stat()
+    try:
+        bst = blob.stat()
+    except FileNotFoundError:
+        bst = None
+    if bst is not None and (bst.st_dev, bst.st_ino) == (st.st_dev, st.st_ino):
+        report.already += 1
+        return
+    if bst is None and digest not in planned:
+        if dry_run:
+            planned.add(digest)
+        else:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            os.link(path, blob)
+        report.stored += 1
+        return
+    if not dry_run:
+        tmp = path.with_name(path.name + _TMP_SUFFIX)
+        os.link(blob, tmp)
+        os.replace(tmp, path)
+    report.linked += 1
+    if st.st_nlink == 1:
+        report.reclaimed_bytes += st.st_size
+
+
+def _iter_images(library_root: Path):
+    """文書フォルダの画像のパス（文書 ID・ファイル名の順。'.' で始まるフォルダは除く）"""
+    try:
+        with os.scandir(library_root) as it:
+            names = sorted(e.name for e in it if e.is_dir() and not e.name.startswith("."))
+    except FileNotFoundError:
+        return
+    for name in names:
+        doc_dir = library_root / name
+        try:
+            with os.scandir(doc_dir) as it:
+                files = sorted(f.name for f in it if f.is_file())
+        except OSError:
+            continue
+        for file_name in files:
+            if _IMAGE_NAME.fullmatch(file_name):
+                yield doc_dir / file_name
+
+
+def _iter_blobs(library_root: Path):
+    """ストアの (パス, stat) を返す（リンク数を見るので DirEntry.stat() は使わない）"""
+    objects = library_root / OBJECTS_DIR_NAME
+    try:
+        prefixes = [e.path for e in os.scandir(objects) if e.is_dir()]
+    except FileNotFoundError:
+        return
+    for prefix in sorted(prefixes):
+        with os.scandir(prefix) as it:
+            for entry in it:
+                if entry.is_file():
+                    yield Path(entry.path), os.stat(entry.path)
+
+
+def _digest_or_none(path: Path) -> str | None:
+    try:
+        return file_digest(path)
+    except OSError:
+        return None
@@ -13,22 +13,172 @@ library/ 配下に蓄積された文書を SQLite FTS5 (trigram tokenizer) で
     hits = idx.search("関東 震災", limit=20)  # AND検索
     for h in hits:
         print(h.id, h.title, h.snippet)
+
+    # 対話メニューやスクリプトから何度も引く場合は、使い回せるハンドルを取る
+    idx = get_index(Path("library"))
+
+LibraryIndex は接続を開きっぱなしにして使い回す（呼び出しごとの connect と
+スキーマ確認をしない）。DB は WAL モードで、書き込みは専用の1接続、検索は
+スレッドセーフな読み取り接続プールから行うので、インデックス更新中でも
+検索が待たされない。使い終わったら close()（with 文でも可）。
+
+差分更新は変更ジャーナル（utils/library_journal.py）の未読エントリに載った
+文書だけを見るので、ライブラリ全体を走査しない。ジャーナルを通らない変更
+（手作業の編集など）は reconcile（全件の突き合わせ）で拾う。
+
+trigram は3文字未満の語を扱えないので、1〜2文字の語（震災・警察など）用に
+文書ごとの異なり1文字・2文字を入れた補助の FTS（grams）も同じ DB に持つ。
+検索語は長さで振り分け、両方に現れる語は rowid（= documents.docno）で
+積をとる。
+
+search には LLM で書き換える前の ocr_raw.txt も raw 列として入れ、原文の
+言い回し（「謹テ上申ス」など）でも引けるようにする。raw 列は正規化していない
+ので、検索語は senzen_word の字体表で新字体 ↔ 旧字体・異体字に展開して
+（国 → 国・國・圀）raw 列に当てる。列ごとの重み付き bm25 で、title・modern の
+一致を原文だけの一致より上に並べる。
+
+search の1行は文書全体ではなくパッセージ（段落を PASSAGE_CHARS 文字まで
+まとめたもの）で、rowid は docno << PASSAGE_BITS | パッセージ番号。数百ページの
+記録でも bm25 が長い文書に引きずられず、文書の関連度は一番よく一致した
+パッセージの bm25 になる。AND は文書単位で（語ごとに別のパッセージにあって
+よい）、抜粋も一番よく一致したパッセージの中だけで探す。ocr_raw.txt は
+modern.txt の区切りと位置の比で対応づけて同じ行に入れる。区切りの無い長い
+本文は PASSAGE_CHARS 文字で機械的に切るので、search の各行には次のパッセージの
+先頭 PASSAGE_OVERLAP 文字も入れ、MAX_TERM_CHARS 文字までの語は区切りを
+またいでもどれかの行に丸ごと収まるようにしている。
+
+search・grams はどちらも本文を持たない（contentless）FTS で、本文は zlib で
+圧縮して doc_text に1文書1行で持つ（パッセージの区切りも）。抜粋は検索結果の LIMIT 件ぶんだけ
+doc_text を展開して Python で作り、文書の削除・更新では doc_text から
+元の本文を戻して FTS の 'delete' に渡す。
+
+語の出現数の推移（「震災」の月ごとの出現数など）のために、集計の対象にした語の
+文書ごとの出現数（term_counts）も持つ。語は初めて集計したときに search の
+fts5vocab（search_instance）か本文から数えて登録し、以後は索引の更新に合わせて
+文書ごとに数え直すので、集計は documents との GROUP BY だけで済む。
+
+同じページを撮り直した記録（近似重複）を見つけるために、文書（複数の元画像を
+まとめた文書はページごとにも）の MinHash 署名（minhash）と、署名の LSH の
+バケット（lsh_bands）も持つ（utils/minhash.py）。索引の更新に合わせて文書ごとに
+作り直すので、新しい本文に近い文書はバケットを引くだけで見つかる。
+
+検索用の FTS とは別に、ocr_raw.txt の「文字 → 文書」転置索引（raw_terms）も
+持つ。OCR誤読ルールを追加・変更したとき、影響しうる文書だけを即座に絞り込む
+ために使う（utils/renormalizer.py）。
+
+大量の文書を一度に索引するとき（rebuild や大きな差分）は、ファイルの読み込みを
+スレッドプールで先読みし、バッチ単位の executemany で書き込む。rebuild は
+一時ファイルにジャーナルなしで組み立ててから差し替えるので、途中で落ちても
+元のインデックスは壊れない。
+
+文書が多くなったら、インデックスを文書 ID の先頭の作成日（YYYY-MM-DD_…）で
+年・月ごとのシャード（IndexShard。library/.index/shards/year/2026.db など）に
+分けられる。シャードは自分の範囲の文書だけを索引する独立した LibraryIndex で、
+ほかのシャードと関係なく更新・作り直しでき、変更ジャーナルも自分の読み手名で
+読む。シャードをまたぐ検索は utils/library_shards.py の FederatedIndex で行う。
 """
 
 import json
+import math
+import os
+import queue
+import re
 import sqlite3
-from collections.abc import Iterator
-from dataclasses import dataclass
+import stat
+import statistics
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field, replace
+from itertools import combinations, groupby
 from pathlib import Path
 
+import numpy as np
+from senzen_word.kanji import convert_old_kanji, get_old_forms
+
 from utils.config import CONFIG
-from utils.text_normalizer import normalize_query
+from utils.library_journal import (
+    BUSY_TIMEOUT_SECONDS,
+    DEFAULT_READER,
+    INDEX_DIR_NAME,
+    ChangeJournal,
+)
+from utils.minhash import (
+    THRESHOLD,
+    band_keys,
+    document_signatures,
+    pack_signature,
+    similarity,
+    unpack_signature,
+)
+from utils.text_normalizer import normalize_before_corrections, normalize_query
 
 # ---------- 定数 ----------
 
-INDEX_DIR_NAME = ".index"
 INDEX_DB_NAME = "search.db"
-TRIGRAM_MIN_QUERY_CHARS = CONFIG.get("search.min_query_chars")  # FTS5 trigram は3文字未満を扱えない
+SHARDS_DIR_NAME = "shards"  # 日付で分けたシャードの DB を置くフォルダ（.index の下）
+SHARD_BY = {"year": 4, "month": 7}  # シャードの単位 → 文書 ID の先頭の何文字で分けるか
+OTHER_SHARD = "other"  # 日付で始まらない ID の文書（手作業で足したフォルダなど）のシャード
+TRIGRAM_MIN_QUERY_CHARS = CONFIG.get("search.min_query_chars")  # これ未満の語は grams で引く
+SNIPPET_CHARS = 16  # 抜粋の長さ（文字数）
+PASSAGE_CHARS = CONFIG.get("index.passage_chars")  # search の1行（パッセージ）の長さの上限（0 で文書ごと）
+MAX_TERM_CHARS = 64  # 検索語の長さの上限（これより長い語はパッセージの区切りをまたぐと引けない）
+PASSAGE_OVERLAP = MAX_TERM_CHARS - 1  # search の各行に続けて入れる、次のパッセージの先頭の文字数
+PASSAGE_BITS = 20  # search の rowid = docno << PASSAGE_BITS | 文書内のパッセージ番号
+PASSAGE_MASK = (1 << PASSAGE_BITS) - 1
+TEXT_COMPRESS_LEVEL = 6  # doc_text に入れる本文の zlib 圧縮レベル
+
+# DB スキーマのバージョン（PRAGMA user_version）。上げたら update() で移行する。
+#   1: raw_terms（ocr_raw の文字 → 文書）を追加
+#   2: documents.docno（= search の rowid）を追加。FTS の行を id 列の全件走査
+#      ではなく rowid で消す・結合する
+#   3: 1〜2文字の語のための grams（異なり1文字・2文字の転置索引）を追加
+#   4: search に raw 列（ocr_raw.txt）を追加し、grams にも ocr_raw の文字を入れる
+#   5: search を本文なし（contentless）にし、本文は zlib で圧縮して doc_text に持つ
+#   6: documents に絞り込み用の列（モデル・元画像の枚数）と doc_tags を追加
+#   7: search の1行を文書からパッセージ（段落）にし、区切りを doc_text.passages に持つ
+#   8: minhash / lsh_bands（近似重複の署名・LSH バケット）を追加
+#   9: search の各行に次のパッセージの先頭 PASSAGE_OVERLAP 文字を重ねて入れる
+SCHEMA_VERSION = 9
+
+# search の列（title・modern・raw）ごとの bm25 の重み
+WEIGHT_TITLE = CONFIG.get("search.weight_title")
+WEIGHT_MODERN = CONFIG.get("search.weight_modern")
+WEIGHT_RAW = CONFIG.get("search.weight_raw")
+RANK_EXPR = f"bm25(search, {float(WEIGHT_TITLE)}, {float(WEIGHT_MODERN)}, {float(WEIGHT_RAW)})"
+MAX_VARIANTS = CONFIG.get("search.max_variants")  # 1語を字体違いに展開する上限
+RESULT_CACHE_SIZE = CONFIG.get("search.result_cache_size")  # 検索結果の LRU キャッシュの件数
+DUPLICATE_BUCKET_LIMIT = 64  # これより大きな LSH のバケットは先頭の1件との組だけを比べる
+PAGE_SIZE = CONFIG.get("search.page_size")  # iter_search() が1回に引く件数
+FACET_PREFILTER_DOCS = CONFIG.get("search.facet_prefilter_docs")  # 絞り込みを先に当てる件数
+_MAX_DOCNO = 2**63 - 1  # grams の降順の先頭ページの境界（SQLite の rowid の最大値）
+
+# raw_terms: 半数以上の文書に出るようなありふれた文字は転置リストを持たず
+# common_terms に名前だけ残す（その文字での絞り込みは「全文書」扱い）。
+RAW_TERMS_COMMON_RATIO = CONFIG.get("renormalize.common_df_ratio")
+RAW_TERMS_COMMON_MIN_DOCS = CONFIG.get("renormalize.common_min_docs")
+
+# 接続ごとの SQLite 設定
+READ_POOL_SIZE = CONFIG.get("search.read_pool_size")  # 同時に検索できる接続数
+CACHE_SIZE_MB = CONFIG.get("search.cache_size_mb")  # ページキャッシュ（接続ごと）
+MMAP_SIZE_MB = CONFIG.get("search.mmap_size_mb")  # メモリマップで読む DB の上限
+CACHED_STATEMENTS = 128  # 接続ごとに保持するプリペアドステートメント数
+
+# 一括索引（rebuild・大きな差分更新）
+INDEX_WORKERS = CONFIG.get("index.workers")  # ファイル読み込みのスレッド数
+INDEX_BATCH_SIZE = CONFIG.get("index.batch_size")  # 1回の executemany にまとめる文書数
+OPTIMIZE_RATIO = CONFIG.get("index.optimize_ratio")  # 文書数に対する変更の割合がこれ以上で optimize
+BUILD_CACHE_SIZE_MB = 256  # rebuild 中だけ使うページキャッシュ
+RECONCILE_HOURS = CONFIG.get("index.reconcile_hours")  # 全件の突き合わせの間隔（0 で自動ではしない）
+# これだけ読みに来ていない読み手（シャード）は、ジャーナルを消すときに待たない
+_READER_STALE_SECONDS = RECONCILE_HOURS * 3600 if RECONCILE_HOURS > 0 else None
+BULK_AUTOMERGE = 16  # 一括索引中の FTS5 automerge（既定の 4 より小さなマージを減らす）
+DEFAULT_AUTOMERGE = 4
 
 
 # ---------- データクラス ----------
@@ -43,6 +193,108 @@ class SearchHit:
     title: str
     snippet: str
     created_at: str
+    score: float = 0.0  # 関連度（一番よく一致したパッセージの bm25。小さいほど上位。短い語だけの検索では 0）
+    line: int | None = None  # 抜粋の位置（modern.txt の行番号。原文だけの一致は対応する段落の先頭）
+    page: int | None = None  # 元画像が複数ある文書で、抜粋がありそうな画像の番号（位置の比からの目安）
+
+
+@dataclass
+class SearchPage:
+    """検索結果の1ページ"""
+
+    hits: list[SearchHit]
+    next_cursor: str | None  # 続きを引くときに after に渡す（最後のページなら None）
+
+
+@dataclass
+class _LoadedDoc:
+    """索引する1文書ぶんの中身（読み込みスレッドで作る）"""
+
+    id: str
+    dir: str
+    mtime: float
+    title: str
+    created_at: str
+    modern: str
+    raw: str  # ocr_raw.txt の中身（無ければ空）
+    modern_blob: bytes  # doc_text に入れる圧縮済みの modern
+    raw_blob: bytes  # 同じく raw
+    passages: list[tuple[int, int, int, int]]  # search の各行の (modern の開始, 終了, raw の開始, 終了)
+    raw_terms: set[str]
+    grams: str
+    ocr_model: str = ""  # 以下は meta.json の絞り込み用の項目
+    modernize_model: str = ""
+    source_count: int = 0
+    tags: list[str] = field(default_factory=list)
+    # 近似重複の検出用: (ページ。0 は文書全体, 署名, LSH のバケット)
+    signatures: list[tuple[int, bytes, list[int]]] = field(default_factory=list)
+
+
+@dataclass(frozen=True)
+class SearchFacets:
+    """検索の絞り込み条件（すべて AND。None・空は条件なし）"""
+
+    tags: tuple[str, ...] = ()  # すべてのタグを持つ文書
+    since: str | None = None  # created_at がこの日付以降（"2026"・"2026-03"・"2026-03-01"）
+    until: str | None = None  # created_at がこの日付まで（"2026-03" なら3月末まで）
+    model: str | None = None  # OCR か口語体変換のモデル名が一致
+    min_sources: int | None = None  # 元画像の枚数がこれ以上
+
+
+@dataclass(frozen=True)
+class IndexShard:
+    """日付で分けたインデックスの1区分（文書 ID の先頭の作成日で振り分ける）"""
+
+    by: str  # SHARD_BY のキー（"year"・"month"）
+    key: str  # "2026"・"2026-03"・OTHER_SHARD
+
+    def contains(self, doc_id: str) -> bool:
+        return shard_key(doc_id, self.by) == self.key
+
+
+@dataclass
+class _QueryPlan:
+    """検索語の振り分け結果（どちらも FTS5 の MATCH 式。使わない側は None）"""
+
+    trigram: str | None  # TRIGRAM_MIN_QUERY_CHARS 文字以上の語 → search
+    trigram_terms: list[str]  # 同じ語の1語ずつの MATCH 式（パッセージをまたいだ AND 用）
+    grams: str | None  # それより短い語 → grams
+    terms: list[str]  # 正規化後の全検索語と spellings の綴り（Python で抜粋を作るときに使う）
+    variants: list[str]  # raw 列に当てる字体違い・入力そのままの語（同上）
+
+
+@dataclass
+class TermBucket:
+    """語の出現数の集計の1区分（月・年・タグ）"""
+
+    key: str  # "2026-03"・"2026"・タグ名
+    documents: int  # 区分の文書数
+    matched_docs: int  # 語の現れる文書数
+    occurrences: int  # modern.txt での出現数の合計
+
+
+@dataclass
+class DuplicateMatch:
+    """本文の近い索引済みの文書1件（near_duplicates() の結果）"""
+
+    id: str
+    dir: Path
+    title: str
+    created_at: str
+    similarity: float  # 署名から推定した Jaccard 係数
+    page: int = 0  # 一致した相手のページ（0 は文書全体）
+    query_page: int = 0  # 一致したこちらのページ（同）
+
+
+@dataclass
+class DuplicateLink:
+    """ライブラリの中の近似重複の1組（a が先に索引した文書）"""
+
+    a: str
+    b: str
+    similarity: float
+    page_a: int = 0  # 一致したページ（0 は文書全体）
+    page_b: int = 0
 
 
 @dataclass
@@ -53,6 +305,7 @@ class IndexStats:
     updated: int = 0
     removed: int = 0
     skipped: int = 0
+    reconciled: bool = False  # ライブラリ全体を走査した
 
 
 # ---------- 例外クラス ----------
@@ -77,139 +330,945 @@ class LibraryIndex:
     """ライブラリ全文検索インデックス
 
     SQLite FTS5 + trigram tokenizer により、日本語の部分一致検索を提供する。
-    インデックス対象は modern.txt と meta.json の title のみ（ocr_raw は除外）。
+    インデックス対象は meta.json の title・modern.txt・ocr_raw.txt。
+    shard を渡すと、その範囲の文書だけを別の DB（シャード）に索引する。
     """
 
-    def __init__(self, library_root: Path):
+    def __init__(
+        self,
+        library_root: Path,
+        read_pool_size: int = READ_POOL_SIZE,
+        result_cache_size: int = RESULT_CACHE_SIZE,
+        shard: IndexShard | None = None,
+    ):
         self.library_root = library_root
+        self.shard = shard
+        self._cache: OrderedDict[tuple, SearchPage] = OrderedDict()  # search_page() の結果
+        self._cache_lock = threading.Lock()
+        self._cache_size = result_cache_size
+        self._write_lock = threading.RLock()  # 書き込み接続・スキーマ確認の排他
+        self._writer: sqlite3.Connection | None = None
+        self._schema_ready = False
+        self._readers: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._reader_slots = threading.BoundedSemaphore(max(1, read_pool_size))
+        self._opened_readers: list[sqlite3.Connection] = []
+
+    def __enter__(self) -> "LibraryIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
 
     @property
     def db_path(self) -> Path:
+        if self.shard is not None:
+            return shard_dir(self.library_root, self.shard.by) / f"{self.shard.key}.db"
         return self.library_root / INDEX_DIR_NAME / INDEX_DB_NAME
 
+    @property
+    def journal(self) -> ChangeJournal:
+        return ChangeJournal(self.library_root)
+
+    def close(self) -> None:
+        """開いている接続をすべて閉じる（次に使うとき開き直す）"""
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for conn in self._opened_readers:
+                conn.close()
+            self._opened_readers.clear()
+            self._readers = queue.LifoQueue()
+            self._schema_ready = False
+
     # ---------- public API ----------
 
-    def update(self) -> IndexStats:
+    def update(self, reconcile: bool = False) -> IndexStats:
         """差分更新
 
-        meta.json の mtime を DB に記録した値と比較し、変化のあった文書だけ
-        再インデックスする。フォルダごと削除された文書は DB からも消す。
+        変更ジャーナルの未読エントリに載った文書だけ、meta.json の mtime を
+        DB に記録した値と比較して再インデックスする。フォルダごと削除された
+        文書は DB からも消す。次の場合はライブラリ全体を走査して突き合わせる:
+          - reconcile=True
+          - このインデックスがまだジャーナルを読んだことがない
+          - 前回の突き合わせから RECONCILE_HOURS 時間以上たった
+        変更が全文書の OPTIMIZE_RATIO 以上なら一括索引として扱う。
+        まだ1件も索引していなければ rebuild() と同じ経路で組み立てる。
         """
-        conn = self._connect()
-        try:
-            self._ensure_schema(conn)
-            stats = IndexStats()
+        with self._write_lock:
+            with self._write() as conn:
+                # 別プロセスの update() とカーソルを取り合わないよう最初から書き込みロック
+                conn.execute("BEGIN IMMEDIATE")
+                (n_docs,) = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+                if n_docs:
+                    stats, seq = self._update_locked(conn, reconcile)
+                    if stats.added or stats.updated or stats.removed:
+                        self._bump_generation(conn)
+            if not n_docs:
+                return self.rebuild()
+            # 読み終えたエントリはもう要らない（rebuild も末尾から読み始める）
+            self.journal.prune(seq, self._journal_reader(), _READER_STALE_SECONDS)
+            if stats.added or stats.updated or stats.removed:
+                # 大きな更新で膨らんだ WAL を本体に書き戻して切り詰める
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            return stats
 
-            existing = {
-                row[0]: row[1] for row in conn.execute("SELECT id, mtime FROM documents")
-            }
-            seen: set[str] = set()
-
-            for meta_path in self._iter_meta_paths():
-                doc_id = meta_path.parent.name
-                mtime = meta_path.stat().st_mtime
-                seen.add(doc_id)
-
-                if doc_id in existing:
-                    if abs(existing[doc_id] - mtime) < 1e-6:
-                        continue  # 変化なし
-                    # 更新
-                    meta = self._load_meta(meta_path)
-                    modern = self._load_modern(meta_path.parent)
-                    if meta is None or modern is None:
-                        stats.skipped += 1
-                        continue
-                    self._delete_doc(conn, doc_id)
-                    self._insert_doc(conn, doc_id, meta_path.parent, meta, modern, mtime)
-                    stats.updated += 1
-                else:
-                    # 追加
-                    meta = self._load_meta(meta_path)
-                    modern = self._load_modern(meta_path.parent)
-                    if meta is None or modern is None:
-                        stats.skipped += 1
-                        continue
-                    self._insert_doc(conn, doc_id, meta_path.parent, meta, modern, mtime)
-                    stats.added += 1
+    def _update_locked(self, conn: sqlite3.Connection, reconcile: bool) -> tuple[IndexStats, int]:
+        """update() の本体。(集計, 読み終えたジャーナルの seq) を返す"""
+        cursor = self._get_state(conn, "journal_seq")
+        reconciled_at = self._get_state(conn, "reconciled_at") or 0
+        due = RECONCILE_HOURS > 0 and time.time() - reconciled_at >= RECONCILE_HOURS * 3600
+        if reconcile or cursor is None or due:
+            # 走査の前に末尾を読んでおく（走査中の追記は次回もう一度見るだけ）
+            seq = self.journal.last_seq()
+            stats = self._sync(conn, bulk=False)
+            self._set_state(conn, "reconciled_at", time.time())
+        else:
+            entries = self.journal.read_since(cursor)
+            seq = entries[-1].seq if entries else cursor
+            stats = self._sync(conn, bulk=False, doc_ids={e.doc for e in entries})
+        self._set_state(conn, "journal_seq", seq)
+        return stats, seq
 
-            # 消えた文書を削除
-            for doc_id in existing.keys() - seen:
-                self._delete_doc(conn, doc_id)
-                stats.removed += 1
+    def rebuild(self) -> IndexStats:
+        """全削除して再構築
 
-            conn.commit()
-            return stats
-        finally:
+        一時ファイル（search.db.build）にジャーナル・同期なしで全件を書き込み、
+        完成してから search.db に写す（install_build）。途中で失敗しても既存の
+        インデックスはそのまま残る。
+        """
+        with self._write_lock:
+            # 出現数を集計している語は作り直した DB でも数える
+            tracked = self.tracked_terms() if self.db_path.exists() else []
+            build_path = self.db_path.with_name(self.db_path.name + ".build")
+            build_path.unlink(missing_ok=True)
+            conn = self._connect(build_path)
+            try:
+                conn.execute("PRAGMA journal_mode = OFF")
+                conn.execute("PRAGMA synchronous = OFF")
+                conn.execute(f"PRAGMA cache_size = {-BUILD_CACHE_SIZE_MB * 1024}")
+                self._ensure_schema(conn)
+                self._migrate(conn)  # 空の DB なので索引を作って版を上げるだけ
+                conn.executemany(
+                    "INSERT INTO tracked_terms (term) VALUES (?)", ((term,) for term in tracked)
+                )
+                seq = self.journal.last_seq()
+                # ここから先のエントリをほかの読み手（シャード）が消さないよう、先に位置を記録する
+                self.journal.prune(seq, self._journal_reader(), _READER_STALE_SECONDS)
+                stats = self._sync(conn, bulk=True)
+                self._set_state(conn, "journal_seq", seq)
+                self._set_state(conn, "reconciled_at", time.time())
+                self._bump_generation(conn)
+                conn.commit()
+                conn.execute("VACUUM")  # optimize で空いたセグメントのページを詰める
+            except BaseException:
+                conn.close()
+                build_path.unlink(missing_ok=True)
+                raise
             conn.close()
 
-    def rebuild(self) -> IndexStats:
-        """全削除して再構築"""
-        # DB ファイルごと削除
-        if self.db_path.exists():
-            self.db_path.unlink()
-        return self.update()
+            if self.db_path.exists():
+                # ほかのプロセスが開いているかもしれないので、ファイルは差し替えずに写す
+                install_build(build_path, self._writer_conn())
+            else:
+                os.replace(build_path, self.db_path)
+                self._writer_conn()  # 読み取り接続より先に WAL に切り替えておく
+            self._schema_ready = True  # 組み立てた DB は最新のスキーマ
+            return stats
 
-    def search(self, query: str, limit: int = 20) -> list[SearchHit]:
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        after: str | None = None,
+        facets: SearchFacets | None = None,
+        spellings: Callable[[str], list[str]] | None = None,
+    ) -> list[SearchHit]:
         """全文検索
 
-        スペース区切りの語は AND 検索。各語は trigram で部分一致する。
-        2文字未満の語が含まれていたら QueryTooShortError を投げる。
+        スペース区切りの語は AND 検索。TRIGRAM_MIN_QUERY_CHARS 文字以上の語は
+        trigram で部分一致し、それより短い語（1〜2文字）は grams で引く。
+        各語は title・modern（正規化後の語）か ocr_raw（字体違いに展開した語）の
+        どれかに現れればよい。
+        短い語だけの検索は関連度を計れないので、新しく索引した文書から返す。
+        使えない語（空・記号を含む短い語）があれば QueryTooShortError を投げる。
+        after には前のページの next_cursor を渡す（search_page() を参照）。
+        facets を渡すと、日付・タグ・モデル・元画像の枚数で絞り込む。
+        spellings は正規化後の語 → その語の代わりに当ててよい綴り（OCR の誤読を
+        見込んだ表記ゆれ。utils/library_fuzzy.py）で、各語はその綴りのどれかに
+        一致すればよくなる。
         """
-        match_expr = self._build_match_expr(query)
-        conn = self._connect()
-        try:
-            self._ensure_schema(conn)
-            cur = conn.execute(
+        return self.search_page(query, limit, after, facets, spellings).hits
+
+    def search_page(
+        self,
+        query: str,
+        limit: int = 20,
+        after: str | None = None,
+        facets: SearchFacets | None = None,
+        spellings: Callable[[str], list[str]] | None = None,
+    ) -> SearchPage:
+        """search() の1ページぶんと、続きを取るためのカーソルを返す
+
+        並び順（関連度, docno）の最後の位置から続きを引く（keyset）ので、
+        OFFSET と違って何ページ目でも前のページを読み飛ばさない。
+        結果は（MATCH 式, 絞り込み条件, 件数, カーソル, インデックスの世代）をキーに LRU で
+        キャッシュする。インデックスを書き換えると世代が変わるので、
+        別プロセスの更新後に古い結果を返すことはない。
+        """
+        plan = self._plan_query(query, spellings=spellings)
+        position = _parse_cursor(after)
+        with self._read() as conn:
+            # 世代を先に読む（この後に更新されても、結果が世代より古くはならない）
+            generation = self._get_state(conn, "generation")
+            key = (plan.trigram, plan.grams, facets, limit, after, generation)
+            with self._cache_lock:
+                page = self._cache.get(key)
+                if page is not None:
+                    self._cache.move_to_end(key)
+                    return SearchPage(list(page.hits), page.next_cursor)
+            page = self._run_plan(conn, plan, limit, position, facets)
+        if self._cache_size > 0:
+            with self._cache_lock:
+                self._cache[key] = page
+                while len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+        return SearchPage(list(page.hits), page.next_cursor)
+
+    def iter_search(
+        self,
+        query: str,
+        page_size: int = PAGE_SIZE,
+        after: str | None = None,
+        facets: SearchFacets | None = None,
+    ) -> Iterator[SearchHit]:
+        """ヒットを（after の続きから）全件、page_size 件ずつ引きながら1件ずつ返す
+
+        書き出しのように全件をたどる用途向け。手元に持つのは1ページぶんだけで、
+        キャッシュも使わない。ページの間は接続をプールに返すので、途中で
+        インデックスが更新されると、その後のページは更新後の内容から引く。
+        """
+        plan = self._plan_query(query)
+        position = _parse_cursor(after)
+        while True:
+            with self._read() as conn:
+                page = self._run_plan(conn, plan, page_size, position, facets)
+            yield from page.hits
+            if page.next_cursor is None:
+                return
+            position = _parse_cursor(page.next_cursor)
+
+    def facet_counts(
+        self, query: str, facets: SearchFacets | None = None
+    ) -> dict[str, dict[str, int]]:
+        """検索結果（facets で絞り込んだ後）全件の、項目ごとの文書数を1回のクエリで数える
+
+        {"tag": {タグ: 件数}, "year": {年: 件数}, "ocr_model": {...},
+        "modernize_model": {...}, "sources": {元画像の枚数: 件数}} を返す
+        （各項目は件数の多い順。値の無い文書は数えない）。
+        """
+        plan = self._plan_query(query)
+        counts: dict[str, dict[str, int]] = {"tag": {}}
+        counts.update((name, {}) for name, _ in _FACET_COLUMNS)
+        with self._read() as conn:
+            ctes, params = self._hits_sql(conn, plan, facets)
+            groups = [
+                f"""
+                SELECT '{name}', {expr}, COUNT(*)
+                  FROM found JOIN documents d ON d.docno = found.docno
+                 GROUP BY 2
                 """
-                SELECT s.id,
-                       snippet(search, 2, '[', ']', '...', 16) AS sn,
-                       d.dir,
-                       d.title,
-                       d.created_at
-                  FROM search s JOIN documents d ON s.id = d.id
-                 WHERE search MATCH ?
-                 ORDER BY bm25(search)
+                for name, expr in _FACET_COLUMNS
+            ]
+            groups.append(
+                """
+                SELECT 'tag', t.tag, COUNT(*)
+                  FROM found JOIN doc_tags t ON t.docno = found.docno
+                 GROUP BY 2
+                """
+            )
+            rows = conn.execute(
+                f"""
+                {ctes},
+                found AS MATERIALIZED (SELECT docno FROM hits)
+                {" UNION ALL ".join(groups)}
+                ORDER BY 1, 3 DESC, 2
+                """,
+                params,
+            ).fetchall()
+        for name, value, n in rows:
+            if value not in ("", None, 0):
+                counts[name][str(value)] = n
+        return counts
+
+    def _run_plan(
+        self,
+        conn: sqlite3.Connection,
+        plan: _QueryPlan,
+        limit: int,
+        after: tuple[float, int] | None = None,
+        facets: SearchFacets | None = None,
+    ) -> SearchPage:
+        """検索語の振り分けに応じて引き、after（関連度, docno）より後の limit 件を返す"""
+        ctes, params = self._hits_sql(conn, plan, facets)
+        if plan.trigram is not None:
+            score, docno = after or (-math.inf, 0)
+            return self._fetch_page(
+                conn,
+                f"""
+                {ctes}
+                SELECT docno, score, pid
+                  FROM hits
+                 WHERE (score, docno) > (?, ?)
+                 ORDER BY score, docno
                  LIMIT ?
                 """,
-                (match_expr, limit),
+                (*params, score, docno, limit + 1),
+                "top.score, top.docno",
+                plan,
+                limit,
             )
-            return [
+        # 短い語だけの検索は関連度が無い（0）ので rowid の降順
+        _, docno = after or (0.0, _MAX_DOCNO)
+        return self._fetch_page(
+            conn,
+            f"""
+            {ctes}
+            SELECT docno, score, pid
+              FROM hits
+             WHERE docno < ?
+             ORDER BY docno DESC
+             LIMIT ?
+            """,
+            (*params, docno, limit + 1),
+            "top.docno DESC",
+            plan,
+            limit,
+        )
+
+    def _hits_sql(
+        self, conn: sqlite3.Connection, plan: _QueryPlan, facets: SearchFacets | None
+    ) -> tuple[str, list]:
+        """一致する文書の (docno, score, pid) を hits として定義する WITH 句とパラメータ
+
+        pid は一番よく一致したパッセージの search の rowid（短い語だけの検索では NULL）。
+
+        長い語と短い語の AND は、trigram の一致を先に確定させて（MATERIALIZED）
+        から grams の一致と rowid で突き合わせる。素直に1つの WHERE に書くと、
+        SQLite が grams 側の rowid ごとに trigram の MATCH を評価し直してしまい、
+        ありふれた短い語で極端に遅くなる。
+
+        絞り込み条件は一致した文書ごとに索引で確かめる。当てはまる文書が
+        FACET_PREFILTER_DOCS 件以下なら、先にその docno の範囲を MATCH に
+        渡して、FTS5 が範囲外の doclist を読まないようにする（docno は索引した
+        順なので、日付の絞り込みはほぼ連続した範囲になる）。当てはまる文書を
+        1件ずつ MATCH にかける（rowid = ?）のは、FTS5 が毎回 doclist を読み
+        直すので範囲よりずっと遅い。
+        """
+        ctes, params = [], []
+        facet = facet_filter(facets) if facets is not None else None
+        bounds = self._facet_range(conn, facets) if facet is not None else None
+        if plan.trigram is not None:
+            # パッセージごとに一致をとり、文書ごとに一番よいパッセージ（bm25 が最小の行。
+            # MIN() と並べた pid はその行の値になる）にまとめる。bm25() は集約の中で
+            # 呼べないので、パッセージの一致を先に実体化する。複数の語は
+            # どれかを含むパッセージで順位をつけ、文書が全部の語を含むかは別に確かめる
+            terms = plan.trigram_terms
+            ctes.append(
+                f"""passage_hits AS MATERIALIZED (
+                    SELECT rowid AS pid, {RANK_EXPR} AS score
+                      FROM search
+                     WHERE search MATCH ?{" AND rowid BETWEEN ? AND ?" if bounds else ""}
+                ),
+                matched AS MATERIALIZED (
+                    SELECT pid >> {PASSAGE_BITS} AS docno, MIN(score) AS score, pid
+                      FROM passage_hits
+                     GROUP BY 1
+                )"""
+            )
+            params.append(" OR ".join(terms) if len(terms) > 1 else terms[0])
+            if bounds:
+                params += [bounds[0] << PASSAGE_BITS, bounds[1] << PASSAGE_BITS | PASSAGE_MASK]
+            source = "matched"
+            selected = "docno, score, pid"
+            column = "matched.docno"
+            conds = []
+            for term in terms if len(terms) > 1 else []:
+                conds.append(
+                    f"docno IN (SELECT rowid >> {PASSAGE_BITS} FROM search WHERE search MATCH ?)"
+                )
+                params.append(term)
+            if plan.grams is not None:
+                conds.append("docno IN (SELECT rowid FROM grams WHERE grams MATCH ?)")
+                params.append(plan.grams)
+        else:
+            source = "grams"
+            selected = "rowid AS docno, 0.0 AS score, NULL AS pid"
+            column = "grams.rowid"
+            conds = ["grams MATCH ?"]
+            params.append(plan.grams)
+            if bounds:
+                conds.append("rowid BETWEEN ? AND ?")
+                params += bounds
+        if facet is not None:
+            # IN (...) にすると FTS5 に rowid の条件として渡り、rowid 順の走査と
+            # LIMIT での打ち切りが効かなくなる。一致した行ごとに確かめる
+            conds.append(f"EXISTS (SELECT 1 FROM documents d WHERE d.docno = {column} AND {facet[0]})")
+            params += facet[1]
+        where = f"WHERE {' AND '.join(conds)}" if conds else ""
+        ctes.append(f"hits AS (SELECT {selected} FROM {source} {where})")
+        return "WITH " + ",\n".join(ctes), params
+
+    def _facet_range(
+        self, conn: sqlite3.Connection, facets: SearchFacets
+    ) -> tuple[int, int] | None:
+        """絞り込みに当てはまる文書の docno の範囲（MATCH に先に渡す価値が無ければ None）
+
+        当てはまる文書が FACET_PREFILTER_DOCS 件を超えるか、範囲が全体の半分を
+        超える（タグのように散らばっている）ときは None。数えるのは索引だけで
+        済ませる（documents の各列の索引は (列, docno)、タグは1つめのタグの
+        doc_tags の主キーから引き、LIMIT で打ち切る）。当てはまる文書が無ければ
+        空の範囲 (1, 0) を返す。
+        """
+        if facets.tags:
+            rest = facet_filter(replace(facets, tags=facets.tags[1:]))
+            sql = "SELECT t0.docno FROM doc_tags t0 WHERE t0.tag = ?"
+            params = [facets.tags[0]]
+            if rest is not None:
+                sql += f" AND EXISTS (SELECT 1 FROM documents d WHERE d.docno = t0.docno AND {rest[0]})"
+                params += rest[1]
+        else:
+            where, params = facet_filter(facets)
+            sql = f"SELECT d.docno FROM documents d WHERE {where}"
+        n, low, high = conn.execute(
+            f"SELECT COUNT(*), MIN(docno), MAX(docno) FROM ({sql} LIMIT ?)",
+            (*params, FACET_PREFILTER_DOCS + 1),
+        ).fetchone()
+        if n == 0:
+            return (1, 0)
+        if n > FACET_PREFILTER_DOCS:
+            return None
+        # 別々の副問い合わせにすると、それぞれ索引の端を読むだけで済む
+        first, last = conn.execute(
+            "SELECT (SELECT MIN(docno) FROM documents), (SELECT MAX(docno) FROM documents)"
+        ).fetchone()
+        if high - low >= (last - first) / 2:
+            return None
+        return (low, high)
+
+    def _fetch_page(
+        self,
+        conn: sqlite3.Connection,
+        top_sql: str,
+        params: tuple,
+        order_sql: str,
+        plan: _QueryPlan,
+        limit: int,
+    ) -> SearchPage:
+        """top_sql（docno, score, pid を limit + 1 件まで返す）を order_sql の順に SearchPage にする
+
+        1件多く引いて、続きがあるかを判定する。search・grams は本文を持たない
+        ので、抜粋は doc_text の圧縮本文を limit 件ぶんだけ展開して Python で
+        作る（一致した全文書の本文は読まない）。語を探すのは一番よく一致した
+        パッセージの中だけ。
+        """
+        rows = conn.execute(
+            f"""
+            WITH top AS MATERIALIZED ({top_sql})
+            SELECT top.docno, top.score, d.id, d.dir, d.title, d.created_at,
+                   t.modern, t.raw, t.passages, top.pid, d.source_count
+              FROM top
+              JOIN documents d ON d.docno = top.docno
+              JOIN doc_text t ON t.docno = top.docno
+             ORDER BY {order_sql}
+            """,
+            params,
+        ).fetchall()
+        hits = []
+        for row in rows[:limit]:
+            modern, raw = unpack_text(row[6]), unpack_text(row[7])
+            span = None
+            if row[9] is not None:
+                span = unpack_passages(row[8], len(modern), len(raw))[row[9] & PASSAGE_MASK]
+            snippet, pos = _plan_snippet(modern, raw, plan, span)
+            hits.append(
                 SearchHit(
-                    id=row[0],
-                    dir=Path(row[2]),
-                    title=row[3],
-                    snippet=row[1],
-                    created_at=row[4],
+                    id=row[2],
+                    dir=Path(row[3]),
+                    title=row[4],
+                    snippet=snippet,
+                    created_at=row[5],
+                    score=row[1],
+                    line=modern.count("\n", 0, pos) + 1,
+                    page=_estimate_page(pos, len(modern), row[10]),
                 )
-                for row in cur
-            ]
-        finally:
-            conn.close()
+            )
+        more = len(rows) > limit
+        last = rows[limit - 1] if more else None
+        return SearchPage(hits, _format_cursor(last[1], last[0]) if last else None)
 
     def stat(self) -> dict:
-        """インデックスの統計情報"""
-        conn = self._connect()
-        try:
-            self._ensure_schema(conn)
+        """インデックスの統計情報
+
+        table_bytes は表ごとのサイズ（FTS5 の影の表・索引は元の表に合算）。
+        """
+        with self._read() as conn:
             (count,) = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
             (latest_mtime,) = conn.execute(
                 "SELECT MAX(mtime) FROM documents"
             ).fetchone()
-            db_size = self.db_path.stat().st_size if self.db_path.exists() else 0
-            return {
-                "library_root": str(self.library_root.resolve()),
-                "document_count": count,
-                "db_size_bytes": db_size,
-                "latest_doc_mtime": latest_mtime,
+            table_bytes = _table_sizes(conn)
+        # WAL にまだ書き戻されていない分も含めたディスク上のサイズ
+        db_size = sum(
+            path.stat().st_size
+            for suffix in ("", "-wal")
+            if (path := self.db_path.with_name(self.db_path.name + suffix)).exists()
+        )
+        return {
+            "library_root": str(self.library_root.resolve()),
+            "document_count": count,
+            "db_size_bytes": db_size,
+            "latest_doc_mtime": latest_mtime,
+            "table_bytes": table_bytes,
+        }
+
+    def raw_overhead(self, samples: int = 20) -> dict:
+        """ocr_raw を索引に含めたことによるサイズ・検索時間の増分を見積もる
+
+        サイズ: doc_text の圧縮した ocr_raw に、search のうち raw 列のぶんを
+        足す。後者は FTS5 が記録している列ごとのトークン総数の比で按分する
+        （推定値）。
+        時間: 文書から切り出した samples 語で、raw 列も引く検索と title・modern
+        だけの検索を行い、1語あたりの中央値を比べる。展開は検索語の正規化と
+        字体違いへの展開（_plan_query）1回あたりの時間。
+        """
+        with self._read() as conn:
+            search_bytes = _table_sizes(conn).get("search", 0)
+            tokens = _fts_column_tokens(conn, "search")
+            (stored_raw,) = conn.execute(
+                "SELECT COALESCE(SUM(LENGTH(raw)), 0) FROM doc_text"
+            ).fetchone()
+            terms = _probe_terms(conn, samples)
+
+            t = time.perf_counter()
+            plans = [self._plan_query(term) for term in terms]
+            expand = (time.perf_counter() - t) / max(1, len(terms))
+            plain = [self._plan_query(term, raw=False) for term in terms]
+
+            def median_ms(plans: list[_QueryPlan]) -> float:
+                times = []
+                for plan in plans:
+                    t = time.perf_counter()
+                    self._run_plan(conn, plan, PROBE_LIMIT)
+                    times.append(time.perf_counter() - t)
+                return statistics.median(times) * 1000 if times else 0.0
+
+            without_raw = median_ms(plain)
+            with_raw = median_ms(plans)
+
+        raw_share = tokens[-1] / sum(tokens) if sum(tokens) else 0.0
+        return {
+            "raw_token_share": raw_share,
+            "raw_bytes_estimate": int(search_bytes * raw_share) + stored_raw,
+            "probe_count": len(terms),
+            "latency_ms_without_raw": without_raw,
+            "latency_ms_with_raw": with_raw,
+            "expand_us": expand * 1e6,
+        }
+
+    def documents(self) -> dict[str, float]:
+        """索引済みの文書を {id: meta.json の mtime} で返す（意味検索の索引の差分判定用）"""
+        with self._read() as conn:
+            return dict(conn.execute("SELECT id, mtime FROM documents"))
+
+    def document_texts(
+        self, doc_ids: Iterable[str], source: str = "modern"
+    ) -> Iterator[tuple[str, str]]:
+        """文書の (id, 本文) を doc_text から展開して返す（索引に無い文書は飛ばす）
+
+        source が "raw" なら ocr_raw.txt の本文（無ければ空）。
+        """
+        column = {"modern": "t.modern", "raw": "t.raw"}[source]
+        for doc_id in doc_ids:
+            with self._read() as conn:
+                row = conn.execute(
+                    f"""
+                    SELECT {column}
+                      FROM documents d JOIN doc_text t ON t.docno = d.docno
+                     WHERE d.id = ?
+                    """,
+                    (doc_id,),
+                ).fetchone()
+            if row is not None:
+                yield doc_id, unpack_text(row[0])
+
+    def document_info(self, doc_ids: Iterable[str]) -> dict[str, tuple[Path, str, str]]:
+        """文書の {id: (フォルダ, タイトル, created_at)}（索引に無い文書は含めない）"""
+        info = {}
+        with self._read() as conn:
+            for doc_id in doc_ids:
+                row = conn.execute(
+                    "SELECT dir, title, created_at FROM documents WHERE id = ?", (doc_id,)
+                ).fetchone()
+                if row is not None:
+                    info[doc_id] = (Path(row[0]), row[1], row[2])
+        return info
+
+    def near_duplicates(
+        self, text: str, pages: int = 1, threshold: float = THRESHOLD
+    ) -> list[DuplicateMatch]:
+        """本文 text に近い（推定 Jaccard 係数 threshold 以上の）索引済みの文書
+
+        text を document_signatures() と同じく署名にし（pages が2以上ならページごと
+        にも）、LSH のバケットが1つでも一致した文書・ページだけを署名で比べる。
+        引く行数はバケットの数と候補の数で決まり、文書数によらない。文書ごとに
+        一番近い組を残し、近い順に返す。
+        """
+        with self._read() as conn:
+            return _near_duplicates(conn, text, pages, threshold)
+
+    def duplicate_links(self, threshold: float = THRESHOLD) -> list[DuplicateLink]:
+        """ライブラリの中の近似重複の組（推定 Jaccard 係数 threshold 以上）
+
+        lsh_bands をバケットの順に読み、同じバケットに入った別の文書の
+        文書・ページの組だけを署名で比べる。DUPLICATE_BUCKET_LIMIT を超える
+        大きなバケット（定型文の多いページなど）は、先頭の1件との組だけを比べる。
+        文書の組ごとに一番近いページの組を残す。
+        """
+        signatures: dict[tuple[int, int], np.ndarray] = {}
+        best: dict[tuple[int, int], tuple[float, int, int]] = {}
+        with self._read() as conn:
+
+            def sig_of(key: tuple[int, int]) -> np.ndarray:
+                if key not in signatures:
+                    row = conn.execute(
+                        "SELECT sig FROM minhash WHERE docno = ? AND page = ?", key
+                    ).fetchone()
+                    signatures[key] = unpack_signature(row[0])
+                return signatures[key]
+
+            rows = conn.execute("SELECT bucket, docno, page FROM lsh_bands ORDER BY bucket")
+            for _, group in groupby(rows, key=lambda row: row[0]):
+                members = [(docno, page) for _, docno, page in group]
+                if len(members) < 2:
+                    continue
+                if len(members) > DUPLICATE_BUCKET_LIMIT:
+                    pairs = ((members[0], other) for other in members[1:])
+                else:
+                    pairs = combinations(members, 2)
+                for x, y in pairs:
+                    if x[0] == y[0]:
+                        continue
+                    if x[0] > y[0]:
+                        x, y = y, x
+                    seen = best.get((x[0], y[0]))
+                    if seen is not None and seen[1:] == (x[1], y[1]):
+                        continue
+                    score = similarity(sig_of(x), sig_of(y))
+                    if score >= threshold and (seen is None or score > seen[0]):
+                        best[(x[0], y[0])] = (score, x[1], y[1])
+            ids = dict(conn.execute("SELECT docno, id FROM documents"))
+        return [
+            DuplicateLink(ids[a], ids[b], score, page_a, page_b)
+            for (a, b), (score, page_a, page_b) in sorted(best.items())
+            if a in ids and b in ids
+        ]
+
+    def term_positions(
+        self, term: str
+    ) -> Iterator[tuple[str, Path, str, list[tuple[int, int]]]]:
+        """modern に term が現れる全箇所を、文書ごとに (id, フォルダ, 本文, 出現) で返す
+
+        出現は modern の (開始, 終了) の文字位置の昇順で、重なる出現も数える。
+        term は normalize_query() で正規化してから引く（終了 − 開始は正規化後の
+        長さ）。3文字以上の語は本文を探さず、語の中で一番出現行の少ない trigram
+        の出現位置（trigram の位置はパッセージの中の文字位置）を search_instance
+        から集めて、本文と照らして確かめるだけにする。search の行は
+        PASSAGE_OVERLAP 文字ずつ重なっているので、区切りをまたぐ出現も
+        どれかの行から拾える。重なりで2つの行から拾った出現は位置で1つにする。
+        短い語は grams で文書を絞ってから本文を探す。文書は docno の順。
+        """
+        term = _required_term(term)
+        with self._read() as conn:
+            for _, doc_id, doc_dir, modern, spans in self._term_positions(conn, term):
+                yield doc_id, Path(doc_dir), modern, spans
+
+    def _term_positions(
+        self, conn: sqlite3.Connection, term: str
+    ) -> Iterator[tuple[int, str, str, str, list[tuple[int, int]]]]:
+        """term_positions() の本体（正規化済みの term。docno も返す）"""
+        if len(term) >= TRIGRAM_MIN_QUERY_CHARS:
+            found = self._trigram_offsets(conn, term)
+        elif _GRAM_RUN.fullmatch(term):
+            found = {
+                docno: None
+                for (docno,) in conn.execute(
+                    "SELECT rowid FROM grams WHERE grams MATCH ? ORDER BY rowid", (_phrase(term),)
+                )
             }
-        finally:
-            conn.close()
+        else:
+            raise QueryTooShortError(
+                f'"{term}" は{TRIGRAM_MIN_QUERY_CHARS}文字未満で記号を含むため検索できません'
+            )
 
-    # ---------- private ----------
+        docnos = sorted(found)
+        folded = term.lower()
+        for i in range(0, len(docnos), INDEX_BATCH_SIZE):
+            batch = docnos[i : i + INDEX_BATCH_SIZE]
+            rows = conn.execute(
+                f"""
+                SELECT d.docno, d.id, d.dir, t.modern, t.passages
+                  FROM documents d JOIN doc_text t ON t.docno = d.docno
+                 WHERE d.docno IN ({",".join("?" * len(batch))})
+                 ORDER BY d.docno
+                """,
+                batch,
+            ).fetchall()
+            for docno, doc_id, doc_dir, modern_blob, passages in rows:
+                modern = unpack_text(modern_blob)
+                offsets = found[docno]
+                if offsets is None:
+                    positions = _find_all(modern, term)
+                else:
+                    bounds = unpack_passages(passages, len(modern), 0)
+                    positions = sorted(
+                        {
+                            pos
+                            for seq, offset in offsets
+                            if modern[(pos := bounds[seq][0] + offset) : pos + len(term)].lower()
+                            == folded
+                        }
+                    )
+                if positions:
+                    yield docno, doc_id, doc_dir, modern, [(p, p + len(term)) for p in positions]
+
+    def _trigram_offsets(
+        self, conn: sqlite3.Connection, term: str
+    ) -> dict[int, list[tuple[int, int]]]:
+        """term の出現の候補を {docno: [(パッセージ番号, パッセージ内の語の先頭位置)]} で返す"""
+        trigrams = [term[i : i + 3].lower() for i in range(len(term) - 2)]
+        rarest, skip = None, 0
+        for k, trigram in enumerate(trigrams):
+            row = conn.execute("SELECT cnt FROM search_row WHERE term = ?", (trigram,)).fetchone()
+            if row is None:
+                return {}  # 一度も現れない trigram がある
+            if rarest is None or row[0] < rarest:
+                rarest, skip = row[0], k
+        found: dict[int, list[tuple[int, int]]] = {}
+        for rowid, offset in conn.execute(
+            "SELECT doc, offset FROM search_instance WHERE term = ? AND col = 'modern'",
+            (trigrams[skip],),
+        ):
+            found.setdefault(rowid >> PASSAGE_BITS, []).append(
+                (rowid & PASSAGE_MASK, offset - skip)
+            )
+        return found
+
+    # ---------- 語の出現数の集計 ----------
+
+    def term_frequency(
+        self, term: str, by: str = "month", facets: SearchFacets | None = None
+    ) -> list[TermBucket]:
+        """term の modern.txt での出現数を by（month / year / tag）の区分ごとに集計する
+
+        初めて集計する語は track_term() で全文書を数えて登録する（以後は索引の
+        更新が数え直すので、2回目からは SQL 1本）。月・年は created_at から取り、
+        古い順に並べる。タグは出現数の多い順で、複数のタグを持つ文書はそれぞれに
+        数える（タグの無い文書は出ない）。facets で文書を絞り込める。
+        """
+        if by not in TERM_GROUPS:
+            raise ValueError(f"by は {' / '.join(TERM_GROUPS)} のいずれか: {by}")
+        term = self.track_term(term)
+        where = facet_filter(facets) if facets is not None else None
+        with self._read() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT {TERM_GROUPS[by]}, COUNT(*), COUNT(c.docno), COALESCE(SUM(c.count), 0)
+                  FROM documents d
+                  {"JOIN doc_tags t ON t.docno = d.docno" if by == "tag" else ""}
+                  LEFT JOIN term_counts c ON c.term = ? AND c.docno = d.docno
+                 {"WHERE " + where[0] if where else ""}
+                 GROUP BY 1
+                 ORDER BY {"4 DESC, 1" if by == "tag" else "1"}
+                """,
+                [term, *(where[1] if where else [])],
+            ).fetchall()
+        return [TermBucket(*row) for row in rows if row[0]]
+
+    def track_term(self, term: str) -> str:
+        """term を出現数の集計の対象にし、正規化した語を返す
+
+        まだ対象でなければ今の全文書での出現数を数えて term_counts に入れる。
+        出現位置・出現数は term_positions() と同じ数え方（3文字以上の語は
+        パッセージの中で大文字小文字を区別せず、短い語は本文全体で）。
+        """
+        term = _required_term(term)
+        if term in self.tracked_terms():
+            return term
+        with self._write() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            if conn.execute("SELECT 1 FROM tracked_terms WHERE term = ?", (term,)).fetchone():
+                return term  # 別のスレッド・プロセスが先に登録した
+            # search_instance の行数は、パッセージの重なりにある出現を2回数えてしまう
+            counts = [(docno, len(spans)) for docno, *_, spans in self._term_positions(conn, term)]
+            conn.executemany(
+                "INSERT INTO term_counts (term, docno, count) VALUES (?, ?, ?)",
+                ((term, docno, n) for docno, n in counts),
+            )
+            conn.execute("INSERT INTO tracked_terms (term) VALUES (?)", (term,))
+        return term
+
+    def forget_term(self, term: str) -> bool:
+        """term を出現数の集計の対象から外す（対象だったら True）"""
+        term = _required_term(term)
+        with self._write() as conn:
+            conn.execute("DELETE FROM term_counts WHERE term = ?", (term,))
+            return conn.execute("DELETE FROM tracked_terms WHERE term = ?", (term,)).rowcount > 0
+
+    def tracked_terms(self) -> list[str]:
+        """出現数を集計している語"""
+        with self._read() as conn:
+            return [term for (term,) in conn.execute("SELECT term FROM tracked_terms ORDER BY term")]
+
+    def raw_candidates(self, trigger: str) -> list[tuple[str, Path]]:
+        """trigger の全文字を ocr_raw に含みうる文書を (id, フォルダ) で返す
+
+        raw_terms の転置リストの積集合をとるだけなので、実際に trigger が
+        連続して現れるかは呼び出し側で確認する（偽陽性はあるが偽陰性はない）。
+        索引の対象外の文字（かな・ASCII 等）やありふれた文字は絞り込みに
+        使えないので無視し、1文字も使えなければ全文書を返す。
+        """
+        with self._read() as conn:
+            common = self._common_terms(conn)
+            terms = {c for c in trigger if is_raw_term(c)} - common
+
+            docs: set[str] | None = None
+            # 転置リストの短い文字から積をとる
+            for term in sorted(terms, key=lambda t: self._term_df(conn, t)):
+                postings = {
+                    row[0]
+                    for row in conn.execute("SELECT doc FROM raw_terms WHERE term = ?", (term,))
+                }
+                docs = postings if docs is None else docs & postings
+                if not docs:
+                    return []
+
+            rows = conn.execute("SELECT id, dir FROM documents ORDER BY id").fetchall()
+            return [
+                (doc_id, Path(doc_dir))
+                for doc_id, doc_dir in rows
+                if docs is None or doc_id in docs
+            ]
+
+    def literal_candidates(
+        self, groups: list[list[str]], raw: bool = False
+    ) -> list[tuple[str, Path]]:
+        """groups の各組について、組のどれかの文字列を含みうる文書を (id, フォルダ) で返す
 
-    def _connect(self) -> sqlite3.Connection:
-        self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        return sqlite3.connect(self.db_path)
+        正規表現検索（library_grep）の候補の絞り込み用。3文字以上の文字列は
+        search の modern 列（raw=True なら raw 列も）、それより短いものは
+        文字・数字の部分を grams で引く。MAX_TERM_CHARS 文字より長い文字列は
+        その長さまでの断片に分けて引くので、パッセージの区切りをまたぐ一致も
+        重なり（PASSAGE_OVERLAP）のどれかの行に収まり、候補から漏れない
+        （結果は一致する文書を必ず含む）。
+        引けない文字列を含む組は無視し、1組も使えなければ全文書を返す。
+        """
+        columns = "{modern raw}" if raw else "modern"
+        conds, params = [], []
+        for group in groups:
+            if len(group) == 1:
+                alternatives = [[piece] for piece in _literal_pieces(group[0])]
+            else:
+                alternatives = [[max(_literal_pieces(lit), key=len, default="") for lit in group]]
+            for alts in alternatives:
+                cond = _literal_filter(alts, columns)
+                if cond is not None:
+                    conds.append(cond[0])
+                    params += cond[1]
+        where = f"WHERE {' AND '.join(conds)}" if conds else ""
+        with self._read() as conn:
+            rows = conn.execute(
+                f"SELECT id, dir FROM documents {where} ORDER BY id", params
+            ).fetchall()
+        return [(doc_id, Path(doc_dir)) for doc_id, doc_dir in rows]
+
+    # ---------- 接続管理 ----------
+
+    def _connect(self, path: Path | None = None) -> sqlite3.Connection:
+        """チューニング済みの接続を開く（プール・書き込み用の共通部分）
+
+        接続はプールを通じて複数スレッドから（同時には1スレッドずつ）使うので
+        check_same_thread を外す。path は rebuild の一時ファイル用。
+        """
+        path = path or self.db_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(
+            path,
+            timeout=BUSY_TIMEOUT_SECONDS,  # 別プロセスの update() が終わるのを待つ
+            check_same_thread=False,
+            cached_statements=CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA cache_size = {-CACHE_SIZE_MB * 1024}")  # 負値は KiB 指定
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE_MB * 1024 * 1024}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def _ensure_ready(self) -> None:
+        """スキーマ確認・移行を（ハンドルごとに）1回だけ行う"""
+        if self._schema_ready:
+            return
+        with self._write_lock:
+            if self._schema_ready:
+                return
+            conn = self._writer_conn()
+            self._ensure_schema(conn)
+            migrated = self._migrate(conn)
+            conn.commit()
+            if migrated:
+                # 表の作り直しで空いたページを詰め、膨らんだ WAL も切り詰める
+                conn.execute("VACUUM")
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._schema_ready = True
+
+    def _writer_conn(self) -> sqlite3.Connection:
+        if self._writer is None:
+            conn = self._connect()
+            # WAL: 書き込み中も読み取り接続は直前のコミット時点を読める
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._writer = conn
+        return self._writer
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """書き込み用接続を排他的に借りる（抜けるときにコミット、例外ならロールバック）"""
+        with self._write_lock:
+            self._ensure_ready()
+            conn = self._writer_conn()
+            try:
+                yield conn
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+
+    @contextmanager
+    def _read(self) -> Iterator[sqlite3.Connection]:
+        """読み取り用接続をプールから借りる（空きが無ければ返却を待つ）"""
+        self._ensure_ready()
+        with self._reader_slots:
+            try:
+                conn = self._readers.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                with self._write_lock:
+                    self._opened_readers.append(conn)
+            try:
+                yield conn
+            finally:
+                self._readers.put(conn)
+
+    # ---------- private ----------
 
     def _ensure_schema(self, conn: sqlite3.Connection) -> None:
         conn.executescript(
@@ -219,100 +1278,1377 @@ class LibraryIndex:
                 dir         TEXT NOT NULL,
                 title       TEXT NOT NULL,
                 created_at  TEXT NOT NULL,
-                mtime       REAL NOT NULL
+                mtime       REAL NOT NULL,
+                docno       INTEGER,
+                ocr_model        TEXT NOT NULL DEFAULT '',
+                modernize_model  TEXT NOT NULL DEFAULT '',
+                source_count     INTEGER NOT NULL DEFAULT 0
             );
+            CREATE TABLE IF NOT EXISTS doc_tags (
+                tag    TEXT NOT NULL,
+                docno  INTEGER NOT NULL,
+                PRIMARY KEY (tag, docno)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS doc_tags_docno ON doc_tags (docno);
             CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
-                id UNINDEXED,
                 title,
                 modern,
+                raw,
+                content = '',
                 tokenize = 'trigram'
             );
+            CREATE TABLE IF NOT EXISTS doc_text (
+                docno     INTEGER PRIMARY KEY,
+                modern    BLOB NOT NULL,
+                raw       BLOB NOT NULL,
+                passages  BLOB  -- search の各行の区切り（pack_passages()）
+            );
+            CREATE TABLE IF NOT EXISTS raw_terms (
+                term  TEXT NOT NULL,
+                doc   TEXT NOT NULL,
+                PRIMARY KEY (term, doc)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS raw_terms_doc ON raw_terms (doc);
+            CREATE TABLE IF NOT EXISTS common_terms (
+                term  TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+            CREATE VIRTUAL TABLE IF NOT EXISTS grams USING fts5(
+                terms,
+                content = '',
+                detail = none,
+                tokenize = 'unicode61 remove_diacritics 0'
+            );
+            CREATE TABLE IF NOT EXISTS tracked_terms (
+                term  TEXT PRIMARY KEY
+            ) WITHOUT ROWID;
+            -- tracked_terms の語の文書ごとの modern での出現数（0 の文書は持たない）
+            CREATE TABLE IF NOT EXISTS term_counts (
+                term   TEXT NOT NULL,
+                docno  INTEGER NOT NULL,
+                count  INTEGER NOT NULL,
+                PRIMARY KEY (term, docno)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS term_counts_docno ON term_counts (docno);
+            -- 近似重複の検出用の MinHash 署名（page 0 は文書全体、1〜 は元画像ごとのページ）
+            CREATE TABLE IF NOT EXISTS minhash (
+                docno  INTEGER NOT NULL,
+                page   INTEGER NOT NULL,
+                sig    BLOB NOT NULL,
+                PRIMARY KEY (docno, page)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS lsh_bands (
+                bucket  INTEGER NOT NULL,
+                docno   INTEGER NOT NULL,
+                page    INTEGER NOT NULL,
+                PRIMARY KEY (bucket, docno, page)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS lsh_bands_docno ON lsh_bands (docno);
+            CREATE TABLE IF NOT EXISTS index_state (
+                key    TEXT PRIMARY KEY,
+                value
+            ) WITHOUT ROWID;
+            -- search の trigram ごとの出現行数・出現位置（本文なしの FTS でも引ける）
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_row USING fts5vocab(search, 'row');
+            CREATE VIRTUAL TABLE IF NOT EXISTS search_instance USING fts5vocab(search, 'instance');
             """
         )
 
-    def _iter_meta_paths(self) -> Iterator[Path]:
-        """library_root 配下の meta.json を列挙
+    def _migrate(self, conn: sqlite3.Connection) -> bool:
+        """古いスキーマの DB を SCHEMA_VERSION まで引き上げる（引き上げたら True）
 
-        '.' で始まるフォルダ（`.index` 等）は除外する。
+        v0 → v1: 既存文書の raw_terms を ocr_raw.txt から作る
+        （update() の差分判定では変化なしとして素通りしてしまうため）。
+        v1 → v2: documents に docno 列を足し、既存の search の rowid を入れる。
+        v2 → v3: 既存文書の grams を作る。
+        v3 → v4: search に raw 列を足し、grams も ocr_raw の文字を含めて作り直す。
+        v4 → v5: search の本文を圧縮して doc_text に移し、search を本文なしで
+        作り直す。FTS5 は列や content の設定を後から変えられないので、v3 以前の
+        DB もここでまとめて作り直し（raw は ocr_raw.txt から読む）、その後で
+        grams を doc_text から作る（v3・v4 の grams の作成を含む）。
+        v5 → v6: documents に絞り込み用の列を足し、meta.json から埋める（タグは doc_tags）。
+        v6 → v7: search をパッセージ単位で作り直す（v4 以前は doc_text に移した本文から）。
+        v7 → v8: 既存文書の MinHash 署名・LSH のバケットを doc_text から作る。
         """
-        if not self.library_root.exists():
-            return
-        for child in self.library_root.iterdir():
-            if not child.is_dir():
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return False
+        has_content = _fts_has_content(conn, "search")
+        if version < 1:
+            common = self._common_terms(conn)
+            for doc_id, doc_dir in conn.execute("SELECT id, dir FROM documents").fetchall():
+                conn.execute("DELETE FROM raw_terms WHERE doc = ?", (doc_id,))
+                self._insert_raw_terms(conn, doc_id, Path(doc_dir), common)
+            self._prune_common_terms(conn)
+        if version < 2:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+            if "docno" not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN docno INTEGER")
+            if has_content:
+                conn.executemany(
+                    "UPDATE documents SET docno = ? WHERE id = ?",
+                    conn.execute("SELECT rowid, id FROM search").fetchall(),
+                )
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS documents_docno ON documents (docno)"
+        )
+        if version < 6:
+            self._add_facet_columns(conn)
+        for column in ("created_at", "ocr_model", "modernize_model", "source_count"):
+            # docno まで含めて、絞り込みの件数と docno の範囲を索引だけで出せるように
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS documents_{column} ON documents ({column}, docno)"
+            )
+        if version < 5 and has_content:
+            self._move_text_to_store(conn)
+        if version < 9:
+            self._split_search(conn)
+        if version < 4:
+            conn.execute("INSERT INTO grams (grams) VALUES ('delete-all')")
+            conn.executemany(
+                "INSERT INTO grams (rowid, terms) VALUES (?, ?)",
+                (
+                    (docno, gram_text(title, unpack_text(modern), unpack_text(raw)))
+                    for docno, title, modern, raw in conn.execute(
+                        """
+                        SELECT d.docno, d.title, t.modern, t.raw
+                          FROM documents d JOIN doc_text t ON t.docno = d.docno
+                        """
+                    ).fetchall()
+                ),
+            )
+        if version < 8:
+            self._fill_signatures(conn)
+        if version < 9:
+            self._recount_terms(conn)
+        self._bump_generation(conn)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        return True
+
+    def _recount_terms(self, conn: sqlite3.Connection) -> None:
+        """集計している語の出現数を数え直す（v8 以前はパッセージの区切りをまたぐ出現を数えていない）"""
+        terms = [term for (term,) in conn.execute("SELECT term FROM tracked_terms")]
+        conn.execute("DELETE FROM term_counts")
+        for term in terms:
+            conn.executemany(
+                "INSERT INTO term_counts (term, docno, count) VALUES (?, ?, ?)",
+                [(term, docno, len(spans)) for docno, *_, spans in self._term_positions(conn, term)],
+            )
+
+    def _fill_signatures(self, conn: sqlite3.Connection) -> None:
+        """v7 以前の DB の全文書の署名・バケットを doc_text の本文から作る"""
+        conn.execute("DELETE FROM minhash")
+        conn.execute("DELETE FROM lsh_bands")
+        rows = conn.execute(
+            """
+            SELECT d.docno, d.source_count, t.modern, t.raw
+              FROM documents d JOIN doc_text t ON t.docno = d.docno
+            """
+        )
+        for docno, source_count, modern, raw in rows:
+            text = unpack_text(raw) or unpack_text(modern)
+            self._insert_signatures(conn, docno, _signature_rows(text, source_count))
+
+    def _insert_signatures(
+        self, conn: sqlite3.Connection, docno: int, signatures: list[tuple[int, bytes, list[int]]]
+    ) -> None:
+        conn.executemany(
+            "INSERT INTO minhash (docno, page, sig) VALUES (?, ?, ?)",
+            ((docno, page, sig) for page, sig, _ in signatures),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO lsh_bands (bucket, docno, page) VALUES (?, ?, ?)",
+            ((bucket, docno, page) for page, _, buckets in signatures for bucket in buckets),
+        )
+
+    def _add_facet_columns(self, conn: sqlite3.Connection) -> None:
+        """v5 以前の documents に絞り込み用の列を足し、meta.json を読んで埋める"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        for column, decl in (
+            ("ocr_model", "TEXT NOT NULL DEFAULT ''"),
+            ("modernize_model", "TEXT NOT NULL DEFAULT ''"),
+            ("source_count", "INTEGER NOT NULL DEFAULT 0"),
+        ):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE documents ADD COLUMN {column} {decl}")
+        rows = conn.execute("SELECT docno, dir FROM documents").fetchall()
+        with ThreadPoolExecutor(max_workers=max(1, INDEX_WORKERS)) as pool:
+            metas = pool.map(_read_meta_facets, [doc_dir for _, doc_dir in rows])
+            for (docno, _), facets in zip(rows, metas):
+                if facets is None:
+                    continue  # 読めない文書は次の update() で読めたときに入る
+                ocr_model, modernize_model, source_count, tags = facets
+                conn.execute(
+                    "UPDATE documents SET ocr_model = ?, modernize_model = ?, source_count = ?"
+                    " WHERE docno = ?",
+                    (ocr_model, modernize_model, source_count, docno),
+                )
+                conn.executemany(
+                    "INSERT OR IGNORE INTO doc_tags (tag, docno) VALUES (?, ?)",
+                    ((tag, docno) for tag in tags),
+                )
+
+    def _move_text_to_store(self, conn: sqlite3.Connection) -> None:
+        """本文を持つ（v4 以前の）search の本文を圧縮して doc_text へ移す
+
+        search 自体は続く _split_search() が本文なしで作り直す。raw 列の無い
+        （v3 以前の）DB は ocr_raw.txt を読んで入れる。読み込みと圧縮は
+        スレッドプールで行う。
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(search)")}
+        raw_expr = "s.raw" if "raw" in columns else "NULL"
+        cur = conn.execute(
+            f"""
+            SELECT s.rowid, d.title, s.modern, {raw_expr}, d.dir
+              FROM search s JOIN documents d ON d.docno = s.rowid
+            """
+        )
+        with ThreadPoolExecutor(max_workers=max(1, INDEX_WORKERS)) as pool:
+            while rows := cur.fetchmany(INDEX_BATCH_SIZE):
+                if "raw" in columns:
+                    raws = [row[3] or "" for row in rows]
+                else:
+                    raws = [raw or "" for raw in pool.map(_read_raw, [row[4] for row in rows])]
+                modern_blobs = pool.map(pack_text, [row[2] for row in rows])
+                raw_blobs = pool.map(pack_text, raws)
+                conn.executemany(
+                    "INSERT INTO doc_text (docno, modern, raw) VALUES (?, ?, ?)",
+                    zip([row[0] for row in rows], modern_blobs, raw_blobs),
+                )
+
+    def _split_search(self, conn: sqlite3.Connection) -> None:
+        """search をパッセージ単位（rowid = docno << PASSAGE_BITS | 番号）で作り直す
+
+        本文は doc_text から読み、区切りを doc_text.passages に入れる。本文の
+        展開と区切りの計算はスレッドプールで行う。v7〜v8 の（パッセージが
+        重ならない）search もここで作り直す。
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(doc_text)")}
+        if "passages" not in columns:
+            conn.execute("ALTER TABLE doc_text ADD COLUMN passages BLOB")
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE search_next USING fts5(
+                title,
+                modern,
+                raw,
+                content = '',
+                tokenize = 'trigram'
+            )
+            """
+        )
+        last = -1
+        with ThreadPoolExecutor(max_workers=max(1, INDEX_WORKERS)) as pool:
+            # doc_text を書き換えながら読むので、docno の順に1バッチずつ引き直す
+            while rows := conn.execute(
+                """
+                SELECT t.docno, d.title, t.modern, t.raw
+                  FROM doc_text t JOIN documents d ON d.docno = t.docno
+                 WHERE t.docno > ?
+                 ORDER BY t.docno
+                 LIMIT ?
+                """,
+                (last, INDEX_BATCH_SIZE),
+            ).fetchall():
+                last = rows[-1][0]
+                for docno, passages, search_rows in pool.map(_split_stored, rows):
+                    conn.execute(
+                        "UPDATE doc_text SET passages = ? WHERE docno = ?", (passages, docno)
+                    )
+                    conn.executemany(
+                        "INSERT INTO search_next (rowid, title, modern, raw) VALUES (?, ?, ?, ?)",
+                        search_rows,
+                    )
+        conn.execute("DROP TABLE search")
+        conn.execute("ALTER TABLE search_next RENAME TO search")
+
+    def _scan_documents(self) -> dict[str, tuple[str, float]]:
+        """library_root 配下の文書を {id: (フォルダの絶対パス, meta.json の mtime)} で返す
+
+        meta.json のあるフォルダだけが対象（シャードなら自分の範囲のものだけ）。
+        '.' で始まるフォルダ（`.index` 等）は除外する。文書数ぶん呼ぶので Path を作らず os.scandir / os.stat で済ませる。
+        """
+        found: dict[str, tuple[str, float]] = {}
+        try:
+            entries = os.scandir(self.library_root)
+        except FileNotFoundError:
+            return found
+        root = str(self.library_root.resolve()) + os.sep
+        meta_name = os.sep + "meta.json"
+        with entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(".") or not entry.is_dir():
+                    continue
+                if self.shard is not None and not self.shard.contains(name):
+                    continue
+                try:
+                    st = os.stat(entry.path + meta_name)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    found[name] = (root + name, st.st_mtime)
+        return found
+
+    def _stat_documents(self, doc_ids: Iterable[str]) -> dict[str, tuple[str, float]]:
+        """指定した文書だけを _scan_documents() と同じ形で返す（無いものは含めない）"""
+        found: dict[str, tuple[str, float]] = {}
+        root = str(self.library_root.resolve()) + os.sep
+        for doc_id in doc_ids:
+            # ジャーナルの中身は信用しすぎない（パス区切りや隠しフォルダは文書ではない）
+            if not doc_id or doc_id.startswith(".") or os.sep in doc_id or "/" in doc_id:
                 continue
-            if child.name.startswith("."):
+            if self.shard is not None and not self.shard.contains(doc_id):
                 continue
-            meta_path = child / "meta.json"
-            if meta_path.is_file():
-                yield meta_path
+            try:
+                st = os.stat(root + doc_id + os.sep + "meta.json")
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                found[doc_id] = (root + doc_id, st.st_mtime)
+        return found
 
-    def _load_meta(self, meta_path: Path) -> dict | None:
-        try:
-            return json.loads(meta_path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError) as e:
-            print(f"⚠ meta.json を読めません ({meta_path}): {e}")
-            return None
+    def _stored_mtimes(self, conn: sqlite3.Connection, doc_ids: list[str]) -> dict[str, float]:
+        existing: dict[str, float] = {}
+        for doc_id in doc_ids:
+            row = conn.execute("SELECT mtime FROM documents WHERE id = ?", (doc_id,)).fetchone()
+            if row is not None:
+                existing[doc_id] = row[0]
+        return existing
 
-    def _load_modern(self, doc_dir: Path) -> str | None:
-        modern_path = doc_dir / "modern.txt"
-        if not modern_path.is_file():
-            print(f"⚠ modern.txt がありません: {doc_dir}")
-            return None
-        try:
-            return modern_path.read_text(encoding="utf-8")
-        except OSError as e:
-            print(f"⚠ modern.txt を読めません ({modern_path}): {e}")
-            return None
+    def _journal_reader(self) -> str:
+        """変更ジャーナルの読み手名（読み終えた位置をインデックスごとに記録する）"""
+        if self.shard is None:
+            return DEFAULT_READER
+        return f"{SHARDS_DIR_NAME}/{self.shard.by}/{self.shard.key}"
+
+    def _get_state(self, conn: sqlite3.Connection, key: str):
+        row = conn.execute("SELECT value FROM index_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, conn: sqlite3.Connection, key: str, value) -> None:
+        conn.execute(
+            "INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)", (key, value)
+        )
+
+    def _bump_generation(self, conn: sqlite3.Connection) -> None:
+        """検索結果が変わりうる書き込みの印に世代を進める（結果キャッシュのキー）
+
+        値は時刻（ns）なので、rebuild で DB ごと作り直しても前の世代と重ならない。
+        このインスタンスのキャッシュは古い世代のぶんをここで捨てる。
+        """
+        self._set_state(conn, "generation", time.time_ns())
+        with self._cache_lock:
+            self._cache.clear()
+
+    def _sync(
+        self, conn: sqlite3.Connection, bulk: bool, doc_ids: Iterable[str] | None = None
+    ) -> IndexStats:
+        """ライブラリの現状に DB を合わせる（update / rebuild の本体）
+
+        doc_ids を渡すとその文書だけを見る（ジャーナル経由の差分更新）。
+        None ならライブラリ全体を走査する。
+
+        変更のあった文書はスレッドプールで1バッチ先まで読み込んでおき、
+        書き込みはバッチごとの executemany で行う。bulk（rebuild）か変更が
+        全文書の OPTIMIZE_RATIO 以上のときは、索引中の FTS5 の自動マージを
+        減らし、最後に optimize で1セグメントにまとめる（optimize は索引全体を
+        書き直すので、少しの変更では行わない）。
+        """
+        if doc_ids is None:
+            stats = IndexStats(reconciled=True)
+            existing = dict(conn.execute("SELECT id, mtime FROM documents"))
+            found = self._scan_documents()
+            n_docs = len(found)
+        else:
+            stats = IndexStats()
+            doc_ids = sorted(doc_ids)
+            existing = self._stored_mtimes(conn, doc_ids)
+            found = self._stat_documents(doc_ids)
+            (n_docs,) = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+
+        removed = existing.keys() - found.keys()
+        if removed:
+            self._delete_docs(conn, removed)
+            stats.removed = len(removed)
+
+        changed = sorted(
+            (doc_id, doc_dir, mtime)
+            for doc_id, (doc_dir, mtime) in found.items()
+            if doc_id not in existing or abs(existing[doc_id] - mtime) >= 1e-6
+        )
+        if not changed:
+            return stats
+
+        heavy = bulk or len(changed) >= n_docs * OPTIMIZE_RATIO
+        if heavy:
+            conn.execute(
+                "INSERT INTO search (search, rank) VALUES ('automerge', ?)", (BULK_AUTOMERGE,)
+            )
+
+        common = self._common_terms(conn)
+        (docno,) = conn.execute("SELECT COALESCE(MAX(docno), 0) FROM documents").fetchone()
+        batches = [
+            changed[i : i + INDEX_BATCH_SIZE] for i in range(0, len(changed), INDEX_BATCH_SIZE)
+        ]
+        with ThreadPoolExecutor(max_workers=max(1, INDEX_WORKERS)) as pool:
+            pending = pool.map(_load_document, batches[0])
+            for i in range(len(batches)):
+                loaded = list(pending)
+                if i + 1 < len(batches):
+                    # 書き込んでいる間に次のバッチを読ませておく
+                    pending = pool.map(_load_document, batches[i + 1])
+                docno = self._write_batch(conn, loaded, existing, common, docno, stats)
+
+        if stats.added:
+            self._prune_common_terms(conn)
+        if heavy:
+            conn.execute("INSERT INTO search (search) VALUES ('optimize')")
+            conn.execute(
+                "INSERT INTO search (search, rank) VALUES ('automerge', ?)", (DEFAULT_AUTOMERGE,)
+            )
+        return stats
 
-    def _insert_doc(
+    def _write_batch(
         self,
         conn: sqlite3.Connection,
-        doc_id: str,
-        doc_dir: Path,
-        meta: dict,
-        modern: str,
-        mtime: float,
-    ) -> None:
-        title = meta.get("title", "") or ""
-        created_at = meta.get("created_at", "") or ""
-        conn.execute(
-            "INSERT INTO documents (id, dir, title, created_at, mtime) VALUES (?, ?, ?, ?, ?)",
-            (doc_id, str(doc_dir.resolve()), title, created_at, mtime),
+        loaded: list["_LoadedDoc | None"],
+        existing: dict[str, float],
+        common: set[str],
+        docno: int,
+        stats: IndexStats,
+    ) -> int:
+        """読み込んだ1バッチを書き込み、最後に使った docno を返す
+
+        読めなかった文書は skipped に数え、更新の場合も古い索引を残す。
+        """
+        doc_rows = []
+        text_rows = []
+        search_rows = []
+        gram_rows = []
+        tag_rows = []
+        count_rows = []
+        signatures = []
+        postings = []
+        stale = []
+        tracked = [term for (term,) in conn.execute("SELECT term FROM tracked_terms")]
+        for doc in loaded:
+            if doc is None:
+                stats.skipped += 1
+                continue
+            if doc.id in existing:
+                stale.append(doc.id)
+                stats.updated += 1
+            else:
+                stats.added += 1
+            docno += 1
+            doc_rows.append(
+                (
+                    doc.id,
+                    doc.dir,
+                    doc.title,
+                    doc.created_at,
+                    doc.mtime,
+                    docno,
+                    doc.ocr_model,
+                    doc.modernize_model,
+                    doc.source_count,
+                )
+            )
+            tag_rows += [(tag, docno) for tag in doc.tags]
+            text_rows.append((docno, doc.modern_blob, doc.raw_blob, pack_passages(doc.passages)))
+            search_rows += _search_rows(docno, doc.title, doc.modern, doc.raw, doc.passages)
+            gram_rows.append((docno, doc.grams))
+            for term in tracked:
+                if n := _count_occurrences(doc.modern, term):
+                    count_rows.append((term, docno, n))
+            signatures.append((docno, doc.signatures))
+            postings += [(term, doc.id) for term in doc.raw_terms - common]
+
+        if stale:
+            self._delete_docs(conn, stale)
+        conn.executemany(
+            "INSERT INTO documents (id, dir, title, created_at, mtime, docno,"
+            " ocr_model, modernize_model, source_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            doc_rows,
         )
-        conn.execute(
-            "INSERT INTO search (id, title, modern) VALUES (?, ?, ?)",
-            (doc_id, title, modern),
+        conn.executemany("INSERT OR IGNORE INTO doc_tags (tag, docno) VALUES (?, ?)", tag_rows)
+        conn.executemany(
+            "INSERT INTO doc_text (docno, modern, raw, passages) VALUES (?, ?, ?, ?)", text_rows
+        )
+        conn.executemany(
+            "INSERT INTO search (rowid, title, modern, raw) VALUES (?, ?, ?, ?)", search_rows
+        )
+        conn.executemany("INSERT INTO grams (rowid, terms) VALUES (?, ?)", gram_rows)
+        conn.executemany(
+            "INSERT INTO term_counts (term, docno, count) VALUES (?, ?, ?)", count_rows
+        )
+        for docno_, rows in signatures:
+            self._insert_signatures(conn, docno_, rows)
+        # 主キー順に並べておくと B-tree への挿入がまとまる
+        postings.sort()
+        conn.executemany("INSERT OR IGNORE INTO raw_terms (term, doc) VALUES (?, ?)", postings)
+        return docno
+
+    def _delete_docs(self, conn: sqlite3.Connection, doc_ids) -> None:
+        rows = [(doc_id,) for doc_id in doc_ids]
+        # search・grams は中身を持たない FTS なので、入れたときと同じ内容を
+        # doc_text から戻して（search はパッセージごとに切り直して）渡して消す
+        old = []
+        search_rows = []
+        for (doc_id,) in rows:
+            for docno, title, modern_blob, raw_blob, passages in conn.execute(
+                """
+                SELECT d.docno, d.title, t.modern, t.raw, t.passages
+                  FROM documents d JOIN doc_text t ON t.docno = d.docno
+                 WHERE d.id = ?
+                """,
+                (doc_id,),
+            ):
+                modern, raw = unpack_text(modern_blob), unpack_text(raw_blob)
+                old.append((docno, title, modern, raw))
+                bounds = unpack_passages(passages, len(modern), len(raw))
+                search_rows += _search_rows(docno, title, modern, raw, bounds)
+        conn.executemany(
+            "INSERT INTO search (search, rowid, title, modern, raw) VALUES ('delete', ?, ?, ?, ?)",
+            search_rows,
+        )
+        conn.executemany(
+            "INSERT INTO grams (grams, rowid, terms) VALUES ('delete', ?, ?)",
+            ((docno, gram_text(title, modern, raw)) for docno, title, modern, raw in old),
+        )
+        conn.executemany("DELETE FROM doc_text WHERE docno = ?", ((row[0],) for row in old))
+        conn.executemany("DELETE FROM doc_tags WHERE docno = ?", ((row[0],) for row in old))
+        conn.executemany("DELETE FROM term_counts WHERE docno = ?", ((row[0],) for row in old))
+        conn.executemany("DELETE FROM minhash WHERE docno = ?", ((row[0],) for row in old))
+        conn.executemany("DELETE FROM lsh_bands WHERE docno = ?", ((row[0],) for row in old))
+        conn.executemany("DELETE FROM raw_terms WHERE doc = ?", rows)
+        conn.executemany("DELETE FROM documents WHERE id = ?", rows)
+
+    # ---------- raw_terms（ocr_raw の文字 → 文書） ----------
+
+    def _insert_raw_terms(
+        self, conn: sqlite3.Connection, doc_id: str, doc_dir: Path, common: set[str]
+    ) -> None:
+        """ocr_raw.txt に現れる索引対象の文字を raw_terms に登録する
+
+        ocr_raw.txt が無い文書は登録しない（再正規化の対象にもならない）。
+        """
+        terms = _read_raw_terms(str(doc_dir))
+        if terms is None:
+            return
+        conn.executemany(
+            "INSERT OR IGNORE INTO raw_terms (term, doc) VALUES (?, ?)",
+            ((term, doc_id) for term in terms - common),
         )
 
-    def _delete_doc(self, conn: sqlite3.Connection, doc_id: str) -> None:
-        conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,))
-        conn.execute("DELETE FROM search WHERE id = ?", (doc_id,))
+    def _common_terms(self, conn: sqlite3.Connection) -> set[str]:
+        return {row[0] for row in conn.execute("SELECT term FROM common_terms")}
 
-    def _build_match_expr(self, query: str) -> str:
-        """スペース区切りクエリを FTS5 の AND 構文に変換
+    def _term_df(self, conn: sqlite3.Connection, term: str) -> int:
+        (df,) = conn.execute(
+            "SELECT COUNT(*) FROM raw_terms WHERE term = ?", (term,)
+        ).fetchone()
+        return df
+
+    def _prune_common_terms(self, conn: sqlite3.Connection) -> None:
+        """出現文書数が RAW_TERMS_COMMON_RATIO を超えた文字の転置リストを捨てる
+
+        文書数が RAW_TERMS_COMMON_MIN_DOCS に満たないうちは判定しない
+        （数件の段階では何でも「ありふれて」見えるため）。
+        一度 common になった文字は rebuild するまで common のまま。
+        """
+        (n_docs,) = conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+        if n_docs < RAW_TERMS_COMMON_MIN_DOCS:
+            return
+        threshold = int(n_docs * RAW_TERMS_COMMON_RATIO)
+        common = [
+            row[0]
+            for row in conn.execute(
+                "SELECT term FROM raw_terms GROUP BY term HAVING COUNT(*) > ?",
+                (threshold,),
+            )
+        ]
+        conn.executemany(
+            "INSERT OR IGNORE INTO common_terms (term) VALUES (?)", ((t,) for t in common)
+        )
+        conn.executemany("DELETE FROM raw_terms WHERE term = ?", ((t,) for t in common))
+
+    def _plan_query(
+        self,
+        query: str,
+        raw: bool = True,
+        spellings: Callable[[str], list[str]] | None = None,
+    ) -> _QueryPlan:
+        """スペース区切りクエリを search / grams の MATCH 式に振り分ける
 
         - 半角/全角スペースで分割
         - 各語を normalize_query() で照合用に正規化（旧字体・仮名遣い等を
           インデックス側 modern.txt と揃える）
-        - 正規化「後」の文字数が TRIGRAM_MIN_QUERY_CHARS 未満なら
-          QueryTooShortError（拗音縮約で字数が縮むため長さ判定は正規化の後）
+        - 正規化「後」の文字数で振り分ける（拗音縮約で字数が縮むため）。
+          TRIGRAM_MIN_QUERY_CHARS 文字以上は search、それ未満は grams
+        - grams は文字・数字の1〜2文字しか持たないので、記号を含む短い語は
+          QueryTooShortError
+        - 正規化していない ocr_raw には、入力そのままの語と正規化後の語の
+          それぞれの字体違い（variant_forms）を OR で当てる。search では
+          title・modern と raw で列を分け、grams は列を持たないので同じ OR に
+          並べる。
+          raw=False なら raw 列を引かない（raw_overhead() の比較用）
+        - spellings があれば、各語を spellings(正規化後の語) の綴りとの OR にする
+          （title・modern と raw のどちらにも当てる）
         - ダブルクォートで囲んで AND 連結（特殊文字を無害化）
+        - MAX_TERM_CHARS 文字を超える語（綴り・字体違いも）は LibrarySearchError
         """
         # 半角/全角スペース両方で分割
-        raw_terms = [t for t in query.replace("　", " ").split(" ") if t]
-        if not raw_terms:
+        typed_terms = [t for t in query.replace("　", " ").split(" ") if t]
+        if not typed_terms:
             raise QueryTooShortError("検索語が空です")
 
         # 各語を照合用に正規化（インデックス側と字体・仮名遣いを揃える）
-        terms = [normalize_query(t) for t in raw_terms]
+        terms = [normalize_query(t) for t in typed_terms]
 
-        for term in terms:
-            if len(term) < TRIGRAM_MIN_QUERY_CHARS:
+        long_exprs = []
+        short_exprs = []
+        variants: list[str] = []
+        extra: list[str] = []
+        for typed, term in zip(typed_terms, terms):
+            alts = [alt for alt in spellings(term) if alt != term] if spellings else []
+            extra += alts
+            forms = list(dict.fromkeys([*_raw_forms(typed, term), *alts])) if raw else []
+            variants += forms
+            _check_term_length(term, *alts, *forms)
+            if len(term) >= TRIGRAM_MIN_QUERY_CHARS:
+                expr = "{title modern} : " + _or_expr([term, *alts])
+                raw_forms = [f for f in forms if len(f) >= TRIGRAM_MIN_QUERY_CHARS]
+                if raw_forms:
+                    expr = f"({expr} OR raw : {_or_expr(raw_forms)})"
+                long_exprs.append(expr)
+                continue
+            if not _GRAM_RUN.fullmatch(term):
                 raise QueryTooShortError(
-                    f'"{term}" は{TRIGRAM_MIN_QUERY_CHARS}文字未満のため '
-                    "trigram で検索できません"
+                    f'"{term}" は{TRIGRAM_MIN_QUERY_CHARS}文字未満で記号を含むため検索できません'
                 )
+            gram_forms = [
+                f
+                for f in [*alts, *forms]
+                if len(f) < TRIGRAM_MIN_QUERY_CHARS and _GRAM_RUN.fullmatch(f)
+            ]
+            short_exprs.append(_or_expr(list(dict.fromkeys([term, *gram_forms]))))
+
+        return _QueryPlan(
+            trigram=" AND ".join(long_exprs) or None,
+            trigram_terms=long_exprs,
+            grams=" AND ".join(short_exprs) or None,
+            terms=list(dict.fromkeys([*terms, *extra])),
+            variants=list(dict.fromkeys(variants)),
+        )
+
+
+def shard_key(doc_id: str, by: str) -> str:
+    """文書 ID の先頭の作成日から、by（year・month）のシャードのキーを返す"""
+    width = SHARD_BY[by]
+    if _SHARD_ID.match(doc_id[:width]):
+        return doc_id[:width]
+    return OTHER_SHARD
+
+
+def shard_dir(library_root: Path, by: str) -> Path:
+    """by（year・month）で分けたシャードの DB を置くフォルダ"""
+    return library_root / INDEX_DIR_NAME / SHARDS_DIR_NAME / by
+
+
+_SHARD_ID = re.compile(r"\d{4}(-\d{2})?\Z")
+
+
+def _required_term(term: str) -> str:
+    """1語の検索語を正規化する（空なら QueryTooShortError、長すぎれば LibrarySearchError）"""
+    term = normalize_query(term.strip())
+    if not term:
+        raise QueryTooShortError("検索語が空です")
+    _check_term_length(term)
+    return term
+
+
+def _check_term_length(*terms: str) -> None:
+    """MAX_TERM_CHARS 文字を超える語があれば LibrarySearchError
+
+    パッセージの重なり（PASSAGE_OVERLAP）より長い語は、区切りをまたいだ出現を
+    引けないので、黙って見落とすかわりに断る。
+    """
+    for term in terms:
+        if len(term) > MAX_TERM_CHARS:
+            raise LibrarySearchError(
+                f'"{term[:10]}…" は長すぎます（1語 {MAX_TERM_CHARS} 文字まで）'
+            )
+
+
+def _count_occurrences(modern: str, term: str) -> int:
+    """term_positions() と同じ数え方での modern の term の出現数（term_counts 用）
+
+    パッセージの区切りをまたぐ出現も数えるよう、本文全体で数える（term_positions()
+    も重なった search の行からそれを拾う）。3文字以上の語は大文字小文字を区別しない。
+    """
+    if len(term) < TRIGRAM_MIN_QUERY_CHARS:
+        return len(_find_all(modern, term))
+    return len(_find_all(modern.lower(), term.lower()))
+
+
+def _find_all(text: str, term: str) -> list[int]:
+    """text 中の term の全出現位置（重なりも数える）"""
+    positions = []
+    pos = text.find(term)
+    while pos >= 0:
+        positions.append(pos)
+        pos = text.find(term, pos + 1)
+    return positions
+
+
+def _literal_pieces(literal: str) -> list[str]:
+    """literal を MAX_TERM_CHARS 文字までの断片に分ける（最後の断片も同じ長さに揃える）
+
+    必須リテラルの部分文字列はどれも必須なので、断片ごとに引いても候補は減りすぎない。
+    """
+    if len(literal) <= MAX_TERM_CHARS:
+        return [literal] if literal else []
+    starts = [*range(0, len(literal) - MAX_TERM_CHARS, MAX_TERM_CHARS), len(literal) - MAX_TERM_CHARS]
+    return [literal[i : i + MAX_TERM_CHARS] for i in starts]
+
+
+def _literal_filter(alts: list[str], columns: str) -> tuple[str, list] | None:
+    """alts のどれかを含む文書に絞る documents の条件（引けない文字列があれば None）"""
+    long = [a for a in alts if len(a) >= TRIGRAM_MIN_QUERY_CHARS]
+    short = []
+    for a in alts:
+        if len(a) >= TRIGRAM_MIN_QUERY_CHARS:
+            continue
+        runs = _GRAM_RUN.findall(a)
+        if not runs:
+            return None
+        short.append(max(runs, key=len))
+    parts, params = [], []
+    if long:
+        parts.append(f"docno IN (SELECT rowid >> {PASSAGE_BITS} FROM search WHERE search MATCH ?)")
+        params.append(f"{columns} : ({' OR '.join(_phrase(a) for a in long)})")
+    if short:
+        parts.append("docno IN (SELECT rowid FROM grams WHERE grams MATCH ?)")
+        params.append(" OR ".join(_phrase(a) for a in dict.fromkeys(short)))
+    return "(" + " OR ".join(parts) + ")", params
+
+
+def _phrase(term: str) -> str:
+    # ダブルクォート内のダブルクォートは "" にエスケープ
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _or_expr(terms: list[str]) -> str:
+    if len(terms) == 1:
+        return _phrase(terms[0])
+    return "(" + " OR ".join(_phrase(t) for t in terms) + ")"
+
+
+# ---------- 字体違いへの展開（raw 列の検索語） ----------
+
+
+def variant_forms(term: str, limit: int = MAX_VARIANTS) -> list[str]:
+    """term の各字を新字体・旧字体・異体字に置き換えた綴りを返す（先頭は term）
+
+    例: variant_forms("国家") → ["国家", "國家", "圀家"]
+    組み合わせが limit を超える字から先は展開しない（term の字のまま）。
+    """
+    forms = [""]
+    for char in term:
+        alts = _char_variants(char)
+        if len(forms) * len(alts) > limit:
+            alts = alts[:1]
+        forms = [form + alt for form in forms for alt in alts]
+    return forms
+
+
+def _char_variants(char: str) -> tuple[str, ...]:
+    """char と同じ新字体に変換される字（char・新字体・旧字体・異体字）
+
+    senzen_word の変換表は正引き・逆引きともソート済みのコードポイント列を
+    二分探索するだけなので、検索のたびに表を走査することはない。結果は
+    1字ごとにキャッシュする。
+    """
+    alts = _VARIANT_CACHE.get(char)
+    if alts is None:
+        base = convert_old_kanji(char)
+        if len(base) != 1:
+            base = char
+        alts = _VARIANT_CACHE[char] = tuple(dict.fromkeys([char, base, *get_old_forms(base)]))
+    return alts
+
+
+_VARIANT_CACHE: dict[str, tuple[str, ...]] = {}
+
+
+def _raw_forms(typed: str, term: str) -> list[str]:
+    """raw 列に当てる綴り（計 MAX_VARIANTS まで）
+
+    入力そのままの語の字体違い（原文の仮名遣い・カタカナ助詞を保つ）と、
+    正規化後の語の字体違いを合わせる。
+    """
+    return list(dict.fromkeys([*variant_forms(typed), *variant_forms(term)]))[:MAX_VARIANTS]
+
+
+# facet_counts() で数える documents の項目（名前, 式）
+_FACET_COLUMNS = [
+    ("year", "substr(d.created_at, 1, 4)"),
+    ("ocr_model", "d.ocr_model"),
+    ("modernize_model", "d.modernize_model"),
+    ("sources", "d.source_count"),
+]
+_DATE_PREFIX = re.compile(r"\d{4}(-\d{2}(-\d{2})?)?")
+# term_frequency() の区分（by）と、documents d・doc_tags t の1行から区分を出す式
+TERM_GROUPS = {
+    "month": "substr(d.created_at, 1, 7)",
+    "year": "substr(d.created_at, 1, 4)",
+    "tag": "t.tag",
+}
+
+
+def facet_filter(facets: SearchFacets) -> tuple[str, list] | None:
+    """絞り込み条件を documents d の1行に対する WHERE 句とパラメータにする（条件なしなら None）
+
+    各条件は documents の列の索引（タグは doc_tags の主キー）で確かめられる形にする。
+    同じ列名の表を持つカタログ（utils/library_catalog.py）でも使う。
+    """
+    conds, params = [], []
+    for tag in facets.tags:
+        conds.append("EXISTS (SELECT 1 FROM doc_tags t WHERE t.tag = ? AND t.docno = d.docno)")
+        params.append(tag)
+    for value in (facets.since, facets.until):
+        if value is not None and not _DATE_PREFIX.fullmatch(value):
+            raise LibrarySearchError(f"日付は YYYY・YYYY-MM・YYYY-MM-DD で指定してください: {value}")
+    if facets.since is not None:
+        conds.append("d.created_at >= ?")
+        params.append(facets.since)
+    if facets.until is not None:
+        # 前方一致で含める（"2026-03" なら "2026-03-31T…" まで）
+        conds.append("d.created_at <= ?")
+        params.append(facets.until + "\U0010ffff")
+    if facets.model is not None:
+        conds.append("(d.ocr_model = ? OR d.modernize_model = ?)")
+        params += [facets.model, facets.model]
+    if facets.min_sources is not None:
+        conds.append("d.source_count >= ?")
+        params.append(facets.min_sources)
+    if not conds:
+        return None
+    return " AND ".join(conds), params
+
+
+def _format_cursor(score: float, docno: int) -> str:
+    """並び順の位置（関連度, docno）を after に渡す文字列にする"""
+    return f"{score!r}:{docno}"
 
-        # ダブルクォート内のダブルクォートは "" にエスケープ
-        quoted = [f'"{t.replace(chr(34), chr(34) * 2)}"' for t in terms]
-        return " AND ".join(quoted)
+
+def _parse_cursor(cursor: str | None) -> tuple[float, int] | None:
+    """_format_cursor() の逆。形式が違えば LibrarySearchError"""
+    if cursor is None:
+        return None
+    score, sep, docno = cursor.rpartition(":")
+    try:
+        if not sep:
+            raise ValueError(cursor)
+        return float(score), int(docno)
+    except ValueError:
+        raise LibrarySearchError(f"カーソルの形式が不正です: {cursor!r}") from None
+
+
+def _plan_snippet(
+    modern: str, raw: str, plan: _QueryPlan, span: tuple[int, int, int, int] | None = None
+) -> tuple[str, int]:
+    """抜粋と、その modern での位置を返す
+
+    span（passage_bounds() の1区間）を渡すと、そのパッセージ（と search の行に
+    重ねて入れた続きの PASSAGE_OVERLAP 文字）の中で語を探す。
+    modern に語が無く ocr_raw だけに一致した文書は ocr_raw から抜粋を作り、
+    位置は対応する modern の区間の先頭とする。
+    """
+    m_start, m_end, r_start, r_end = _row_span(span) if span else (0, len(modern), 0, len(raw))
+    found = _first_term(modern, plan.terms, m_start, m_end)
+    if found is None and raw:
+        return make_snippet(raw, plan.variants, start=r_start, end=r_end), m_start
+    pos = found[0] if found is not None else m_start
+    return make_snippet(modern, plan.terms, start=m_start, end=m_end), pos
+
+
+# ---------- grams（1〜2文字の語の索引） ----------
+
+# grams に入れる文字の並び（unicode61 の既定で単語を成す文字 ≒ 文字・数字）
+_GRAM_RUN = re.compile(r"[^\W_]+")
+
+
+def gram_text(*texts: str) -> str:
+    """grams に入れる文字列（異なり1文字・2文字を空白区切りで並べたもの）
+
+    文書の削除時に同じ文字列を作り直して渡すので、並びが毎回同じになるよう
+    set ではなく（挿入順を保つ）dict で重複を除く。
+    """
+    runs = [run for text in texts for run in _GRAM_RUN.findall(text)]
+    grams = dict.fromkeys("".join(runs))
+    grams.update(dict.fromkeys([g for run in runs for g in map(str.__add__, run, run[1:])]))
+    return " ".join(grams)
+
+
+def make_snippet(
+    text: str, terms: list[str], width: int = SNIPPET_CHARS, start: int = 0, end: int | None = None
+) -> str:
+    """text[start:end] で最初に見つかった語の前後 width 文字を切り出し、語を [ ] で囲む
+
+    search・grams は中身を持たない（FTS の snippet() が使えない）ので Python で作る。
+    書式は FTS5 の snippet(search, -1, '[', ']', '...', 16) に合わせている。
+    語を探すのは start〜end の間だけだが、前後の文字は text 全体から取る。
+    """
+    found = _first_term(text, terms, start, len(text) if end is None else end)
+    if found is None:
+        cut = text[start : start + width]
+        return ("..." if start > 0 else "") + cut + ("..." if start + width < len(text) else "")
+    pos, term = found
+    left = max(0, min(pos - (width - len(term)) // 2, len(text) - width))
+    right = left + width
+    pattern = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+    window = re.sub(f"({pattern})", r"[\1]", text[left:right])
+    return ("..." if left > 0 else "") + window + ("..." if right < len(text) else "")
+
+
+def _first_term(text: str, terms: list[str], start: int, end: int) -> tuple[int, str] | None:
+    """text[start:end] で最初に現れる語の (位置, 語)（どれも無ければ None）"""
+    hits = [(pos, t) for t in terms if (pos := text.find(t, start, end)) >= 0]
+    return min(hits) if hits else None
+
+
+def _estimate_page(pos: int, length: int, source_count: int) -> int | None:
+    """modern の pos 文字目が何枚目の元画像にありそうか（1枚以下の文書は None）
+
+    一括 OCR の modern.txt はページの切れ目を持たないので、位置の比で割り振る目安。
+    """
+    if source_count <= 1:
+        return None
+    return min(source_count, 1 + pos * source_count // max(1, length))
+
+
+# ---------- パッセージ（search の1行） ----------
+
+# パッセージの切れ目の候補（前のものほど優先: 空行 → 改行 → 文末）
+_PASSAGE_BREAKS = [re.compile(r"\n[^\S\n]*\n\s*"), re.compile(r"\n"), re.compile(r"[。！？]")]
+_RAW_ALIGN_CHARS = 200  # raw の区切りを位置の比の点から後ろへ寄せる範囲
+_RAW_BREAK = re.compile(r"\n|[。！？]")
+
+
+def passage_bounds(
+    modern: str, raw: str, size: int | None = None
+) -> list[tuple[int, int, int, int]]:
+    """search の各行にする (modern の開始, 終了, raw の開始, 終了) の並び
+
+    modern を段落ごとに、size 文字を超えない範囲でまとめて区切る（空行・改行・
+    文末の順に、区間の後半にある最後の切れ目で切る。無ければ size 文字で切る）。
+    size が 0 なら文書全体で1区間。区間は隙間なく続き、両端は本文の両端。
+    raw は口語体変換で長さが変わっているので、modern の区切りと同じ位置の比の
+    点から後ろの最初の改行・文末で切る（modern が空なら raw だけで区切る）。
+    size を省くと PASSAGE_CHARS。
+    """
+    if size is None:
+        size = PASSAGE_CHARS
+    if not modern:
+        raw_ends = _split_ends(raw, size)
+        return [(0, 0, s, e) for s, e in zip([0, *raw_ends], raw_ends)]
+    modern_ends = _split_ends(modern, size)
+    raw_ends = []
+    for end in modern_ends[:-1]:
+        target = max(end * len(raw) // len(modern), raw_ends[-1] if raw_ends else 0)
+        m = _RAW_BREAK.search(raw, target, target + _RAW_ALIGN_CHARS)
+        raw_ends.append(m.end() if m else target)
+    raw_ends.append(len(raw))
+    return [
+        (m_start, m_end, r_start, r_end)
+        for m_start, m_end, r_start, r_end in zip(
+            [0, *modern_ends], modern_ends, [0, *raw_ends], raw_ends
+        )
+    ]
+
+
+def _split_ends(text: str, size: int) -> list[int]:
+    """text を size 文字以下の区間に切ったときの各区間の終わり"""
+    ends = []
+    start = 0
+    while size > 0 and len(text) - start > size:
+        cut = start + size
+        for pattern in _PASSAGE_BREAKS:
+            last = None
+            for last in pattern.finditer(text, start + size // 2, start + size):
+                pass
+            if last is not None:
+                cut = last.end()
+                break
+        ends.append(cut)
+        start = cut
+    ends.append(len(text))
+    return ends
+
+
+def pack_passages(passages: list[tuple[int, int, int, int]]) -> bytes | None:
+    """doc_text.passages に入れる形（各区間の終わりの並び。1区間なら None）"""
+    if len(passages) <= 1:
+        return None
+    ends = array("I", [p[1] for p in passages] + [p[3] for p in passages])
+    return ends.tobytes()
+
+
+def unpack_passages(
+    blob: bytes | None, modern_len: int, raw_len: int
+) -> list[tuple[int, int, int, int]]:
+    if not blob:
+        return [(0, modern_len, 0, raw_len)]
+    ends = array("I")
+    ends.frombytes(blob)
+    n = len(ends) // 2
+    modern_ends, raw_ends = ends[:n].tolist(), ends[n:].tolist()
+    return list(zip([0, *modern_ends], modern_ends, [0, *raw_ends], raw_ends))
+
+
+def _row_span(span: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+    """パッセージ span の search の行に入れる範囲（終わりを PASSAGE_OVERLAP 文字延ばす）
+
+    区切りをまたぐ MAX_TERM_CHARS 文字までの語が、語の始まるパッセージの行に
+    丸ごと入る。本文の長さを超えた終わりはスライスで切れる。
+    """
+    m_start, m_end, r_start, r_end = span
+    return m_start, m_end + PASSAGE_OVERLAP, r_start, r_end + PASSAGE_OVERLAP
+
+
+def _search_rows(
+    docno: int, title: str, modern: str, raw: str, passages: list[tuple[int, int, int, int]]
+) -> list[tuple[int, str, str, str]]:
+    """search に入れる (rowid, title, modern, raw) の行（題名は先頭のパッセージだけに入れる）
+
+    各行は _row_span() の範囲で、隣の行と PASSAGE_OVERLAP 文字ずつ重なる。
+    """
+    return [
+        (docno << PASSAGE_BITS | seq, title if seq == 0 else "", modern[ms:me], raw[rs:re_])
+        for seq, (ms, me, rs, re_) in enumerate(map(_row_span, passages))
+    ]
+
+
+def _split_stored(row: tuple[int, str, bytes, bytes]) -> tuple[int, bytes | None, list]:
+    """doc_text の1行から (docno, doc_text.passages, search の行) を作る（移行用）"""
+    docno, title, modern_blob, raw_blob = row
+    modern, raw = unpack_text(modern_blob), unpack_text(raw_blob)
+    passages = passage_bounds(modern, raw)
+    return docno, pack_passages(passages), _search_rows(docno, title, modern, raw, passages)
+
+
+# ---------- raw_terms の対象文字 ----------
+
+
+def is_raw_term(char: str) -> bool:
+    """raw_terms に登録する文字か
+
+    ASCII・ラテン文字・かな・和文の句読点は、どの文書にもほぼ必ず現れて
+    絞り込みに役立たないので対象外。漢字・変体仮名・記号類など
+    （CJK部首補助 U+2E80 以降）を対象にする。
+    """
+    code = ord(char)
+    return code >= 0x2E80 and not (0x3000 <= code <= 0x30FF)
+
+
+def raw_terms_of(text: str) -> set[str]:
+    """normalize_before_corrections(text) に現れる raw_terms 対象の文字の集合
+
+    ①〜④ の変換で漢字などの索引対象文字が変わるのは1文字単位の変換
+    （NFKC・旧字体→新字体）だけで、複数文字にまたがる変換（仮名の合成・
+    歴史的仮名遣い）は仮名しか生まないので、異なり文字ごとの結果を
+    キャッシュして和をとれば全文を変換したのと同じ集合になる。
+    """
+    terms: set[str] = set()
+    for char in set(text):
+        mapped = _TERM_CACHE.get(char)
+        if mapped is None:
+            mapped = _TERM_CACHE[char] = frozenset(
+                c for c in normalize_before_corrections(char) if is_raw_term(c)
+            )
+        terms |= mapped
+    return terms
+
+
+_TERM_CACHE: dict[str, frozenset[str]] = {}
+
+
+# ---------- 文書ファイルの読み込み（スレッドプールから呼ぶ） ----------
+
+
+def _load_document(entry: tuple[str, str, float]) -> _LoadedDoc | None:
+    """(id, フォルダ, mtime) の文書を読む。meta.json / modern.txt が読めなければ None"""
+    doc_id, doc_dir, mtime = entry
+    meta_path = os.path.join(doc_dir, "meta.json")
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        print(f"⚠ meta.json を読めません ({meta_path}): {e}")
+        return None
+
+    modern_path = os.path.join(doc_dir, "modern.txt")
+    try:
+        with open(modern_path, encoding="utf-8") as f:
+            modern = f.read()
+    except FileNotFoundError:
+        print(f"⚠ modern.txt がありません: {doc_dir}")
+        return None
+    except OSError as e:
+        print(f"⚠ modern.txt を読めません ({modern_path}): {e}")
+        return None
+
+    title = meta.get("title", "") or ""
+    raw = _read_raw(doc_dir)
+    ocr_model, modernize_model, source_count, tags = _meta_facets(meta)
+    passages = passage_bounds(modern, raw or "")
+    return _LoadedDoc(
+        id=doc_id,
+        dir=doc_dir,
+        mtime=mtime,
+        title=title,
+        created_at=meta.get("created_at", "") or "",
+        modern=modern,
+        raw=raw or "",
+        modern_blob=pack_text(modern),
+        raw_blob=pack_text(raw or ""),
+        passages=passages,
+        raw_terms=raw_terms_of(raw) if raw is not None else set(),
+        grams=gram_text(title, modern, raw or ""),
+        ocr_model=ocr_model,
+        modernize_model=modernize_model,
+        source_count=source_count,
+        tags=tags,
+        signatures=_signature_rows(raw or modern, source_count),
+    )
+
+
+def _signature_rows(text: str, pages: int) -> list[tuple[int, bytes, list[int]]]:
+    """本文（ocr_raw、無ければ modern）の (ページ, 署名, LSH のバケット)"""
+    return [(page, pack_signature(sig), band_keys(sig)) for page, sig in document_signatures(text, pages)]
+
+
+def _meta_facets(meta: dict) -> tuple[str, str, int, list[str]]:
+    """meta.json から絞り込み用の (OCR モデル, 口語体変換モデル, 元画像の枚数, タグ) を取る"""
+    ocr = meta.get("ocr") or {}
+    modernize = meta.get("modernize") or {}
+    tags = [str(tag).strip() for tag in meta.get("tags") or []]
+    return (
+        str(ocr.get("model") or ""),
+        str(modernize.get("model") or "") if modernize.get("enabled", True) else "",
+        len(meta.get("sources") or []),
+        sorted({tag for tag in tags if tag}),
+    )
+
+
+def _read_meta_facets(doc_dir: str) -> tuple[str, str, int, list[str]] | None:
+    """doc_dir の meta.json を読んで _meta_facets() を返す（読めなければ None）"""
+    try:
+        with open(os.path.join(doc_dir, "meta.json"), encoding="utf-8") as f:
+            return _meta_facets(json.load(f))
+    except (json.JSONDecodeError, OSError):
+        return None
+
+
+def _read_raw(doc_dir: str) -> str | None:
+    """ocr_raw.txt の中身（ファイルが無い・読めなければ None）"""
+    try:
+        with open(os.path.join(doc_dir, "ocr_raw.txt"), encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _read_raw_terms(doc_dir: str) -> set[str] | None:
+    """ocr_raw.txt の raw_terms 対象文字（ファイルが無ければ None）
+
+    OCR誤読ルールは normalize_before_corrections() 後のテキストに照合される
+    ので、索引もその変換後の文字で作る。
+    """
+    raw = _read_raw(doc_dir)
+    return None if raw is None else raw_terms_of(raw)
+
+
+# ---------- doc_text（圧縮した本文） ----------
+
+
+def pack_text(text: str) -> bytes:
+    """doc_text に入れる形（UTF-8 を zlib で圧縮）"""
+    return zlib.compress(text.encode("utf-8"), TEXT_COMPRESS_LEVEL)
+
+
+def unpack_text(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _fts_has_content(conn: sqlite3.Connection, table: str) -> bool:
+    """FTS5 表が本文を持つか（content='' の表には %_content が無い）"""
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_schema WHERE type = 'table' AND name = ?", (f"{table}_content",)
+    ).fetchone()
+    return row is not None
+
+
+# ---------- 索引サイズの内訳（stat・raw_overhead 用） ----------
+
+PROBE_LIMIT = 20  # raw_overhead() の計測で1語あたりに取る件数（search() の既定と同じ）
+
+
+def _table_sizes(conn: sqlite3.Connection) -> dict[str, int]:
+    """表ごとのディスク上のサイズ（索引・FTS5 の影の表は元の表に合算）"""
+    owners = dict(conn.execute("SELECT name, tbl_name FROM sqlite_schema"))
+    sizes: dict[str, int] = {}
+    for name, size in conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"):
+        table = owners.get(name, name)
+        for fts in ("search", "grams"):
+            if table.startswith(fts + "_"):
+                table = fts
+        sizes[table] = sizes.get(table, 0) + size
+    return sizes
+
+
+def _fts_column_tokens(conn: sqlite3.Connection, table: str) -> list[int]:
+    """FTS5 表の列ごとのトークン総数
+
+    FTS5 は bm25 の平均文書長のために、%_data の id=1 の行に
+    「行数, 列ごとのトークン総数…」を SQLite の可変長整数で持っている。
+    """
+    row = conn.execute(f"SELECT block FROM {table}_data WHERE id = 1").fetchone()
+    values = []
+    block = row[0] if row else b""
+    pos = 0
+    while pos < len(block):
+        value = 0
+        for i in range(9):
+            byte = block[pos]
+            pos += 1
+            if i == 8:
+                value = (value << 8) | byte
+                break
+            value = (value << 7) | (byte & 0x7F)
+            if byte < 0x80:
+                break
+        values.append(value)
+    return values[1:]  # 先頭は行数
+
+
+def _probe_terms(conn: sqlite3.Connection, samples: int) -> list[str]:
+    """計測用の検索語（文書の modern から1語ずつ切り出す）"""
+    n = TRIGRAM_MIN_QUERY_CHARS + 1
+    terms = []
+    for (blob,) in conn.execute(
+        """
+        SELECT modern FROM doc_text
+         WHERE docno IN (SELECT docno FROM documents ORDER BY random() LIMIT ?)
+        """,
+        (samples,),
+    ):
+        run = max(_GRAM_RUN.findall(unpack_text(blob)), key=len, default="")
+        if len(run) >= n:
+            middle = (len(run) - n) // 2
+            terms.append(run[middle : middle + n])
+    return terms
+
+
+# ---------- 組み立てた DB の取り込み ----------
+
+
+def install_build(build_path: Path, dest: sqlite3.Connection) -> None:
+    """一時ファイルに組み立てた DB（build_path）を、開いている dest に写して消す
+
+    os.replace で WAL モードの DB を差し替えると、ほかのプロセスが開いたままの
+    接続は古いファイルに書き続け、その書き込みは失われる。sqlite3 の
+    バックアップ API は dest の書き込みロックを取ってページを写すので、ほかの
+    接続は次に読み書きするとき新しい中身を見る。写したら WAL を切り詰める。
+    """
+    src = sqlite3.connect(build_path)
+    try:
+        src.backup(dest)
+    finally:
+        src.close()
+    dest.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    build_path.unlink()
+
+
+# ---------- 近似重複の照合 ----------
+
+
+def read_near_duplicates(
+    library_root: Path, text: str, pages: int = 1, threshold: float = THRESHOLD
+) -> list[DuplicateMatch]:
+    """保存時の照合用の near_duplicates()（search.db を読み取り専用で開く）
+
+    スキーマの移行も書き込みロックの待ちもしない。索引が無い・移行前の版・
+    ロック中などで引けなければ空を返す（知らせるだけの照合なので保存を遅らせない）。
+    """
+    path = Path(library_root) / INDEX_DIR_NAME / INDEX_DB_NAME
+    if not path.exists():
+        return []
+    try:
+        conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=0)
+    except sqlite3.Error:
+        return []
+    try:
+        (version,) = conn.execute("PRAGMA user_version").fetchone()
+        if version < SCHEMA_VERSION:
+            return []
+        return _near_duplicates(conn, text, pages, threshold)
+    except sqlite3.Error:
+        return []
+    finally:
+        conn.close()
+
+
+def _near_duplicates(
+    conn: sqlite3.Connection, text: str, pages: int, threshold: float
+) -> list[DuplicateMatch]:
+    """near_duplicates() の本体（接続は呼び出し側で用意する）"""
+    queries = [(page, sig, band_keys(sig)) for page, sig in document_signatures(text, pages)]
+    best: dict[int, tuple[float, int, int]] = {}
+    for query_page, sig, buckets in queries:
+        marks = ", ".join("?" * len(buckets))
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT m.docno, m.page, m.sig
+              FROM lsh_bands b JOIN minhash m ON m.docno = b.docno AND m.page = b.page
+             WHERE b.bucket IN ({marks})
+            """,
+            buckets,
+        )
+        for docno, page, blob in rows:
+            score = similarity(sig, unpack_signature(blob))
+            if score >= threshold and score > best.get(docno, (0.0,))[0]:
+                best[docno] = (score, page, query_page)
+    matches = []
+    for docno, (score, page, query_page) in best.items():
+        row = conn.execute(
+            "SELECT id, dir, title, created_at FROM documents WHERE docno = ?", (docno,)
+        ).fetchone()
+        if row is not None:
+            matches.append(
+                DuplicateMatch(row[0], Path(row[1]), row[2], row[3], score, page, query_page)
+            )
+    matches.sort(key=lambda m: (-m.similarity, m.id))
+    return matches
+
+
+# ---------- 使い回し用ハンドル ----------
+
+_HANDLES: dict[Path, LibraryIndex] = {}
+_HANDLES_LOCK = threading.Lock()
+
+
+def get_index(library_root: Path) -> LibraryIndex:
+    """ライブラリごとに1つだけ LibraryIndex を作って使い回す
+
+    対話メニューのように同じプロセスで何度も検索する場合、接続・スキーマ確認・
+    プリペアドステートメントのキャッシュをそのまま再利用できる。
+    """
+    key = Path(library_root).resolve()
+    with _HANDLES_LOCK:
+        idx = _HANDLES.get(key)
+        if idx is None:
+            idx = _HANDLES[key] = LibraryIndex(Path(library_root))
+        return idx
@@ -0,0 +1,213 @@
+"""
+シャード分割・連合検索モジュール（prewar index --shard-by / search --shard-by・--with-library）
+
+1つの search.db に何十万文書も入れると、FTS5 の索引が1つの巨大な構造になり、
+更新・作り直しのたびに全体を書き直す。プロジェクトごとにライブラリのフォルダを
+分けている場合は、そもそも1つの索引で引けない。
+
+FederatedIndex は次の単位に分けた LibraryIndex（シャード）をまとめて扱う。
+  - ライブラリのフォルダごと（複数の library_root）
+  - by を渡すと、さらに文書 ID の先頭の作成日で年・月ごと
+    （library/.index/shards/year/2026.db など。IndexShard を参照）
+シャードはそれぞれ独立した DB なので、1つだけ作り直せ（rebuild(["2026"])）、
+更新も別々のスレッドで並行に進む。変更ジャーナルは各シャードが自分の読み手名で
+読むので、ほかのシャードや search.db の更新で未読のエントリが消えることはない。
+
+検索は全シャードにスレッドで同時に投げ、関連度（bm25）の順にまとめて上位を返す。
+bm25 の語の重み（IDF）はシャードの中の文書数から計算するので、1つの索引で
+引いたときと順位が少し変わることがある。関連度が同じ（短い語だけの検索など）
+なら作成日の新しい順。作成日で絞り込む検索は、範囲に入らない年・月のシャードを
+引かない。
+
+使い方:
+    from pathlib import Path
+    from utils.library_shards import FederatedIndex
+
+    with FederatedIndex([Path("library"), Path("library_b")], by="year") as fed:
+        fed.update()
+        for h in fed.search("関東 震災"):
+            print(h.id, h.dir, h.score)
+        fed.rebuild(["2026"])  # 2026年のシャードだけ作り直す
+"""
+
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils.config import CONFIG
+from utils.library_search import (
+    OTHER_SHARD,
+    RESULT_CACHE_SIZE,
+    SHARD_BY,
+    IndexShard,
+    IndexStats,
+    LibraryIndex,
+    SearchFacets,
+    SearchHit,
+    shard_dir,
+    shard_key,
+)
+
+# ---------- 定数 ----------
+
+WORKERS = CONFIG.get("shards.workers")  # シャードを並行に検索・更新するスレッド数
+
+
+# ---------- メインクラス ----------
+
+
+class FederatedIndex:
+    """複数のライブラリ・日付のシャードをまとめて更新・検索する"""
+
+    def __init__(
+        self,
+        library_roots: Iterable[Path],
+        by: str | None = None,
+        workers: int = WORKERS,
+        result_cache_size: int = RESULT_CACHE_SIZE,
+    ):
+        if by is not None and by not in SHARD_BY:
+            raise ValueError(f"シャードの単位は {'・'.join(SHARD_BY)} のどれかです: {by}")
+        self.library_roots = list(dict.fromkeys(Path(root) for root in library_roots))
+        self.by = by
+        self._indexes: dict[tuple[Path, str | None], LibraryIndex] = {}
+        self._lock = threading.Lock()
+        self._workers = max(1, workers)
+        self._cache_size = result_cache_size  # シャードごとの検索結果のキャッシュ
+        self._pool: ThreadPoolExecutor | None = None
+
+    def __enter__(self) -> "FederatedIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """シャードの接続とスレッドを閉じる（次に使うとき開き直す）"""
+        with self._lock:
+            for idx in self._indexes.values():
+                idx.close()
+            self._indexes.clear()
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    # ---------- public API ----------
+
+    def shards(self, scan: bool = False) -> list[LibraryIndex]:
+        """シャードの LibraryIndex をライブラリ・キーの順に返す
+
+        by を渡していれば、DB のあるシャードのほか、scan=True ならライブラリを
+        走査して、まだ DB の無い年・月の文書のシャードも加える。
+        """
+        found = []
+        for root in self.library_roots:
+            if self.by is None:
+                found.append(self._index(root, None))
+                continue
+            keys = {path.stem for path in shard_dir(root, self.by).glob("*.db")}
+            if scan:
+                keys |= _document_keys(root, self.by, known=keys)
+            found.extend(self._index(root, key) for key in sorted(keys))
+        return found
+
+    def update(self, reconcile: bool = False) -> dict[str, IndexStats]:
+        """全シャードを並行に差分更新し、{シャード名: 集計} を返す"""
+        shards = self.shards(scan=True)
+        results = self._executor().map(lambda idx: idx.update(reconcile=reconcile), shards)
+        return dict(zip(map(self.label, shards), results))
+
+    def rebuild(self, names: Iterable[str] | None = None) -> dict[str, IndexStats]:
+        """シャードを並行に作り直す（names でシャード名かキーを指定すればそれだけ）"""
+        shards = self.shards(scan=True)
+        if names is not None:
+            wanted = set(names)
+            shards = [
+                idx
+                for idx in shards
+                if self.label(idx) in wanted or (idx.shard and idx.shard.key in wanted)
+            ]
+        results = self._executor().map(LibraryIndex.rebuild, shards)
+        return dict(zip(map(self.label, shards), results))
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        facets: SearchFacets | None = None,
+        spellings: Callable[[str], list[str]] | None = None,
+    ) -> list[SearchHit]:
+        """全シャードを同時に検索し、関連度の順にまとめて上位 limit 件を返す
+
+        各シャードから上位 limit 件ずつ引く。引数・例外は LibraryIndex.search() と同じ
+        （after によるページ送りはできない）。
+        """
+        shards = [idx for idx in self.shards() if _may_contain(idx.shard, facets)]
+        pool = self._executor()
+        futures = [pool.submit(idx.search, query, limit, None, facets, spellings) for idx in shards]
+        hits = [hit for future in futures for hit in future.result()]
+        hits.sort(key=lambda h: h.created_at, reverse=True)
+        hits.sort(key=lambda h: h.score)
+        return hits[:limit]
+
+    def label(self, idx: LibraryIndex) -> str:
+        """シャードの表示名（ライブラリが1つなら "2026"、複数なら "library/2026"）"""
+        parts = [idx.library_root.name] if len(self.library_roots) > 1 or idx.shard is None else []
+        if idx.shard is not None:
+            parts.append(idx.shard.key)
+        return "/".join(parts)
+
+    # ---------- private ----------
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self._workers, thread_name_prefix="shard")
+            return self._pool
+
+    def _index(self, root: Path, key: str | None) -> LibraryIndex:
+        with self._lock:
+            idx = self._indexes.get((root, key))
+            if idx is None:
+                shard = IndexShard(self.by, key) if key is not None else None
+                idx = self._indexes[(root, key)] = LibraryIndex(
+                    root, result_cache_size=self._cache_size, shard=shard
+                )
+            return idx
+
+
+# ---------- 内部ヘルパー ----------
+
+
+def _document_keys(root: Path, by: str, known: set[str]) -> set[str]:
+    """root の文書の年・月のキー（meta.json は known に無いキーの最初の文書でだけ確かめる）"""
+    keys: set[str] = set()
+    try:
+        entries = os.scandir(root)
+    except FileNotFoundError:
+        return keys
+    with entries:
+        for entry in entries:
+            name = entry.name
+            if name.startswith(".") or not entry.is_dir():
+                continue
+            key = shard_key(name, by)
+            if key in known or key in keys:
+                continue
+            if os.path.isfile(os.path.join(entry.path, "meta.json")):
+                keys.add(key)
+    return keys
+
+
+def _may_contain(shard: IndexShard | None, facets: SearchFacets | None) -> bool:
+    """作成日の絞り込みの範囲にシャードの年・月がかかるか"""
+    if shard is None or facets is None or shard.key == OTHER_SHARD:
+        return True
+    key = shard.key
+    if facets.since and key < facets.since[: len(key)]:
+        return False
+    if facets.until and key[: len(facets.until)] > facets.until:
+        return False
+    return True
@@ -0,0 +1,702 @@
+"""
+意味検索（埋め込みベクトル）インデックスモジュール
+
+modern.txt をパッセージ（文の切れ目で数百文字ずつ）に分け、Ollama の埋め込み
+モデルでベクトル化して保存し、検索語と意味の近いパッセージを引く（F2）。
+語句が一致しなくても、言い回しの違う文書を拾える。
+
+使い方:
+    from pathlib import Path
+    from utils.library_search import LibraryIndex
+    from utils.library_vectors import VectorIndex
+
+    with LibraryIndex(Path("library")) as idx:
+        idx.update()
+        with VectorIndex(idx) as vectors:
+            vectors.update()                    # 変わった文書のパッセージだけ埋め込む
+            for h in vectors.search("地震の被害", limit=10):
+                print(h.id, h.similarity, h.snippet)
+
+保存先は library/.index/ の2つ:
+  - vectors.db: パッセージの表（行番号 → 文書・位置・本文のハッシュ）と状態
+  - vectors-<世代>.f16: 単位長に正規化した float16 の行列（行番号 = 表の row）
+行列は NumPy の memmap で読むので、全体をメモリに載せない。追加は末尾に書き足し、
+削除は表から消すだけ（行列には残る）。消えた行が COMPACT_RATIO を超えたら、
+生きている行だけを新しいファイルに詰め直し、表の状態で参照先を切り替える
+（途中で落ちても古いファイルを指したまま）。
+
+検索は検索語のベクトルとのコサイン類似度（単位ベクトル同士の内積）を行列全体と
+まとめて計算する。行数が ANN_MIN_ROWS 以上になったら IVF（k-means の代表点
+ごとの行のリスト）を作り、検索語に近い NPROBE 個のリストの行だけを比べる
+近似検索に切り替える。
+
+差分は LibraryIndex が記録した meta.json の mtime で判定し、変わった文書でも
+本文が同じパッセージは埋め込み直さない（本文のハッシュで行を使い回す）。
+埋め込みモデルを変えたら全件を埋め込み直す。
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.library_journal import BUSY_TIMEOUT_SECONDS, INDEX_DIR_NAME
+from utils.library_search import LibraryIndex
+from utils.ollama_client import OllamaConnectionError, OllamaModelNotFoundError
+
+# ---------- 定数 ----------
+
+VECTORS_DB_NAME = "vectors.db"
+EMBED_MODEL = CONFIG.get("models.embed")
+EMBED_BATCH_SIZE = CONFIG.get("semantic.batch_size")  # 1回の埋め込み呼び出しに渡すパッセージ数
+PASSAGE_CHARS = CONFIG.get("semantic.passage_chars")  # パッセージの長さの目安（文字数）
+ANN_MIN_ROWS = CONFIG.get("semantic.ann_min_rows")  # これ以上の行数で IVF の近似検索にする
+NPROBE = CONFIG.get("semantic.nprobe")  # 近似検索で比べる IVF のリスト数
+
+DOC_BATCH = 64  # 何文書ごとに埋め込んでコミットするか
+COMPACT_RATIO = 0.3  # 消えた行が行列のこの割合を超えたら詰め直す
+RETRAIN_GROWTH = 2.0  # IVF を作ったときの行数のこの倍になったら作り直す
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE_PER_LIST = 64  # k-means の学習に使う1リストあたりの行数
+SCORE_CHUNK_ROWS = 4096  # 類似度の計算で一度に float32 に広げる行数（CPU キャッシュに収まる程度）
+PASSAGES_PER_HIT = 4  # 文書ごとにまとめる前に、上位何倍のパッセージを見るか
+SNIPPET_CHARS = 80  # 抜粋として表示するパッセージの長さ（文字数）
+
+
+# ---------- データクラス ----------
+
+
+@dataclass
+class SemanticHit:
+    """意味検索の結果1件（文書ごとに一番近いパッセージ）"""
+
+    id: str
+    dir: Path
+    title: str
+    snippet: str  # 一番近いパッセージ（SNIPPET_CHARS 文字まで）
+    created_at: str
+    similarity: float  # コサイン類似度（大きいほど近い）
+    start: int  # そのパッセージの modern.txt 上の位置（文字）
+    end: int
+
+
+@dataclass
+class VectorStats:
+    """意味検索インデックス更新の集計"""
+
+    embedded: int = 0  # 埋め込んだパッセージ
+    reused: int = 0  # 本文が変わらず使い回したパッセージ
+    removed: int = 0  # 消したパッセージ
+    documents: int = 0  # 埋め込み直した文書
+    compacted: bool = False  # 行列を詰め直した
+    ann_lists: int = 0  # IVF を作り直したときのリスト数（作り直さなければ 0）
+
+
+@dataclass
+class _Snapshot:
+    """検索に使う行列と行の一覧（インデックスの世代ごとに読み直す）"""
+
+    generation: int
+    matrix: np.ndarray  # (行数, 次元) の float16 memmap
+    rows: np.ndarray  # 生きている行（昇順）
+    centroids: np.ndarray | None  # IVF の代表点 (リスト数, 次元)。無ければ全件比較
+    order: np.ndarray | None  # 生きている行を IVF のリスト順に並べたもの
+    offsets: np.ndarray | None  # リスト l の行は order[offsets[l]:offsets[l + 1]]
+
+
+# ---------- 例外クラス ----------
+
+
+class VectorIndexError(Exception):
+    """意味検索インデックスの汎用例外"""
+
+    pass
+
+
+# ---------- 埋め込み ----------
+
+
+class Embedder(Protocol):
+    """テキストの列を (件数, 次元) の行列にする"""
+
+    model: str
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray: ...
+
+
+class OllamaEmbedder:
+    """Ollama の埋め込みモデル（nomic-embed-text / bge-m3 など）
+
+    使い方:
+        embedder = OllamaEmbedder()
+        vectors = embedder.embed(["関東大震災の被害", "警察の報告"])
+    """
+
+    def __init__(self, model: str = EMBED_MODEL):
+        self.model = model
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """texts をまとめて1回の API 呼び出しで埋め込む"""
+        import ollama
+
+        try:
+            response = ollama.embed(model=self.model, input=list(texts))
+        except ConnectionError:
+            raise OllamaConnectionError(
+                "Ollamaサーバーに接続できません。\n"
+                "→ Ollama.app を起動してください（メニューバーにアイコンが出ます）"
+            )
+        except ollama.ResponseError as e:
+            if "not found" in str(e).lower():
+                raise OllamaModelNotFoundError(
+                    f"モデル '{self.model}' が見つかりません。\n"
+                    f"→ ollama pull {self.model} を実行してください"
+                )
+            raise
+        return np.asarray(response.embeddings, dtype=np.float32)
+
+
+class HashingEmbedder:
+    """文字2-gram を特徴ハッシュで固定次元に落とす、決定的な埋め込み
+
+    Ollama なしで動かすテスト・ベンチマーク用。意味ではなく字面の近さしか
+    見ないが、同じテキストには必ず同じベクトルを返す。ハッシュしただけでは
+    ほとんどの次元が 0 になるので、固定の直交行列で回して（内積は変わらない）
+    実際の埋め込みと同じく全次元に値が載るようにする。
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.model = f"hashing-{dim}"
+        rng = np.random.default_rng(dim)
+        self._rotation = np.linalg.qr(rng.standard_normal((dim, dim)))[0].astype(np.float32)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+            if len(codes) < 2:
+                continue
+            h = (codes[:-1] * np.uint64(1000003) ^ codes[1:]) * np.uint64(2654435761)
+            h &= np.uint64(0xFFFFFFFF)
+            signs = np.where(h >> np.uint64(31), -1.0, 1.0)
+            out[i] = np.bincount((h % np.uint64(self.dim)).astype(np.intp), signs, self.dim)
+        return out @ self._rotation
+
+
+# ---------- メインクラス ----------
+
+
+class VectorIndex:
+    """ライブラリの意味検索インデックス
+
+    本文は LibraryIndex（search.db の doc_text）から読むので、先に
+    LibraryIndex.update() で全文検索の索引を最新にしておく。
+    """
+
+    def __init__(self, index: LibraryIndex, embedder: Embedder | None = None):
+        self.index = index
+        self.embedder = embedder or OllamaEmbedder()
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._snapshot: _Snapshot | None = None
+
+    def __enter__(self) -> "VectorIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def db_path(self) -> Path:
+        return self.index.library_root / INDEX_DIR_NAME / VECTORS_DB_NAME
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._snapshot = None
+
+    # ---------- public API ----------
+
+    def update(self) -> VectorStats:
+        """全文検索の索引にある文書に合わせて、パッセージを埋め込み・削除する
+
+        埋め込みは EMBED_BATCH_SIZE 件ずつの呼び出しにまとめ、DOC_BATCH 文書ごとに
+        コミットする（途中で止めても、それまでの分は次回に持ち越さない）。
+        """
+        stats = VectorStats()
+        current = self.index.documents()
+        with self._lock:
+            conn = self._db()
+            stored_model = _get_state(conn, "model")
+            if stored_model is not None and stored_model != self.embedder.model:
+                self._reset(conn)
+            with conn:
+                _set_state(conn, "model", self.embedder.model)
+
+            stored = dict(conn.execute("SELECT id, mtime FROM vector_docs"))
+            removed = sorted(stored.keys() - current.keys())
+            if removed:
+                with conn:
+                    for doc_id in removed:
+                        cur = conn.execute("DELETE FROM passages WHERE doc = ?", (doc_id,))
+                        stats.removed += cur.rowcount
+                        conn.execute("DELETE FROM vector_docs WHERE id = ?", (doc_id,))
+            changed = sorted(doc_id for doc_id, mtime in current.items() if stored.get(doc_id) != mtime)
+            for i in range(0, len(changed), DOC_BATCH):
+                batch = changed[i : i + DOC_BATCH]
+                self._embed_documents(conn, batch, current, stats)
+
+            if not (removed or changed):
+                return stats
+            self._compact_if_sparse(conn, stats)
+            self._train_if_needed(conn, stats)
+            with conn:
+                _set_state(conn, "generation", time.time_ns())
+        return stats
+
+    def search(self, query: str, limit: int = 20, exact: bool = False) -> list[SemanticHit]:
+        """query と意味の近い文書を、一番近いパッセージの類似度の順に返す
+
+        IVF を作ってあれば近似検索（exact=True なら全件と比べる）。
+        """
+        if not query.strip():
+            raise VectorIndexError("検索語が空です")
+        q = self._embed([query])[0].astype(np.float32)
+        snapshot = self._load_snapshot()
+        if snapshot is None or not len(snapshot.rows):
+            return []
+
+        if snapshot.centroids is not None and not exact:
+            rows = _probe_rows(snapshot, q, NPROBE)
+            scores = _row_scores(snapshot.matrix, rows, q)
+        else:
+            rows = snapshot.rows
+            scores = _all_scores(snapshot.matrix, q)[rows]
+        k = min(len(rows), limit * PASSAGES_PER_HIT)
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return self._hits(rows[top], scores[top], limit)
+
+    def stat(self) -> dict:
+        """意味検索インデックスの統計（未作成なら空の dict）"""
+        if not self.db_path.exists():
+            return {}
+        with self._lock:
+            conn = self._db()
+            if _get_state(conn, "generation") is None:
+                return {}
+            (alive,) = conn.execute("SELECT COUNT(*) FROM passages").fetchone()
+            (docs,) = conn.execute("SELECT COUNT(*) FROM vector_docs").fetchone()
+            matrix = self._matrix_path(conn)
+            centroids = _get_state(conn, "centroids")
+            dim = _get_state(conn, "dim") or 0
+            return {
+                "model": _get_state(conn, "model"),
+                "dim": dim,
+                "document_count": docs,
+                "passage_count": alive,
+                "matrix_rows": _get_state(conn, "rows") or 0,
+                "matrix_bytes": matrix.stat().st_size if matrix and matrix.exists() else 0,
+                "ann_lists": len(centroids) // (4 * dim) if centroids and dim else 0,
+            }
+
+    # ---------- private: 更新 ----------
+
+    def _embed_documents(
+        self,
+        conn: sqlite3.Connection,
+        doc_ids: list[str],
+        mtimes: dict[str, float],
+        stats: VectorStats,
+    ) -> None:
+        """文書のパッセージを埋め込んで行列に書き足し、表を差し替える（1トランザクション）"""
+        moved = []  # (開始, 終了, 使い回す行)
+        pending = []  # (文書, 開始, 終了, ハッシュ, 本文)
+        dead = []
+        seen = []
+        for doc_id, text in self.index.document_texts(doc_ids):
+            old: dict[bytes, list[int]] = {}
+            for row, digest in conn.execute(
+                "SELECT row, hash FROM passages WHERE doc = ? ORDER BY row", (doc_id,)
+            ):
+                old.setdefault(digest, []).append(row)
+            for start, end in split_passages(text):
+                piece = text[start:end].strip()
+                digest = hashlib.sha1(piece.encode("utf-8")).digest()
+                if old.get(digest):
+                    moved.append((start, end, old[digest].pop(0)))
+                    stats.reused += 1
+                else:
+                    pending.append((doc_id, start, end, digest, piece))
+            dead += [row for rows in old.values() for row in rows]
+            seen.append(doc_id)
+
+        vectors = self._embed([p[4] for p in pending])
+        first = self._append(conn, vectors)
+        lists = _assign_lists(_centroids(conn), vectors)
+        with conn:
+            conn.executemany(
+                "UPDATE passages SET char_start = ?, char_end = ? WHERE row = ?", moved
+            )
+            conn.executemany("DELETE FROM passages WHERE row = ?", ((row,) for row in dead))
+            conn.executemany(
+                "INSERT INTO passages (row, doc, char_start, char_end, hash, list)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (first + i, doc_id, start, end, digest, lists[i] if lists is not None else None)
+                    for i, (doc_id, start, end, digest, _) in enumerate(pending)
+                ),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO vector_docs (id, mtime) VALUES (?, ?)",
+                ((doc_id, mtimes[doc_id]) for doc_id in seen),
+            )
+            _set_state(conn, "rows", first + len(pending))
+        stats.embedded += len(pending)
+        stats.removed += len(dead)
+        stats.documents += len(seen)
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        """texts を EMBED_BATCH_SIZE 件ずつ埋め込み、単位長の float16 にする"""
+        dim = self._dim()
+        parts = []
+        for i in range(0, len(texts), EMBED_BATCH_SIZE):
+            part = np.asarray(self.embedder.embed(texts[i : i + EMBED_BATCH_SIZE]), dtype=np.float32)
+            if dim is None:
+                dim = self._set_dim(part.shape[1])
+            if part.shape != (len(texts[i : i + EMBED_BATCH_SIZE]), dim):
+                raise VectorIndexError(
+                    f"埋め込みの次元が合いません（索引: {dim}、モデルの出力: {part.shape[1:]}）"
+                )
+            parts.append(part)
+        if not parts:
+            return np.zeros((0, dim or 0), dtype=np.float16)
+        vectors = np.vstack(parts)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float16)
+
+    def _append(self, conn: sqlite3.Connection, vectors: np.ndarray) -> int:
+        """vectors を行列ファイルの末尾（使っている行の次）に書き、先頭の行番号を返す
+
+        表に載せる前に fsync しておく（コミット済みの行が書きかけを指さないように）。
+        行数より後ろの書きかけ（前回コミットし損ねた分）は上書きする。
+        """
+        first = _get_state(conn, "rows") or 0
+        if not len(vectors):
+            return first
+        path = self._matrix_path(conn, create=True)
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.seek(first * vectors.shape[1] * vectors.itemsize)
+            f.write(vectors.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        return first
+
+    def _compact_if_sparse(self, conn: sqlite3.Connection, stats: VectorStats) -> None:
+        """消えた行が多ければ、生きている行だけの新しい行列ファイルに詰め直す"""
+        rows_used = _get_state(conn, "rows") or 0
+        (alive,) = conn.execute("SELECT COUNT(*) FROM passages").fetchone()
+        if rows_used == 0 or rows_used - alive <= COMPACT_RATIO * rows_used:
+            return
+        old_path = self._matrix_path(conn)
+        dim = self._dim()
+        matrix = np.memmap(old_path, dtype=np.float16, mode="r", shape=(rows_used, dim))
+        keep = np.array([row for (row,) in conn.execute("SELECT row FROM passages ORDER BY row")])
+        new_path = old_path.with_name(f"vectors-{time.time_ns()}.f16")
+        with open(new_path, "wb") as f:
+            for i in range(0, len(keep), SCORE_CHUNK_ROWS):
+                f.write(np.ascontiguousarray(matrix[keep[i : i + SCORE_CHUNK_ROWS]]).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        del matrix
+        with conn:
+            # 昇順に詰めれば、新しい行番号は必ずまだ使われていない（古い番号以下）
+            conn.executemany(
+                "UPDATE passages SET row = ? WHERE row = ?",
+                ((new, int(old)) for new, old in enumerate(keep)),
+            )
+            _set_state(conn, "file", new_path.name)
+            _set_state(conn, "rows", len(keep))
+        old_path.unlink(missing_ok=True)
+        self._snapshot = None
+        stats.compacted = True
+
+    def _train_if_needed(self, conn: sqlite3.Connection, stats: VectorStats) -> None:
+        """行数が ANN_MIN_ROWS 以上なら IVF を作る（前回の RETRAIN_GROWTH 倍で作り直す）"""
+        (alive,) = conn.execute("SELECT COUNT(*) FROM passages").fetchone()
+        trained = _get_state(conn, "trained_rows") or 0
+        if alive < ANN_MIN_ROWS:
+            if trained:
+                with conn:
+                    conn.execute("UPDATE passages SET list = NULL")
+                    conn.execute("DELETE FROM vector_state WHERE key IN ('centroids', 'trained_rows')")
+            return
+        if trained and alive < trained * RETRAIN_GROWTH:
+            return
+        rows = np.array([row for (row,) in conn.execute("SELECT row FROM passages ORDER BY row")])
+        matrix = self._open_matrix(conn)
+        n_lists = max(1, int(np.sqrt(alive)))
+        centroids = _kmeans(matrix, rows, n_lists)
+        updates = []
+        for i in range(0, len(rows), SCORE_CHUNK_ROWS):
+            chunk = rows[i : i + SCORE_CHUNK_ROWS]
+            lists = _assign_lists(centroids, matrix[chunk])
+            updates += zip(lists.tolist(), chunk.tolist())
+        with conn:
+            conn.executemany("UPDATE passages SET list = ? WHERE row = ?", updates)
+            _set_state(conn, "centroids", centroids.astype(np.float32).tobytes())
+            _set_state(conn, "trained_rows", alive)
+        stats.ann_lists = n_lists
+
+    def _reset(self, conn: sqlite3.Connection) -> None:
+        """埋め込みモデルが変わったので、行列と表を空にする"""
+        path = self._matrix_path(conn)
+        with conn:
+            conn.execute("DELETE FROM passages")
+            conn.execute("DELETE FROM vector_docs")
+            conn.execute("DELETE FROM vector_state")
+        if path is not None:
+            path.unlink(missing_ok=True)
+        self._snapshot = None
+
+    # ---------- private: 検索 ----------
+
+    def _load_snapshot(self) -> _Snapshot | None:
+        """行列・生きている行・IVF のリストを読む（世代が変わっていなければ前回のまま）"""
+        if not self.db_path.exists():
+            return None
+        with self._lock:
+            conn = self._db()
+            generation = _get_state(conn, "generation")
+            if generation is None:
+                return None
+            if self._snapshot is not None and self._snapshot.generation == generation:
+                return self._snapshot
+            data = conn.execute("SELECT row, COALESCE(list, -1) FROM passages ORDER BY row").fetchall()
+            table = np.array(data, dtype=np.int64).reshape(-1, 2)
+            centroids = _centroids(conn)
+            matrix = self._open_matrix(conn)
+            rows = table[:, 0]
+            order = offsets = None
+            if centroids is not None:
+                by_list = np.argsort(table[:, 1], kind="stable")
+                order = rows[by_list]
+                offsets = np.searchsorted(table[by_list, 1], np.arange(len(centroids) + 1))
+            self._snapshot = _Snapshot(generation, matrix, rows, centroids, order, offsets)
+            return self._snapshot
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray, limit: int) -> list[SemanticHit]:
+        """類似度の高い順のパッセージの行を、文書ごとに一番近い1件にまとめて返す"""
+        with self._lock:
+            conn = self._db()
+            found = {
+                row: (doc, start, end)
+                for row, doc, start, end in conn.execute(
+                    f"SELECT row, doc, char_start, char_end FROM passages"
+                    f" WHERE row IN ({','.join('?' * len(rows))})",
+                    rows.tolist(),
+                )
+            }
+        best: dict[str, tuple[float, int, int]] = {}
+        for row, score in zip(rows.tolist(), scores.tolist()):
+            if row in found:
+                doc, start, end = found[row]
+                if doc not in best:
+                    best[doc] = (score, start, end)
+                    if len(best) == limit:
+                        break
+        info = self.index.document_info(best)
+        texts = dict(self.index.document_texts(best))
+        hits = []
+        for doc, (score, start, end) in best.items():
+            if doc not in info:
+                continue  # 全文検索の索引から消えたばかりの文書
+            doc_dir, title, created_at = info[doc]
+            passage = texts.get(doc, "")[start:end].strip().replace("\n", " ")
+            if len(passage) > SNIPPET_CHARS:
+                passage = passage[:SNIPPET_CHARS] + "..."
+            hits.append(SemanticHit(doc, doc_dir, title, passage, created_at, score, start, end))
+        return hits
+
+    # ---------- private: 保存先 ----------
+
+    def _db(self) -> sqlite3.Connection:
+        """vectors.db への接続（_lock を持って使う）"""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.db_path, timeout=BUSY_TIMEOUT_SECONDS, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS passages (
+                    row         INTEGER PRIMARY KEY,  -- 行列の行番号
+                    doc         TEXT NOT NULL,
+                    char_start  INTEGER NOT NULL,     -- modern.txt 上の位置（文字）
+                    char_end    INTEGER NOT NULL,
+                    hash        BLOB NOT NULL,        -- 本文の SHA-1（同じなら使い回す）
+                    list        INTEGER               -- IVF のリスト（作る前は NULL）
+                );
+                CREATE INDEX IF NOT EXISTS passages_doc ON passages (doc);
+                CREATE TABLE IF NOT EXISTS vector_docs (
+                    id     TEXT PRIMARY KEY,
+                    mtime  REAL NOT NULL
+                ) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS vector_state (
+                    key    TEXT PRIMARY KEY,
+                    value
+                ) WITHOUT ROWID;
+                """
+            )
+            self._conn = conn
+        return self._conn
+
+    def _matrix_path(self, conn: sqlite3.Connection, create: bool = False) -> Path | None:
+        name = _get_state(conn, "file")
+        if name is None:
+            if not create:
+                return None
+            name = f"vectors-{time.time_ns()}.f16"
+            with conn:
+                _set_state(conn, "file", name)
+        return self.db_path.with_name(name)
+
+    def _open_matrix(self, conn: sqlite3.Connection) -> np.ndarray:
+        rows_used = _get_state(conn, "rows") or 0
+        dim = self._dim() or 0
+        path = self._matrix_path(conn)
+        if rows_used == 0 or path is None:
+            return np.zeros((0, dim), dtype=np.float16)
+        return np.memmap(path, dtype=np.float16, mode="r", shape=(rows_used, dim))
+
+    def _dim(self) -> int | None:
+        return _get_state(self._db(), "dim")
+
+    def _set_dim(self, dim: int) -> int:
+        with self._db() as conn:
+            _set_state(conn, "dim", dim)
+        return dim
+
+
+# ---------- パッセージ ----------
+
+_SENTENCE_END = re.compile(r"[。！？!?]+|\n+")
+
+
+def split_passages(text: str, size: int = PASSAGE_CHARS) -> list[tuple[int, int]]:
+    """本文を文の切れ目でおよそ size 文字ずつに区切り、(開始, 終了) の文字位置で返す
+
+    1文が size を超えるときは size 文字ごとに切る。空白だけの区間は返さない。
+    """
+    ends = [m.end() for m in _SENTENCE_END.finditer(text)]
+    if not ends or ends[-1] != len(text):
+        ends.append(len(text))
+    passages = []
+    start = prev = 0
+    for end in ends:
+        # この文を足すと size を超えるなら、前の文までで区切る
+        if end - start > size and prev > start:
+            passages.append((start, prev))
+            start = prev
+        while end - start > size:
+            passages.append((start, start + size))
+            start += size
+        prev = end
+    if prev > start:
+        passages.append((start, prev))
+    return [(a, b) for a, b in passages if text[a:b].strip()]
+
+
+# ---------- 類似度・IVF ----------
+
+
+def _all_scores(matrix: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """行列の全行と q の内積（SCORE_CHUNK_ROWS 行ずつ float32 に広げて計算する）"""
+    scores = np.empty(len(matrix), dtype=np.float32)
+    for i in range(0, len(matrix), SCORE_CHUNK_ROWS):
+        scores[i : i + SCORE_CHUNK_ROWS] = matrix[i : i + SCORE_CHUNK_ROWS].astype(np.float32) @ q
+    return scores
+
+
+def _row_scores(matrix: np.ndarray, rows: np.ndarray, q: np.ndarray) -> np.ndarray:
+    """指定した行（昇順）と q の内積"""
+    scores = np.empty(len(rows), dtype=np.float32)
+    for i in range(0, len(rows), SCORE_CHUNK_ROWS):
+        chunk = rows[i : i + SCORE_CHUNK_ROWS]
+        scores[i : i + len(chunk)] = matrix[chunk].astype(np.float32) @ q
+    return scores
+
+
+def _probe_rows(snapshot: _Snapshot, q: np.ndarray, nprobe: int) -> np.ndarray:
+    """q に近い nprobe 個の IVF リストに入っている行（昇順。memmap を前から読むため）"""
+    closeness = snapshot.centroids @ q
+    nprobe = min(nprobe, len(closeness))
+    lists = np.argpartition(-closeness, nprobe - 1)[:nprobe]
+    parts = [snapshot.order[snapshot.offsets[l] : snapshot.offsets[l + 1]] for l in lists]
+    return np.sort(np.concatenate(parts))
+
+
+def _assign_lists(centroids: np.ndarray | None, vectors: np.ndarray) -> np.ndarray | None:
+    """各ベクトルに一番近い代表点（IVF のリスト番号）。IVF が無ければ None"""
+    if centroids is None:
+        return None
+    if not len(vectors):
+        return np.zeros(0, dtype=np.int64)
+    return np.argmax(vectors.astype(np.float32) @ centroids.T, axis=1)
+
+
+def _kmeans(matrix: np.ndarray, rows: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """単位ベクトルの k-means（球面 k-means）で IVF の代表点を n_lists 個作る
+
+    学習には n_lists × KMEANS_SAMPLE_PER_LIST 行までの標本を使う。
+    """
+    rng = np.random.default_rng(seed)
+    n_sample = min(len(rows), n_lists * KMEANS_SAMPLE_PER_LIST)
+    sample = np.sort(rng.choice(rows, n_sample, replace=False))
+    x = matrix[sample].astype(np.float32)
+    centroids = x[rng.choice(len(x), n_lists, replace=False)]
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        filled = norms[:, 0] > 0
+        # 誰も割り当たらなかった代表点は前のまま残す
+        centroids[filled] = sums[filled] / norms[filled]
+    return centroids
+
+
+def _centroids(conn: sqlite3.Connection) -> np.ndarray | None:
+    blob = _get_state(conn, "centroids")
+    dim = _get_state(conn, "dim")
+    if blob is None or not dim:
+        return None
+    return np.frombuffer(blob, dtype=np.float32).reshape(-1, dim)
+
+
+# ---------- 状態 ----------
+
+
+def _get_state(conn: sqlite3.Connection, key: str):
+    row = conn.execute("SELECT value FROM vector_state WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_state(conn: sqlite3.Connection, key: str, value) -> None:
+    conn.execute("INSERT OR REPLACE INTO vector_state (key, value) VALUES (?, ?)", (key, value))
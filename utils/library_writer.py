@@ -29,6 +29,12 @@ from pathlib import Path
 from zoneinfo import ZoneInfo
 
 from utils.config import CONFIG
+from utils.library_catalog import record_document
+from utils.library_dedup import find_near_duplicates
+from utils.library_journal import record_change
+from utils.library_objects import ENABLED as OBJECTS_ENABLED
+from utils.library_objects import place_file
+from utils.library_search import DuplicateMatch
 
 # ---------- 定数 ----------
 
@@ -158,6 +164,11 @@ def save_document(
             modern.txt
             meta.json
 
+    書き終えた文書の ID は変更ジャーナル（library/.index/journal.db）に追記し、
+    meta.json の内容はカタログ（library/.index/catalog.db）に入れる。
+    検索インデックスに本文の近い文書（同じページの撮り直しなど）があれば、
+    meta.json の near_duplicates にその ID と推定類似度を書く。
+
     Args:
         record: 保存するレコード
         library_root: ライブラリのルートディレクトリ（デフォルト: library/）
@@ -176,14 +187,14 @@ def save_document(
     doc_dir = resolve_unique_dir(library_root, base_id)
     doc_dir.mkdir(parents=True)
 
-    # 元画像をコピー（実体コピー）
-    source_names = _copy_sources(record.source_paths, doc_dir)
+    # 元画像を置く（library/.objects/ の blob へのハードリンク。できなければ実体コピー）
+    source_names = _copy_sources(record.source_paths, doc_dir, library_root)
 
-    # 前処理後画像をコピー（A1。temp 削除前にここで実体コピーする）
+    # 前処理後画像を置く（A1。temp 削除前にここでストアに入れる）
     preprocessed_names: list[str] = []
     if record.preprocessed_paths:
         preprocessed_names = _copy_images(
-            record.preprocessed_paths, doc_dir, "preprocessed"
+            record.preprocessed_paths, doc_dir, "preprocessed", library_root
         )
 
     # ocr_raw.txt
@@ -227,32 +238,58 @@ def save_document(
             "steps": list(record.preprocess.steps),
             "elapsed_seconds": round(record.preprocess.elapsed_seconds, 2),
         }
+
+    # 近似重複（索引済みの文書とだけ比べる。複数枚ならページごとにも）
+    duplicates = find_near_duplicates(
+        library_root, record.ocr_raw or record.modern_text, pages=len(source_names)
+    )
+    if duplicates:
+        meta["near_duplicates"] = [_duplicate_entry(m) for m in duplicates]
     meta_json = json.dumps(meta, indent=2, ensure_ascii=False) + "\n"
     (doc_dir / "meta.json").write_text(meta_json, encoding="utf-8", newline="\n")
 
+    # 全ファイルを書き終えてから変更ジャーナルに載せる（検索インデックスが拾う）
+    record_change(library_root, doc_dir.name)
+    # stat・list が meta.json を開かずに済むよう、カタログにはすぐ入れる
+    record_document(library_root, doc_dir.name)
+
     return doc_dir
 
 
-def _copy_sources(source_paths: list[Path], doc_dir: Path) -> list[str]:
-    """元画像を doc_dir に source という基底名でコピーする（後方互換ラッパー）"""
-    return _copy_images(source_paths, doc_dir, "source")
+def _duplicate_entry(match: DuplicateMatch) -> dict:
+    """meta.json の near_duplicates の1件（ページはどちらかが 0 でなければ書く）"""
+    entry = {"id": match.id, "similarity": round(match.similarity, 3)}
+    if match.page:
+        entry["page"] = match.page
+    if match.query_page:
+        entry["own_page"] = match.query_page
+    return entry
+
+
+def _copy_sources(
+    source_paths: list[Path], doc_dir: Path, library_root: Path | None = None
+) -> list[str]:
+    """元画像を doc_dir に source という基底名で置く（後方互換ラッパー）"""
+    return _copy_images(source_paths, doc_dir, "source", library_root)
 
 
-def _copy_images(paths: list[Path], doc_dir: Path, basename: str) -> list[str]:
-    """画像群を doc_dir に basename を基底名でコピーし、コピー先名リストを返す
+def _copy_images(
+    paths: list[Path], doc_dir: Path, basename: str, library_root: Path | None = None
+) -> list[str]:
+    """画像群を doc_dir に basename を基底名で置き、置いた名前のリストを返す
 
     1枚: {basename}{元拡張子}
     複数枚: {basename}_01{元拡張子}, {basename}_02{元拡張子}, ...
+    library_root を渡し objects.enabled なら、同じ中身の画像を1つにまとめる
+    ストア（library/.objects/）の blob へのハードリンクにする。
     """
     if len(paths) == 1:
-        src = paths[0]
-        dest_name = f"{basename}{src.suffix}"
-        shutil.copy2(src, doc_dir / dest_name)
-        return [dest_name]
-
-    names: list[str] = []
-    for i, src in enumerate(paths, start=1):
-        dest_name = f"{basename}_{i:02d}{src.suffix}"
-        shutil.copy2(src, doc_dir / dest_name)
-        names.append(dest_name)
+        names = [f"{basename}{paths[0].suffix}"]
+    else:
+        names = [f"{basename}_{i:02d}{src.suffix}" for i, src in enumerate(paths, start=1)]
+    for src, dest_name in zip(paths, names):
+        if library_root is not None and OBJECTS_ENABLED:
+            place_file(library_root, src, doc_dir / dest_name)
+        else:
+            shutil.copy2(src, doc_dir / dest_name)
     return names
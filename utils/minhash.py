@@ -0,0 +1,161 @@
+"""
+MinHash・LSH による近似重複の検出の部品
+
+同じページを別の日に撮り直して OCR すると、ほぼ同じ本文の記録がライブラリに
+いくつもできる。OCR の揺れ（誤読・改行位置の違い）があるので完全一致では
+見つからない。ここでは本文の近さを、SHINGLE 文字ずつの並び（shingle）の集合の
+Jaccard 係数で測り、それを MinHash の署名で推定する。
+
+照合用テキスト:
+  normalize_before_corrections（NFKC・旧字体→新字体など）を1文字ずつ当て、
+  空白・句読点・記号を除いたもの。異なり字ごとに変換をキャッシュして
+  str.translate で全文に当てる（raw_terms_of と同じ考え方）。
+
+署名:
+  照合用テキストを UTF-32 の NumPy 配列にし、SHINGLE 文字の並びを多項式
+  ハッシュ（uint64 の桁あふれのまま）で1つの数にする。NUM_PERM 個のハッシュ
+  関数を別々に当てる代わりに、shingle ごとに1回だけ混ぜたハッシュの上位で
+  NUM_PERM 個の区画に振り分け、区画ごとの下位 32bit の最小値を並べる
+  （one permutation hashing。計算は shingle 数に比例し、NUM_PERM によらない）。
+  shingle の少ない短いページで空になった区画は、右隣の空でない区画の値を
+  距離に応じてずらして借りる（densification）。2つの署名で値の一致する割合が
+  Jaccard 係数の推定値。
+
+LSH:
+  署名を BANDS 個のバンド（NUM_PERM / BANDS 行ずつ）に分け、バンドごとの値の
+  ハッシュ（バケット）を索引に入れる。どれかのバンドが丸ごと一致する文書だけを
+  候補にすれば、Jaccard 係数 s の組が候補になる確率は 1 - (1 - s^行数)^BANDS で、
+  文書数によらずバケットの数だけ引けば済む。候補は署名で比べ直して
+  THRESHOLD 以上のものを残す。
+
+複数の元画像をまとめた文書は、文書全体に加えてページごと（空行で区切った段落を
+位置の比で振り分けたおおよそのページ）の署名も作る。1枚だけ撮り直した
+ページが、まとめて撮った記録の1ページと重なっていても見つけられる。
+
+使い方:
+    from utils.minhash import band_keys, document_signatures, similarity
+
+    for page, sig in document_signatures(ocr_raw, pages=3):
+        print(page, band_keys(sig)[:2])
+"""
+
+import hashlib
+import re
+
+import numpy as np
+
+from utils.config import CONFIG
+from utils.text_normalizer import normalize_before_corrections
+
+# ---------- 定数 ----------
+
+NUM_PERM = CONFIG.get("dedup.num_perm")  # 署名の長さ（ハッシュ関数の数）
+BANDS = CONFIG.get("dedup.bands")  # LSH のバンド数（NUM_PERM を割り切る数）
+SHINGLE = CONFIG.get("dedup.shingle")  # 何文字ずつの並びで比べるか
+MIN_CHARS = CONFIG.get("dedup.min_chars")  # 照合用テキストがこれより短い文書・ページは署名を作らない
+THRESHOLD = CONFIG.get("dedup.threshold")  # 近似重複とみなす推定 Jaccard 係数の下限
+
+# 署名のハッシュの定数（変えると保存済みの署名と比べられなくなる）
+_SHINGLE_BASE = np.uint64(0x100000001B3)  # 多項式ハッシュの底
+_MIX = (np.uint64(0xBF58476D1CE4E5B9), np.uint64(0x94D049BB133111EB))  # splitmix64 の乗数
+_DENSIFY = np.uint32(0x9E3779B1)  # 空の区画に借りた値を距離ごとにずらす量
+
+# 空行を含まない一続きの段落（複数ページの本文はページを空行でつないで保存される）
+_PARAGRAPH = re.compile(r"(?:(?!\n[^\S\n]*\n).)+", re.DOTALL)
+
+
+# ---------- 公開関数 ----------
+
+
+def match_text(text: str) -> str:
+    """照合用テキスト（1文字ずつ正規化し、空白・句読点・記号を除く）"""
+    missing = {char for char in set(text) if ord(char) not in _TRANSLATE}
+    for char in missing:
+        mapped = "".join(c for c in normalize_before_corrections(char) if c.isalnum())
+        _TRANSLATE[ord(char)] = mapped or None
+    return text.translate(_TRANSLATE)
+
+
+def signature(text: str) -> np.ndarray | None:
+    """照合用テキストの MinHash 署名（uint32 × NUM_PERM）。MIN_CHARS 文字未満なら None"""
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    n = len(codes) - SHINGLE + 1
+    if len(codes) < max(MIN_CHARS, SHINGLE):
+        return None
+    shingles = np.zeros(n, dtype=np.uint64)
+    for j in range(SHINGLE):
+        shingles = shingles * _SHINGLE_BASE + codes[j : j + n]
+    hashed = np.unique(shingles)
+    for mul in _MIX:
+        hashed ^= hashed >> np.uint64(31)
+        hashed *= mul
+    hashed ^= hashed >> np.uint64(31)
+
+    bins = (hashed >> np.uint64(32)) % np.uint64(NUM_PERM)
+    values = (hashed & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+    order = np.lexsort((values, bins))  # 区画ごとに値の小さい順
+    bins, values = bins[order], values[order]
+    first = np.ones(len(bins), dtype=bool)
+    first[1:] = bins[1:] != bins[:-1]
+    filled = bins[first].astype(np.int64)
+    sig = np.zeros(NUM_PERM, dtype=np.uint32)
+    sig[filled] = values[first]
+    if len(filled) < NUM_PERM:
+        empty = np.setdiff1d(np.arange(NUM_PERM), filled)
+        donor = filled[np.searchsorted(filled, empty) % len(filled)]
+        distance = ((donor - empty) % NUM_PERM).astype(np.uint32)
+        sig[empty] = sig[donor] + distance * _DENSIFY
+    return sig
+
+
+def document_signatures(text: str, pages: int = 1) -> list[tuple[int, np.ndarray]]:
+    """文書全体（ページ 0）と、pages が2以上なら各ページ（1〜）の (ページ, 署名)
+
+    短すぎて署名を作れないものは含めない。
+    """
+    parts = [text] if pages <= 1 else [text, *page_texts(text, pages)]
+    found = []
+    for page, part in enumerate(parts):
+        sig = signature(match_text(part))
+        if sig is not None:
+            found.append((page, sig))
+    return found
+
+
+def page_texts(text: str, pages: int) -> list[str]:
+    """複数の元画像をまとめた本文を、空行で区切った段落の位置の比で pages 個に分ける"""
+    parts: list[list[str]] = [[] for _ in range(pages)]
+    total = max(1, len(text))
+    for m in _PARAGRAPH.finditer(text):
+        middle = (m.start() + m.end()) / 2
+        parts[min(pages - 1, int(middle / total * pages))].append(m.group())
+    return ["\n\n".join(part) for part in parts]
+
+
+def band_keys(sig: np.ndarray) -> list[int]:
+    """署名の各バンドのバケット（バンド番号も混ぜた 64bit の符号つき整数）"""
+    raw = pack_signature(sig)
+    width = len(raw) // BANDS
+    keys = []
+    for b in range(BANDS):
+        digest = hashlib.blake2b(raw[b * width : (b + 1) * width], digest_size=8, salt=bytes([b]))
+        keys.append(int.from_bytes(digest.digest(), "little", signed=True))
+    return keys
+
+
+def similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """2つの署名から推定した Jaccard 係数"""
+    return float(np.count_nonzero(a == b)) / len(a)
+
+
+def pack_signature(sig: np.ndarray) -> bytes:
+    return sig.astype("<u4").tobytes()
+
+
+def unpack_signature(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<u4")
+
+
+# ---------- 内部ヘルパー ----------
+
+_TRANSLATE: dict[int, str | None] = {}
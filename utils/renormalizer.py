@@ -0,0 +1,257 @@
+"""
+OCR誤読ルール変更時の差分再正規化モジュール
+
+OCR_MISREAD_CORRECTIONS / CONTEXT_CORRECTIONS にルールを足したり直したりしたとき、
+ライブラリ全体を処理し直すのではなく、そのルールが効きうる文書だけを
+正規化し直す。
+
+流れ:
+  1. 前回実行時のルール（library/.index/correction_rules.json）と現在のルールを
+     比べ、追加・変更・削除されたルールを求める
+  2. 各ルールの「きっかけ文字列」（辞書ルールはキー、文脈ルールは正規表現中の
+     必須リテラル）で search.db の raw_terms を引き、候補文書を絞り込む
+  3. 候補の ocr_raw.txt を実際に照合し、ルールが当たる文書だけを処理する
+     - 口語体変換なし: ocr_raw.txt から normalize_text() をやり直す
+     - 口語体変換あり: LLM は再実行できないので、modern.txt に追加・変更後の
+       ルールを置換としてそのまま当てる（削除されたルールは戻せないので報告のみ）
+  4. 書き換えた文書の meta.json の mtime を更新して変更ジャーナルに記録し、
+     検索インデックスを差分更新する
+
+使い方:
+    from utils.renormalizer import renormalize_library
+
+    report = renormalize_library(Path("library"))
+    print(report.renormalized, report.patched)
+"""
+
+import json
+import os
+import re
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from utils.library_grep import literal_groups
+from utils.library_journal import ChangeJournal
+from utils.library_search import INDEX_DIR_NAME, IndexStats, get_index
+from utils.text_normalizer import (
+    CONTEXT_CORRECTIONS,
+    OCR_MISREAD_CORRECTIONS,
+    normalize_before_corrections,
+    normalize_text,
+)
+
+# ---------- 定数 ----------
+
+RULES_SNAPSHOT_NAME = "correction_rules.json"
+
+
+# ---------- データクラス ----------
+
+
+@dataclass(frozen=True)
+class CorrectionRule:
+    """OCR誤読ルール1件"""
+
+    kind: str  # "dict"（OCR_MISREAD_CORRECTIONS）| "context"（CONTEXT_CORRECTIONS）
+    pattern: str
+    replacement: str
+
+    @property
+    def trigger(self) -> str:
+        """このルールが当たる文書が必ず含む文字列（raw_terms の絞り込み用）"""
+        if self.kind == "dict":
+            return self.pattern
+        # raw_candidates は文字の積で引くので、選択肢の無い（必ず現れる）リテラルだけ使う
+        required = "".join(group[0] for group in literal_groups(self.pattern) if len(group) == 1)
+        return "".join(dict.fromkeys(required))
+
+    def matches(self, text: str) -> bool:
+        """正規化途中のテキスト（誤読修正の直前）にこのルールが当たるか"""
+        if self.kind == "dict":
+            return self.pattern in text
+        return re.search(self.pattern, text) is not None
+
+    def apply(self, text: str) -> str:
+        if self.kind == "dict":
+            return text.replace(self.pattern, self.replacement)
+        return re.sub(self.pattern, self.replacement, text)
+
+
+@dataclass
+class RenormalizeReport:
+    """再正規化の集計"""
+
+    added_rules: list[CorrectionRule] = field(default_factory=list)
+    removed_rules: list[CorrectionRule] = field(default_factory=list)
+    baseline: bool = False  # スナップショットが無く、今回のルールを基準として記録しただけ
+    candidates: int = 0  # raw_terms で絞り込んだ候補文書数
+    renormalized: list[str] = field(default_factory=list)  # ocr_raw から正規化し直した
+    patched: list[str] = field(default_factory=list)  # modern.txt に置換を当てた
+    skipped: list[tuple[str, str]] = field(default_factory=list)  # (文書ID, 理由)
+    index: IndexStats | None = None
+
+
+# ---------- ルールのスナップショット ----------
+
+
+def current_rules() -> list[CorrectionRule]:
+    """text_normalizer の現在のルールを適用順に返す"""
+    rules = [
+        CorrectionRule("dict", wrong, correct)
+        for wrong, correct in OCR_MISREAD_CORRECTIONS.items()
+    ]
+    rules += [
+        CorrectionRule("context", pattern, replacement)
+        for pattern, replacement in CONTEXT_CORRECTIONS
+    ]
+    return rules
+
+
+def snapshot_path(library_root: Path) -> Path:
+    # search.db と同じ場所だが、index --rebuild で消えないよう別ファイルにする
+    return library_root / INDEX_DIR_NAME / RULES_SNAPSHOT_NAME
+
+
+def load_snapshot(path: Path) -> list[CorrectionRule] | None:
+    """前回のルールを読む（初回・壊れている場合は None）"""
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        return [CorrectionRule(**rule) for rule in data["rules"]]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        return None
+
+
+def save_snapshot(path: Path, rules: list[CorrectionRule]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = {"rules": [asdict(rule) for rule in rules]}
+    path.write_text(
+        json.dumps(data, indent=2, ensure_ascii=False) + "\n",
+        encoding="utf-8",
+        newline="\n",
+    )
+
+
+def diff_rules(
+    old: list[CorrectionRule], new: list[CorrectionRule]
+) -> tuple[list[CorrectionRule], list[CorrectionRule]]:
+    """(追加されたルール, 削除されたルール) を返す
+
+    置換先だけ変えたルールは「旧ルールの削除 + 新ルールの追加」になる。
+    """
+    old_set, new_set = set(old), set(new)
+    added = [rule for rule in new if rule not in old_set]
+    removed = [rule for rule in old if rule not in new_set]
+    return added, removed
+
+
+# ---------- 再正規化 ----------
+
+
+def renormalize_library(library_root: Path, dry_run: bool = False) -> RenormalizeReport:
+    """ルール変更の影響を受ける文書だけを再正規化し、インデックスを更新する
+
+    Args:
+        library_root: ライブラリのルートディレクトリ
+        dry_run: True なら対象文書を調べるだけでファイルもスナップショットも変えない
+
+    Returns:
+        集計（RenormalizeReport）
+    """
+    report = RenormalizeReport()
+    rules = current_rules()
+    snap_path = snapshot_path(library_root)
+    previous = load_snapshot(snap_path)
+
+    if previous is None:
+        # 初回は比較対象が無い。既存文書は今のルールで正規化済みとみなす
+        report.baseline = True
+        if not dry_run:
+            save_snapshot(snap_path, rules)
+        return report
+
+    report.added_rules, report.removed_rules = diff_rules(previous, rules)
+    changed = report.added_rules + report.removed_rules
+    if not changed:
+        return report
+
+    idx = get_index(library_root)
+    idx.update()  # raw_terms を最新にしてから引く
+
+    candidates: dict[str, Path] = {}
+    for rule in changed:
+        candidates.update(idx.raw_candidates(rule.trigger))
+    report.candidates = len(candidates)
+
+    touched = [
+        doc_id
+        for doc_id, doc_dir in sorted(candidates.items())
+        if _renormalize_doc(doc_id, doc_dir, report, dry_run)
+    ]
+
+    if not dry_run:
+        if touched:
+            ChangeJournal(library_root).record(touched)
+            report.index = idx.update()
+        save_snapshot(snap_path, rules)
+    return report
+
+
+def _renormalize_doc(
+    doc_id: str, doc_dir: Path, report: RenormalizeReport, dry_run: bool
+) -> bool:
+    """1文書を処理する。modern.txt を書き換えたら True"""
+    try:
+        raw = (doc_dir / "ocr_raw.txt").read_text(encoding="utf-8")
+        modern = (doc_dir / "modern.txt").read_text(encoding="utf-8")
+        meta = json.loads((doc_dir / "meta.json").read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        report.skipped.append((doc_id, "文書ファイルを読めません"))
+        return False
+
+    # 候補は文字単位の絞り込みなので、ルールが本当に当たるかをここで確かめる
+    prepared = normalize_before_corrections(raw)
+    # 文脈ルールは辞書ルールの適用後に照合される
+    after_dict = prepared
+    for rule in current_rules():
+        if rule.kind == "dict":
+            after_dict = rule.apply(after_dict)
+
+    def hits(rule: CorrectionRule) -> bool:
+        return rule.matches(prepared if rule.kind == "dict" else after_dict)
+
+    added = [r for r in report.added_rules if hits(r)]
+    removed = [r for r in report.removed_rules if hits(r)]
+    if not added and not removed:
+        return False
+
+    if not meta.get("normalization", {}).get("ocr_misread_correction", False):
+        report.skipped.append((doc_id, "正規化なし（--no-normalize）で保存された文書"))
+        return False
+
+    if not meta.get("modernize", {}).get("enabled", False):
+        # 口語体変換なし → modern.txt は normalize_text(ocr_raw) そのもの
+        new_modern = normalize_text(raw)
+        done = report.renormalized
+    else:
+        # 口語体変換あり → LLM の出力に新ルールだけを当てる
+        if removed:
+            report.skipped.append(
+                (doc_id, "削除されたルールは口語体変換後の文書では元に戻せません")
+            )
+        new_modern = modern
+        for rule in added:
+            new_modern = rule.apply(new_modern)
+        done = report.patched
+
+    if new_modern == modern:
+        return False
+    done.append(doc_id)
+    if dry_run:
+        return False
+
+    (doc_dir / "modern.txt").write_text(new_modern, encoding="utf-8", newline="\n")
+    # インデックスの差分更新は meta.json の mtime で変更を検知する
+    # （ジャーナルへの記録は呼び出し側でまとめて行う）
+    os.utime(doc_dir / "meta.json")
+    return True
+
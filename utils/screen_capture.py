@@ -25,6 +25,8 @@ from zoneinfo import ZoneInfo
 
 import questionary
 
+from utils.image_hash import ImageHash, ImageHashError, hash_image
+
 # ---------- 定数 ----------
 
 _TZ_JST = ZoneInfo("Asia/Tokyo")
@@ -90,11 +92,14 @@ def capture_one(dest: Path) -> bool:
     return dest.exists()
 
 
-def shoot_session(input_dir: Path) -> list[Path] | None:
+def shoot_session(input_dir: Path, skip_duplicates: bool = True) -> list[Path] | None:
     """範囲スクショを繰り返し撮影し、セッションフォルダに連番保存する
 
     1枚撮るごとに「次を撮る／撮り直す／終了」を対話的に選べる。
     撮った順 = ページ順として p001.png, p002.png ... と連番で保存する。
+    skip_duplicates なら、このセッションで撮ったページと同じ画像（知覚ハッシュが
+    近いもの）は二度撮りとみなし、捨てるか残すかを選ばせる（似た別のページも
+    あるので、黙って消さない）。
 
     Returns:
         撮影した画像パスのソート済みリスト（1枚以上）。
@@ -113,6 +118,7 @@ def shoot_session(input_dir: Path) -> list[Path] | None:
     print("  範囲をドラッグで囲って本文だけを撮ってください。")
 
     captured: list[Path] = []
+    hashes: list[tuple[Path, ImageHash]] = []
     counter = 1
 
     while True:
@@ -120,7 +126,13 @@ def shoot_session(input_dir: Path) -> list[Path] | None:
         print(f"\n[{counter}枚目] 範囲を選択してください（Esc でキャンセル）...")
 
         ok = capture_one(dest)
-        if ok:
+        if ok and skip_duplicates and not _keep_capture(dest, hashes):
+            print("  － 二度撮りとして捨てました")
+            action = questionary.select(
+                "次は？",
+                choices=["次を撮る", "終了して処理へ"],
+            ).ask()
+        elif ok:
             print(f"  ✓ 保存: {dest.name}")
             captured.append(dest)
             counter += 1
@@ -148,3 +160,33 @@ def shoot_session(input_dir: Path) -> list[Path] | None:
 
     print(f"\n✓ {len(captured)}枚 撮影しました: {session_dir}/")
     return sorted(captured)
+
+
+def _keep_capture(dest: Path, hashes: list[tuple[Path, ImageHash]]) -> bool:
+    """撮った dest を残すか（撮影済みと同じページなら聞き、捨てると答えたら消して False）"""
+    earlier = _earlier_capture(dest, hashes)
+    if earlier is None:
+        return True
+    print(f"  ？ {earlier.name} と同じページのようです（二度撮り）")
+    choice = questionary.select(
+        "この画像は？",
+        choices=["捨てる", "残す（別のページ）"],
+    ).ask()
+    # 残す・Ctrl+C で選択を抜けた場合は消さない
+    if choice != "捨てる":
+        return True
+    dest.unlink()
+    return False
+
+
+def _earlier_capture(dest: Path, hashes: list[tuple[Path, ImageHash]]) -> Path | None:
+    """dest と同じページの撮影済み画像（無ければ dest のハッシュを hashes に足して None）"""
+    try:
+        h = hash_image(dest)
+    except ImageHashError:
+        return None
+    for path, other in hashes:
+        if h.matches(other):
+            return path
+    hashes.append((dest, h))
+    return None
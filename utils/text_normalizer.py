@@ -161,14 +161,8 @@ def normalize_text(text: str) -> str:
     if not body.strip():
         return text
 
-    # ① Unicode正規化
-    body = _normalize_unicode(body)
-    # ② 旧字体→新字体（senzen_word）
-    body = _convert_old_kanji(body)
-    # ③ 半角→全角
-    body = _normalize_width(body)
-    # ④ 歴史的仮名遣い変換（senzen_word）
-    body = convert_historical_kana(body)
+    # ①〜④ Unicode正規化・旧字体・半角→全角・歴史的仮名遣い
+    body = normalize_before_corrections(body)
     # ⑤ OCR誤読修正
     body = _correct_ocr_misreads(body)
     body = _correct_context_misreads(body)
@@ -183,6 +177,20 @@ def normalize_text(text: str) -> str:
     return body
 
 
+def normalize_before_corrections(text: str) -> str:
+    """normalize_text の①〜④（OCR誤読修正の直前まで）を適用する
+
+    OCR誤読辞書・文脈依存パターンはこの変換後のテキストに対して照合される。
+    誤読ルールの影響を受ける文書を探す索引（library_search の raw_terms）も
+    このテキストの文字で作る。
+    """
+    text = _normalize_unicode(text)       # ① NFKC
+    text = _convert_old_kanji(text)       # ② 旧字体→新字体
+    text = _normalize_width(text)         # ③ 半角→全角
+    text = convert_historical_kana(text)  # ④ 歴史的仮名遣い
+    return text
+
+
 def normalize_query(text: str) -> str:
     """検索クエリを照合用に正規化する（normalize_text の照合サブセット）
 